@@ -7,7 +7,7 @@ import psycopg2.extras
 import logging
 import os
 from typing import Optional
-from app.core.db_pool import get_connection, put_connection, PooledConnection, init_connection_pool
+from app.core.db_pool import get_connection, PooledConnection, init_connection_pool
 
 logger = logging.getLogger(__name__)
 
@@ -55,43 +55,43 @@ class DatabaseInitService:
         pass
 
     def init_all_tables(self):
-        """Initialize all PostgreSQL database tables"""
-        conn = None
-        try:
-            logger.info("🗄️  Initializing PostgreSQL database...")
-            conn = get_postgresql_connection()
-            cursor = conn.cursor()
-
-            # Create all tables (in correct order for foreign keys)
-            logger.info("📋 Creating/verifying database tables...")
-            self._create_users_table(cursor, conn)
-            self._create_categories_table(cursor, conn)
-            self._create_products_table(cursor, conn)
-            self._create_orders_table(cursor, conn)
-            self._create_reviews_table(cursor, conn)
-            self._create_seller_payouts_table(cursor, conn)
-            self._create_support_tickets_table(cursor, conn)
-            self._create_download_tokens_table(cursor, conn)
-            self._create_download_rate_limits_table(cursor, conn)
-
-            # Insert default data
-            logger.info("📦 Inserting default data...")
-            self._insert_default_categories(cursor, conn)
-
-            # Create triggers for automatic rating updates
-            logger.info("⚙️  Creating database triggers...")
-            self._create_rating_triggers(cursor, conn)
+        """
+        Initialize PostgreSQL schema.
 
-            logger.info("✅ PostgreSQL database initialization completed successfully")
+        Le DDL n'est plus ré-exécuté à chaque démarrage: délègue au moteur de
+        migrations versionnées (app/core/migrations), qui ne fait qu'une requête
+        quand le schéma est déjà à jour.
+        """
+        from app.core.migrations import run_migrations
+        run_migrations()
 
-        except Exception as e:
-            logger.error(f"❌ PostgreSQL database initialization failed: {e}")
-            if conn:
-                conn.rollback()
-            raise
-        finally:
-            if conn:
-                put_connection(conn)  # Return connection to pool
+    def create_baseline_schema(self, cursor, conn):
+        """
+        Baseline schema (migration 0001): all tables, default data and triggers.
+        Every statement is idempotent so it can run on an existing database.
+        """
+        # Create all tables (in correct order for foreign keys)
+        logger.info("📋 Creating/verifying database tables...")
+        self._create_users_table(cursor, conn)
+        self._create_categories_table(cursor, conn)
+        self._create_products_table(cursor, conn)
+        self._create_orders_table(cursor, conn)
+        self._create_reviews_table(cursor, conn)
+        self._create_seller_payouts_table(cursor, conn)
+        self._create_support_tickets_table(cursor, conn)
+        self._create_download_tokens_table(cursor, conn)
+        self._create_download_rate_limits_table(cursor, conn)
+        self._create_download_token_redemptions_table(cursor, conn)
+
+        # Insert default data
+        logger.info("📦 Inserting default data...")
+        self._insert_default_categories(cursor, conn)
+
+        # Create triggers for automatic rating updates
+        logger.info("⚙️  Creating database triggers...")
+        self._create_rating_triggers(cursor, conn)
+
+        logger.info("✅ PostgreSQL baseline schema created/verified")
 
     def _create_users_table(self, cursor, conn):
         """
@@ -456,6 +456,28 @@ class DatabaseInitService:
             conn.rollback()
             raise
 
+    def _create_download_token_redemptions_table(self, cursor, conn):
+        """
+        Create download token redemptions table (PostgreSQL)
+        Shared replay set for signed download tokens (multi-worker deployments only)
+        """
+        try:
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS download_token_redemptions (
+                    nonce TEXT PRIMARY KEY,
+                    expires_at TIMESTAMP NOT NULL
+                )
+            ''')
+
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_token_redemptions_expires_at ON download_token_redemptions(expires_at)')
+
+            conn.commit()
+            logger.debug("✅ Download token redemptions table created/verified (PostgreSQL)")
+        except Exception as e:
+            logger.error(f"❌ Error creating download_token_redemptions table: {e}")
+            conn.rollback()
+            raise
+
     def _create_rating_triggers(self, cursor, conn):
         """
         Create triggers to auto-update product ratings (PostgreSQL)
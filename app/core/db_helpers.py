@@ -3,11 +3,17 @@ Database Helper Functions - Connection Pool Wrappers
 Simplifies database operations with automatic connection management
 """
 import logging
+import os
+import time
 from functools import wraps
 from app.core.db_pool import get_connection, put_connection
 
 logger = logging.getLogger(__name__)
 
+# Batched deletes: rows per transaction, pause between transactions
+DELETE_BATCH_SIZE = int(os.getenv('DELETE_BATCH_SIZE', '5000'))
+DELETE_BATCH_PAUSE_SECONDS = float(os.getenv('DELETE_BATCH_PAUSE_SECONDS', '0.05'))
+
 
 def with_db_connection(func):
     """
@@ -169,6 +175,64 @@ def execute_dict_query(query: str, params: tuple = None, fetch_one: bool = False
             put_connection(conn)
 
 
+def delete_in_batches(table: str, where: str, params: tuple = None,
+                      batch_size: int = DELETE_BATCH_SIZE, pause_seconds: float = DELETE_BATCH_PAUSE_SECONDS) -> int:
+    """
+    Delete matching rows in short transactions of at most batch_size rows.
+
+    A single large DELETE holds row locks and a snapshot for its whole duration and
+    leaves one burst of dead tuples; committing per batch keeps locks short and lets
+    autovacuum reclaim space while the purge runs. The WHERE clause should be backed
+    by an index. Not for partitioned tables (ctid is only unique within a partition).
+
+    Usage:
+        deleted = delete_in_batches(
+            "download_tokens",
+            "expires_at < %s",
+            (cutoff,)
+        )
+
+    Returns:
+        int: Total number of deleted rows
+    """
+    query = f'''
+        DELETE FROM {table}
+        WHERE ctid = ANY(ARRAY(
+            SELECT ctid FROM {table}
+            WHERE {where}
+            LIMIT %s
+        ))
+    '''
+    total = 0
+    conn = None
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        while True:
+            cursor.execute(query, tuple(params or ()) + (batch_size,))
+            deleted = cursor.rowcount
+            conn.commit()
+            total += deleted
+            # Short batch: nothing left (rows moved meanwhile are picked up by the next run)
+            if deleted < batch_size:
+                break
+            if pause_seconds:
+                time.sleep(pause_seconds)
+
+        cursor.close()
+        return total
+
+    except Exception as e:
+        if conn:
+            conn.rollback()
+        logger.error(f"❌ Batched delete on {table} failed after {total} rows: {e}")
+        raise
+
+    finally:
+        if conn:
+            put_connection(conn)
+
+
 class TransactionContext:
     """
     Context manager for database transactions with automatic rollback on error.
@@ -1,19 +1,362 @@
 """
 PostgreSQL Connection Pool - Production-Ready Implementation
 Manages database connections efficiently to avoid 'too many connections' errors
+
+ObservablePool remplace psycopg2 ThreadedConnectionPool:
+- File d'attente bornée avec timeout (au lieu d'un PoolError immédiat); les coroutines
+  passent par get_connection_async() / asyncio.to_thread pour attendre sans bloquer la
+  boucle. Une attente sur le thread de la boucle reste possible mais est comptée
+  (loop_waits) et signalée: elle gèle tous les handlers le temps de l'attente
+- Health check des connexions restées inactives + recyclage après max lifetime
+- Métriques live: en cours d'utilisation, en attente, temps d'attente, durée de checkout
+- Détecteur de fuites: pile d'appel du checkout des connexions gardées trop longtemps
+- Connexions instrumentées (app.core.query_stats) si DB_QUERY_STATS=true
 """
+import asyncio
 import psycopg2
 from psycopg2 import pool
 import logging
 import os
-from typing import Optional
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Dict, List, Optional
 import atexit
 from urllib.parse import urlparse
 
+from app.core.query_stats import QUERY_STATS_ENABLED, InstrumentedConnection
+
 logger = logging.getLogger(__name__)
 
+# Timeout d'attente d'une connexion libre (secondes)
+DEFAULT_CHECKOUT_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '10'))
+# Nombre max de threads en attente avant de refuser immédiatement
+DEFAULT_MAX_WAITERS = int(os.getenv('DB_POOL_MAX_WAITERS', '50'))
+# Durée de vie max d'une connexion avant recyclage (secondes)
+DEFAULT_MAX_LIFETIME = float(os.getenv('DB_POOL_MAX_LIFETIME', '1800'))
+# Une connexion inactive depuis plus longtemps est vérifiée (SELECT 1) avant d'être prêtée
+DEFAULT_HEALTH_CHECK_IDLE = float(os.getenv('DB_POOL_HEALTH_CHECK_IDLE', '30'))
+# Une connexion gardée plus longtemps est signalée comme fuite probable
+DEFAULT_LEAK_THRESHOLD = float(os.getenv('DB_POOL_LEAK_THRESHOLD', '30'))
+
+
+def _on_event_loop() -> bool:
+    """True si le thread courant exécute une boucle asyncio (handlers du bot, FastAPI)"""
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
+
+class _Checkout:
+    """Connexion prêtée: origine et horodatage (pour métriques et fuites)"""
+    __slots__ = ('conn', 'created_at', 'checked_out_at', 'thread_name', 'stack', 'reported')
+
+    def __init__(self, conn, created_at: float, stack: Optional[traceback.StackSummary]):
+        self.conn = conn
+        self.created_at = created_at
+        self.checked_out_at = time.monotonic()
+        self.thread_name = threading.current_thread().name
+        self.stack = stack
+        self.reported = False
+
+
+class ObservablePool:
+    """
+    Pool de connexions psycopg2 avec file d'attente, recyclage et métriques.
+
+    API compatible avec ThreadedConnectionPool (getconn / putconn / closeall,
+    minconn / maxconn) pour rester transparent pour get_connection().
+    """
+
+    def __init__(self, minconn: int, maxconn: int, checkout_timeout: float = DEFAULT_CHECKOUT_TIMEOUT,
+                 max_waiters: int = DEFAULT_MAX_WAITERS, max_lifetime: float = DEFAULT_MAX_LIFETIME,
+                 health_check_idle: float = DEFAULT_HEALTH_CHECK_IDLE,
+                 leak_threshold: float = DEFAULT_LEAK_THRESHOLD,
+                 track_stacks: bool = True, **connect_kwargs):
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.checkout_timeout = checkout_timeout
+        self.max_waiters = max_waiters
+        self.max_lifetime = max_lifetime
+        self.health_check_idle = health_check_idle
+        self.leak_threshold = leak_threshold
+        self.track_stacks = track_stacks
+        self._connect_kwargs = connect_kwargs
+
+        self._cond = threading.Condition()
+        # Connexions libres: (conn, created_at, last_used)
+        self._idle: deque = deque()
+        # id(conn) -> _Checkout
+        self._in_use: Dict[int, _Checkout] = {}
+        # Connexions en cours d'ouverture (slot réservé hors verrou)
+        self._opening = 0
+        self._waiting = 0
+        self._closed = False
+
+        self._stats = {
+            'checkouts': 0,
+            'timeouts': 0,
+            'rejected': 0,
+            'loop_waits': 0,
+            'opened': 0,
+            'recycled': 0,
+            'health_check_failures': 0,
+            'leaks_detected': 0,
+            'peak_waiting': 0,
+            'total_wait_ms': 0.0,
+            'max_wait_ms': 0.0,
+            'total_checkout_ms': 0.0,
+            'max_checkout_ms': 0.0,
+            'returns': 0,
+        }
+
+        for _ in range(minconn):
+            self._idle.append((self._open(), time.monotonic(), time.monotonic()))
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+    # OUVERTURE / FERMETURE
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+    def _open(self):
+        conn = psycopg2.connect(**self._connect_kwargs)
+        self._stats['opened'] += 1
+        return conn
+
+    @staticmethod
+    def _discard(conn):
+        try:
+            if not conn.closed:
+                conn.close()
+        except Exception:
+            pass
+
+    def _total(self) -> int:
+        return len(self._idle) + len(self._in_use) + self._opening
+
+    def _is_healthy(self, conn, created_at: float, last_used: float, now: float) -> bool:
+        if conn.closed:
+            return False
+        if now - created_at > self.max_lifetime:
+            self._stats['recycled'] += 1
+            return False
+        if now - last_used > self.health_check_idle:
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute('SELECT 1')
+                conn.rollback()
+            except Exception:
+                self._stats['health_check_failures'] += 1
+                return False
+        return True
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+    # CHECKOUT / RETOUR
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+    def getconn(self, timeout: Optional[float] = None):
+        """
+        Prête une connexion, en attendant au plus `timeout` secondes.
+
+        Depuis une coroutine, passer par get_connection_async(): une attente sur le
+        thread de la boucle gèle tous les handlers (comptée dans loop_waits).
+
+        Raises:
+            pool.PoolError: File d'attente pleine ou timeout dépassé
+        """
+        timeout = self.checkout_timeout if timeout is None else timeout
+        requested_at = time.monotonic()
+        deadline = requested_at + timeout
+
+        while True:
+            candidate = None
+            must_open = False
+
+            with self._cond:
+                if self._closed:
+                    raise pool.PoolError("connection pool is closed")
+
+                if not self._idle and self._total() >= self.maxconn:
+                    if timeout <= 0:
+                        self._stats['rejected'] += 1
+                        raise pool.PoolError(
+                            f"connection pool exhausted ({len(self._in_use)} in use, not waiting)"
+                        )
+                    if _on_event_loop():
+                        self._stats['loop_waits'] += 1
+                        logger.warning(
+                            "⚠️ DB pool exhausted: waiting on the event loop thread "
+                            "(use get_connection_async / asyncio.to_thread)"
+                        )
+                    if self._waiting >= self.max_waiters:
+                        self._stats['rejected'] += 1
+                        raise pool.PoolError(f"connection pool wait queue full ({self._waiting} waiting)")
+
+                    self._waiting += 1
+                    self._stats['peak_waiting'] = max(self._stats['peak_waiting'], self._waiting)
+                    try:
+                        while not self._idle and self._total() >= self.maxconn:
+                            remaining = deadline - time.monotonic()
+                            if remaining <= 0:
+                                self._stats['timeouts'] += 1
+                                raise pool.PoolError(
+                                    f"no connection available after {timeout:.1f}s "
+                                    f"({len(self._in_use)} in use, {self._waiting} waiting)"
+                                )
+                            self._cond.wait(remaining)
+                    finally:
+                        self._waiting -= 1
+
+                if self._idle:
+                    # LIFO: la connexion la plus chaude (moins de health checks)
+                    candidate = self._idle.pop()
+                else:
+                    self._opening += 1
+                    must_open = True
+
+            # Ouverture / vérification hors verrou (I/O réseau)
+            now = time.monotonic()
+            if must_open:
+                try:
+                    conn = self._open()
+                except Exception:
+                    with self._cond:
+                        self._opening -= 1
+                        self._cond.notify()
+                    raise
+                created_at = now
+            else:
+                conn, created_at, last_used = candidate
+                if not self._is_healthy(conn, created_at, last_used, now):
+                    self._discard(conn)
+                    with self._cond:
+                        self._cond.notify()
+                    continue
+
+            # Capture paresseuse (pas de lecture des sources tant qu'aucune fuite n'est signalée)
+            stack = traceback.StackSummary.extract(
+                traceback.walk_stack(sys._getframe(1)), limit=12, lookup_lines=False
+            ) if self.track_stacks else None
+            checkout = _Checkout(conn, created_at, stack)
+
+            with self._cond:
+                if must_open:
+                    self._opening -= 1
+                self._in_use[id(conn)] = checkout
+                wait_ms = (checkout.checked_out_at - requested_at) * 1000
+                self._stats['checkouts'] += 1
+                self._stats['total_wait_ms'] += wait_ms
+                self._stats['max_wait_ms'] = max(self._stats['max_wait_ms'], wait_ms)
+
+            return conn
+
+    def putconn(self, conn, close: bool = False):
+        """Rend une connexion au pool (fermée si cassée, trop vieille ou close=True)"""
+        now = time.monotonic()
+
+        with self._cond:
+            checkout = self._in_use.pop(id(conn), None)
+
+            if checkout is None:
+                # Connexion étrangère ou déjà rendue
+                logger.warning("⚠️ put_connection() called with a connection not checked out from the pool")
+                return
+
+            held_ms = (now - checkout.checked_out_at) * 1000
+            self._stats['returns'] += 1
+            self._stats['total_checkout_ms'] += held_ms
+            self._stats['max_checkout_ms'] = max(self._stats['max_checkout_ms'], held_ms)
+
+            expired = now - checkout.created_at > self.max_lifetime
+            if close or self._closed or conn.closed or expired:
+                if expired:
+                    self._stats['recycled'] += 1
+                self._discard(conn)
+            else:
+                self._idle.append((conn, checkout.created_at, now))
+
+            self._cond.notify()
+
+        if checkout.reported:
+            logger.info(f"🔌 Leaked connection returned after {held_ms / 1000:.1f}s (thread {checkout.thread_name})")
+
+    def closeall(self):
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                conn, _, _ = self._idle.pop()
+                self._discard(conn)
+            for checkout in list(self._in_use.values()):
+                self._discard(checkout.conn)
+            self._in_use.clear()
+            self._cond.notify_all()
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+    # MÉTRIQUES / FUITES
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+    def find_leaks(self, threshold: Optional[float] = None) -> List[Dict]:
+        """
+        Connexions prêtées depuis plus de `threshold` secondes.
+        La première détection de chaque fuite est loggée avec sa pile de checkout.
+        """
+        threshold = self.leak_threshold if threshold is None else threshold
+        now = time.monotonic()
+        leaks = []
+
+        with self._cond:
+            checkouts = list(self._in_use.values())
+
+        for checkout in checkouts:
+            held = now - checkout.checked_out_at
+            if held < threshold:
+                continue
+            stack = ''.join(traceback.StackSummary.from_list(list(reversed(checkout.stack))).format()) if checkout.stack else None
+            if not checkout.reported:
+                checkout.reported = True
+                self._stats['leaks_detected'] += 1
+                logger.warning(
+                    f"⚠️ Connection held for {held:.1f}s by thread {checkout.thread_name} "
+                    f"(missing put_connection()?). Checkout stack:\n{stack or 'n/a'}"
+                )
+            leaks.append({
+                'held_seconds': round(held, 1),
+                'thread': checkout.thread_name,
+                'stack': stack
+            })
+
+        return leaks
+
+    def get_stats(self) -> Dict:
+        with self._cond:
+            stats = dict(self._stats)
+            in_use = len(self._in_use)
+            idle = len(self._idle)
+            waiting = self._waiting
+            opening = self._opening
+
+        checkouts = stats.pop('checkouts')
+        returns = stats.pop('returns')
+        total_wait_ms = stats.pop('total_wait_ms')
+        total_checkout_ms = stats.pop('total_checkout_ms')
+
+        return {
+            'in_use': in_use,
+            'idle': idle,
+            'opening': opening,
+            'waiting': waiting,
+            'checkouts': checkouts,
+            'avg_wait_ms': round(total_wait_ms / checkouts, 2) if checkouts else 0.0,
+            'avg_checkout_ms': round(total_checkout_ms / returns, 2) if returns else 0.0,
+            **{k: round(v, 2) if isinstance(v, float) else v for k, v in stats.items()},
+        }
+
+
 # Global connection pool (singleton)
-_connection_pool: Optional[pool.ThreadedConnectionPool] = None
+_connection_pool: Optional[ObservablePool] = None
 
 
 def init_connection_pool(
@@ -72,7 +415,12 @@ def init_connection_pool(
         # SSL mode: require for remote, prefer for local
         sslmode = 'prefer' if pghost in ['localhost', '127.0.0.1'] else 'require'
 
-        _connection_pool = pool.ThreadedConnectionPool(
+        connect_kwargs = {}
+        if QUERY_STATS_ENABLED:
+            # Chaque curseur mesure ses requêtes (voir /metrics et /dbstats)
+            connect_kwargs['connection_factory'] = InstrumentedConnection
+
+        _connection_pool = ObservablePool(
             minconn=min_connections,
             maxconn=max_connections,
             host=pghost,
@@ -80,10 +428,14 @@ def init_connection_pool(
             database=pgdatabase,
             user=pguser,
             password=pgpassword,
-            sslmode=sslmode
+            sslmode=sslmode,
+            **connect_kwargs
         )
 
-        logger.info(f"✅ PostgreSQL connection pool initialized successfully")
+        logger.info(
+            f"✅ PostgreSQL connection pool initialized successfully "
+            f"(timeout {DEFAULT_CHECKOUT_TIMEOUT:g}s, max lifetime {DEFAULT_MAX_LIFETIME:g}s)"
+        )
 
         # Register cleanup on exit
         atexit.register(close_all_connections)
@@ -93,16 +445,22 @@ def init_connection_pool(
         raise
 
 
-def get_connection():
+def get_connection(timeout: Optional[float] = None):
     """
     Get a connection from the pool.
 
+    Args:
+        timeout: Max wait in seconds (default: DB_POOL_TIMEOUT)
+
     Returns:
         psycopg2.connection: Database connection from pool
 
+    Waits up to DB_POOL_TIMEOUT seconds when all connections are busy. From a
+    coroutine, use get_connection_async() so the wait does not block the event loop.
+
     Raises:
         RuntimeError: If pool not initialized
-        pool.PoolError: If no connection available
+        pool.PoolError: If no connection became available in time
 
     Usage:
         conn = get_connection()
@@ -126,15 +484,12 @@ def get_connection():
         )
 
     try:
-        conn = _connection_pool.getconn()
-
-        if conn is None:
-            raise pool.PoolError("No connection available from pool")
-
-        return conn
+        return _connection_pool.getconn(timeout)
 
     except pool.PoolError as e:
         logger.error(f"❌ Pool exhausted: {e}")
+        # Les connexions gardées trop longtemps sont loggées avec leur pile de checkout
+        _connection_pool.find_leaks()
         logger.error(
             "⚠️ Possible causes:\n"
             "1. Too many concurrent requests\n"
@@ -144,6 +499,20 @@ def get_connection():
         raise
 
 
+async def get_connection_async(timeout: Optional[float] = None):
+    """
+    Get a connection from a coroutine, waiting for a free one without blocking the loop.
+
+    The checkout runs in a worker thread (asyncio.to_thread), where the pool may wait
+    up to `timeout` seconds. Return it with put_connection() as usual.
+
+    Raises:
+        RuntimeError: If pool not initialized
+        pool.PoolError: If no connection became available in time
+    """
+    return await asyncio.to_thread(get_connection, timeout)
+
+
 def put_connection(conn):
     """
     Return a connection to the pool.
@@ -175,6 +544,8 @@ def put_connection(conn):
 
         except Exception as e:
             logger.error(f"❌ Error returning connection to pool: {e}")
+            # Connexion inutilisable: la fermer pour libérer son slot
+            _connection_pool.putconn(conn, close=True)
 
 
 def close_all_connections():
@@ -197,14 +568,15 @@ def close_all_connections():
 def get_pool_status() -> dict:
     """
     Get current status of the connection pool.
-    Useful for monitoring and debugging.
+    Useful for monitoring and debugging (exposed in /health).
 
     Returns:
         dict: Pool statistics
-            - initialized: bool
-            - min_connections: int
-            - max_connections: int
-            - Note: psycopg2 pool doesn't expose active connections count
+            - initialized, min_connections, max_connections
+            - in_use, idle, waiting: live counts
+            - avg/max wait and checkout durations (ms)
+            - timeouts, recycled, health_check_failures
+            - leaks: connections held longer than DB_POOL_LEAK_THRESHOLD, with checkout stack
     """
     global _connection_pool
 
@@ -218,7 +590,9 @@ def get_pool_status() -> dict:
     return {
         'initialized': True,
         'min_connections': _connection_pool.minconn,
-        'max_connections': _connection_pool.maxconn
+        'max_connections': _connection_pool.maxconn,
+        **_connection_pool.get_stats(),
+        'leaks': _connection_pool.find_leaks()
     }
 
 
@@ -0,0 +1,288 @@
+"""
+Download Tokens - Stateless signed one-time download links
+Remplace la table download_tokens sur le hot path du mini-app download
+
+Un token = payload compact signé HMAC-SHA256 (aucun INSERT en DB):
+- expiration intégrée au payload
+- usage unique via un replay set en mémoire (TTL), optionnellement partagé en PostgreSQL
+- rate limit via la limite nommée "downloads" de app.core.rate_limiter (GCRA, mémoire ou PostgreSQL)
+"""
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional, Tuple
+
+from app.core.rate_limiter import RateLimiter, register_rate_limit
+from app.core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def _b64decode(data: str) -> bytes:
+    padding = '=' * (-len(data) % 4)
+    return base64.urlsafe_b64decode(data + padding)
+
+
+class DownloadTokenSigner:
+    """
+    Emet et vérifie des tokens de téléchargement signés.
+
+    Format: base64url(payload_json).base64url(hmac_sha256)
+    Payload: {"u": user_id, "o": order_id, "p": product_id, "e": expires_ts, "n": nonce}
+    """
+
+    def __init__(self, secret: bytes, ttl_seconds: int = 300):
+        """
+        Args:
+            secret: Clé HMAC
+            ttl_seconds: Durée de validité d'un token (5 min par défaut)
+        """
+        if not secret:
+            raise ValueError("Download token secret is empty")
+
+        self._secret = secret
+        self.ttl_seconds = ttl_seconds
+
+    def _sign(self, payload: bytes) -> bytes:
+        return hmac.new(self._secret, payload, hashlib.sha256).digest()
+
+    def issue(self, user_id: int, order_id: str, product_id: str) -> str:
+        """
+        Crée un token signé (aucun accès DB)
+
+        Returns:
+            Token URL-safe
+        """
+        payload = json.dumps({
+            'u': user_id,
+            'o': order_id,
+            'p': product_id,
+            'e': int(time.time()) + self.ttl_seconds,
+            'n': _b64encode(secrets.token_bytes(12))
+        }, separators=(',', ':')).encode()
+
+        return f"{_b64encode(payload)}.{_b64encode(self._sign(payload))}"
+
+    def verify(self, token: str) -> Optional[Dict]:
+        """
+        Vérifie signature et expiration (ne consomme pas le token)
+
+        Returns:
+            Payload décodé ou None si invalide/expiré
+        """
+        try:
+            payload_part, signature_part = token.split('.', 1)
+            payload = _b64decode(payload_part)
+            signature = _b64decode(signature_part)
+        except (ValueError, TypeError):
+            return None
+
+        if not hmac.compare_digest(self._sign(payload), signature):
+            return None
+
+        try:
+            data = json.loads(payload)
+        except ValueError:
+            return None
+
+        if data.get('e', 0) < time.time():
+            return None
+
+        return data
+
+
+class ReplayGuard:
+    """
+    Replay set en mémoire pour l'usage unique des tokens.
+
+    Tous les tokens ont le même TTL: l'ordre d'insertion suit donc l'ordre
+    d'expiration, et la purge se fait par la gauche d'une deque (O(1) amorti).
+    """
+
+    def __init__(self, use_database: bool = False):
+        """
+        Args:
+            use_database: Partager le replay set entre workers via PostgreSQL
+        """
+        self.use_database = use_database
+        self._seen: Dict[str, int] = {}
+        self._expiry_queue: deque = deque()
+        self._lock = threading.Lock()
+
+    def _purge(self, now: float):
+        while self._expiry_queue and self._expiry_queue[0][0] < now:
+            _, nonce = self._expiry_queue.popleft()
+            self._seen.pop(nonce, None)
+
+    def consume(self, nonce: str, expires_at: int) -> bool:
+        """
+        Marque un nonce comme utilisé
+
+        Le nonce n'entre dans le replay set en mémoire qu'une fois la rédemption
+        enregistrée en base (mode use_database): une erreur DB ne brûle pas le token,
+        le client peut réessayer. Deux rédemptions concurrentes dans ce process sont
+        départagées par la clé primaire de download_token_redemptions.
+
+        Returns:
+            True si c'est la première utilisation, False si rejoué
+        """
+        with self._lock:
+            self._purge(time.time())
+            if nonce in self._seen:
+                return False
+            if not self.use_database:
+                self._remember(nonce, expires_at)
+                return True
+
+        from app.domain.repositories.download_repo import DownloadRepository
+        first_use = DownloadRepository.record_token_redemption(nonce, expires_at)
+
+        # Enregistré (par nous ou un autre worker): les rejeux suivants sont rejetés en mémoire
+        with self._lock:
+            if nonce not in self._seen:
+                self._remember(nonce, expires_at)
+        return first_use
+
+    def _remember(self, nonce: str, expires_at: int):
+        self._seen[nonce] = expires_at
+        self._expiry_queue.append((expires_at, nonce))
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+
+class DownloadTokenService:
+    """Point d'entrée: rate limit + émission + rédemption des tokens"""
+
+    def __init__(self, signer: DownloadTokenSigner, replay_guard: ReplayGuard, rate_limiter: RateLimiter):
+        self.signer = signer
+        self.replay_guard = replay_guard
+        self.rate_limiter = rate_limiter
+
+    def check_rate_limit(self, user_id: int) -> Tuple[bool, Optional[str]]:
+        """
+        Returns:
+            (is_allowed, error_message)
+        """
+        decision = self.rate_limiter.check(user_id)
+        if not decision.allowed:
+            return False, f"Rate limit exceeded: retry in {decision.retry_after}s"
+        return True, None
+
+    def issue(self, user_id: int, order_id: str, product_id: str) -> str:
+        return self.signer.issue(user_id, order_id, product_id)
+
+    def redeem(self, token: str) -> Optional[Tuple[int, str, str]]:
+        """
+        Valide et consomme un token (one-time)
+
+        Returns:
+            (user_id, order_id, product_id) ou None - même contrat que get_and_validate_token
+        """
+        data = self.signer.verify(token)
+        if not data:
+            return None
+
+        if not self.replay_guard.consume(data['n'], data['e']):
+            logger.warning(f"⚠️ Download token replay rejected for user {data['u']}")
+            return None
+
+        return data['u'], data['o'], data['p']
+
+
+# Global download token service instance
+_download_token_service: Optional[DownloadTokenService] = None
+
+
+def _resolve_secret() -> bytes:
+    secret = os.getenv('DOWNLOAD_TOKEN_SECRET')
+    if secret:
+        return secret.encode()
+
+    if settings.TELEGRAM_BOT_TOKEN:
+        # Clé dérivée du token bot: stable entre redémarrages et entre workers
+        return hmac.new(b"DownloadToken", settings.TELEGRAM_BOT_TOKEN.encode(), hashlib.sha256).digest()
+
+    logger.warning("⚠️ No DOWNLOAD_TOKEN_SECRET configured - using ephemeral key (tokens lost on restart)")
+    return secrets.token_bytes(32)
+
+
+def _configured_workers() -> int:
+    """Processus servant l'API (WEB_CONCURRENCY, convention uvicorn / gunicorn)"""
+    try:
+        return max(1, int(os.getenv('WEB_CONCURRENCY', '1')))
+    except ValueError:
+        return 1
+
+
+def init_download_token_service(
+    ttl_seconds: int = 300,
+    max_tokens: int = 10,
+    window_seconds: int = 3600,
+    shared_replay: Optional[bool] = None
+):
+    """
+    Initialize global download token service.
+
+    Args:
+        ttl_seconds: Token lifetime
+        max_tokens: Tokens allowed per user per window
+        window_seconds: Rate limit window
+        shared_replay: Persist redemptions in PostgreSQL (multi-worker).
+                       Defaults to DOWNLOAD_TOKEN_SHARED_REPLAY, or to True when
+                       WEB_CONCURRENCY > 1 and the variable is unset.
+
+    Raises:
+        RuntimeError: Replay set en mémoire avec plusieurs workers (chaque token serait
+                      utilisable une fois par processus)
+    """
+    global _download_token_service
+
+    workers = _configured_workers()
+    if shared_replay is None:
+        configured = os.getenv('DOWNLOAD_TOKEN_SHARED_REPLAY')
+        if configured is None:
+            shared_replay = workers > 1
+        else:
+            shared_replay = configured.lower() in ('1', 'true', 'yes')
+
+    if workers > 1 and not shared_replay:
+        raise RuntimeError(
+            f"DOWNLOAD_TOKEN_SHARED_REPLAY must be enabled with {workers} workers "
+            "(in-memory replay set is per process: tokens would be reusable)"
+        )
+
+    _download_token_service = DownloadTokenService(
+        signer=DownloadTokenSigner(_resolve_secret(), ttl_seconds),
+        replay_guard=ReplayGuard(use_database=shared_replay),
+        rate_limiter=register_rate_limit('downloads', max_tokens, window_seconds)
+    )
+
+    logger.info(
+        f"🔐 Download token service initialized: ttl={ttl_seconds}s, "
+        f"{max_tokens} tokens / {window_seconds}s, shared_replay={shared_replay}"
+    )
+
+
+def get_download_token_service() -> DownloadTokenService:
+    """
+    Get global download token service (lazy init with defaults).
+
+    Returns:
+        DownloadTokenService: Global service
+    """
+    if _download_token_service is None:
+        init_download_token_service()
+
+    return _download_token_service
@@ -0,0 +1,392 @@
+"""
+Email Outbox - Envoi asynchrone et groupé des emails transactionnels (Mailjet v3.1)
+
+- Les handlers mettent le message en file (table email_outbox, migration 0008) et
+  rendent la main: aucun appel HTTP sur le chemin de la requête utilisateur
+- Un worker dans la boucle du serveur réclame les messages échus par lots et les
+  envoie en une seule requête Mailjet v3.1 (jusqu'à 50 messages par appel) via un
+  client httpx.AsyncClient partagé (connexions keep-alive)
+- Fenêtre de regroupement (EMAIL_BATCH_WINDOW): les messages mis en file quasi
+  simultanément (vendeur + acheteur d'une même vente) partent dans le même lot
+- Résultat par message: succès (identifiant Mailjet conservé), erreur définitive
+  (adresse invalide...) ou nouvelle tentative avec backoff exponentiel (réseau, 429, 5xx)
+- Statut persisté: un message mis en file avant un arrêt du serveur est envoyé au
+  démarrage suivant, un lot réclamé mais non confirmé est remis en file après 5 minutes
+- Scripts hors serveur (cron): le message est persisté et envoyé par le worker du serveur
+"""
+import asyncio
+import logging
+import os
+import random
+import time
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from app.domain.repositories.email_outbox_repo import EmailOutboxRepository
+
+logger = logging.getLogger(__name__)
+
+MAILJET_SEND_URL = "https://api.mailjet.com/v3.1/send"
+MAILJET_MAX_BATCH = 50  # Messages par appel Send API v3.1
+
+EMAIL_BATCH_WINDOW = float(os.getenv('EMAIL_BATCH_WINDOW', '0.5'))
+EMAIL_MAX_ATTEMPTS = int(os.getenv('EMAIL_MAX_ATTEMPTS', '6'))
+EMAIL_POLL_INTERVAL = float(os.getenv('EMAIL_POLL_INTERVAL', '30'))
+EMAIL_OUTBOX_RETENTION_DAYS = int(os.getenv('EMAIL_OUTBOX_RETENTION_DAYS', '30'))
+
+# Lot réclamé non confirmé depuis 5 min: remis en file (vérifié toutes les minutes)
+STALE_CLAIM_SECONDS = 300
+STALE_CLAIM_CHECK_INTERVAL = 60.0
+
+# Backoff: 30s, 1 min, 2 min... plafonné à 1h, ±20% de jitter
+RETRY_BASE_DELAY = 30.0
+RETRY_MAX_DELAY = 3600.0
+
+DEFAULT_TEXT_PART = "Veuillez activer l'HTML pour voir ce message."
+
+
+def retry_delay(attempts: int) -> float:
+    """Délai avant la tentative suivante (attempts = tentatives déjà faites)"""
+    delay = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** max(attempts - 1, 0))
+    return delay * random.uniform(0.8, 1.2)
+
+
+def _message_error(message: Dict) -> Tuple[str, bool]:
+    """(description, erreur temporaire) d'un message en erreur dans la réponse Mailjet"""
+    errors = message.get('Errors') or []
+    description = '; '.join(
+        f"{error.get('ErrorCode', '?')}: {error.get('ErrorMessage', '')}" for error in errors
+    ) or 'unknown Mailjet error'
+    status_codes = [int(error.get('StatusCode') or 400) for error in errors]
+    transient = any(code == 429 or code >= 500 for code in status_codes)
+    return description, transient
+
+
+def classify_response(rows: List[Dict], status_code: int, payload: Optional[Dict]):
+    """
+    Répartit un lot selon la réponse Mailjet
+
+    Le statut par message ('success' / 'error') fait foi quand il est présent, y compris
+    dans une réponse 400: seuls les messages explicitement en erreur sont rejetés.
+
+    Returns:
+        (envoyés [(row, MessageID)], à retenter [(row, erreur)], en échec [(row, erreur)])
+    """
+    sent, retry, failed = [], [], []
+
+    messages = (payload or {}).get('Messages') if isinstance(payload, dict) else None
+    if status_code in (200, 400) and isinstance(messages, list):
+        by_custom_id = {str(message.get('CustomID')): message for message in messages if message.get('CustomID')}
+        for index, row in enumerate(rows):
+            message = by_custom_id.get(str(row['id']))
+            if message is None and len(messages) == len(rows):
+                message = messages[index]
+            if message is None:
+                retry.append((row, f"HTTP {status_code}: no status for this message"))
+            elif message.get('Status') == 'success':
+                recipients = message.get('To') or [{}]
+                provider_id = recipients[0].get('MessageUUID') or recipients[0].get('MessageID')
+                sent.append((row, str(provider_id) if provider_id is not None else None))
+            else:
+                description, transient = _message_error(message)
+                (retry if transient else failed).append((row, description))
+        return sent, retry, failed
+
+    # Pas de statut par message: 401/403 (clés), 429, 5xx... tout le lot est retenté
+    error = f"HTTP {status_code}"
+    if isinstance(payload, dict) and (payload.get('ErrorMessage') or payload.get('ErrorInfo')):
+        error += f": {payload.get('ErrorMessage') or payload.get('ErrorInfo')}"
+    return sent, [(row, error) for row in rows], failed
+
+
+class EmailOutbox:
+    """Worker d'envoi de l'outbox email (un par processus serveur)"""
+
+    def __init__(self, api_key: str, api_secret: str, from_email: str, from_name: str,
+                 batch_window: float = EMAIL_BATCH_WINDOW, max_attempts: int = EMAIL_MAX_ATTEMPTS,
+                 poll_interval: float = EMAIL_POLL_INTERVAL, repo: Optional[EmailOutboxRepository] = None):
+        """
+        Args:
+            api_key / api_secret: Clés API Mailjet (SMTP_USERNAME / SMTP_PASSWORD)
+            from_email / from_name: Expéditeur de tous les messages
+            batch_window: Attente après une mise en file pour grouper les messages voisins (s)
+            max_attempts: Tentatives avant de passer un message en 'failed'
+            poll_interval: Relecture périodique de la table (messages d'autres processus, échéances)
+        """
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.from_email = from_email
+        self.from_name = from_name
+        self.batch_window = batch_window
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self.repo = repo or EmailOutboxRepository()
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._next_claim_check = 0.0
+
+        self._stats = {
+            'enqueued': 0,
+            'sent': 0,
+            'failed': 0,
+            'retried': 0,
+            'batches': 0,
+            'max_batch_size': 0,
+            'released_claims': 0,
+            'total_send_ms': 0.0,
+        }
+        self._last_error: Optional[str] = None
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+    # CYCLE DE VIE
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+    def start(self):
+        """Démarre le worker dans la boucle courante"""
+        if self.running:
+            return
+        self._client = httpx.AsyncClient(
+            auth=(self.api_key, self.api_secret),
+            timeout=httpx.Timeout(15.0, connect=5.0),
+            limits=httpx.Limits(max_connections=4, max_keepalive_connections=2)
+        )
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._worker = asyncio.create_task(self._run(), name="email-outbox")
+        logger.info(f"📧 Email outbox started (batch window {self.batch_window:g}s, "
+                    f"up to {MAILJET_MAX_BATCH} messages per request)")
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None and not self._worker.done()
+
+    async def stop(self, drain_timeout: float = 5.0):
+        """Termine le lot en cours; les messages encore en file restent persistés"""
+        if self._worker:
+            self._stopping = True
+            self._wakeup.set()
+            try:
+                await asyncio.wait_for(self._worker, timeout=drain_timeout)
+            except asyncio.TimeoutError:
+                self._worker.cancel()
+                try:
+                    await self._worker
+                except asyncio.CancelledError:
+                    pass
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        if self._client:
+            await self._client.aclose()
+            self._client = None
+        logger.info("📧 Email outbox stopped")
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+    # API
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+    async def enqueue(self, to_email: str, subject: str, html_body: str,
+                      text_body: Optional[str] = None) -> bool:
+        """
+        Persiste le message et réveille le worker, sans attendre Mailjet
+
+        Returns:
+            bool: True si le message est en file
+        """
+        try:
+            await asyncio.to_thread(self.repo.enqueue, to_email, subject, html_body, text_body)
+        except Exception as e:
+            logger.error(f"❌ Could not queue email to {to_email}: {e}")
+            return False
+        self._stats['enqueued'] += 1
+        self.notify()
+        return True
+
+    def notify(self):
+        """Réveille le worker (appelable depuis un autre thread)"""
+        if self._loop is None or self._wakeup is None:
+            return
+        try:
+            if self._loop is asyncio.get_running_loop():
+                self._wakeup.set()
+                return
+        except RuntimeError:
+            pass
+        self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def get_stats(self) -> Dict:
+        """Métriques de l'outbox (exposées dans /health)"""
+        batches = self._stats['batches']
+        return {
+            **{k: v for k, v in self._stats.items() if k != 'total_send_ms'},
+            'running': self.running,
+            'avg_batch_size': round((self._stats['sent'] + self._stats['failed'] + self._stats['retried'])
+                                    / batches, 1) if batches else 0.0,
+            'avg_request_ms': round(self._stats['total_send_ms'] / batches, 1) if batches else 0.0,
+            'last_error': self._last_error,
+        }
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+    # INTERNE
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                self._wakeup.clear()
+                if time.monotonic() >= self._next_claim_check:
+                    await self._release_stale_claims()
+                await self._drain()
+
+                due_in = await asyncio.to_thread(self.repo.next_due_in)
+                timeout = self.poll_interval if due_in is None else min(max(due_in, 0.1), self.poll_interval)
+                timeout = min(timeout, max(self._next_claim_check - time.monotonic(), 0.1))
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+                    # Laisser les messages mis en file dans la foulée rejoindre le lot
+                    if not self._stopping:
+                        await asyncio.sleep(self.batch_window)
+                except asyncio.TimeoutError:
+                    pass
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Email outbox loop error: {e}")
+                await asyncio.sleep(5)
+
+    async def _release_stale_claims(self):
+        """Remet en file les lots réclamés par une instance arrêtée (au démarrage puis chaque minute)"""
+        self._next_claim_check = time.monotonic() + STALE_CLAIM_CHECK_INTERVAL
+        try:
+            released = await asyncio.to_thread(self.repo.release_stale_claims, STALE_CLAIM_SECONDS)
+        except Exception as e:
+            logger.error(f"❌ Email outbox recovery failed: {e}")
+            return
+        if released:
+            self._stats['released_claims'] += released
+            logger.warning(f"📧 {released} email(s) claimed by a stopped instance put back in queue")
+
+    async def _drain(self):
+        """Envoie tous les messages échus, par lots de MAILJET_MAX_BATCH"""
+        while not self._stopping:
+            rows = await asyncio.to_thread(self.repo.claim_due, MAILJET_MAX_BATCH)
+            if not rows:
+                return
+            await self._send_batch(rows)
+            if len(rows) < MAILJET_MAX_BATCH:
+                return
+
+    def _mailjet_message(self, row: Dict) -> Dict:
+        return {
+            "From": {"Email": self.from_email, "Name": self.from_name},
+            "To": [{"Email": row['to_email']}],
+            "Subject": row['subject'],
+            "HTMLPart": row['html_body'],
+            "TextPart": row['text_body'] or DEFAULT_TEXT_PART,
+            "CustomID": str(row['id']),
+        }
+
+    async def _send_batch(self, rows: List[Dict]):
+        start = time.perf_counter()
+        try:
+            response = await self._client.post(
+                MAILJET_SEND_URL,
+                json={"Messages": [self._mailjet_message(row) for row in rows]}
+            )
+            try:
+                payload = response.json()
+            except ValueError:
+                payload = None
+            sent, retry, failed = classify_response(rows, response.status_code, payload)
+        except httpx.HTTPError as e:
+            sent, retry, failed = [], [(row, f"{type(e).__name__}: {e}") for row in rows], []
+
+        self._stats['batches'] += 1
+        self._stats['max_batch_size'] = max(self._stats['max_batch_size'], len(rows))
+        self._stats['total_send_ms'] += (time.perf_counter() - start) * 1000
+
+        # Tentatives épuisées: échec définitif
+        exhausted = [(row, error) for row, error in retry if row['attempts'] >= self.max_attempts]
+        retry = [(row, error) for row, error in retry if row['attempts'] < self.max_attempts]
+        failed += exhausted
+
+        await asyncio.to_thread(self._record, sent, retry, failed)
+
+        self._stats['sent'] += len(sent)
+        self._stats['retried'] += len(retry)
+        self._stats['failed'] += len(failed)
+        if sent:
+            logger.info(f"✅ {len(sent)} email(s) sent in one Mailjet request")
+        for row, error in retry:
+            self._last_error = error
+            logger.warning(f"⚠️ Email {row['id']} to {row['to_email']} will be retried "
+                           f"(attempt {row['attempts']}/{self.max_attempts}): {error}")
+        for row, error in failed:
+            self._last_error = error
+            logger.error(f"❌ Email {row['id']} to {row['to_email']} failed: {error}")
+
+    def _record(self, sent, retry, failed):
+        self.repo.mark_sent([(row['id'], provider_id) for row, provider_id in sent])
+        self.repo.mark_retry([(row['id'], retry_delay(row['attempts']), error) for row, error in retry])
+        self.repo.mark_failed([(row['id'], error) for row, error in failed])
+
+
+# Global outbox instance
+_outbox: Optional[EmailOutbox] = None
+
+
+def init_email_outbox(**kwargs) -> Optional[EmailOutbox]:
+    """Crée et démarre l'outbox global (boucle du serveur); None sans credentials Mailjet"""
+    global _outbox
+    from app.core.settings import settings
+
+    if not (settings.SMTP_USERNAME and settings.SMTP_PASSWORD and settings.FROM_EMAIL):
+        logger.info("⏭️ Email outbox disabled (Mailjet credentials missing, emails are simulated)")
+        return None
+
+    _outbox = EmailOutbox(settings.SMTP_USERNAME, settings.SMTP_PASSWORD,
+                          settings.FROM_EMAIL, settings.FROM_NAME, **kwargs)
+    _outbox.start()
+    return _outbox
+
+
+def get_email_outbox() -> Optional[EmailOutbox]:
+    """Outbox global, None s'il n'a pas été démarré (scripts cron)"""
+    return _outbox
+
+
+async def shutdown_email_outbox():
+    global _outbox
+    if _outbox:
+        await _outbox.stop()
+        _outbox = None
+
+
+async def queue_email(to_email: str, subject: str, html_body: str, text_body: Optional[str] = None) -> bool:
+    """
+    Point d'entrée unique des emails sortants: mise en file, sans attendre Mailjet
+
+    Passe par l'outbox global s'il tourne dans cette boucle (réveil immédiat du worker).
+    Sinon (scripts cron lancés hors serveur), le message est seulement persisté et
+    sera envoyé par le worker du serveur au plus tard après EMAIL_POLL_INTERVAL.
+
+    Returns:
+        bool: True si le message est en file
+    """
+    outbox = _outbox
+    if outbox and outbox.running and outbox._worker.get_loop() is asyncio.get_running_loop():
+        return await outbox.enqueue(to_email, subject, html_body, text_body)
+
+    try:
+        await asyncio.to_thread(EmailOutboxRepository().enqueue, to_email, subject, html_body, text_body)
+        return True
+    except Exception as e:
+        logger.error(f"❌ Could not queue email to {to_email}: {e}")
+        return False
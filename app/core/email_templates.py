@@ -0,0 +1,1028 @@
+"""
+Templates d'emails précompilés (HTML + version texte)
+
+- Chaque email = layout UZEUR (coquille HTML + CSS inline) + contenu, fusionnés en un seul
+  template au chargement du module: la coquille n'est plus reconstruite à chaque envoi
+- Template compilé: fragments statiques précalculés + emplacements variables; le rendu
+  d'un message ne fait que remplir les emplacements (un seul ''.join)
+- Valeurs échappées pour le HTML (titres produits, noms, messages clients...), format
+  optionnel comme str.format ({prix:.2f})
+- Version texte (Mailjet TextPart) dérivée une fois du même source HTML
+- Fragment: section réutilisable (bloc d'appel, durée de suspension...) insérée telle quelle
+  dans un emplacement; sans emplacement variable, rendue une seule fois puis mise en cache
+
+Usage:
+    rendered = SALE_NOTIFICATION_SELLER.render(seller_name=..., product_title=..., ...)
+    rendered.subject, rendered.html, rendered.text
+"""
+import html
+import re
+import string
+from typing import Dict, NamedTuple, Optional
+
+_formatter = string.Formatter()
+
+
+class RenderedFragment(NamedTuple):
+    """Fragment rendu: inséré tel quel (html dans un template HTML, text dans un template texte)"""
+    html: str
+    text: str
+
+
+class RenderedEmail(NamedTuple):
+    subject: str
+    html: str
+    text: str
+
+
+class Template:
+    """
+    Source au format str.format compilé une fois
+
+    Args:
+        source: Texte avec emplacements {nom} / {nom:spec}; accolades littérales doublées
+        escape: True = valeurs échappées HTML (template HTML), False = texte brut
+    """
+
+    __slots__ = ('source', 'escape', '_literals', '_fields', 'slots')
+
+    def __init__(self, source: str, escape: bool = True):
+        self.source = source
+        self.escape = escape
+        self._literals = []
+        self._fields = []
+        for literal, field_name, spec, conversion in _formatter.parse(source):
+            self._literals.append(literal)
+            self._fields.append((field_name, spec or '') if field_name is not None else None)
+        self.slots = frozenset(field[0] for field in self._fields if field)
+
+    def _value(self, value, spec: str) -> str:
+        if isinstance(value, RenderedFragment):
+            return value.html if self.escape else value.text
+        text = format(value, spec) if spec else str(value)
+        return html.escape(text) if self.escape else text
+
+    def render(self, values: Dict) -> str:
+        parts = []
+        append = parts.append
+        for literal, field in zip(self._literals, self._fields):
+            append(literal)
+            if field is not None:
+                append(self._value(values[field[0]], field[1]))
+        return ''.join(parts)
+
+    def fill_source(self, values: Dict) -> str:
+        """
+        Nouveau source où les emplacements fournis sont remplacés par du source brut
+        (composition à la compilation: layout + contenu); les autres restent des emplacements
+        """
+        parts = []
+        for literal, field in zip(self._literals, self._fields):
+            parts.append(literal.replace('{', '{{').replace('}', '}}'))
+            if field is None:
+                continue
+            name, spec = field
+            if name in values:
+                parts.append(values[name])
+            else:
+                parts.append('{' + name + (':' + spec if spec else '') + '}')
+        return ''.join(parts)
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# VERSION TEXTE
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+_HEAD_RE = re.compile(r'<head\b.*?</head>', re.S | re.I)
+_LINK_RE = re.compile(r'<a\b[^>]*href="([^"]*)"[^>]*>(.*?)</a>', re.S | re.I)
+_PARAGRAPH_END_RE = re.compile(r'</(?:p|h[1-6]|table|ol|ul|pre)>', re.I)
+_LINE_END_RE = re.compile(r'<br\s*/?>|</(?:div|tr|li)>', re.I)
+_CELL_END_RE = re.compile(r'</td>', re.I)
+_LIST_ITEM_RE = re.compile(r'<li\b[^>]*>', re.I)
+_TAG_RE = re.compile(r'<[^>]+>')
+_PARAGRAPH_BREAK = '\x00'
+
+
+def html_to_text(source: str) -> str:
+    """
+    Version texte d'un source HTML (appelée à la compilation, pas à l'envoi)
+
+    Les emplacements {nom} traversent la conversion: le résultat est lui-même un source
+    de template texte. Liens rendus "libellé: url", une ligne par bloc, une ligne vide
+    après les paragraphes, titres et tableaux.
+    """
+    text = _HEAD_RE.sub('', source)
+    text = _LINK_RE.sub(lambda m: f"{_TAG_RE.sub('', m.group(2)).strip()}: {m.group(1)}", text)
+    text = _LIST_ITEM_RE.sub('\n- ', text)
+    text = _CELL_END_RE.sub('  ', text)
+    text = _PARAGRAPH_END_RE.sub('\n' + _PARAGRAPH_BREAK + '\n', text)
+    text = _LINE_END_RE.sub('\n', text)
+    text = html.unescape(_TAG_RE.sub('', text))
+
+    # Lignes vides de l'indentation du source supprimées, sauts de paragraphe conservés
+    lines = []
+    for line in text.splitlines():
+        line = ' '.join(line.split())
+        if line == _PARAGRAPH_BREAK:
+            if lines and lines[-1] != '':
+                lines.append('')
+        elif line:
+            lines.append(line)
+    return '\n'.join(lines).strip()
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# FRAGMENTS ET EMAILS
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+class Fragment:
+    """Section HTML réutilisable, compilée en HTML + texte"""
+
+    def __init__(self, source: str):
+        self.html = Template(source)
+        self.text = Template(html_to_text(source), escape=False)
+        self._static: Optional[RenderedFragment] = None
+
+    def render(self, **values) -> RenderedFragment:
+        if not self.html.slots:
+            # Fragment statique: rendu une fois, servi depuis le cache ensuite
+            if self._static is None:
+                self._static = RenderedFragment(self.html.render({}), self.text.render({}))
+            return self._static
+        return RenderedFragment(self.html.render(values), self.text.render(values))
+
+
+class Layout:
+    """Coquille HTML commune; header_title / header_subtitle / content (+ options) fixés par email"""
+
+    def __init__(self, source: str, **defaults):
+        self.template = Template(source)
+        self.defaults = defaults
+
+    def compose(self, **parts) -> str:
+        return self.template.fill_source({**self.defaults, **parts})
+
+
+class EmailTemplate:
+    """Email complet (sujet, HTML, texte) compilé une fois au chargement du module"""
+
+    def __init__(self, name: str, subject: str, html_source: str, text_source: Optional[str] = None):
+        self.name = name
+        self.subject = Template(subject, escape=False)
+        self.html = Template(html_source)
+        self.text = Template(text_source if text_source is not None else html_to_text(html_source), escape=False)
+
+    @classmethod
+    def with_layout(cls, name: str, subject: str, layout: Layout, header_title: str,
+                    header_subtitle: str, content: str, **layout_options) -> 'EmailTemplate':
+        return cls(name, subject, layout.compose(
+            header_title=header_title, header_subtitle=header_subtitle, content=content, **layout_options
+        ))
+
+    @classmethod
+    def plain(cls, name: str, subject: str, text: str) -> 'EmailTemplate':
+        """Email texte (notifications admin): HTML = texte préformaté"""
+        text = text.strip('\n') + '\n'
+        return cls(name, subject, '<pre>' + html.escape(text, quote=False) + '</pre>', text)
+
+    def render(self, **values) -> RenderedEmail:
+        return RenderedEmail(
+            self.subject.render(values),
+            self.html.render(values),
+            self.text.render(values)
+        )
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# LAYOUT UZEUR
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+HEADER_PURPLE = "linear-gradient(135deg, #8b5cf6 0%, #a78bfa 50%, #ec4899 100%)"
+HEADER_ORANGE_RED = "linear-gradient(135deg, #ef4444 0%, #f87171 50%, #fb923c 100%)"
+HEADER_RED = "linear-gradient(135deg, #dc2626 0%, #ef4444 50%, #f87171 100%)"
+
+STANDARD_LAYOUT = Layout("""
+<!DOCTYPE html>
+<html lang="fr">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <style>
+        * {{
+            margin: 0;
+            padding: 0;
+            box-sizing: border-box;
+        }}
+
+        body {{
+            font-family: -apple-system, BlinkMacSystemFont, 'Inter', 'Segoe UI', Roboto, sans-serif;
+            background: #fafbfc;
+            color: #334155;
+            line-height: 1.6;
+            -webkit-font-smoothing: antialiased;
+        }}
+
+        .container {{
+            max-width: 600px;
+            margin: 40px auto;
+            background: white;
+            border-radius: 16px;
+            box-shadow: 0 10px 40px rgba(139, 92, 246, 0.12);
+            overflow: hidden;
+        }}
+
+        .header {{
+            background: {header_background};
+            padding: 40px 30px;
+            text-align: center;
+        }}
+
+        .header h1 {{
+            font-size: 32px;
+            font-weight: 900;
+            color: white;
+            margin-bottom: 8px;
+            letter-spacing: -0.02em;
+        }}
+
+        .header p {{
+            font-size: 16px;
+            color: rgba(255, 255, 255, 0.9);
+        }}
+
+        .content {{
+            padding: 40px 30px;
+        }}
+
+        .welcome-box, .login-box, .alert-box, .success-box {{
+            background: linear-gradient(135deg, rgba(139, 92, 246, 0.05) 0%, rgba(236, 72, 153, 0.05) 100%);
+            border-left: 4px solid #8b5cf6;
+            padding: 20px;
+            border-radius: 8px;
+            margin-bottom: 30px;
+        }}
+
+        .welcome-box h2, .login-box h2, .alert-box h2, .success-box h2 {{
+            font-size: 24px;
+            font-weight: 800;
+            color: #1e293b;
+            margin-bottom: 10px;
+        }}
+
+        .info-section {{
+            background: #f3f4f6;
+            padding: 20px;
+            border-radius: 12px;
+            margin-bottom: 24px;
+        }}
+
+        .info-item {{
+            margin-bottom: 16px;
+        }}
+
+        .info-item:last-child {{
+            margin-bottom: 0;
+        }}
+
+        .info-label {{
+            font-size: 12px;
+            font-weight: 700;
+            color: #64748b;
+            text-transform: uppercase;
+            letter-spacing: 0.05em;
+            margin-bottom: 4px;
+        }}
+
+        .info-value {{
+            font-size: 16px;
+            font-weight: 600;
+            color: #1e293b;
+            word-break: break-all;
+        }}
+
+        .reason-box {{
+            background: #fef2f2;
+            border: 2px solid #fecaca;
+            padding: 20px;
+            border-radius: 12px;
+            margin: 24px 0;
+        }}
+
+        .reason-box h3 {{
+            font-size: 16px;
+            font-weight: 700;
+            color: #7f1d1d;
+            margin-bottom: 8px;
+        }}
+
+        .cta-button {{
+            display: inline-block;
+            background: linear-gradient(135deg, #8b5cf6 0%, #a78bfa 100%);
+            color: white;
+            text-decoration: none;
+            padding: 16px 32px;
+            border-radius: 12px;
+            font-weight: 700;
+            font-size: 16px;
+            text-align: center;
+            box-shadow: 0 4px 12px rgba(139, 92, 246, 0.3);
+            transition: transform 0.2s;
+        }}
+
+        .cta-button:hover {{
+            transform: translateY(-2px);
+        }}
+
+        .steps {{
+            margin-top: 30px;
+        }}
+
+        .step {{
+            display: flex;
+            margin-bottom: 20px;
+            align-items: flex-start;
+        }}
+
+        .step-number {{
+            background: linear-gradient(135deg, #8b5cf6 0%, #a78bfa 100%);
+            color: white;
+            width: 36px;
+            height: 36px;
+            border-radius: 50%;
+            display: flex;
+            align-items: center;
+            justify-content: center;
+            font-weight: 800;
+            font-size: 18px;
+            margin-right: 16px;
+            flex-shrink: 0;
+        }}
+
+        .step-content h3 {{
+            font-size: 16px;
+            font-weight: 700;
+            color: #1e293b;
+            margin-bottom: 4px;
+        }}
+
+        .step-content p {{
+            font-size: 14px;
+            color: #64748b;
+        }}
+
+        .footer {{
+            background: #f3f4f6;
+            padding: 30px;
+            text-align: center;
+            border-top: 1px solid #e2e8f0;
+        }}
+
+        .footer p {{
+            font-size: 14px;
+            color: #64748b;
+            margin-bottom: 8px;
+        }}
+
+        .footer a {{
+            color: #8b5cf6;
+            text-decoration: none;
+            font-weight: 600;
+        }}
+    </style>
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <h1>{header_title}</h1>
+            <p>{header_subtitle}</p>
+        </div>
+
+        <div class="content">
+            {content}
+        </div>
+
+        <div class="footer">
+            <p>© 2025 UZEUR Marketplace</p>
+            <p><a href="https://uzeur.com">uzeur.com</a></p>
+        </div>
+    </div>
+</body>
+</html>
+""", header_background=HEADER_PURPLE)
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# FRAGMENTS CONDITIONNELS (statiques: rendus une fois)
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+PRODUCT_APPEAL_POSSIBLE = Fragment("""
+            <div style="background: linear-gradient(135deg, rgba(139, 92, 246, 0.1) 0%, rgba(236, 72, 153, 0.1) 100%); padding: 20px; border-radius: 12px; margin-top: 30px; text-align: center;">
+                <p style="font-size: 14px; color: #64748b; margin: 0;">
+                    💡 <strong>Faire appel ?</strong> Contactez le support via /support dans le bot
+                </p>
+            </div>
+""")
+
+PRODUCT_APPEAL_FINAL = Fragment("""
+            <div style="background: linear-gradient(135deg, rgba(239, 68, 68, 0.1) 0%, rgba(251, 146, 60, 0.1) 100%); padding: 20px; border-radius: 12px; margin-top: 30px; text-align: center;">
+                <p style="font-size: 14px; color: #7c2d12; margin: 0;">
+                    ⚠️ Cette décision est <strong>définitive</strong>. Le produit ne pourra pas être réactivé.
+                </p>
+            </div>
+""")
+
+ACCOUNT_SUSPENSION_PERMANENT = Fragment("""
+                <div class="info-item">
+                    <div class="info-label">⏱ Durée de la suspension</div>
+                    <div class="info-value" style="color: #dc2626;">PERMANENTE</div>
+                </div>
+""")
+
+ACCOUNT_SUSPENSION_DURATION = Fragment("""
+                <div class="info-item">
+                    <div class="info-label">⏱ Durée de la suspension</div>
+                    <div class="info-value">{duration}</div>
+                </div>
+""")
+
+ACCOUNT_APPEAL_POSSIBLE = Fragment("""
+            <div style="text-align: center; margin: 30px 0;">
+                <a href="https://t.me/uzeur_bot" class="cta-button">
+                     Contacter le Support
+                </a>
+            </div>
+            <div style="background: rgba(139, 92, 246, 0.1); padding: 20px; border-radius: 12px; margin-top: 30px; text-align: center;">
+                <p style="font-size: 14px; color: #64748b; margin: 0;">
+                     <strong>Faire appel ?</strong> Contactez le support via /support
+                </p>
+            </div>
+""")
+
+ACCOUNT_APPEAL_FINAL = Fragment("""
+            <div style="background: rgba(239, 68, 68, 0.1); padding: 20px; border-radius: 12px; margin-top: 30px; text-align: center;">
+                <p style="font-size: 14px; color: #7c2d12; margin: 0;">
+                    ⚠️ Cette suspension est <strong>permanente</strong>.
+                </p>
+            </div>
+""")
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# EMAILS
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+SELLER_WELCOME = EmailTemplate.with_layout(
+    'seller_welcome',
+    subject="🎉 Bienvenue sur UZEUR Marketplace !",
+    layout=STANDARD_LAYOUT,
+    header_title=" Bienvenue sur UZEUR !",
+    header_subtitle="Votre compte vendeur est actif",
+    content="""
+            <div class="welcome-box">
+                <h2>Bonjour {seller_name} 👋</h2>
+                <p>Félicitations ! Votre compte vendeur a été créé avec succès. Vous pouvez maintenant commencer à vendre vos produits numériques sur notre marketplace décentralisée.</p>
+            </div>
+
+            <div class="info-section">
+                <div class="info-item">
+                    <div class="info-label"> Email de notification</div>
+                    <div class="info-value">{to_email}</div>
+                </div>
+
+                <div class="info-item">
+                    <div class="info-label"> Adresse Solana (Payouts)</div>
+                    <div class="info-value">{solana_address}</div>
+                </div>
+            </div>
+
+            <div style="text-align: center; margin: 30px 0;">
+                <a href="https://t.me/uzeur_bot" class="cta-button">
+                     Accéder au Dashboard
+                </a>
+            </div>
+
+            <div class="steps">
+                <h3 style="font-size: 20px; font-weight: 800; color: #1e293b; margin-bottom: 20px;">
+                    Prochaines étapes :
+                </h3>
+
+                <div class="step">
+                    <div class="step-number">1</div>
+                    <div class="step-content">
+                        <h3>Ajoutez votre premier produit</h3>
+                        <p>Créez votre catalogue en quelques clics depuis le bot Telegram</p>
+                    </div>
+                </div>
+
+                <div class="step">
+                    <div class="step-number">2</div>
+                    <div class="step-content">
+                        <h3>Configurez votre profil</h3>
+                        <p>Personnalisez votre bio et nom dans les paramètres vendeur</p>
+                    </div>
+                </div>
+
+                <div class="step">
+                    <div class="step-number">3</div>
+                    <div class="step-content">
+                        <h3>Recevez vos premiers paiements</h3>
+                        <p>Les payouts crypto sont automatiques après chaque vente</p>
+                    </div>
+                </div>
+            </div>
+
+            <div style="background: linear-gradient(135deg, rgba(139, 92, 246, 0.1) 0%, rgba(236, 72, 153, 0.1) 100%); padding: 20px; border-radius: 12px; margin-top: 30px; text-align: center;">
+                <p style="font-size: 14px; color: #64748b; margin: 0;">
+                     <strong>Besoin d'aide ?</strong> Contactez le support directement depuis le bot avec /support
+                </p>
+            </div>
+        """
+)
+
+SELLER_LOGIN = EmailTemplate.with_layout(
+    'seller_login',
+    subject=" Nouvelle connexion à votre compte vendeur UZEUR",
+    layout=STANDARD_LAYOUT,
+    header_title=" Connexion Détectée",
+    header_subtitle="Votre compte vendeur a été connecté",
+    content="""
+            <div class="login-box">
+                <h2>Bonjour {seller_name} 👋</h2>
+                <p>Une connexion à votre compte vendeur UZEUR a été effectuée avec succès.</p>
+            </div>
+
+            <div class="info-section">
+                <div class="info-item">
+                    <div class="info-label"> Email du compte</div>
+                    <div class="info-value">{to_email}</div>
+                </div>
+
+                <div class="info-item">
+                    <div class="info-label"> Date et heure de connexion</div>
+                    <div class="info-value">{login_time}</div>
+                </div>
+
+                <div class="info-item">
+                    <div class="info-label"> Plateforme</div>
+                    <div class="info-value">UZEUR </div>
+                </div>
+            </div>
+
+            <div style="text-align: center; margin: 30px 0;">
+                <a href="https://t.me/uzeur_bot" class="cta-button">
+                     Accéder au Dashboard
+                </a>
+            </div>
+
+            <div class="security-notice">
+                <h3> Sécurité de votre compte</h3>
+                <p>Si vous n'êtes pas à l'origine de cette connexion, contactez immédiatement le support via /support dans le bot.</p>
+            </div>
+        """
+)
+
+PRODUCT_SUSPENDED = EmailTemplate.with_layout(
+    'product_suspended',
+    subject="⚠️ Votre produit a été suspendu - UZEUR Marketplace",
+    layout=STANDARD_LAYOUT,
+    header_title="⚠️ Produit Suspendu",
+    header_subtitle="Action requise sur votre catalogue",
+    header_background=HEADER_ORANGE_RED,
+    content="""
+            <div class="alert-box">
+                <h2>Bonjour {seller_name},</h2>
+                <p>Votre produit a été suspendu par notre équipe de modération.</p>
+            </div>
+            <div class="info-section">
+                <div class="info-item">
+                    <div class="info-label"> Produit concerné</div>
+                    <div class="info-value">{product_title}</div>
+                </div>
+                <div class="info-item">
+                    <div class="info-label"> Compte vendeur</div>
+                    <div class="info-value">{to_email}</div>
+                </div>
+            </div>
+            <div class="reason-box">
+                <h3> Raison de la suspension :</h3>
+                <p>{reason}</p>
+            </div>
+            <div style="text-align: center; margin: 30px 0;">
+                <a href="https://t.me/uzeur_bot" class="cta-button">Accéder au Dashboard</a>
+            </div>
+            {appeal_section}
+        """
+)
+
+ACCOUNT_SUSPENDED = EmailTemplate.with_layout(
+    'account_suspended',
+    subject=" Votre compte a été suspendu - UZEUR Marketplace",
+    layout=STANDARD_LAYOUT,
+    header_title="🔒 Compte Suspendu",
+    header_subtitle="Accès à votre compte temporairement bloqué",
+    header_background=HEADER_RED,
+    content="""
+            <div class="alert-box">
+                <h2>Bonjour {user_name},</h2>
+                <p>Votre compte UZEUR Marketplace a été suspendu suite à une violation de nos conditions d'utilisation.</p>
+            </div>
+            <div class="info-section">
+                <div class="info-item">
+                    <div class="info-label"> Compte concerné</div>
+                    <div class="info-value">{to_email}</div>
+                </div>
+                {duration_info}
+            </div>
+            <div class="reason-box">
+                <h3> Raison de la suspension :</h3>
+                <p>{reason}</p>
+            </div>
+            {appeal_section}
+        """
+)
+
+SALE_CONFIRMATION = EmailTemplate.with_layout(
+    'sale_confirmation',
+    subject="Nouvelle vente sur UZEUR Marketplace!",
+    layout=STANDARD_LAYOUT,
+    header_title=" Nouvelle Vente!",
+    header_subtitle="Un client a acheté votre produit",
+    content="""
+            <div class="success-box">
+                <h2>Félicitations {seller_name}!</h2>
+                <p>Vous avez réalisé une nouvelle vente sur UZEUR Marketplace.</p>
+            </div>
+
+            <div class="info-section">
+                <div class="info-item">
+                    <div class="info-label"> Produit vendu</div>
+                    <div class="info-value">{product_title}</div>
+                </div>
+
+                <div class="info-item">
+                    <div class="info-label"> Acheteur</div>
+                    <div class="info-value">{buyer_name}</div>
+                </div>
+
+                <div class="info-item">
+                    <div class="info-label"> Montant</div>
+                    <div class="info-value">{sale_amount}</div>
+                </div>
+
+                <div class="info-item">
+                    <div class="info-label"> Date de vente</div>
+                    <div class="info-value">{sale_date}</div>
+                </div>
+            </div>
+
+            <div style="text-align: center; margin: 30px 0;">
+                <a href="https://t.me/uzeur_bot" class="cta-button">
+                     Voir mes ventes
+                </a>
+            </div>
+
+            <div style="background: linear-gradient(135deg, rgba(139, 92, 246, 0.1) 0%, rgba(236, 72, 153, 0.1) 100%); padding: 20px; border-radius: 12px; margin-top: 30px; text-align: center;">
+                <p style="font-size: 14px; color: #64748b; margin: 0;">
+                     Le paiement sera automatiquement transféré vers votre wallet après confirmation
+                </p>
+            </div>
+        """
+)
+
+PAYMENT_RECEIVED = EmailTemplate.with_layout(
+    'payment_received',
+    subject=" Paiement reçu - UZEUR Marketplace",
+    layout=STANDARD_LAYOUT,
+    header_title=" Paiement Reçu",
+    header_subtitle="Votre payout a été transféré",
+    content="""
+            <div class="success-box">
+                <h2>Bonjour {seller_name},</h2>
+                <p>Votre paiement a été transféré avec succès vers votre wallet.</p>
+            </div>
+
+            <div class="info-section">
+                <div class="info-item">
+                    <div class="info-label"> Montant reçu</div>
+                    <div class="info-value">{payout_amount}</div>
+                </div>
+
+                <div class="info-item">
+                    <div class="info-label"> Adresse de réception</div>
+                    <div class="info-value" style="word-break: break-all;">{payout_address}</div>
+                </div>
+
+                <div class="info-item">
+                    <div class="info-label"> Date du transfert</div>
+                    <div class="info-value">{transaction_date}</div>
+                </div>
+            </div>
+
+            <div style="text-align: center; margin: 30px 0;">
+                <a href="https://t.me/uzeur_bot" class="cta-button">
+                     Voir l'historique des payouts
+                </a>
+            </div>
+
+            <div style="background: linear-gradient(135deg, rgba(34, 197, 94, 0.1) 0%, rgba(16, 185, 129, 0.1) 100%); padding: 20px; border-radius: 12px; margin-top: 30px; text-align: center;">
+                <p style="font-size: 14px; color: #064e3b; margin: 0;">
+                     Vérifiez votre wallet pour confirmer la réception des fonds
+                </p>
+            </div>
+        """
+)
+
+PRODUCT_ADDED = EmailTemplate.with_layout(
+    'product_added',
+    subject=" Produit ajouté avec succès - UZEUR Marketplace",
+    layout=STANDARD_LAYOUT,
+    header_title=" Produit Ajouté",
+    header_subtitle="Votre produit est en ligne",
+    content="""
+            <div class="success-box">
+                <h2>Bravo {seller_name}!</h2>
+                <p>Votre produit a été ajouté avec succès sur la marketplace.</p>
+            </div>
+
+            <div class="info-section">
+                <div class="info-item">
+                    <div class="info-label"> Nom du produit</div>
+                    <div class="info-value">{product_title}</div>
+                </div>
+
+                <div class="info-item">
+                    <div class="info-label"> Prix</div>
+                    <div class="info-value">{product_price}</div>
+                </div>
+
+                <div class="info-item">
+                    <div class="info-label"> ID produit</div>
+                    <div class="info-value">{product_id}</div>
+                </div>
+            </div>
+
+            <div style="text-align: center; margin: 30px 0;">
+                <a href="https://t.me/uzeur_bot" class="cta-button">
+                     Voir mon catalogue
+                </a>
+            </div>
+
+            <div style="background: linear-gradient(135deg, rgba(139, 92, 246, 0.1) 0%, rgba(236, 72, 153, 0.1) 100%); padding: 20px; border-radius: 12px; margin-top: 30px; text-align: center;">
+                <p style="font-size: 14px; color: #64748b; margin: 0;">
+                     Votre produit est maintenant visible par tous les acheteurs
+                </p>
+            </div>
+        """
+)
+
+PRODUCT_REMOVED = EmailTemplate.with_layout(
+    'product_removed',
+    subject=" Produit supprimé - UZEUR Marketplace",
+    layout=STANDARD_LAYOUT,
+    header_title=" Produit Supprimé",
+    header_subtitle="Le produit a été retiré du catalogue",
+    content="""
+            <div class="alert-box">
+                <h2>Bonjour {seller_name},</h2>
+                <p>Votre produit a été supprimé de la marketplace.</p>
+            </div>
+
+            <div class="info-section">
+                <div class="info-item">
+                    <div class="info-label"> Produit supprimé</div>
+                    <div class="info-value">{product_title}</div>
+                </div>
+
+                <div class="info-item">
+                    <div class="info-label"> ID produit</div>
+                    <div class="info-value">{product_id}</div>
+                </div>
+
+                <div class="info-item">
+                    <div class="info-label"> Raison</div>
+                    <div class="info-value">{reason}</div>
+                </div>
+            </div>
+
+            <div style="text-align: center; margin: 30px 0;">
+                <a href="https://t.me/uzeur_bot" class="cta-button">
+                     Voir mon catalogue
+                </a>
+            </div>
+
+            <div style="background: linear-gradient(135deg, rgba(139, 92, 246, 0.1) 0%, rgba(236, 72, 153, 0.1) 100%); padding: 20px; border-radius: 12px; margin-top: 30px; text-align: center;">
+                <p style="font-size: 14px; color: #64748b; margin: 0;">
+                     Ce produit n'est plus visible par les acheteurs
+                </p>
+            </div>
+        """
+)
+
+NEW_TICKET_ADMIN = EmailTemplate.plain(
+    'new_ticket_admin',
+    subject="Nouveau ticket support - {ticket_id}",
+    text="""
+Nouveau ticket de support créé
+
+ID Ticket: {ticket_id}
+User ID: {user_id}
+Email client: {client_email}
+
+Sujet: {subject}
+
+Message:
+{message}
+
+Vous pouvez répondre directement à l'adresse: {client_email}
+"""
+)
+
+TICKET_CONFIRMATION_CLIENT = EmailTemplate.with_layout(
+    'ticket_confirmation_client',
+    subject="Ticket reçu - {ticket_id}",
+    layout=STANDARD_LAYOUT,
+    header_title=" Ticket Reçu",
+    header_subtitle="Référence : {ticket_id}",
+    content="""
+            <div class="success-box">
+                <h2>Votre ticket a bien été reçu</h2>
+                <p>Merci de nous avoir contactés. Notre équipe support traite votre demande et vous répondra dans les plus brefs délais.</p>
+            </div>
+
+            <div class="info-section">
+                <div class="info-item">
+                    <div class="info-label"> Numéro de ticket</div>
+                    <div class="info-value"><strong>{ticket_id}</strong></div>
+                </div>
+
+                <div class="info-item">
+                    <div class="info-label"> Sujet</div>
+                    <div class="info-value">{subject}</div>
+                </div>
+
+                <div class="info-item">
+                    <div class="info-label"> Votre message</div>
+                    <div class="info-value" style="background: #f9fafb; padding: 15px; border-radius: 8px; white-space: pre-wrap;">{message_excerpt}</div>
+                </div>
+            </div>
+
+            <div style="text-align: center; margin: 30px 0;">
+                <a href="https://t.me/uzeur_bot" class="cta-button">
+                     Voir mes tickets
+                </a>
+            </div>
+
+            <div style="background: linear-gradient(135deg, rgba(59, 130, 246, 0.1) 0%, rgba(37, 99, 235, 0.1) 100%); padding: 20px; border-radius: 12px; margin-top: 30px; text-align: center;">
+                <p style="font-size: 14px; color: #1e40af; margin: 0;">
+                    ⏱ <strong>Délai de réponse habituel</strong> : 24-48 heures<br>
+                    💡 Vous recevrez une notification dès que nous aurons répondu
+                </p>
+            </div>
+        """
+)
+
+SALE_NOTIFICATION_SELLER = EmailTemplate.with_layout(
+    'sale_notification_seller',
+    subject="🎉 Nouvelle vente - {product_title}",
+    layout=STANDARD_LAYOUT,
+    header_title="🎉 Nouvelle Vente !",
+    header_subtitle="Vous avez gagné ${seller_revenue_usd:.2f}",
+    content="""
+            <div class="success-box">
+                <h2>Félicitations {seller_name} !</h2>
+                <p>Vous venez de réaliser une nouvelle vente. Le paiement a été confirmé et le produit a été livré automatiquement à l'acheteur.</p>
+            </div>
+
+            <div class="info-section">
+                <div class="info-item">
+                    <div class="info-label"> Produit vendu</div>
+                    <div class="info-value"><strong>{product_title}</strong></div>
+                </div>
+
+                <div class="info-item">
+                    <div class="info-label"> Prix de vente</div>
+                    <div class="info-value"><strong>${product_price_usd:.2f} USD</strong></div>
+                </div>
+
+                <div class="info-item">
+                    <div class="info-label"> Paiement en</div>
+                    <div class="info-value">{payment_currency}</div>
+                </div>
+
+                <div class="info-item">
+                    <div class="info-label"> Acheteur</div>
+                    <div class="info-value">@{buyer_username}</div>
+                </div>
+
+                <div class="info-item">
+                    <div class="info-label"> Commande</div>
+                    <div class="info-value" style="font-family: monospace; font-size: 12px;">{order_id}</div>
+                </div>
+            </div>
+
+            <div style="background: linear-gradient(135deg, rgba(34, 197, 94, 0.1) 0%, rgba(16, 185, 129, 0.1) 100%); padding: 20px; border-radius: 12px; margin: 20px 0;">
+                <h3 style="margin: 0 0 15px 0; color: #065f46;">💵 Répartition financière</h3>
+                <table style="width: 100%; border-collapse: collapse;">
+                    <tr style="border-bottom: 1px solid #d1fae5;">
+                        <td style="padding: 10px 0; color: #064e3b;">Prix de vente</td>
+                        <td style="padding: 10px 0; text-align: right; color: #064e3b;">${product_price_usd:.2f}</td>
+                    </tr>
+                    <tr style="border-bottom: 1px solid #d1fae5;">
+                        <td style="padding: 10px 0; color: #064e3b;">Commission plateforme (3.14%)</td>
+                        <td style="padding: 10px 0; text-align: right; color: #064e3b;">-${platform_commission_usd:.2f}</td>
+                    </tr>
+                    <tr>
+                        <td style="padding: 10px 0; color: #065f46; font-weight: bold; font-size: 16px;">Votre revenu net</td>
+                        <td style="padding: 10px 0; text-align: right; color: #065f46; font-weight: bold; font-size: 16px;">${seller_revenue_usd:.2f}</td>
+                    </tr>
+                </table>
+            </div>
+
+            <div style="text-align: center; margin: 30px 0;">
+                <a href="https://t.me/uzeur_bot" class="cta-button">
+                     Voir mes statistiques
+                </a>
+            </div>
+
+            <div style="background: linear-gradient(135deg, rgba(59, 130, 246, 0.1) 0%, rgba(37, 99, 235, 0.1) 100%); padding: 20px; border-radius: 12px; margin-top: 30px; text-align: center;">
+                <p style="font-size: 14px; color: #1e40af; margin: 0;">
+                     Vos revenus seront transférés vers votre wallet Solana lors du prochain payout.<br>
+                     Les payouts sont traités manuellement après vérification anti-fraude.
+                </p>
+            </div>
+        """
+)
+
+PURCHASE_CONFIRMATION_BUYER = EmailTemplate.with_layout(
+    'purchase_confirmation_buyer',
+    subject=" Achat confirmé - {product_title}",
+    layout=STANDARD_LAYOUT,
+    header_title=" Achat Confirmé",
+    header_subtitle="Votre produit est prêt",
+    content="""
+            <div class="success-box">
+                <h2>Merci pour votre achat !</h2>
+                <p>Votre paiement a été confirmé avec succès. Votre produit est maintenant disponible dans votre bibliothèque.</p>
+            </div>
+
+            <div class="info-section">
+                <div class="info-item">
+                    <div class="info-label"> Produit acheté</div>
+                    <div class="info-value"><strong>{product_title}</strong></div>
+                </div>
+
+                <div class="info-item">
+                    <div class="info-label"> Vendeur</div>
+                    <div class="info-value">{seller_name}</div>
+                </div>
+
+                <div class="info-item">
+                    <div class="info-label"> Prix du produit</div>
+                    <div class="info-value">${product_price_usd:.2f} USD</div>
+                </div>
+
+                <div class="info-item">
+                    <div class="info-label"> Frais de gestion</div>
+                    <div class="info-value">${platform_commission_usd:.2f} USD</div>
+                </div>
+
+                <div class="info-item" style="border-top: 2px solid #e5e7eb; padding-top: 12px; margin-top: 8px;">
+                    <div class="info-label"> Montant total payé</div>
+                    <div class="info-value"><strong>${total_paid_usd:.2f} USD</strong></div>
+                </div>
+
+                <div class="info-item">
+                    <div class="info-label"> Méthode de paiement</div>
+                    <div class="info-value">{payment_currency}</div>
+                </div>
+
+                <div class="info-item">
+                    <div class="info-label"> Numéro de commande</div>
+                    <div class="info-value" style="font-family: monospace; font-size: 12px;">{order_id}</div>
+                </div>
+            </div>
+
+            <div style="text-align: center; margin: 30px 0;">
+                <a href="https://t.me/uzeur_bot" class="cta-button">
+                    📚 Accéder à ma bibliothèque
+                </a>
+            </div>
+
+            <div style="background: linear-gradient(135deg, rgba(34, 197, 94, 0.1) 0%, rgba(16, 185, 129, 0.1) 100%); padding: 20px; border-radius: 12px; margin-top: 30px;">
+                <h3 style="margin: 0 0 15px 0; color: #065f46;"> Comment télécharger votre produit ?</h3>
+                <ol style="margin: 0; padding-left: 20px; color: #064e3b;">
+                    <li style="margin-bottom: 8px;">Ouvrez le bot Telegram @uzeur_bot</li>
+                    <li style="margin-bottom: 8px;">Cliquez sur "📚 Ma Bibliothèque"</li>
+                    <li style="margin-bottom: 8px;">Sélectionnez votre produit</li>
+                    <li>Cliquez sur " Télécharger" </li>
+                </ol>
+            </div>
+
+            <div style="background: linear-gradient(135deg, rgba(59, 130, 246, 0.1) 0%, rgba(37, 99, 235, 0.1) 100%); padding: 20px; border-radius: 12px; margin-top: 20px; text-align: center;">
+                <p style="font-size: 14px; color: #1e40af; margin: 0;">
+                    💡 <strong>Besoin d'aide ?</strong><br>
+                    Contactez le vendeur directement depuis votre bibliothèque ou créez un ticket support.
+                </p>
+            </div>
+        """
+)
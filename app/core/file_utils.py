@@ -4,12 +4,12 @@ import os
 import logging
 from typing import Optional
 from app.core.settings import settings
-from app.services.b2_storage_service import B2StorageService
+from app.services.b2_storage_service import get_storage_service
 
 logger = logging.getLogger(__name__)
 
 # Initialize B2 service
-b2_service = B2StorageService()
+b2_service = get_storage_service()
 
 async def save_uploaded_file(file_info, filename: str) -> Optional[str]:
     """
@@ -46,34 +46,7 @@ class ImageUtils:
         """
         try:
             with Image.open(image_path) as img:
-                # Convert to RGB if needed (handles RGBA, P, etc.)
-                if img.mode != 'RGB':
-                    img = img.convert('RGB')
-
-                # Calculate resize to fill target size (crop instead of padding)
-                img_ratio = img.width / img.height
-                target_ratio = size[0] / size[1]
-
-                if img_ratio > target_ratio:
-                    # Image is wider - resize based on height, then crop width
-                    new_height = size[1]
-                    new_width = int(new_height * img_ratio)
-                else:
-                    # Image is taller - resize based on width, then crop height
-                    new_width = size[0]
-                    new_height = int(new_width / img_ratio)
-
-                # Resize with BICUBIC for SHARP edges (no blur like LANCZOS)
-                img = img.resize((new_width, new_height), Image.Resampling.BICUBIC)
-
-                # Calculate crop box (center crop)
-                left = (new_width - size[0]) // 2
-                top = (new_height - size[1]) // 2
-                right = left + size[0]
-                bottom = top + size[1]
-
-                # Crop to exact size
-                img = img.crop((left, top, right, bottom))
+                img = ImageUtils._center_crop(img, size)
 
                 # Save with MAXIMUM quality (98 - near lossless)
                 img.save(output_path, 'JPEG', quality=98, optimize=True)
@@ -85,6 +58,52 @@ class ImageUtils:
             logger.error(f"❌ Error generating thumbnail: {e}")
             return False
 
+    @staticmethod
+    def _center_crop(img, size: tuple):
+        """RGB conversion, resize to fill `size` (BICUBIC), then center crop"""
+        # Convert to RGB if needed (handles RGBA, P, etc.)
+        if img.mode != 'RGB':
+            img = img.convert('RGB')
+
+        # Calculate resize to fill target size (crop instead of padding)
+        img_ratio = img.width / img.height
+        target_ratio = size[0] / size[1]
+
+        if img_ratio > target_ratio:
+            # Image is wider - resize based on height, then crop width
+            new_height = size[1]
+            new_width = int(new_height * img_ratio)
+        else:
+            # Image is taller - resize based on width, then crop height
+            new_width = size[0]
+            new_height = int(new_width / img_ratio)
+
+        # Resize with BICUBIC for SHARP edges (no blur like LANCZOS)
+        img = img.resize((new_width, new_height), Image.Resampling.BICUBIC)
+
+        # Calculate crop box (center crop)
+        left = (new_width - size[0]) // 2
+        top = (new_height - size[1]) // 2
+
+        # Crop to exact size
+        return img.crop((left, top, left + size[0], top + size[1]))
+
+    @staticmethod
+    def thumbnail_bytes(image_data: bytes, size: tuple = (1280, 1280)) -> bytes:
+        """
+        Same thumbnail as generate_thumbnail, from an in-memory image (JPEG bytes out)
+
+        CPU-bound: call through asyncio.to_thread from async code.
+
+        Raises:
+            Exception: if the image cannot be decoded
+        """
+        with Image.open(BytesIO(image_data)) as img:
+            img = ImageUtils._center_crop(img, size)
+            buffer = BytesIO()
+            img.save(buffer, 'JPEG', quality=98, optimize=True)
+        return buffer.getvalue()
+
     @staticmethod
     def compress_for_telegram(image_path: str, max_size_kb: int = 3000) -> str:
         """
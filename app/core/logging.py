@@ -1,15 +1,282 @@
 """
 Logging configuration optimisée pour Railway
 
-Changements par rapport à logging.py:
-- StreamHandler utilise explicitement sys.stdout (au lieu de stderr)
-- Railway affichera correctement les niveaux de log (INFO = info, ERROR = error)
-- Logs structurés avec timestamps ISO8601 pour Railway
+- Écritures hors boucle: la racine n'a qu'un QueueHandler (put_nowait dans une file
+  bornée); un QueueListener écrit sur stdout et dans le fichier depuis son propre thread.
+  File pleine = enregistrement abandonné et compté, jamais d'attente sur la boucle.
+- Sortie JSON structurée (LOG_FORMAT=json, défaut) ou texte (LOG_FORMAT=text):
+  une ligne par enregistrement, niveau lisible par Railway, champs extra=... conservés
+- Identifiant de corrélation par update Telegram / requête HTTP (contextvars), ajouté
+  à chaque enregistrement émis pendant son traitement
+- Loggers des chemins chauds: échantillonnage et plafond par seconde par message
+  (HotPathFilter, LOG_SAMPLING); les WARNING et plus ne sont jamais filtrés
+- Formatage paresseux: logger.info("... %s", valeur) n'est formaté que si
+  l'enregistrement passe le niveau et les filtres
 """
+import atexit
+import contextvars
+import copy
+import json
 import logging
-import sys
+import logging.handlers
 import os
-from typing import Optional
+import queue
+import random
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional, Tuple
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Taille de la file entre la boucle et le thread d'écriture
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', '10000'))
+
+# Chemins chauds: {logger: (taux d'échantillonnage, messages max par seconde et par gabarit)}
+# Surcharge: LOG_SAMPLING="logger=taux:max_par_seconde,..." (max vide = pas de plafond)
+DEFAULT_HOT_PATH_LOGGERS: Dict[str, Tuple[float, Optional[float]]] = {
+    'app.integrations.telegram.callback_router': (1.0, 20),
+    'app.integrations.telegram.handlers.buy_handlers': (1.0, 20),
+    'app.integrations.ipn_server': (1.0, 50),
+    'app.core.update_dispatcher': (1.0, 5),
+}
+
+# Traceback figé dans prepare() (format standard, indépendant du formatter des handlers)
+_EXCEPTION_FORMATTER = logging.Formatter()
+
+# Attributs standard d'un LogRecord (tout le reste vient de extra=...)
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# CORRÉLATION
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+_correlation_id: contextvars.ContextVar = contextvars.ContextVar('correlation_id', default=None)
+
+
+def get_correlation_id() -> Optional[str]:
+    return _correlation_id.get()
+
+
+def set_correlation_id(value: Optional[str]) -> contextvars.Token:
+    """Identifiant des logs émis dans le contexte courant (tâche asyncio / thread)"""
+    return _correlation_id.set(value)
+
+
+def reset_correlation_id(token: contextvars.Token):
+    _correlation_id.reset(token)
+
+
+@contextmanager
+def correlation_scope(value: Optional[str]):
+    token = _correlation_id.set(value)
+    try:
+        yield
+    finally:
+        _correlation_id.reset(token)
+
+
+class CorrelationFilter(logging.Filter):
+    """Ajoute correlation_id (exécuté dans le thread émetteur, où le contexte est visible)"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.correlation_id = _correlation_id.get()
+        return True
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# ÉCHANTILLONNAGE DES CHEMINS CHAUDS
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+class HotPathFilter(logging.Filter):
+    """
+    Filtre d'un logger bavard: échantillonnage + plafond par seconde par gabarit
+
+    Le gabarit est record.msg avant formatage ("Routing callback %s"): tous les
+    callbacks partagent le même plafond. Le prochain message accepté porte le
+    nombre de messages supprimés depuis (champ suppressed).
+
+    Args:
+        sample_rate: Fraction des messages conservés (1.0 = tous)
+        max_per_second: Messages max par seconde et par gabarit (None = pas de plafond)
+    """
+
+    def __init__(self, sample_rate: float = 1.0, max_per_second: Optional[float] = None):
+        super().__init__()
+        self.sample_rate = sample_rate
+        self.max_per_second = max_per_second
+        # {gabarit: [jetons, dernière mise à jour, supprimés]}
+        self._buckets: Dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return False
+
+        if self.max_per_second is None:
+            return True
+
+        template = record.msg if isinstance(record.msg, str) else repr(type(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(template)
+            if bucket is None:
+                if len(self._buckets) >= 1000:
+                    self._buckets.clear()
+                bucket = self._buckets[template] = [self.max_per_second, now, 0]
+
+            bucket[0] = min(self.max_per_second, bucket[0] + (now - bucket[1]) * self.max_per_second)
+            bucket[1] = now
+            if bucket[0] < 1:
+                bucket[2] += 1
+                return False
+
+            bucket[0] -= 1
+            if bucket[2]:
+                record.suppressed = bucket[2]
+                bucket[2] = 0
+            return True
+
+
+def _parse_sampling(value: str) -> Dict[str, Tuple[float, Optional[float]]]:
+    """LOG_SAMPLING="logger=taux:max_par_seconde,..." """
+    config = {}
+    for entry in filter(None, (part.strip() for part in value.split(','))):
+        name, _, spec = entry.partition('=')
+        rate, _, max_per_second = spec.partition(':')
+        config[name.strip()] = (float(rate or 1.0), float(max_per_second) if max_per_second else None)
+    return config
+
+
+def configure_sampling(config: Dict[str, Tuple[float, Optional[float]]]):
+    """Remplace le HotPathFilter de chaque logger listé"""
+    for name, (sample_rate, max_per_second) in config.items():
+        target = logging.getLogger(name)
+        for existing in [f for f in target.filters if isinstance(f, HotPathFilter)]:
+            target.removeFilter(existing)
+        target.addFilter(HotPathFilter(sample_rate, max_per_second))
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# FORMAT ET FILE D'ÉCRITURE
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+class JsonFormatter(logging.Formatter):
+    """Une ligne JSON par enregistrement (formatée dans le thread d'écriture)"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and value is not None:
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Format texte historique, suivi de [correlation_id] si présent"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        correlation_id = getattr(record, 'correlation_id', None)
+        return f"{line} [{correlation_id}]" if correlation_id else line
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler qui n'attend jamais: file pleine = enregistrement abandonné (compté)
+
+    prepare() fige le message et le traceback dans le thread émetteur (comme le
+    QueueHandler standard: arguments et frames peuvent changer après l'appel, et un
+    exc_info ne se sérialise pas); la mise en forme est faite par le thread d'écriture.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        if record.args:
+            record.msg = record.getMessage()
+            record.args = None
+        if record.exc_info:
+            record.exc_text = _EXCEPTION_FORMATTER.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_queue_handler: Optional[NonBlockingQueueHandler] = None
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def start_queue_logging(handlers: Iterable[logging.Handler], level: int = logging.INFO,
+                        queue_size: int = LOG_QUEUE_SIZE) -> NonBlockingQueueHandler:
+    """
+    Branche la racine sur un QueueHandler; handlers écrits par le thread du QueueListener
+
+    Returns:
+        NonBlockingQueueHandler: Handler installé sur la racine
+    """
+    global _queue_handler, _listener
+
+    shutdown_logging()
+
+    log_queue = queue.Queue(maxsize=queue_size)
+    _queue_handler = NonBlockingQueueHandler(log_queue)
+    _queue_handler.addFilter(CorrelationFilter())
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+    root_logger = logging.getLogger()
+    root_logger.addHandler(_queue_handler)
+    root_logger.setLevel(level)
+    return _queue_handler
+
+
+def shutdown_logging():
+    """Vide la file puis arrête le thread d'écriture (appelé à la sortie du process)"""
+    global _queue_handler, _listener
+
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
+
+
+def get_logging_stats() -> Dict:
+    if _queue_handler is None:
+        return {'queued': 0, 'dropped': 0}
+    return {'queued': _queue_handler.queue.qsize(), 'dropped': _queue_handler.dropped}
+
+
+atexit.register(shutdown_logging)
 
 
 def configure_logging(settings) -> None:
@@ -28,29 +295,24 @@ def configure_logging(settings) -> None:
     if root_logger.handlers:
         return
 
+    if os.getenv('LOG_FORMAT', 'json').lower() == 'text':
+        formatter = TextFormatter(TEXT_FORMAT)
+    else:
+        formatter = JsonFormatter()
+
     # StreamHandler avec stdout explicite (pas stderr)
     # Cela permet à Railway de différencier INFO vs ERROR correctement
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(logging.INFO)
-    console_handler.setFormatter(logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    ))
+    console_handler.setFormatter(formatter)
 
-    # File handler (reste inchangé)
     file_handler = logging.FileHandler(log_file_path)
     file_handler.setLevel(logging.INFO)
-    file_handler.setFormatter(logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    ))
-
-    logging.basicConfig(
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        level=logging.INFO,
-        handlers=[
-            file_handler,
-            console_handler  # ✅ Utilise stdout au lieu de stderr par défaut
-        ]
-    )
+    file_handler.setFormatter(formatter)
+
+    start_queue_logging([console_handler, file_handler], level=logging.INFO)
+
+    configure_sampling({**DEFAULT_HOT_PATH_LOGGERS, **_parse_sampling(os.getenv('LOG_SAMPLING', ''))})
 
     # Réduire la verbosité de httpx (optionnel)
     # httpx log chaque requête HTTP en INFO, ce qui peut être trop verbeux
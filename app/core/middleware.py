@@ -22,10 +22,6 @@ async def rate_limit_middleware(update: Update, context: ContextTypes.DEFAULT_TY
     Returns:
         bool: True if request allowed, False if rate limited
     """
-    # Skip rate limiting for callback queries (already rate limited by message handler)
-    if update.callback_query:
-        return True
-
     # Get user ID
     user = update.effective_user
     if not user:
@@ -33,17 +29,23 @@ async def rate_limit_middleware(update: Update, context: ContextTypes.DEFAULT_TY
 
     user_id = user.id
 
-    # Check rate limit
-    rate_limiter = get_rate_limiter()
-    is_allowed, remaining = rate_limiter.is_allowed(user_id)
+    # Check rate limit (button presses have their own, larger limit)
+    rate_limiter = get_rate_limiter('callbacks' if update.callback_query else 'messages')
+    decision = rate_limiter.check(user_id)
+    remaining = decision.remaining
+
+    if not decision.allowed:
+        wait_time = decision.retry_after
 
-    if not is_allowed:
-        wait_time = rate_limiter.get_wait_time(user_id)
+        # Limite réellement atteinte (messages ou clics sur les boutons, fenêtre configurée)
+        limit_label = "clics sur les boutons" if rate_limiter.name == 'callbacks' else "messages"
+        window = rate_limiter.window_seconds
+        window_label = "minute" if window == 60 else f"{window:g} secondes"
 
         # Send rate limit message
         rate_limit_message = f"""⚠️ **Trop de requêtes**
 
-Vous avez atteint la limite de {rate_limiter.max_requests} requêtes par minute.
+Vous avez atteint la limite de {rate_limiter.max_requests} {limit_label} par {window_label}.
 
 ⏳ Veuillez patienter **{wait_time} secondes** avant de réessayer.
 
@@ -56,12 +58,13 @@ Vous avez atteint la limite de {rate_limiter.max_requests} requêtes par minute.
             )
         elif update.callback_query:
             await update.callback_query.answer(
-                f"⚠️ Trop de requêtes. Attendez {wait_time}s.",
+                f"⚠️ Limite de {rate_limiter.max_requests} {limit_label} par {window_label} atteinte. "
+                f"Attendez {wait_time}s.",
                 show_alert=True
             )
 
         logger.warning(
-            f"⚠️ Rate limit exceeded - User: {user_id} (@{user.username}), "
+            f"⚠️ Rate limit '{rate_limiter.name}' exceeded - User: {user_id} (@{user.username}), "
             f"Wait time: {wait_time}s, Remaining: {remaining}"
         )
 
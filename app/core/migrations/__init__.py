@@ -0,0 +1,250 @@
+"""
+Schema Migrations - Migrations PostgreSQL versionnées
+Remplace l'exécution de tout le DDL (DatabaseInitService) à chaque démarrage
+
+- Table schema_migrations (version, name, applied_at, duration_ms)
+- Migrations ordonnées dans app/core/migrations/versions/NNNN_description.py
+- Démarrage à froid "déjà à jour" = une seule requête (SELECT MAX(version))
+- Verrou advisory: une seule instance applique les migrations en attente
+- Migrations non transactionnelles (TRANSACTIONAL = False) pour
+  CREATE INDEX CONCURRENTLY: les index sont construits sans bloquer les écritures
+
+Usage:
+    python -m app.core.migrations status
+    python -m app.core.migrations upgrade
+"""
+import importlib
+import logging
+import pkgutil
+import re
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+
+import psycopg2
+import psycopg2.errors
+
+from app.core.db_pool import get_connection, put_connection
+
+logger = logging.getLogger(__name__)
+
+VERSIONS_PACKAGE = 'app.core.migrations.versions'
+# Clé pg_advisory_lock réservée aux migrations
+MIGRATION_LOCK_KEY = 727_001
+_VERSION_FILE_RE = re.compile(r'^(\d{4})_(\w+)$')
+
+
+@dataclass
+class Migration:
+    """Migration chargée depuis versions/"""
+    version: int
+    name: str
+    description: str
+    transactional: bool
+    module: object
+
+    def upgrade(self, cursor, conn):
+        self.module.upgrade(cursor, conn)
+
+
+def load_migrations() -> List[Migration]:
+    """Charge et trie les migrations de versions/ (numéros uniques et croissants)"""
+    package = importlib.import_module(VERSIONS_PACKAGE)
+    migrations = []
+
+    for module_info in pkgutil.iter_modules(package.__path__):
+        match = _VERSION_FILE_RE.match(module_info.name)
+        if not match:
+            continue
+        module = importlib.import_module(f"{VERSIONS_PACKAGE}.{module_info.name}")
+        migrations.append(Migration(
+            version=int(match.group(1)),
+            name=match.group(2),
+            description=getattr(module, 'DESCRIPTION', match.group(2)),
+            transactional=getattr(module, 'TRANSACTIONAL', True),
+            module=module
+        ))
+
+    migrations.sort(key=lambda m: m.version)
+    versions = [m.version for m in migrations]
+    if len(versions) != len(set(versions)):
+        raise RuntimeError(f"Duplicate migration versions in {VERSIONS_PACKAGE}: {versions}")
+
+    return migrations
+
+
+def head_version() -> int:
+    migrations = load_migrations()
+    return migrations[-1].version if migrations else 0
+
+
+def create_index_concurrently(cursor, name: str, table: str, definition: str, where: Optional[str] = None,
+                              include: Optional[str] = None, unique: bool = False):
+    """
+    CREATE INDEX CONCURRENTLY idempotent (à utiliser dans une migration TRANSACTIONAL = False).
+
+    Un build concurrent interrompu laisse un index INVALID: il est supprimé puis reconstruit.
+
+    Args:
+        name: Nom de l'index
+        table: Table indexée
+        definition: Colonnes / expressions, ex: "category, status, created_at DESC"
+        where: Prédicat d'index partiel (optionnel)
+        include: Colonnes couvrantes INCLUDE (optionnel, index-only scans)
+        unique: Index UNIQUE
+    """
+    # to_regclass respecte le search_path (pas de collision avec un autre schéma)
+    cursor.execute('SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(%s)', (name,))
+    row = cursor.fetchone()
+    if row is not None:
+        if row[0]:
+            logger.debug(f"✅ Index {name} already exists")
+            return
+        logger.warning(f"⚠️ Dropping invalid index {name} left by an interrupted build")
+        cursor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {name}')
+
+    sql = f"CREATE {'UNIQUE ' if unique else ''}INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} ({definition})"
+    if include:
+        sql += f" INCLUDE ({include})"
+    if where:
+        sql += f" WHERE {where}"
+
+    start = time.perf_counter()
+    cursor.execute(sql)
+    logger.info(f"✅ Index {name} built concurrently in {(time.perf_counter() - start) * 1000:.0f}ms")
+
+
+class MigrationRunner:
+    """Applique les migrations en attente sur une connexion du pool"""
+
+    def __init__(self, migrations: Optional[List[Migration]] = None):
+        self._migrations = migrations
+
+    @property
+    def migrations(self) -> List[Migration]:
+        if self._migrations is None:
+            self._migrations = load_migrations()
+        return self._migrations
+
+    @staticmethod
+    def _current_version(cursor, conn) -> Optional[int]:
+        """Version appliquée, None si schema_migrations n'existe pas encore"""
+        try:
+            cursor.execute('SELECT MAX(version) FROM schema_migrations')
+            row = cursor.fetchone()
+            conn.commit()
+            return row[0] or 0
+        except psycopg2.errors.UndefinedTable:
+            conn.rollback()
+            return None
+
+    @staticmethod
+    def _ensure_table(cursor, conn):
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                duration_ms INTEGER
+            )
+        ''')
+        conn.commit()
+
+    def run(self) -> int:
+        """
+        Met le schéma à jour.
+
+        Returns:
+            int: Nombre de migrations appliquées (0 si déjà à jour)
+        """
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+
+            # Chemin rapide: une seule requête quand le schéma est à jour
+            current = self._current_version(cursor, conn)
+            head = self.migrations[-1].version if self.migrations else 0
+            if current is not None and current >= head:
+                logger.info(f"✅ Database schema at head (version {current})")
+                return 0
+
+            # Une seule instance migre; les autres attendent puis revérifient
+            cursor.execute('SELECT pg_advisory_lock(%s)', (MIGRATION_LOCK_KEY,))
+            try:
+                self._ensure_table(cursor, conn)
+                current = self._current_version(cursor, conn) or 0
+                pending = [m for m in self.migrations if m.version > current]
+
+                for migration in pending:
+                    self._apply(conn, migration)
+
+                if pending:
+                    logger.info(f"✅ Database schema migrated {current} → {pending[-1].version} "
+                                f"({len(pending)} migration(s))")
+                return len(pending)
+            finally:
+                # Abandonner une éventuelle transaction en échec avant de libérer le verrou
+                conn.rollback()
+                cursor = conn.cursor()
+                cursor.execute('SELECT pg_advisory_unlock(%s)', (MIGRATION_LOCK_KEY,))
+                conn.commit()
+
+        except Exception as e:
+            logger.error(f"❌ Database migration failed: {e}")
+            raise
+        finally:
+            put_connection(conn)
+
+    def _apply(self, conn, migration: Migration):
+        logger.info(f"🗄️  Applying migration {migration.version:04d}_{migration.name}: {migration.description}")
+        start = time.perf_counter()
+
+        if migration.transactional:
+            # DDL + enregistrement de version dans la même transaction
+            cursor = conn.cursor()
+            migration.upgrade(cursor, conn)
+            self._record(cursor, migration, start)
+            conn.commit()
+        else:
+            # CREATE INDEX CONCURRENTLY est interdit dans une transaction
+            conn.commit()
+            conn.autocommit = True
+            try:
+                cursor = conn.cursor()
+                migration.upgrade(cursor, conn)
+                self._record(cursor, migration, start)
+            finally:
+                conn.autocommit = False
+
+    @staticmethod
+    def _record(cursor, migration: Migration, start: float):
+        cursor.execute(
+            '''INSERT INTO schema_migrations (version, name, duration_ms)
+               VALUES (%s, %s, %s)
+               ON CONFLICT (version) DO NOTHING''',
+            (migration.version, migration.name, int((time.perf_counter() - start) * 1000))
+        )
+
+    def status(self) -> dict:
+        """Version courante, head et migrations en attente"""
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            current = self._current_version(cursor, conn)
+            applied = current or 0
+            return {
+                'current_version': current,
+                'head_version': self.migrations[-1].version if self.migrations else 0,
+                'pending': [f"{m.version:04d}_{m.name}" for m in self.migrations if m.version > applied]
+            }
+        finally:
+            put_connection(conn)
+
+
+def run_migrations() -> int:
+    """Point d'entrée du démarrage: applique les migrations en attente"""
+    return MigrationRunner().run()
+
+
+def get_migration_status() -> dict:
+    return MigrationRunner().status()
@@ -0,0 +1,36 @@
+"""
+CLI migrations
+
+Usage:
+    python -m app.core.migrations status
+    python -m app.core.migrations upgrade
+"""
+import logging
+import sys
+
+from app.core.db_pool import init_connection_pool
+from app.core.migrations import get_migration_status, run_migrations
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else 'status'
+    init_connection_pool(min_connections=1, max_connections=2)
+
+    if command == 'upgrade':
+        applied = run_migrations()
+        logger.info(f"✅ {applied} migration(s) applied")
+    elif command == 'status':
+        status = get_migration_status()
+        logger.info(f"📋 Current version: {status['current_version']} / head: {status['head_version']}")
+        for name in status['pending']:
+            logger.info(f"   ⏳ pending: {name}")
+    else:
+        print(__doc__)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,18 @@
+"""
+Baseline: schéma historique de DatabaseInitService (tables, catégories par défaut, triggers)
+
+Idempotent (CREATE ... IF NOT EXISTS): sur une base existante, ne fait
+qu'enregistrer la version 1.
+
+Non transactionnelle: chaque étape de DatabaseInitService valide sa propre
+transaction. Une baseline interrompue est simplement rejouée au démarrage
+suivant (la version n'est enregistrée qu'à la fin).
+"""
+from app.core.database_init import DatabaseInitService
+
+DESCRIPTION = "Baseline schema (tables, default categories, rating triggers)"
+TRANSACTIONAL = False
+
+
+def upgrade(cursor, conn):
+    DatabaseInitService().create_baseline_schema(cursor, conn)
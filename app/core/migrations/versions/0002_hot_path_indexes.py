@@ -0,0 +1,51 @@
+"""
+Index composites / partiels / couvrants alignés sur les requêtes chaudes
+
+- Catalogue produits: category = ? AND status = 'active' ORDER BY created_at DESC
+- Boutique vendeur: seller_user_id = ? ORDER BY created_at DESC
+- Analytics vendeur: seller_user_id = ? AND payment_status = 'completed' AND completed_at >= ?
+  (couvrant: SUM(product_price_usd / seller_revenue_usd) sans lire la table)
+- Bibliothèque / possession: buyer_user_id = ? AND payment_status = 'completed' [AND product_id = ?]
+- Avis: product_id = ? [AND rating = ?] et page d'avis ORDER BY created_at DESC
+
+download_tokens.token est déjà la clé primaire: aucun index supplémentaire.
+Voir QUERY_SHAPES.md et benchmark_query_plans.py.
+"""
+from app.core.migrations import create_index_concurrently
+
+DESCRIPTION = "Hot-path composite, partial and covering indexes (built concurrently)"
+TRANSACTIONAL = False
+
+
+def upgrade(cursor, conn):
+    create_index_concurrently(
+        cursor, 'idx_products_active_category_created', 'products',
+        'category, created_at DESC', where="status = 'active'"
+    )
+    create_index_concurrently(
+        cursor, 'idx_products_seller_created', 'products',
+        'seller_user_id, created_at DESC'
+    )
+    create_index_concurrently(
+        cursor, 'idx_orders_seller_completed', 'orders',
+        'seller_user_id, completed_at',
+        include='product_price_usd, seller_revenue_usd, platform_commission_usd, product_id',
+        where="payment_status = 'completed'"
+    )
+    create_index_concurrently(
+        cursor, 'idx_orders_buyer_completed', 'orders',
+        'buyer_user_id, product_id',
+        include='completed_at, download_count',
+        where="payment_status = 'completed'"
+    )
+    create_index_concurrently(
+        cursor, 'idx_reviews_product_rating', 'reviews',
+        'product_id, rating'
+    )
+    create_index_concurrently(
+        cursor, 'idx_reviews_product_created', 'reviews',
+        'product_id, created_at DESC'
+    )
+
+    # Préfixe de idx_reviews_product_rating: l'index mono-colonne ne sert plus qu'à ralentir les écritures
+    cursor.execute('DROP INDEX CONCURRENTLY IF EXISTS idx_reviews_product')
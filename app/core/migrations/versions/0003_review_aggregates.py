@@ -0,0 +1,96 @@
+"""
+Agrégats d'avis dénormalisés par produit (nombre, somme, histogramme 1-5 étoiles)
+
+- Table product_review_stats (clé primaire product_id: une seule lecture indexée)
+- update_product_rating() devient incrémental: +1/-1 sur l'agrégat au lieu de
+  COUNT/SUM sur tous les avis du produit, puis products.rating / reviews_count
+  recalculés depuis l'agrégat (moyenne pondérée avec les avis importés, inchangée)
+- Backfill depuis reviews (relançable: python backfill_review_stats.py)
+"""
+from app.domain.repositories.review_repo import REVIEW_STATS_BACKFILL_SQL
+
+DESCRIPTION = "Denormalised per-product review aggregates maintained by the rating triggers"
+TRANSACTIONAL = True
+
+
+def upgrade(cursor, conn):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS product_review_stats (
+            product_id TEXT PRIMARY KEY REFERENCES products (product_id) ON DELETE CASCADE,
+            review_count INTEGER NOT NULL DEFAULT 0,
+            rating_sum INTEGER NOT NULL DEFAULT 0,
+            rating_1 INTEGER NOT NULL DEFAULT 0,
+            rating_2 INTEGER NOT NULL DEFAULT 0,
+            rating_3 INTEGER NOT NULL DEFAULT 0,
+            rating_4 INTEGER NOT NULL DEFAULT 0,
+            rating_5 INTEGER NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Même nom de fonction: les triggers existants (insert/update/delete) l'utilisent tels quels
+    cursor.execute('''
+        CREATE OR REPLACE FUNCTION update_product_rating()
+        RETURNS TRIGGER AS $$
+        DECLARE
+            touched TEXT[];
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                touched := ARRAY[NEW.product_id];
+            ELSIF TG_OP = 'DELETE' THEN
+                touched := ARRAY[OLD.product_id];
+            ELSE
+                touched := ARRAY[OLD.product_id, NEW.product_id];
+            END IF;
+
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                UPDATE product_review_stats
+                SET review_count = review_count - 1,
+                    rating_sum = rating_sum - OLD.rating,
+                    rating_1 = rating_1 - (OLD.rating = 1)::int,
+                    rating_2 = rating_2 - (OLD.rating = 2)::int,
+                    rating_3 = rating_3 - (OLD.rating = 3)::int,
+                    rating_4 = rating_4 - (OLD.rating = 4)::int,
+                    rating_5 = rating_5 - (OLD.rating = 5)::int,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE product_id = OLD.product_id;
+            END IF;
+
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO product_review_stats
+                    (product_id, review_count, rating_sum, rating_1, rating_2, rating_3, rating_4, rating_5)
+                VALUES (
+                    NEW.product_id, 1, NEW.rating,
+                    (NEW.rating = 1)::int, (NEW.rating = 2)::int, (NEW.rating = 3)::int,
+                    (NEW.rating = 4)::int, (NEW.rating = 5)::int
+                )
+                ON CONFLICT (product_id) DO UPDATE
+                SET review_count = product_review_stats.review_count + 1,
+                    rating_sum = product_review_stats.rating_sum + EXCLUDED.rating_sum,
+                    rating_1 = product_review_stats.rating_1 + EXCLUDED.rating_1,
+                    rating_2 = product_review_stats.rating_2 + EXCLUDED.rating_2,
+                    rating_3 = product_review_stats.rating_3 + EXCLUDED.rating_3,
+                    rating_4 = product_review_stats.rating_4 + EXCLUDED.rating_4,
+                    rating_5 = product_review_stats.rating_5 + EXCLUDED.rating_5,
+                    updated_at = CURRENT_TIMESTAMP;
+            END IF;
+
+            -- Moyenne pondérée avis importés + avis locaux, depuis l'agrégat (lecture par clé)
+            UPDATE products p
+            SET rating = CASE
+                    WHEN (COALESCE(p.imported_reviews_count, 0) + s.review_count) > 0 THEN
+                        (COALESCE(p.imported_rating, 0.0) * COALESCE(p.imported_reviews_count, 0) + s.rating_sum)
+                        / (COALESCE(p.imported_reviews_count, 0) + s.review_count)
+                    ELSE 0.0
+                END,
+                reviews_count = COALESCE(p.imported_reviews_count, 0) + s.review_count
+            FROM product_review_stats s
+            WHERE s.product_id = p.product_id
+              AND p.product_id = ANY(touched);
+
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    ''')
+
+    cursor.execute(REVIEW_STATS_BACKFILL_SQL)
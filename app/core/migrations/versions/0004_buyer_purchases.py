@@ -0,0 +1,63 @@
+"""
+Projection des achats par acheteur: buyer_purchases (buyer_user_id, product_id) -> dernier achat
+
+- Une ligne par (acheteur, produit) au lieu de GROUP BY + MAX(completed_at) sur orders
+- Maintenue par trigger à la complétion d'une commande (tous les chemins: IPN,
+  vérification manuelle, SQL direct)
+- Index (buyer_user_id, last_purchased_at DESC, product_id DESC): pagination keyset de la bibliothèque
+- Backfill depuis les commandes complétées existantes
+"""
+
+DESCRIPTION = "Per-buyer purchases projection maintained on order completion"
+TRANSACTIONAL = True
+
+
+def upgrade(cursor, conn):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS buyer_purchases (
+            buyer_user_id BIGINT NOT NULL,
+            product_id TEXT NOT NULL REFERENCES products (product_id) ON DELETE CASCADE,
+            order_id TEXT NOT NULL,
+            last_purchased_at TIMESTAMP NOT NULL,
+            PRIMARY KEY (buyer_user_id, product_id)
+        )
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_buyer_purchases_recent
+        ON buyer_purchases (buyer_user_id, last_purchased_at DESC, product_id DESC)
+    ''')
+
+    cursor.execute('''
+        CREATE OR REPLACE FUNCTION record_buyer_purchase()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            INSERT INTO buyer_purchases (buyer_user_id, product_id, order_id, last_purchased_at)
+            VALUES (NEW.buyer_user_id, NEW.product_id, NEW.order_id, COALESCE(NEW.completed_at, CURRENT_TIMESTAMP))
+            ON CONFLICT (buyer_user_id, product_id) DO UPDATE
+            SET order_id = EXCLUDED.order_id,
+                last_purchased_at = EXCLUDED.last_purchased_at
+            WHERE buyer_purchases.last_purchased_at <= EXCLUDED.last_purchased_at;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    ''')
+
+    cursor.execute('''
+        DROP TRIGGER IF EXISTS trigger_record_buyer_purchase ON orders;
+        CREATE TRIGGER trigger_record_buyer_purchase
+        AFTER INSERT OR UPDATE OF payment_status, completed_at ON orders
+        FOR EACH ROW
+        WHEN (NEW.payment_status = 'completed')
+        EXECUTE FUNCTION record_buyer_purchase();
+    ''')
+
+    cursor.execute('''
+        INSERT INTO buyer_purchases (buyer_user_id, product_id, order_id, last_purchased_at)
+        SELECT DISTINCT ON (o.buyer_user_id, o.product_id)
+            o.buyer_user_id, o.product_id, o.order_id, COALESCE(o.completed_at, o.created_at)
+        FROM orders o
+        JOIN products p ON p.product_id = o.product_id
+        WHERE o.payment_status = 'completed'
+        ORDER BY o.buyer_user_id, o.product_id, COALESCE(o.completed_at, o.created_at) DESC
+        ON CONFLICT (buyer_user_id, product_id) DO NOTHING
+    ''')
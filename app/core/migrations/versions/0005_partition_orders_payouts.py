@@ -0,0 +1,109 @@
+"""
+orders et seller_payouts partitionnées par mois sur created_at (PARTITION BY RANGE)
+
+- Table d'origine renommée <table>_unpartitioned, table partitionnée créée à l'identique
+  (LIKE ... INCLUDING DEFAULTS), partitions mensuelles du plus ancien mois à
+  PARTITION_MONTHS_AHEAD mois devant + partition par défaut, copie, suppression
+- Clé primaire étendue à la clé de partition: (order_id, created_at) / (id, created_at)
+- Clés étrangères, index (0001 / 0002) et trigger buyer_purchases (0004) recréés sur le
+  parent: PostgreSQL les propage à chaque partition
+- Séquence seller_payouts_id_seq conservée (détachée puis rattachée à la nouvelle table)
+- Table partition_archives: exports compressés des partitions froides (tâche de rétention)
+
+Transactionnelle: sur échec, les tables d'origine restent en place.
+"""
+from datetime import datetime
+
+from app.core.partitioning import (
+    PARTITION_MONTHS_AHEAD, add_months, create_default_partition,
+    ensure_monthly_partitions, is_partitioned, month_start
+)
+
+DESCRIPTION = "Monthly range partitioning of orders and seller_payouts on created_at"
+TRANSACTIONAL = True
+
+
+def _swap_in_partitioned(cursor, table: str, primary_key: str, foreign_keys: list):
+    """Renomme la table, crée le parent partitionné et ses partitions, copie les lignes"""
+    legacy = f'{table}_unpartitioned'
+
+    cursor.execute(f'ALTER TABLE {table} RENAME TO {legacy}')
+    # Le nom d'index de la clé primaire doit être libéré pour la nouvelle table
+    cursor.execute(f'ALTER TABLE {legacy} RENAME CONSTRAINT {table}_pkey TO {legacy}_pkey')
+    # created_at devient clé de partition (NOT NULL via la clé primaire)
+    cursor.execute(f'UPDATE {legacy} SET created_at = CURRENT_TIMESTAMP WHERE created_at IS NULL')
+
+    cursor.execute(f'''
+        CREATE TABLE {table} (
+            LIKE {legacy} INCLUDING DEFAULTS,
+            PRIMARY KEY ({primary_key})
+        ) PARTITION BY RANGE (created_at)
+    ''')
+    for columns, target in foreign_keys:
+        cursor.execute(f'ALTER TABLE {table} ADD FOREIGN KEY ({columns}) REFERENCES {target} ON DELETE CASCADE')
+
+    cursor.execute(f'SELECT MIN(created_at) FROM {legacy}')
+    oldest = cursor.fetchone()[0] or datetime.now()
+    current = month_start(datetime.now())
+    ensure_monthly_partitions(cursor, table, month_start(oldest), add_months(current, PARTITION_MONTHS_AHEAD))
+    create_default_partition(cursor, table)
+
+    cursor.execute(f'INSERT INTO {table} SELECT * FROM {legacy}')
+
+
+def upgrade(cursor, conn):
+    if not is_partitioned(cursor, 'orders'):
+        _swap_in_partitioned(cursor, 'orders', 'order_id, created_at', [
+            ('buyer_user_id', 'users (user_id)'),
+            ('seller_user_id', 'users (user_id)'),
+            ('product_id', 'products (product_id)'),
+        ])
+        cursor.execute('DROP TABLE orders_unpartitioned')
+
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_orders_buyer ON orders (buyer_user_id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_orders_seller ON orders (seller_user_id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_orders_product ON orders (product_id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_orders_status ON orders (payment_status)')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_orders_seller_completed ON orders (seller_user_id, completed_at)
+            INCLUDE (product_price_usd, seller_revenue_usd, platform_commission_usd, product_id)
+            WHERE payment_status = 'completed'
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_orders_buyer_completed ON orders (buyer_user_id, product_id)
+            INCLUDE (completed_at, download_count)
+            WHERE payment_status = 'completed'
+        ''')
+
+        cursor.execute('''
+            CREATE TRIGGER trigger_record_buyer_purchase
+            AFTER INSERT OR UPDATE OF payment_status, completed_at ON orders
+            FOR EACH ROW
+            WHEN (NEW.payment_status = 'completed')
+            EXECUTE FUNCTION record_buyer_purchase();
+        ''')
+
+    if not is_partitioned(cursor, 'seller_payouts'):
+        # La séquence SERIAL appartient à l'ancienne table: la détacher avant suppression
+        cursor.execute('ALTER SEQUENCE seller_payouts_id_seq OWNED BY NONE')
+        _swap_in_partitioned(cursor, 'seller_payouts', 'id, created_at', [
+            ('seller_user_id', 'users (user_id)'),
+        ])
+        cursor.execute('DROP TABLE seller_payouts_unpartitioned')
+        cursor.execute('ALTER SEQUENCE seller_payouts_id_seq OWNED BY seller_payouts.id')
+
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_payouts_seller ON seller_payouts (seller_user_id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_payouts_status ON seller_payouts (payout_status)')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS partition_archives (
+            partition_name TEXT PRIMARY KEY,
+            parent_table TEXT NOT NULL,
+            range_start DATE NOT NULL,
+            range_end DATE NOT NULL,
+            row_count BIGINT NOT NULL,
+            object_key TEXT NOT NULL,
+            size_bytes BIGINT,
+            archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
@@ -0,0 +1,39 @@
+"""
+Planificateur de maintenance: table scheduled_job_runs + autovacuum des tables de tokens
+
+- scheduled_job_runs: une ligne par tâche planifiée. last_tick est réclamé de façon
+  atomique par l'instance qui exécute l'échéance (un seul exécutant par échéance,
+  même avec plusieurs workers), dernière durée / statut / erreur pour le suivi
+- download_tokens, download_token_redemptions, download_rate_limits: purgées par lots
+  toutes les heures; autovacuum déclenché plus tôt (5 % de lignes mortes au lieu de 20 %)
+  pour réutiliser l'espace libéré au lieu d'étendre la table
+"""
+
+DESCRIPTION = "Scheduled job runs table and autovacuum tuning for token tables"
+TRANSACTIONAL = True
+
+_PURGED_TABLES = ('download_tokens', 'download_token_redemptions', 'download_rate_limits')
+
+
+def upgrade(cursor, conn):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS scheduled_job_runs (
+            job_name TEXT PRIMARY KEY,
+            last_tick TIMESTAMP NOT NULL,
+            last_started_at TIMESTAMP,
+            last_finished_at TIMESTAMP,
+            last_duration_ms DOUBLE PRECISION,
+            last_status TEXT,
+            last_error TEXT,
+            run_count BIGINT NOT NULL DEFAULT 0,
+            failure_count BIGINT NOT NULL DEFAULT 0
+        )
+    ''')
+
+    for table in _PURGED_TABLES:
+        cursor.execute(f'''
+            ALTER TABLE IF EXISTS {table} SET (
+                autovacuum_vacuum_scale_factor = 0.05,
+                autovacuum_analyze_scale_factor = 0.05
+            )
+        ''')
@@ -0,0 +1,55 @@
+"""
+Jobs d'import de boutique (Gumroad) persistés: reprise après redémarrage, résultats hors mémoire
+
+- import_jobs: un job par URL soumise (utilisateur, message de statut, état, progression
+  réelle: pages produit récupérées / covers uploadées)
+- import_job_products: produits scrapés, une ligne par position du carrousel
+  (enriched = page produit déjà récupérée: un job repris ne refait que les pages manquantes)
+- Index partiel des jobs à reprendre (queued / running) et index par utilisateur
+"""
+
+DESCRIPTION = "Persisted shop import jobs and their scraped products"
+TRANSACTIONAL = True
+
+
+def upgrade(cursor, conn):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS import_jobs (
+            job_id TEXT PRIMARY KEY,
+            user_id BIGINT NOT NULL,
+            chat_id BIGINT NOT NULL,
+            status_message_id BIGINT,
+            source_url TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'queued',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            pages_total INTEGER NOT NULL DEFAULT 0,
+            pages_fetched INTEGER NOT NULL DEFAULT 0,
+            covers_total INTEGER NOT NULL DEFAULT 0,
+            covers_uploaded INTEGER NOT NULL DEFAULT 0,
+            product_count INTEGER NOT NULL DEFAULT 0,
+            excluded_products JSONB,
+            error TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            finished_at TIMESTAMP
+        )
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_import_jobs_user
+        ON import_jobs (user_id, created_at DESC)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_import_jobs_pending
+        ON import_jobs (created_at)
+        WHERE status IN ('queued', 'running')
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS import_job_products (
+            job_id TEXT NOT NULL REFERENCES import_jobs (job_id) ON DELETE CASCADE,
+            position INTEGER NOT NULL,
+            product JSONB NOT NULL,
+            enriched BOOLEAN NOT NULL DEFAULT FALSE,
+            PRIMARY KEY (job_id, position)
+        )
+    ''')
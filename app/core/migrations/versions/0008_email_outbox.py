@@ -0,0 +1,48 @@
+"""
+File d'envoi des emails transactionnels (outbox)
+
+- email_outbox: un message par ligne (destinataire, sujet, HTML, texte), statut
+  queued -> sending -> sent | failed, tentatives, prochaine tentative (backoff),
+  dernière erreur, identifiant Mailjet une fois envoyé
+- Index partiel des messages à envoyer (queued, par échéance) et des envois réclamés
+  (sending, par date de réclamation: reprise après un arrêt du serveur)
+- Messages envoyés purgés par lots (tâche planifiée email_outbox_cleanup)
+"""
+
+DESCRIPTION = "Transactional email outbox"
+TRANSACTIONAL = True
+
+
+def upgrade(cursor, conn):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS email_outbox (
+            id BIGSERIAL PRIMARY KEY,
+            to_email TEXT NOT NULL,
+            subject TEXT NOT NULL,
+            html_body TEXT NOT NULL,
+            text_body TEXT,
+            status TEXT NOT NULL DEFAULT 'queued',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            claimed_at TIMESTAMP,
+            last_error TEXT,
+            provider_message_id TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            sent_at TIMESTAMP
+        )
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_email_outbox_due
+        ON email_outbox (next_attempt_at)
+        WHERE status = 'queued'
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_email_outbox_claimed
+        ON email_outbox (claimed_at)
+        WHERE status = 'sending'
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_email_outbox_finished
+        ON email_outbox (created_at)
+        WHERE status IN ('sent', 'failed')
+    ''')
@@ -0,0 +1,28 @@
+"""
+État partagé du rate limiting (GCRA) entre workers
+
+- rate_limit_state: une ligne par (limite nommée, clé) avec son heure d'arrivée
+  théorique (TAT, epoch en secondes); vérification = un seul UPSERT atomique
+- UNLOGGED: état éphémère, pas de WAL (perdu après un crash = limites remises à zéro)
+- Index sur tat: purge des lignes expirées (tâche planifiée rate_limits_cleanup)
+- download_rate_limits supprimée: les liens de téléchargement passent par la limite "downloads"
+"""
+
+DESCRIPTION = "Shared GCRA rate limit state, drop download_rate_limits"
+TRANSACTIONAL = True
+
+
+def upgrade(cursor, conn):
+    cursor.execute('''
+        CREATE UNLOGGED TABLE IF NOT EXISTS rate_limit_state (
+            limit_name TEXT NOT NULL,
+            limit_key TEXT NOT NULL,
+            tat DOUBLE PRECISION NOT NULL,
+            PRIMARY KEY (limit_name, limit_key)
+        )
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_rate_limit_state_tat
+        ON rate_limit_state (tat)
+    ''')
+    cursor.execute('DROP TABLE IF EXISTS download_rate_limits')
@@ -0,0 +1,50 @@
+"""
+Unicité de order_id sur orders partitionnée: registre order_ids
+
+- La clé primaire de orders inclut la clé de partition (order_id, created_at) (0005):
+  elle n'empêche pas deux commandes de même order_id. Un INSERT ... WHERE NOT EXISTS
+  ne suffit pas (deux transactions READ COMMITTED concurrentes passent toutes deux)
+  et parcourt chaque partition
+- order_ids: clé primaire order_id, alimentée par un trigger AFTER INSERT sur orders
+  (propagé à chaque partition): un doublon échoue en unique_violation quel que soit le
+  chemin d'insertion (repository, handlers, SQL direct), via un seul accès d'index
+- Backfill depuis orders; les identifiants des partitions archivées restent réservés
+"""
+
+DESCRIPTION = "order_ids registry enforcing order_id uniqueness across orders partitions"
+TRANSACTIONAL = True
+
+
+def upgrade(cursor, conn):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS order_ids (
+            order_id TEXT PRIMARY KEY,
+            registered_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE OR REPLACE FUNCTION register_order_id()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            INSERT INTO order_ids (order_id) VALUES (NEW.order_id);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    ''')
+
+    cursor.execute('''
+        DROP TRIGGER IF EXISTS trigger_register_order_id ON orders;
+        CREATE TRIGGER trigger_register_order_id
+        AFTER INSERT ON orders
+        FOR EACH ROW
+        EXECUTE FUNCTION register_order_id();
+    ''')
+
+    cursor.execute('''
+        INSERT INTO order_ids (order_id, registered_at)
+        SELECT order_id, MIN(created_at)
+        FROM orders
+        GROUP BY order_id
+        ON CONFLICT (order_id) DO NOTHING
+    ''')
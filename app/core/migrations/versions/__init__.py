@@ -0,0 +1,8 @@
+"""
+Migrations versionnées - un fichier par version: NNNN_description.py
+
+Chaque module définit:
+    DESCRIPTION: str
+    def upgrade(cursor, conn): ...
+    TRANSACTIONAL = True   # False pour CREATE INDEX CONCURRENTLY (autocommit)
+"""
@@ -0,0 +1,516 @@
+"""
+Outbound Messages - File d'envoi Telegram centralisée
+Respecte les limites Telegram (~30 msg/s global, 1 msg/s par chat)
+
+- Token bucket global + espacement minimal par chat
+- Envois concurrents (max_in_flight), jamais deux à la fois pour un même chat:
+  un appel Telegram lent ne retarde pas les autres chats
+- Priorités: une livraison acheteur passe avant une notification marketing
+- Coalescence: plusieurs notifications en attente pour un même vendeur et de
+  même priorité sont fusionnées en un seul message (seul le message coalesçable
+  attend la fenêtre, pas les autres messages du chat); deux messages portant
+  chacun un clavier ne sont jamais fusionnés
+- RetryAfter (429): le chat est mis en pause le temps demandé, le message est re-planifié
+- Métriques de file (taille, attente, envois, échecs) via get_stats()
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+
+from telegram.error import BadRequest, NetworkError, RetryAfter
+
+logger = logging.getLogger(__name__)
+
+# Priorités (plus petit = plus urgent)
+PRIORITY_DELIVERY = 0       # Livraison d'un achat à l'acheteur
+PRIORITY_TRANSACTIONAL = 1  # Paiement confirmé, payout créé...
+PRIORITY_ADMIN = 2          # Rapports admin (cron)
+PRIORITY_MARKETING = 3      # Résumés, jalons, avis
+
+PRIORITY_NAMES = {
+    PRIORITY_DELIVERY: 'delivery',
+    PRIORITY_TRANSACTIONAL: 'transactional',
+    PRIORITY_ADMIN: 'admin',
+    PRIORITY_MARKETING: 'marketing',
+}
+
+TELEGRAM_MAX_MESSAGE_LENGTH = 4096
+COALESCE_SEPARATOR = "\n\n━━━━━━━━━━━━━━━━━━\n\n"
+
+
+@dataclass
+class OutboundMessage:
+    """Message en attente d'envoi"""
+    chat_id: int
+    text: str
+    priority: int = PRIORITY_TRANSACTIONAL
+    parse_mode: Optional[str] = None
+    reply_markup: Any = None
+    disable_web_page_preview: Optional[bool] = None
+    coalesce_key: Optional[str] = None
+    enqueued_at: float = field(default_factory=time.monotonic)
+    # Instant (monotonic) avant lequel le message n'est pas envoyé (fenêtre de coalescence)
+    not_before: float = 0.0
+    attempts: int = 0
+    futures: list = field(default_factory=list)
+
+    def resolve(self, success: bool):
+        for future in self.futures:
+            if not future.done():
+                future.set_result(success)
+
+
+def _retry_after_seconds(error: RetryAfter) -> float:
+    """RetryAfter.retry_after est un int ou un timedelta selon la version de PTB"""
+    retry_after = error.retry_after
+    return retry_after.total_seconds() if hasattr(retry_after, 'total_seconds') else float(retry_after)
+
+
+class OutboundMessageScheduler:
+    """
+    File d'envoi Telegram avec pacing global et par chat.
+
+    Les appelants n'attendent plus Telegram directement: enqueue() rend la main
+    immédiatement, send() attend le résultat (True/False) sans bloquer sur
+    les flood waits des autres chats.
+    """
+
+    def __init__(self, bot, global_rate: float = 30.0, per_chat_interval: float = 1.0,
+                 max_queue: int = 10000, max_retries: int = 3, coalesce_window: float = 2.0,
+                 max_in_flight: int = 30):
+        """
+        Args:
+            bot: telegram.Bot utilisé pour les envois
+            global_rate: Messages par seconde, tous chats confondus
+            per_chat_interval: Délai minimal entre deux messages d'un même chat (s)
+            max_queue: Taille max de la file (les messages marketing sont refusés au-delà)
+            max_retries: Tentatives sur erreur réseau / RetryAfter
+            coalesce_window: Délai pendant lequel une notification coalesçable reste ouverte à la fusion
+            max_in_flight: Appels send_message simultanés (un seul par chat)
+        """
+        self.bot = bot
+        self.global_rate = global_rate
+        self.per_chat_interval = per_chat_interval
+        self.max_queue = max_queue
+        self.max_retries = max_retries
+        self.coalesce_window = coalesce_window
+        self.max_in_flight = max_in_flight
+
+        self._heap: list = []
+        self._seq = itertools.count()
+        # (chat_id, coalesce_key, priority) -> message encore en file
+        self._coalescable: Dict[tuple, OutboundMessage] = {}
+        # chat_id -> instant (monotonic) à partir duquel le chat peut recevoir
+        self._chat_ready_at: Dict[int, float] = {}
+        # chat_id -> envoi en cours (tâche, message)
+        self._in_flight: Dict[int, Tuple[asyncio.Task, OutboundMessage]] = {}
+
+        self._tokens = global_rate
+        self._last_refill = time.monotonic()
+
+        self._wakeup: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+
+        self._stats = {
+            'enqueued': 0,
+            'sent': 0,
+            'failed': 0,
+            'retried': 0,
+            'coalesced': 0,
+            'rejected': 0,
+            'retry_after_events': 0,
+            'total_wait_ms': 0.0,
+            'max_wait_ms': 0.0,
+        }
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+    # CYCLE DE VIE
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+    def start(self):
+        """Démarre le worker dans la boucle courante"""
+        if self._worker and not self._worker.done():
+            return
+        self._wakeup = asyncio.Event()
+        self._worker = asyncio.create_task(self._run(), name="outbound-messages")
+        logger.info(f"📤 Outbound message scheduler started ({self.global_rate:g} msg/s, "
+                    f"{self.per_chat_interval:g}s per chat)")
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None and not self._worker.done()
+
+    async def stop(self, drain_timeout: float = 5.0):
+        """Arrête le worker après avoir tenté de vider la file"""
+        if not self.running:
+            return
+
+        deadline = time.monotonic() + drain_timeout
+        while (self._heap or self._in_flight) and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+
+        in_flight = list(self._in_flight.values())
+        for task, _ in in_flight:
+            task.cancel()
+        await asyncio.gather(*(task for task, _ in in_flight), return_exceptions=True)
+        for _, message in in_flight:
+            message.resolve(False)
+        self._in_flight.clear()
+
+        # Les messages restants sont considérés comme non envoyés
+        while self._heap:
+            _, _, message = heapq.heappop(self._heap)
+            message.resolve(False)
+        self._coalescable.clear()
+
+        logger.info("📤 Outbound message scheduler stopped")
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+    # API
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+    def enqueue(self, chat_id: int, text: str, priority: int = PRIORITY_TRANSACTIONAL,
+                coalesce_key: Optional[str] = None, **kwargs) -> asyncio.Future:
+        """
+        Met un message en file sans attendre Telegram.
+
+        Args:
+            chat_id: Destinataire
+            text: Contenu du message
+            priority: PRIORITY_* (plus petit = plus urgent)
+            coalesce_key: Si défini, fusionne avec un message en attente de même clé et de même priorité pour ce chat
+            **kwargs: parse_mode, reply_markup, disable_web_page_preview
+
+        Returns:
+            Future résolu à True (envoyé) ou False (échec / refusé)
+        """
+        future = asyncio.get_running_loop().create_future()
+
+        if coalesce_key and self._try_coalesce(chat_id, text, coalesce_key, priority, future, kwargs):
+            return future
+
+        if len(self._heap) >= self.max_queue and priority >= PRIORITY_MARKETING:
+            self._stats['rejected'] += 1
+            logger.warning(f"⚠️ Outbound queue full ({len(self._heap)}) - dropping {PRIORITY_NAMES.get(priority)} message to {chat_id}")
+            future.set_result(False)
+            return future
+
+        message = OutboundMessage(
+            chat_id=chat_id,
+            text=text,
+            priority=priority,
+            parse_mode=kwargs.get('parse_mode'),
+            reply_markup=kwargs.get('reply_markup'),
+            disable_web_page_preview=kwargs.get('disable_web_page_preview'),
+            coalesce_key=coalesce_key,
+            futures=[future]
+        )
+
+        if coalesce_key:
+            self._coalescable[(chat_id, coalesce_key, priority)] = message
+            # Laisser une fenêtre aux notifications suivantes pour fusionner
+            message.not_before = message.enqueued_at + self.coalesce_window
+
+        self._push(message)
+        self._stats['enqueued'] += 1
+        return future
+
+    async def send(self, chat_id: int, text: str, priority: int = PRIORITY_TRANSACTIONAL,
+                   coalesce_key: Optional[str] = None, **kwargs) -> bool:
+        """Met en file puis attend le résultat de l'envoi"""
+        return await self.enqueue(chat_id, text, priority=priority, coalesce_key=coalesce_key, **kwargs)
+
+    def get_stats(self) -> Dict:
+        """Métriques de la file (exposées dans /health)"""
+        now = time.monotonic()
+        by_priority = {name: 0 for name in PRIORITY_NAMES.values()}
+        oldest_wait = 0.0
+        for _, _, message in self._heap:
+            by_priority[PRIORITY_NAMES.get(message.priority, str(message.priority))] += 1
+            oldest_wait = max(oldest_wait, now - message.enqueued_at)
+
+        sent = self._stats['sent']
+        return {
+            **{k: v for k, v in self._stats.items() if k != 'total_wait_ms'},
+            'running': self.running,
+            'queued': len(self._heap),
+            'queued_by_priority': by_priority,
+            'in_flight': len(self._in_flight),
+            'oldest_queued_ms': round(oldest_wait * 1000, 1),
+            'avg_wait_ms': round(self._stats['total_wait_ms'] / sent, 1) if sent else 0.0,
+            'max_wait_ms': round(self._stats['max_wait_ms'], 1),
+            'paused_chats': sum(1 for ready_at in self._chat_ready_at.values() if ready_at > now),
+        }
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+    # INTERNE
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+    def _push(self, message: OutboundMessage):
+        heapq.heappush(self._heap, (message.priority, next(self._seq), message))
+        if self._wakeup:
+            self._wakeup.set()
+
+    def _try_coalesce(self, chat_id: int, text: str, coalesce_key: str, priority: int, future, kwargs) -> bool:
+        # Même priorité seulement: un transactionnel ne part pas en retard avec du marketing
+        pending = self._coalescable.get((chat_id, coalesce_key, priority))
+        if pending is None or pending.parse_mode != kwargs.get('parse_mode'):
+            return False
+
+        # Un seul clavier par message: ne pas en perdre un en fusionnant
+        if pending.reply_markup is not None and kwargs.get('reply_markup') is not None:
+            return False
+
+        merged = pending.text + COALESCE_SEPARATOR + text
+        if len(merged) > TELEGRAM_MAX_MESSAGE_LENGTH:
+            return False
+
+        pending.text = merged
+        if kwargs.get('reply_markup') is not None:
+            pending.reply_markup = kwargs['reply_markup']
+        pending.futures.append(future)
+        self._stats['coalesced'] += 1
+        return True
+
+    def _hold_chat(self, chat_id: int, seconds: float):
+        ready_at = time.monotonic() + seconds
+        if self._chat_ready_at.get(chat_id, 0) < ready_at:
+            self._chat_ready_at[chat_id] = ready_at
+
+    def _refill(self, now: float):
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        self._tokens = min(self.global_rate, self._tokens + elapsed * self.global_rate)
+
+    def _pop_ready(self, now: float):
+        """
+        Retire le message le plus prioritaire dont le chat est disponible
+        (pas d'envoi en cours, pause et fenêtre de coalescence écoulées).
+
+        Returns:
+            (message, délai avant le prochain message disponible)
+        """
+        skipped = []
+        message = None
+        next_ready = None
+
+        # Scan borné: les chats en pause ne bloquent pas les autres
+        while self._heap and len(skipped) < 256:
+            entry = heapq.heappop(self._heap)
+            candidate = entry[2]
+            if candidate.chat_id in self._in_flight:
+                # Réveil par _on_delivered
+                skipped.append(entry)
+                continue
+            ready_at = max(self._chat_ready_at.get(candidate.chat_id, 0), candidate.not_before)
+            if ready_at <= now:
+                message = candidate
+                break
+            skipped.append(entry)
+            next_ready = ready_at if next_ready is None else min(next_ready, ready_at)
+
+        for entry in skipped:
+            heapq.heappush(self._heap, entry)
+
+        delay = (next_ready - now) if next_ready is not None else None
+        return message, delay
+
+    async def _run(self):
+        while True:
+            try:
+                now = time.monotonic()
+                self._refill(now)
+
+                if self._tokens < 1:
+                    await asyncio.sleep((1 - self._tokens) / self.global_rate)
+                    continue
+
+                message, delay = (None, None)
+                if len(self._in_flight) < self.max_in_flight:
+                    message, delay = self._pop_ready(now)
+                if message is None:
+                    self._wakeup.clear()
+                    # asyncio.wait plutôt que wait_for: un réveil (fin d'envoi) simultané à
+                    # stop() ne doit pas absorber l'annulation du worker
+                    waiter = asyncio.ensure_future(self._wakeup.wait())
+                    try:
+                        await asyncio.wait({waiter}, timeout=delay if delay is not None else 60)
+                    finally:
+                        waiter.cancel()
+                    continue
+
+                if message.coalesce_key:
+                    coalesce_slot = (message.chat_id, message.coalesce_key, message.priority)
+                    # Un message plus récent a pu prendre la place (claviers incompatibles)
+                    if self._coalescable.get(coalesce_slot) is message:
+                        del self._coalescable[coalesce_slot]
+
+                self._tokens -= 1
+                self._hold_chat(message.chat_id, self.per_chat_interval)
+                task = asyncio.create_task(self._deliver(message))
+                self._in_flight[message.chat_id] = (task, message)
+                task.add_done_callback(lambda _, chat_id=message.chat_id: self._on_delivered(chat_id))
+
+                # Purge des chats revenus disponibles (évite une croissance sans fin)
+                if len(self._chat_ready_at) > 10000:
+                    self._chat_ready_at = {c: t for c, t in self._chat_ready_at.items() if t > now}
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Outbound scheduler loop error: {e}")
+                await asyncio.sleep(1)
+
+    def _on_delivered(self, chat_id: int):
+        self._in_flight.pop(chat_id, None)
+        if self._wakeup:
+            self._wakeup.set()
+
+    async def _deliver(self, message: OutboundMessage):
+        message.attempts += 1
+        try:
+            await self.bot.send_message(
+                chat_id=message.chat_id,
+                text=message.text,
+                parse_mode=message.parse_mode,
+                reply_markup=message.reply_markup,
+                disable_web_page_preview=message.disable_web_page_preview
+            )
+        except RetryAfter as e:
+            retry_after = _retry_after_seconds(e)
+            self._stats['retry_after_events'] += 1
+            logger.warning(f"⏳ Telegram flood wait {retry_after:.0f}s for chat {message.chat_id}")
+            self._hold_chat(message.chat_id, retry_after)
+            # Un 429 signale aussi une saturation globale: vider le bucket
+            self._tokens = 0
+            self._retry(message)
+            return
+        except BadRequest as e:
+            # Erreur définitive (chat introuvable, Markdown invalide...)
+            self._fail(message, e)
+            return
+        except NetworkError as e:
+            logger.warning(f"⚠️ Network error sending to {message.chat_id} (attempt {message.attempts}): {e}")
+            self._hold_chat(message.chat_id, 2 ** message.attempts)
+            self._retry(message)
+            return
+        except Exception as e:
+            # Forbidden (bot bloqué) et autres erreurs: pas de nouvelle tentative
+            self._fail(message, e)
+            return
+
+        wait_ms = (time.monotonic() - message.enqueued_at) * 1000
+        self._stats['sent'] += 1
+        self._stats['total_wait_ms'] += wait_ms
+        self._stats['max_wait_ms'] = max(self._stats['max_wait_ms'], wait_ms)
+        message.resolve(True)
+
+    def _retry(self, message: OutboundMessage):
+        if message.attempts > self.max_retries:
+            self._fail(message, "max retries reached")
+            return
+        self._stats['retried'] += 1
+        self._push(message)
+
+    def _fail(self, message: OutboundMessage, error):
+        self._stats['failed'] += 1
+        logger.error(f"❌ Failed to send message to {message.chat_id}: {error}")
+        message.resolve(False)
+
+
+# Global scheduler instance
+_scheduler: Optional[OutboundMessageScheduler] = None
+
+# Bot des envois directs hors scheduler: (boucle, bot), un seul client HTTP par processus
+_fallback_bot: Optional[Tuple[asyncio.AbstractEventLoop, Any]] = None
+
+
+def init_outbound_scheduler(bot, **kwargs) -> OutboundMessageScheduler:
+    """Crée et démarre le scheduler global (à appeler dans la boucle du serveur)"""
+    global _scheduler
+    _scheduler = OutboundMessageScheduler(bot, **kwargs)
+    _scheduler.start()
+    return _scheduler
+
+
+def get_outbound_scheduler() -> Optional[OutboundMessageScheduler]:
+    """Scheduler global, None s'il n'a pas été démarré (scripts cron)"""
+    return _scheduler
+
+
+async def shutdown_outbound_scheduler():
+    global _scheduler
+    if _scheduler:
+        await _scheduler.stop()
+        _scheduler = None
+
+
+async def send_telegram_message(chat_id: int, text: str, priority: int = PRIORITY_TRANSACTIONAL,
+                                coalesce_key: Optional[str] = None, bot=None, wait: bool = True,
+                                **kwargs) -> bool:
+    """
+    Point d'entrée unique pour les envois sortants.
+
+    Passe par le scheduler global s'il tourne dans cette boucle. Sinon (scripts
+    cron lancés hors serveur), envoie directement avec le bot fourni en
+    respectant un éventuel RetryAfter.
+
+    Args:
+        wait: False = rendre la main dès la mise en file (notifications)
+
+    Returns:
+        bool: True si le message a été envoyé (ou mis en file si wait=False)
+    """
+    scheduler = _scheduler
+    if scheduler and scheduler.running and scheduler._worker.get_loop() is asyncio.get_running_loop():
+        future = scheduler.enqueue(chat_id, text, priority=priority, coalesce_key=coalesce_key, **kwargs)
+        if not wait:
+            return not future.done() or future.result()
+        return await future
+
+    if bot is None:
+        bot = _get_fallback_bot()
+        if bot is None:
+            logger.warning("No bot token available for outbound message")
+            return False
+
+    for attempt in range(3):
+        try:
+            await bot.send_message(chat_id=chat_id, text=text, **kwargs)
+            return True
+        except RetryAfter as e:
+            retry_after = _retry_after_seconds(e)
+            logger.warning(f"⏳ Telegram flood wait {retry_after:.0f}s for chat {chat_id}")
+            await asyncio.sleep(retry_after)
+        except Exception as e:
+            logger.error(f"❌ Failed to send message to {chat_id}: {e}")
+            return False
+
+    return False
+
+
+def _get_fallback_bot():
+    """Bot partagé des envois directs (recréé si la boucle a changé, ex: plusieurs asyncio.run)"""
+    global _fallback_bot
+
+    loop = asyncio.get_running_loop()
+    if _fallback_bot is not None and _fallback_bot[0] is loop:
+        return _fallback_bot[1]
+
+    from telegram import Bot
+    from app.core import settings as core_settings
+    if not core_settings.TELEGRAM_BOT_TOKEN:
+        return None
+
+    _fallback_bot = (loop, Bot(token=core_settings.TELEGRAM_BOT_TOKEN))
+    return _fallback_bot[1]
@@ -0,0 +1,174 @@
+"""
+Partitionnement mensuel natif (PARTITION BY RANGE) de orders et seller_payouts
+
+- Clé de partition: created_at (NOT NULL, immuable). completed_at est NULL tant que la
+  commande est en attente et ne peut pas porter la clé primaire
+- Une partition par mois: <table>_yYYYYmMM, plus <table>_default (filet de sécurité)
+- Création automatique des mois à venir (PARTITION_MONTHS_AHEAD) au démarrage du serveur
+  et par la tâche python -m app.tasks.partition_maintenance
+- Si des lignes sont tombées dans la partition par défaut, elles sont déplacées dans
+  la nouvelle partition avant ATTACH (sinon ATTACH échoue)
+
+Élagage (partition pruning) des requêtes analytiques par completed_at:
+ajouter ORDERS_RECENT_FILTER (borne created_at = fenêtre + délai de paiement maximal).
+Une commande payée plus de ORDER_COMPLETION_WINDOW_DAYS jours après sa création
+sort des graphiques glissants (les totaux globaux, non bornés, restent exacts).
+"""
+import logging
+import os
+import re
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# table -> colonne de partition
+PARTITIONED_TABLES: Dict[str, str] = {
+    'orders': 'created_at',
+    'seller_payouts': 'created_at',
+}
+
+PARTITION_MONTHS_AHEAD = int(os.getenv('PARTITION_MONTHS_AHEAD', '3'))
+ORDER_COMPLETION_WINDOW_DAYS = int(os.getenv('ORDER_COMPLETION_WINDOW_DAYS', '31'))
+# Clé pg_advisory_xact_lock réservée à la maintenance des partitions
+PARTITION_LOCK_KEY = 727_002
+
+_PARTITION_NAME_RE = re.compile(r'^(?P<table>\w+)_y(?P<year>\d{4})m(?P<month>\d{2})$')
+
+
+def orders_recent_filter(days: int, alias: str = '') -> str:
+    """
+    Borne created_at élaguant les partitions pour une fenêtre completed_at >= NOW() - days
+
+    Ex: f"... AND completed_at >= NOW() - INTERVAL '30 days' AND {orders_recent_filter(30)}"
+    """
+    prefix = f'{alias}.' if alias else ''
+    return f"{prefix}created_at >= NOW() - INTERVAL '{days + ORDER_COMPLETION_WINDOW_DAYS} days'"
+
+
+# Fenêtre glissante des graphiques vendeur (30 jours)
+ORDERS_RECENT_FILTER = orders_recent_filter(30)
+
+
+def month_start(value) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_y{month.year:04d}m{month.month:02d}"
+
+
+def default_partition_name(table: str) -> str:
+    return f"{table}_default"
+
+
+def parse_partition_name(name: str) -> Optional[Tuple[str, date]]:
+    """(table, mois) d'une partition mensuelle, None pour la partition par défaut"""
+    match = _PARTITION_NAME_RE.match(name)
+    if not match:
+        return None
+    return match.group('table'), date(int(match.group('year')), int(match.group('month')), 1)
+
+
+def is_partitioned(cursor, table: str) -> bool:
+    cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", (table,))
+    row = cursor.fetchone()
+    return bool(row) and row[0] == 'p'
+
+
+def list_partitions(cursor, table: str) -> List[str]:
+    """Partitions attachées (noms), partition par défaut comprise"""
+    cursor.execute('''
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass(%s)
+        ORDER BY c.relname
+    ''', (table,))
+    return [row[0] for row in cursor.fetchall()]
+
+
+def create_default_partition(cursor, table: str):
+    cursor.execute(
+        f'CREATE TABLE IF NOT EXISTS {default_partition_name(table)} PARTITION OF {table} DEFAULT'
+    )
+
+
+def _create_month_partition(cursor, table: str, month: date):
+    """Crée la partition du mois, en reprenant les lignes de la partition par défaut"""
+    key = PARTITIONED_TABLES[table]
+    name = partition_name(table, month)
+    lower, upper = month.isoformat(), add_months(month, 1).isoformat()
+
+    cursor.execute(f'CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+
+    cursor.execute('SELECT to_regclass(%s)', (default_partition_name(table),))
+    if cursor.fetchone()[0] is not None:
+        cursor.execute(f'''
+            WITH moved AS (
+                DELETE FROM {default_partition_name(table)}
+                WHERE {key} >= %s AND {key} < %s
+                RETURNING *
+            )
+            INSERT INTO {name} SELECT * FROM moved
+        ''', (lower, upper))
+        if cursor.rowcount:
+            logger.warning(f"⚠️ {cursor.rowcount} rows moved from {default_partition_name(table)} to {name}")
+
+    # Les index partitionnés du parent sont créés sur la partition à l'ATTACH
+    cursor.execute(f"ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES FROM ('{lower}') TO ('{upper}')")
+
+
+def ensure_monthly_partitions(cursor, table: str, first_month: date, last_month: date) -> List[str]:
+    """Crée les partitions mensuelles manquantes de first_month à last_month inclus"""
+    created = []
+    month = month_start(first_month)
+    while month <= last_month:
+        name = partition_name(table, month)
+        cursor.execute('SELECT to_regclass(%s)', (name,))
+        if cursor.fetchone()[0] is None:
+            _create_month_partition(cursor, table, month)
+            created.append(name)
+        month = add_months(month, 1)
+    return created
+
+
+def maintain_partitions(months_ahead: int = PARTITION_MONTHS_AHEAD) -> List[str]:
+    """
+    Crée les partitions du mois courant et des months_ahead mois suivants (toutes tables)
+    Sans effet si une autre instance fait la maintenance au même moment.
+
+    Returns:
+        Noms des partitions créées
+    """
+    from app.core.db_pool import get_connection, put_connection
+
+    conn = get_connection()
+    created: List[str] = []
+    try:
+        cursor = conn.cursor()
+        cursor.execute('SELECT pg_try_advisory_xact_lock(%s)', (PARTITION_LOCK_KEY,))
+        if not cursor.fetchone()[0]:
+            conn.rollback()
+            return created
+
+        current = month_start(datetime.now())
+        for table in PARTITIONED_TABLES:
+            if not is_partitioned(cursor, table):
+                continue
+            created.extend(ensure_monthly_partitions(cursor, table, current, add_months(current, months_ahead)))
+
+        conn.commit()
+        for name in created:
+            logger.info(f"🗓️ Partition {name} created")
+        return created
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        put_connection(conn)
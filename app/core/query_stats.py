@@ -0,0 +1,309 @@
+"""
+Query Stats - Instrumentation des requêtes au niveau connexion/curseur
+Chaque cursor.execute() issu du pool est mesuré, sans modifier les appelants
+
+- Empreinte de requête (littéraux remplacés par ?), durée, nombre de lignes, fonction appelante
+- Histogrammes de latence par méthode (repository / handler)
+- Seuil de requête lente (DB_SLOW_QUERY_MS): plan EXPLAIN capturé (sans ré-exécution)
+- Exposé via /metrics (FastAPI, format Prometheus) et /dbstats (admin Telegram)
+
+Coût par requête: un perf_counter, une remontée de frames et un dict update
+sous verrou (quelques microsecondes) - prévu pour rester actif en production.
+"""
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+import psycopg2
+import psycopg2.extensions
+
+logger = logging.getLogger(__name__)
+
+QUERY_STATS_ENABLED = os.getenv('DB_QUERY_STATS', 'true').lower() == 'true'
+SLOW_QUERY_MS = float(os.getenv('DB_SLOW_QUERY_MS', '200'))
+# Un même fingerprint lent n'est EXPLAIN-é qu'une fois par intervalle
+EXPLAIN_INTERVAL_SECONDS = 60
+
+# Bornes supérieures des buckets d'histogramme (ms)
+HISTOGRAM_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, float('inf'))
+
+_MAX_FINGERPRINTS = 4096
+_MAX_SLOW_SAMPLES = 50
+
+_STRING_LITERAL_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST_RE = re.compile(r'\(\s*(?:\?|%s)(?:\s*,\s*(?:\?|%s))+\s*\)')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# Frames à ignorer pour trouver l'appelant réel
+_SKIPPED_MODULES = ('app.core.query_stats', 'psycopg2')
+
+
+def fingerprint(query) -> str:
+    """Forme normalisée d'une requête: littéraux → ?, listes IN compactées, espaces réduits"""
+    if isinstance(query, bytes):
+        query = query.decode('utf-8', 'replace')
+    elif not isinstance(query, str):
+        # psycopg2.sql.Composed etc.
+        query = str(query)
+    text = _STRING_LITERAL_RE.sub('?', query)
+    text = _NUMBER_RE.sub('?', text)
+    text = _IN_LIST_RE.sub('(?)', text)
+    return _WHITESPACE_RE.sub(' ', text).strip()
+
+
+def _caller() -> str:
+    """module.Classe.méthode de la première frame hors instrumentation"""
+    frame = sys._getframe(3)
+    while frame is not None:
+        module = frame.f_globals.get('__name__', '')
+        if not module.startswith(_SKIPPED_MODULES):
+            return f"{module}.{frame.f_code.co_qualname}"
+        frame = frame.f_back
+    return 'unknown'
+
+
+class _Histogram:
+    __slots__ = ('count', 'total_ms', 'max_ms', 'rows', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.buckets = [0] * len(HISTOGRAM_BUCKETS_MS)
+
+    def observe(self, duration_ms: float, rows: int):
+        self.count += 1
+        self.total_ms += duration_ms
+        if duration_ms > self.max_ms:
+            self.max_ms = duration_ms
+        if rows > 0:
+            self.rows += rows
+        for index, bound in enumerate(HISTOGRAM_BUCKETS_MS):
+            if duration_ms <= bound:
+                self.buckets[index] += 1
+                break
+
+    def percentile(self, q: float) -> float:
+        """Approximation par borne supérieure de bucket"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for index, bound in enumerate(HISTOGRAM_BUCKETS_MS):
+            seen += self.buckets[index]
+            if seen >= target:
+                return self.max_ms if bound == float('inf') else float(bound)
+        return self.max_ms
+
+    def as_dict(self) -> Dict:
+        return {
+            'count': self.count,
+            'total_ms': round(self.total_ms, 2),
+            'avg_ms': round(self.total_ms / self.count, 3) if self.count else 0.0,
+            'p95_ms': self.percentile(0.95),
+            'max_ms': round(self.max_ms, 2),
+            'rows': self.rows
+        }
+
+
+class QueryStats:
+    """Agrégats par méthode appelante et par fingerprint"""
+
+    def __init__(self, slow_query_ms: float = SLOW_QUERY_MS):
+        self.slow_query_ms = slow_query_ms
+        self._lock = threading.Lock()
+        self._by_method: Dict[str, _Histogram] = {}
+        self._by_fingerprint: Dict[str, _Histogram] = {}
+        # texte brut -> fingerprint (les requêtes sont en grande majorité des constantes)
+        self._fingerprints: Dict[str, str] = {}
+        self._slow_queries: deque = deque(maxlen=_MAX_SLOW_SAMPLES)
+        self._last_explain: Dict[str, float] = {}
+        self.started_at = time.time()
+
+    def fingerprint_of(self, query) -> str:
+        cached = self._fingerprints.get(query) if isinstance(query, str) else None
+        if cached is not None:
+            return cached
+        result = fingerprint(query)
+        if isinstance(query, str):
+            if len(self._fingerprints) >= _MAX_FINGERPRINTS:
+                self._fingerprints.clear()
+            self._fingerprints[query] = result
+        return result
+
+    def record(self, query, duration_ms: float, rows: int, caller: str) -> str:
+        fp = self.fingerprint_of(query)
+        with self._lock:
+            method_hist = self._by_method.get(caller)
+            if method_hist is None:
+                method_hist = self._by_method[caller] = _Histogram()
+            method_hist.observe(duration_ms, rows)
+
+            fp_hist = self._by_fingerprint.get(fp)
+            if fp_hist is None:
+                if len(self._by_fingerprint) >= _MAX_FINGERPRINTS:
+                    self._by_fingerprint.clear()
+                fp_hist = self._by_fingerprint[fp] = _Histogram()
+            fp_hist.observe(duration_ms, rows)
+        return fp
+
+    def should_explain(self, fp: str) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            last = self._last_explain.get(fp, 0.0)
+            if now - last < EXPLAIN_INTERVAL_SECONDS:
+                return False
+            self._last_explain[fp] = now
+            return True
+
+    def record_slow(self, fp: str, duration_ms: float, rows: int, caller: str, plan: Optional[str]):
+        self._slow_queries.append({
+            'at': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'caller': caller,
+            'duration_ms': round(duration_ms, 1),
+            'rows': rows,
+            'fingerprint': fp,
+            'plan': plan
+        })
+
+    def top_methods(self, limit: int = 10, order_by: str = 'total_ms') -> List[Dict]:
+        with self._lock:
+            rows = [{'method': method, **hist.as_dict()} for method, hist in self._by_method.items()]
+        rows.sort(key=lambda r: r[order_by], reverse=True)
+        return rows[:limit]
+
+    def top_fingerprints(self, limit: int = 10) -> List[Dict]:
+        with self._lock:
+            rows = [{'fingerprint': fp, **hist.as_dict()} for fp, hist in self._by_fingerprint.items()]
+        rows.sort(key=lambda r: r['total_ms'], reverse=True)
+        return rows[:limit]
+
+    def slow_queries(self, limit: int = 10) -> List[Dict]:
+        return list(self._slow_queries)[-limit:][::-1]
+
+    def prometheus_histograms(self) -> List[str]:
+        """Histogrammes par méthode au format d'exposition Prometheus"""
+        lines = [
+            '# HELP db_query_duration_ms Database query duration per calling method',
+            '# TYPE db_query_duration_ms histogram'
+        ]
+        with self._lock:
+            items = [(method, list(hist.buckets), hist.total_ms, hist.count) for method, hist in self._by_method.items()]
+
+        for method, buckets, total_ms, count in items:
+            label = method.replace('\\', '\\\\').replace('"', '\\"')
+            cumulative = 0
+            for bound, bucket_count in zip(HISTOGRAM_BUCKETS_MS, buckets):
+                cumulative += bucket_count
+                le = '+Inf' if bound == float('inf') else f"{bound:g}"
+                lines.append(f'db_query_duration_ms_bucket{{method="{label}",le="{le}"}} {cumulative}')
+            lines.append(f'db_query_duration_ms_sum{{method="{label}"}} {total_ms:.3f}')
+            lines.append(f'db_query_duration_ms_count{{method="{label}"}} {count}')
+        return lines
+
+    def reset(self):
+        with self._lock:
+            self._by_method.clear()
+            self._by_fingerprint.clear()
+            self._slow_queries.clear()
+            self._last_explain.clear()
+            self.started_at = time.time()
+
+
+_stats = QueryStats()
+
+
+def get_query_stats() -> QueryStats:
+    return _stats
+
+
+def _capture_plan(cursor, query, params) -> Optional[str]:
+    """EXPLAIN (sans ANALYZE) d'une requête lente, isolé dans un savepoint"""
+    if not isinstance(query, str) or not query.lstrip().upper().startswith(('SELECT', 'UPDATE', 'DELETE', 'INSERT', 'WITH')):
+        return None
+
+    conn = cursor.connection
+    if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_INTRANS and not conn.autocommit:
+        # Transaction en échec ou état inattendu: ne rien toucher
+        return None
+
+    # Hors autocommit, un EXPLAIN en erreur ne doit pas invalider la transaction de l'appelant
+    use_savepoint = not conn.autocommit
+    explain_cursor = psycopg2.extensions.cursor(conn)
+    try:
+        if use_savepoint:
+            explain_cursor.execute('SAVEPOINT query_stats_explain')
+        explain_cursor.execute('EXPLAIN ' + query, params)
+        plan = '\n'.join(row[0] for row in explain_cursor.fetchall())
+        if use_savepoint:
+            explain_cursor.execute('RELEASE SAVEPOINT query_stats_explain')
+        return plan
+    except Exception as e:
+        if use_savepoint:
+            try:
+                explain_cursor.execute('ROLLBACK TO SAVEPOINT query_stats_explain')
+            except Exception:
+                pass
+        logger.debug(f"EXPLAIN capture failed: {e}")
+        return None
+    finally:
+        explain_cursor.close()
+
+
+class InstrumentedCursorMixin:
+    """Mesure execute()/executemany() puis délègue au curseur psycopg2 d'origine"""
+
+    def execute(self, query, vars=None):
+        start = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            self._record(query, vars, (time.perf_counter() - start) * 1000)
+
+    def executemany(self, query, vars_list):
+        start = time.perf_counter()
+        try:
+            return super().executemany(query, vars_list)
+        finally:
+            self._record(query, None, (time.perf_counter() - start) * 1000, explain=False)
+
+    def _record(self, query, params, duration_ms: float, explain: bool = True):
+        try:
+            caller = _caller()
+            rows = self.rowcount
+            fp = _stats.record(query, duration_ms, rows, caller)
+
+            if duration_ms >= _stats.slow_query_ms and _stats.should_explain(fp):
+                plan = _capture_plan(self, query, params) if explain else None
+                _stats.record_slow(fp, duration_ms, rows, caller, plan)
+                logger.warning(f"🐢 Slow query {duration_ms:.0f}ms in {caller} ({rows} rows): {fp[:200]}")
+        except Exception as e:
+            # L'instrumentation ne doit jamais casser une requête
+            logger.debug(f"Query stats error: {e}")
+
+
+_instrumented_classes: Dict[type, type] = {}
+
+
+def _instrumented(cursor_class: type) -> type:
+    cls = _instrumented_classes.get(cursor_class)
+    if cls is None:
+        cls = type(f"Instrumented{cursor_class.__name__}", (InstrumentedCursorMixin, cursor_class), {})
+        _instrumented_classes[cursor_class] = cls
+    return cls
+
+
+class InstrumentedConnection(psycopg2.extensions.connection):
+    """Connexion dont tous les curseurs (y compris RealDictCursor) sont instrumentés"""
+
+    def cursor(self, *args, **kwargs):
+        cursor_factory = kwargs.get('cursor_factory') or self.cursor_factory or psycopg2.extensions.cursor
+        kwargs['cursor_factory'] = _instrumented(cursor_factory)
+        return super().cursor(*args, **kwargs)
@@ -1,50 +1,270 @@
 """
 Rate Limiter - Protect against spam and DDoS
-Limits requests per user per time window
+Limits requests per key (user) per time window, with several named limits
+
+GCRA (generic cell rate algorithm): each key stores a single float, its
+theoretical arrival time (TAT). A check is one comparison and one store, so
+every operation is O(1) regardless of traffic:
+- a limit of N requests per W seconds emits one request every T = W / N seconds
+  and tolerates a burst of N
+- a request at `now` is allowed when max(TAT, now) + T - W <= now; the TAT then
+  advances by T
+- a TAT in the past is equivalent to no entry at all, so idle keys are evicted
+
+Backends:
+- MemoryRateLimitBackend: per-process, keys kept in recency order and evicted
+  as soon as they expire (bounded memory)
+- PostgresRateLimitBackend: shared between workers, one atomic UPSERT per check
+  on the rate_limit_state table (migration 0009)
+
+Named limits (RATE_LIMIT_BACKEND selects the backend, RATE_LIMIT_BACKEND_<NAME>
+overrides it for one limit):
+- messages: bot messages
+- callbacks: inline button presses
+- downloads: download links (mini-app) - set RATE_LIMIT_BACKEND_DOWNLOADS=postgres
+  to share the hourly quota between workers and keep it across restarts
+- uploads: product files sent to the bot
 """
+import math
+import os
+import threading
 import time
 import logging
-from collections import defaultdict
-from typing import Dict, Tuple
-from datetime import datetime, timedelta
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional, Tuple, Union
 
 logger = logging.getLogger(__name__)
 
+Key = Union[int, str]
+
+# Hard cap per limit for the in-memory backend (least recently seen keys are dropped first)
+RATE_LIMIT_MAX_KEYS = int(os.getenv('RATE_LIMIT_MAX_KEYS', '100000'))
+
+# Expired keys dropped from the front at most per allowed check (amortized O(1))
+EVICTIONS_PER_CHECK = 4
+
+
+class RateLimit(NamedTuple):
+    """Named limit: max_requests per window_seconds, bursts up to max_requests"""
+    name: str
+    max_requests: int
+    window_seconds: float
+
+    @property
+    def emission_interval(self) -> float:
+        return self.window_seconds / self.max_requests
+
+
+class RateLimitDecision(NamedTuple):
+    allowed: bool
+    remaining: int
+    retry_after: int
+
+
+def _decide(limit: RateLimit, tat: Optional[float], now: float) -> Tuple[RateLimitDecision, float]:
+    """
+    GCRA step shared by the backends.
+
+    Returns:
+        (decision, new_tat) - new_tat only needs to be stored when allowed
+    """
+    interval = limit.emission_interval
+    new_tat = max(tat if tat is not None else now, now) + interval
+    allow_at = new_tat - limit.window_seconds
+
+    if allow_at > now:
+        return RateLimitDecision(False, 0, math.ceil(allow_at - now)), new_tat
+
+    remaining = int((now + limit.window_seconds - new_tat) / interval + 1e-9)
+    return RateLimitDecision(True, remaining, 0), new_tat
+
+
+def _peek(limit: RateLimit, tat: Optional[float], now: float) -> RateLimitDecision:
+    """State of a key without consuming a request"""
+    if tat is None or tat <= now:
+        return RateLimitDecision(True, limit.max_requests, 0)
+    decision, _ = _decide(limit, tat, now)
+    if not decision.allowed:
+        return decision
+    return decision._replace(remaining=decision.remaining + 1)
+
+
+class MemoryRateLimitBackend:
+    """
+    In-process GCRA state: {limit name: OrderedDict(key -> TAT)}.
+
+    Keys are moved to the end on each allowed request, so the front holds the
+    least recently seen keys. A key's TAT is at most `window_seconds` after its
+    last allowed request, so expired keys reach the front and are popped by the
+    following checks (up to EVICTIONS_PER_CHECK per check): memory tracks keys active in the last
+    window, never every key seen. Thread-safe.
+    """
+
+    name = 'memory'
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        self._tats: Dict[str, OrderedDict] = {}
+        self._allowed: Dict[RateLimit, Tuple[RateLimitDecision, ...]] = {}
+        self._lock = threading.Lock()
+
+    def hit(self, limit: RateLimit, key: Key) -> RateLimitDecision:
+        # _decide inlined: hot path of every bot update
+        name, max_requests, window = limit
+        interval = window / max_requests
+        now = time.monotonic()
+
+        with self._lock:
+            tats = self._tats.get(name)
+            if tats is None:
+                tats = self._tats[name] = OrderedDict()
+
+            allowed = self._allowed.get(limit)
+            if allowed is None:
+                # Allowed decisions indexed by remaining requests, built once per limit
+                allowed = self._allowed[limit] = tuple(
+                    RateLimitDecision(True, remaining, 0) for remaining in range(max_requests + 1)
+                )
+
+            tat = tats.get(key, now)
+            new_tat = (tat if tat > now else now) + interval
+            allow_at = new_tat - window
+            if allow_at > now:
+                return RateLimitDecision(False, 0, math.ceil(allow_at - now))
+
+            tats[key] = new_tat
+            tats.move_to_end(key)
+            self._evict(tats, now)
+
+        return allowed[int((now + window - new_tat) / interval + 1e-9)]
+
+    def peek(self, limit: RateLimit, key: Key) -> RateLimitDecision:
+        with self._lock:
+            tats = self._tats.get(limit.name)
+            return _peek(limit, tats.get(key) if tats else None, time.monotonic())
+
+    def reset(self, limit: RateLimit, key: Key):
+        with self._lock:
+            tats = self._tats.get(limit.name)
+            if tats:
+                tats.pop(key, None)
+
+    def tracked_keys(self, limit: RateLimit) -> int:
+        return len(self._tats.get(limit.name, ()))
+
+    def _evict(self, tats: OrderedDict, now: float):
+        for _ in range(EVICTIONS_PER_CHECK):
+            oldest_key = next(iter(tats))
+            if tats[oldest_key] > now:
+                break
+            del tats[oldest_key]
+
+        while len(tats) > self.max_keys:
+            tats.popitem(last=False)
+
+
+class PostgresRateLimitBackend:
+    """
+    GCRA state shared by every worker (rate_limit_state, migration 0009).
+
+    An allowed check is a single UPSERT using the database clock; a rejected one
+    reads the current TAT to compute the wait time. Expired rows are purged by
+    the rate_limits_cleanup scheduled job.
+    """
+
+    name = 'postgres'
+
+    def hit(self, limit: RateLimit, key: Key) -> RateLimitDecision:
+        from app.domain.repositories.rate_limit_repo import RateLimitRepository
+
+        allowed, tat, now = RateLimitRepository.hit(
+            limit.name, str(key), limit.emission_interval, limit.window_seconds
+        )
+        if allowed:
+            remaining = int((now + limit.window_seconds - tat) / limit.emission_interval + 1e-9)
+            return RateLimitDecision(True, remaining, 0)
+
+        decision, _ = _decide(limit, tat, now)
+        return decision
+
+    def peek(self, limit: RateLimit, key: Key) -> RateLimitDecision:
+        from app.domain.repositories.rate_limit_repo import RateLimitRepository
+
+        tat, now = RateLimitRepository.get_tat(limit.name, str(key))
+        return _peek(limit, tat, now)
+
+    def reset(self, limit: RateLimit, key: Key):
+        from app.domain.repositories.rate_limit_repo import RateLimitRepository
+        RateLimitRepository.reset(limit.name, str(key))
+
+    def tracked_keys(self, limit: RateLimit) -> Optional[int]:
+        return None
+
+
+RateLimitBackend = Union[MemoryRateLimitBackend, PostgresRateLimitBackend]
+
 
 class RateLimiter:
     """
-    In-memory rate limiter with sliding window.
+    One named limit bound to a backend.
 
     Features:
-    - Per-user rate limiting
-    - Configurable window and max requests
-    - Automatic cleanup of old entries
-    - Thread-safe (for single process)
+    - O(1) checks (GCRA), bounded memory
+    - Same interface as the former sliding-window limiter (is_allowed, get_wait_time...)
+    - check() returns the full decision (remaining requests, retry delay)
     """
 
-    def __init__(self, max_requests: int = 10, window_seconds: int = 60):
+    def __init__(self, max_requests: int = 10, window_seconds: int = 60,
+                 name: str = 'messages', backend: Optional[RateLimitBackend] = None):
         """
         Initialize rate limiter.
 
         Args:
-            max_requests: Maximum requests allowed per window
+            max_requests: Maximum requests allowed per window (also the burst size)
             window_seconds: Time window in seconds
+            name: Limit name (state is kept per name)
+            backend: State backend (default: get_rate_limit_backend(name))
         """
-        self.max_requests = max_requests
-        self.window_seconds = window_seconds
+        self.limit = RateLimit(name, max_requests, window_seconds)
+        self.backend = backend or get_rate_limit_backend(name)
+        self._allowed = 0
+        self._denied = 0
+
+        logger.info(
+            f"🛡️ Rate limiter '{name}' initialized: {max_requests} requests / {window_seconds}s "
+            f"per user ({self.backend.name})"
+        )
 
-        # Store: {user_id: [(timestamp1, timestamp2, ...)]}
-        self._requests: Dict[int, list] = defaultdict(list)
+    @property
+    def name(self) -> str:
+        return self.limit.name
 
-        # Last cleanup timestamp
-        self._last_cleanup = time.time()
+    @property
+    def max_requests(self) -> int:
+        return self.limit.max_requests
 
-        # Cleanup interval (5 minutes)
-        self._cleanup_interval = 300
+    @property
+    def window_seconds(self) -> float:
+        return self.limit.window_seconds
 
-        logger.info(f"🛡️ Rate limiter initialized: {max_requests} requests / {window_seconds}s per user")
+    def check(self, key: Key) -> RateLimitDecision:
+        """
+        Consume one request for key.
+
+        Returns:
+            RateLimitDecision: (allowed, remaining, retry_after seconds)
+        """
+        decision = self.backend.hit(self.limit, key)
+        if decision.allowed:
+            self._allowed += 1
+        else:
+            self._denied += 1
+            logger.warning(
+                f"⚠️ Rate limit '{self.name}' exceeded for {key}: retry in {decision.retry_after}s"
+            )
+        return decision
 
-    def is_allowed(self, user_id: int) -> Tuple[bool, int]:
+    def is_allowed(self, user_id: Key) -> Tuple[bool, int]:
         """
         Check if user is allowed to make a request.
 
@@ -54,36 +274,10 @@ class RateLimiter:
         Returns:
             tuple: (is_allowed: bool, remaining_requests: int)
         """
-        current_time = time.time()
+        decision = self.check(user_id)
+        return decision.allowed, decision.remaining
 
-        # Periodic cleanup
-        self._maybe_cleanup()
-
-        # Get user's request timestamps
-        timestamps = self._requests[user_id]
-
-        # Remove timestamps outside window
-        cutoff_time = current_time - self.window_seconds
-        timestamps = [ts for ts in timestamps if ts > cutoff_time]
-
-        # Update cleaned timestamps
-        self._requests[user_id] = timestamps
-
-        # Check if limit exceeded
-        if len(timestamps) >= self.max_requests:
-            remaining = 0
-            is_allowed = False
-            logger.warning(f"⚠️ Rate limit exceeded for user {user_id}: {len(timestamps)}/{self.max_requests} requests")
-        else:
-            # Allow request and record timestamp
-            timestamps.append(current_time)
-            self._requests[user_id] = timestamps
-            remaining = self.max_requests - len(timestamps)
-            is_allowed = True
-
-        return is_allowed, remaining
-
-    def get_wait_time(self, user_id: int) -> int:
+    def get_wait_time(self, user_id: Key) -> int:
         """
         Get time in seconds user must wait before next request.
 
@@ -93,34 +287,19 @@ class RateLimiter:
         Returns:
             int: Seconds to wait (0 if allowed now)
         """
-        current_time = time.time()
-        timestamps = self._requests.get(user_id, [])
-
-        if not timestamps or len(timestamps) < self.max_requests:
-            return 0
-
-        # Time until oldest request expires
-        cutoff_time = current_time - self.window_seconds
-        oldest_timestamp = min(timestamps)
+        return self.backend.peek(self.limit, user_id).retry_after
 
-        if oldest_timestamp <= cutoff_time:
-            return 0
-
-        wait_time = int(oldest_timestamp - cutoff_time) + 1
-        return wait_time
-
-    def reset_user(self, user_id: int):
+    def reset_user(self, user_id: Key):
         """
         Reset rate limit for specific user.
 
         Args:
             user_id: Telegram user ID
         """
-        if user_id in self._requests:
-            del self._requests[user_id]
-            logger.info(f"🔄 Rate limit reset for user {user_id}")
+        self.backend.reset(self.limit, user_id)
+        logger.info(f"🔄 Rate limit '{self.name}' reset for user {user_id}")
 
-    def get_user_stats(self, user_id: int) -> Dict:
+    def get_user_stats(self, user_id: Key) -> Dict:
         """
         Get statistics for specific user.
 
@@ -130,102 +309,103 @@ class RateLimiter:
         Returns:
             dict: User rate limit statistics
         """
-        current_time = time.time()
-        cutoff_time = current_time - self.window_seconds
-
-        timestamps = self._requests.get(user_id, [])
-        active_timestamps = [ts for ts in timestamps if ts > cutoff_time]
-
+        decision = self.backend.peek(self.limit, user_id)
         return {
             'user_id': user_id,
-            'requests_in_window': len(active_timestamps),
+            'limit': self.name,
             'max_requests': self.max_requests,
-            'remaining_requests': max(0, self.max_requests - len(active_timestamps)),
+            'remaining_requests': decision.remaining,
             'window_seconds': self.window_seconds,
-            'wait_time': self.get_wait_time(user_id)
+            'wait_time': decision.retry_after
         }
 
     def get_global_stats(self) -> Dict:
         """
-        Get global rate limiter statistics.
+        Get global rate limiter statistics (counters kept by this process).
 
         Returns:
             dict: Global statistics
         """
-        current_time = time.time()
-        cutoff_time = current_time - self.window_seconds
-
-        total_users = len(self._requests)
-        active_users = 0
-        total_requests = 0
-
-        for user_id, timestamps in self._requests.items():
-            active_timestamps = [ts for ts in timestamps if ts > cutoff_time]
-            if active_timestamps:
-                active_users += 1
-                total_requests += len(active_timestamps)
-
         return {
-            'total_users_tracked': total_users,
-            'active_users_in_window': active_users,
-            'total_requests_in_window': total_requests,
+            'limit': self.name,
+            'backend': self.backend.name,
+            'total_users_tracked': self.backend.tracked_keys(self.limit),
+            'allowed_requests': self._allowed,
+            'denied_requests': self._denied,
             'max_requests_per_user': self.max_requests,
             'window_seconds': self.window_seconds
         }
 
-    def _maybe_cleanup(self):
-        """
-        Periodically clean up old entries to prevent memory leak.
-        """
-        current_time = time.time()
 
-        if current_time - self._last_cleanup < self._cleanup_interval:
-            return
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# NAMED LIMITS
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 
-        logger.info("🧹 Running rate limiter cleanup...")
+# Default (max_requests, window_seconds) per limit, overridden by init_rate_limiter / register_rate_limit
+DEFAULT_LIMITS = {
+    'messages': (10, 60),
+    'callbacks': (30, 60),
+    'downloads': (10, 3600),
+    'uploads': (20, 3600),
+}
 
-        cutoff_time = current_time - self.window_seconds
-        users_to_remove = []
+_backends: Dict[str, RateLimitBackend] = {}
+_rate_limiters: Dict[str, RateLimiter] = {}
 
-        for user_id, timestamps in self._requests.items():
-            # Remove old timestamps
-            active_timestamps = [ts for ts in timestamps if ts > cutoff_time]
 
-            if active_timestamps:
-                self._requests[user_id] = active_timestamps
-            else:
-                # No active timestamps, mark for removal
-                users_to_remove.append(user_id)
+def get_rate_limit_backend(name: Optional[str] = None) -> RateLimitBackend:
+    """
+    Backend of a named limit (lazy init, one shared instance per backend kind).
+
+    RATE_LIMIT_BACKEND_<NAME>, then RATE_LIMIT_BACKEND: memory (default) keeps state
+    per process, off the database, and resets it on restart; postgres shares it
+    between workers and survives restarts at the cost of one UPSERT per check.
+    """
+    kind = (
+        (name and os.getenv(f'RATE_LIMIT_BACKEND_{name.upper()}'))
+        or os.getenv('RATE_LIMIT_BACKEND', 'memory')
+    ).lower()
 
-        # Remove users with no active timestamps
-        for user_id in users_to_remove:
-            del self._requests[user_id]
+    backend = _backends.get(kind)
+    if backend is None:
+        backend = PostgresRateLimitBackend() if kind == 'postgres' else MemoryRateLimitBackend()
+        _backends[kind] = backend
 
-        self._last_cleanup = current_time
+    return backend
 
-        if users_to_remove:
-            logger.info(f"✅ Cleaned up {len(users_to_remove)} inactive users from rate limiter")
 
+def register_rate_limit(name: str, max_requests: int, window_seconds: int) -> RateLimiter:
+    """
+    Create (or replace) a named limit on its backend (get_rate_limit_backend(name)).
 
-# Global rate limiter instance
-_rate_limiter: RateLimiter = None
+    Returns:
+        RateLimiter: The registered limiter
+    """
+    _rate_limiters[name] = RateLimiter(max_requests, window_seconds, name=name)
+    return _rate_limiters[name]
 
 
 def init_rate_limiter(max_requests: int = 10, window_seconds: int = 60):
     """
-    Initialize global rate limiter.
+    Initialize global rate limiters.
 
     Args:
-        max_requests: Maximum requests per window
+        max_requests: Maximum messages per window
         window_seconds: Time window in seconds
+
+    The other named limits (callbacks, downloads, uploads) get their defaults
+    unless already registered.
     """
-    global _rate_limiter
-    _rate_limiter = RateLimiter(max_requests, window_seconds)
+    register_rate_limit('messages', max_requests, window_seconds)
+
+    for name, (limit_requests, limit_window) in DEFAULT_LIMITS.items():
+        if name not in _rate_limiters:
+            register_rate_limit(name, limit_requests, limit_window)
 
 
-def get_rate_limiter() -> RateLimiter:
+def get_rate_limiter(name: str = 'messages') -> RateLimiter:
     """
-    Get global rate limiter instance.
+    Get a named global rate limiter.
 
     Returns:
         RateLimiter: Global rate limiter
@@ -233,12 +413,12 @@ def get_rate_limiter() -> RateLimiter:
     Raises:
         RuntimeError: If rate limiter not initialized
     """
-    global _rate_limiter
+    limiter = _rate_limiters.get(name)
 
-    if _rate_limiter is None:
-        raise RuntimeError("Rate limiter not initialized. Call init_rate_limiter() first.")
+    if limiter is None:
+        raise RuntimeError(f"Rate limiter '{name}' not initialized. Call init_rate_limiter() first.")
 
-    return _rate_limiter
+    return limiter
 
 
 # Decorator for rate-limited functions
@@ -261,10 +441,10 @@ def rate_limit(func):
         user_id = update.effective_user.id
         rate_limiter = get_rate_limiter()
 
-        is_allowed, remaining = rate_limiter.is_allowed(user_id)
+        decision = rate_limiter.check(user_id)
 
-        if not is_allowed:
-            wait_time = rate_limiter.get_wait_time(user_id)
+        if not decision.allowed:
+            wait_time = decision.retry_after
 
             # Send rate limit message
             rate_limit_message = f"""⚠️ **Trop de requêtes**
@@ -0,0 +1,492 @@
+"""
+Planificateur de maintenance en process (démarré par le lifespan FastAPI)
+
+- Tâches cron (5 champs: minute heure jour mois jour-de-semaine, ou @hourly / @daily /
+  @weekly / @monthly), heure locale du serveur, avec jitter aléatoire par tâche
+- Un seul exécutant par échéance, même avec plusieurs workers ou répliques:
+    pg_try_advisory_lock(SCHEDULER_LOCK_CLASS, crc32(nom)) empêche deux exécutions
+    simultanées, la réclamation atomique de l'échéance dans scheduled_job_runs
+    empêche une seconde exécution de la même échéance après la fin de la première
+- Tâches synchrones exécutées dans un thread, coroutines dans la boucle du serveur
+- Pas de rattrapage: une échéance manquée (serveur arrêté, tâche trop longue) est sautée
+- Métriques par tâche (exécutions, échecs, sauts, durées) via get_stats() et
+  prometheus_lines(); dernier statut partagé entre instances dans scheduled_job_runs
+
+Tâches enregistrées au démarrage (register_maintenance_jobs), désactivables par
+SCHEDULER_DISABLED_JOBS=nom1,nom2 ou globalement par SCHEDULER_ENABLED=false.
+"""
+import asyncio
+import logging
+import os
+import random
+import shutil
+import time
+import zlib
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Callable, Dict, FrozenSet, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SCHEDULER_ENABLED = os.getenv('SCHEDULER_ENABLED', 'true').lower() == 'true'
+SCHEDULER_DISABLED_JOBS = frozenset(
+    name.strip() for name in os.getenv('SCHEDULER_DISABLED_JOBS', '').split(',') if name.strip()
+)
+DEFAULT_JITTER_SECONDS = float(os.getenv('SCHEDULER_JITTER_SECONDS', '30'))
+
+# Classe de verrou consultatif (clé à deux entiers): 727_001 migrations, 727_002 partitions
+SCHEDULER_LOCK_CLASS = 727_003
+
+# Réveil au plus toutes les 5 min pour suivre l'horloge murale (changement d'heure, dérive)
+_MAX_SLEEP_SECONDS = 300
+
+DURATION_BUCKETS_SECONDS = (0.1, 0.5, 1, 5, 15, 60, 300, 900, 3600, float('inf'))
+
+_CRON_ALIASES = {
+    '@hourly': '0 * * * *',
+    '@daily': '0 0 * * *',
+    '@weekly': '0 0 * * 0',
+    '@monthly': '0 0 1 * *',
+}
+
+
+class CronSchedule:
+    """Expression cron à 5 champs (listes, intervalles, pas: '*/15', '1-5', '0,30')"""
+
+    _BOUNDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+    def __init__(self, expression: str):
+        self.expression = expression
+        fields = _CRON_ALIASES.get(expression.strip(), expression).split()
+        if len(fields) != 5:
+            raise ValueError(f"Invalid cron expression (5 fields expected): {expression!r}")
+
+        minutes, hours, days, months, weekdays = (
+            self._parse_field(token, low, high) for token, (low, high) in zip(fields, self._BOUNDS)
+        )
+        self.minutes = minutes
+        self.hours = hours
+        self.days = days
+        self.months = months
+        # 0 et 7 = dimanche
+        self.weekdays = frozenset(day % 7 for day in weekdays)
+        # Sémantique cron: jour du mois OU jour de semaine si les deux sont restreints
+        self._days_restricted = fields[2] != '*'
+        self._weekdays_restricted = fields[4] != '*'
+
+    @staticmethod
+    def _parse_field(token: str, low: int, high: int) -> FrozenSet[int]:
+        values = set()
+        for part in token.split(','):
+            step = 1
+            if '/' in part:
+                part, step_text = part.split('/', 1)
+                step = int(step_text)
+                if step <= 0:
+                    raise ValueError(f"Invalid cron step: {token!r}")
+
+            if part == '*':
+                start, end = low, high
+            elif '-' in part:
+                start, end = (int(value) for value in part.split('-', 1))
+            else:
+                start = int(part)
+                end = high if step > 1 else start
+
+            if start < low or end > high or start > end:
+                raise ValueError(f"Cron field out of range [{low}-{high}]: {token!r}")
+            values.update(range(start, end + 1, step))
+        return frozenset(values)
+
+    def _day_matches(self, moment: datetime) -> bool:
+        in_days = moment.day in self.days
+        # datetime.weekday(): lundi = 0, cron: dimanche = 0
+        in_weekdays = (moment.weekday() + 1) % 7 in self.weekdays
+        if self._days_restricted and self._weekdays_restricted:
+            return in_days or in_weekdays
+        return in_days and in_weekdays
+
+    def next_after(self, moment: datetime) -> datetime:
+        """Première échéance strictement postérieure à moment (à la minute)"""
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        # Borne: 5 ans de mois / jours / heures suffisent pour toute expression valide
+        for _ in range(100_000):
+            if candidate.month not in self.months:
+                year, month = divmod(candidate.month, 12)
+                candidate = candidate.replace(year=candidate.year + year, month=month + 1,
+                                              day=1, hour=0, minute=0)
+            elif not self._day_matches(candidate):
+                candidate = candidate.replace(hour=0, minute=0) + timedelta(days=1)
+            elif candidate.hour not in self.hours:
+                candidate = candidate.replace(minute=0) + timedelta(hours=1)
+            elif candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+            else:
+                return candidate
+        raise ValueError(f"Cron expression never matches: {self.expression!r}")
+
+    def __repr__(self) -> str:
+        return f"CronSchedule({self.expression!r})"
+
+
+@dataclass
+class ScheduledJob:
+    """Tâche planifiée et ses métriques locales"""
+    name: str
+    schedule: CronSchedule
+    func: Callable
+    jitter_seconds: float = DEFAULT_JITTER_SECONDS
+    next_tick: Optional[datetime] = None
+    running: bool = False
+    runs: int = 0
+    failures: int = 0
+    skipped: int = 0
+    last_status: Optional[str] = None
+    last_error: Optional[str] = None
+    last_started_at: Optional[float] = None
+    last_duration_ms: Optional[float] = None
+    max_duration_ms: float = 0.0
+    total_duration_ms: float = 0.0
+    buckets: List[int] = field(default_factory=lambda: [0] * len(DURATION_BUCKETS_SECONDS))
+
+    @property
+    def lock_key(self) -> int:
+        """Second entier du verrou consultatif (int4 positif stable entre processus)"""
+        return zlib.crc32(self.name.encode('utf-8')) & 0x7FFFFFFF
+
+    def observe(self, duration_ms: float, status: str, error: Optional[str] = None):
+        self.last_status = status
+        self.last_error = error
+        self.last_duration_ms = duration_ms
+        self.max_duration_ms = max(self.max_duration_ms, duration_ms)
+        self.total_duration_ms += duration_ms
+        self.runs += 1
+        if status == 'failed':
+            self.failures += 1
+        for index, bound in enumerate(DURATION_BUCKETS_SECONDS):
+            if duration_ms / 1000 <= bound:
+                self.buckets[index] += 1
+                break
+
+
+class MaintenanceScheduler:
+    """Exécute les tâches enregistrées à leurs échéances, une boucle asyncio par tâche"""
+
+    def __init__(self, disabled_jobs: FrozenSet[str] = SCHEDULER_DISABLED_JOBS):
+        self.disabled_jobs = disabled_jobs
+        self._jobs: Dict[str, ScheduledJob] = {}
+        self._tasks: List[asyncio.Task] = []
+
+    def register(self, name: str, cron: str, func: Callable,
+                 jitter_seconds: float = DEFAULT_JITTER_SECONDS) -> Optional[ScheduledJob]:
+        """
+        Enregistre une tâche (fonction synchrone ou coroutine, sans argument)
+
+        Returns:
+            La tâche, ou None si elle est désactivée par SCHEDULER_DISABLED_JOBS
+        """
+        if name in self._jobs:
+            raise ValueError(f"Job {name!r} already registered")
+        if name in self.disabled_jobs:
+            logger.info(f"⏭️ Scheduled job {name} disabled")
+            return None
+
+        job = ScheduledJob(name=name, schedule=CronSchedule(cron), func=func, jitter_seconds=jitter_seconds)
+        self._jobs[name] = job
+        if self.running:
+            self._tasks.append(asyncio.create_task(self._job_loop(job), name=f"scheduler-{name}"))
+        return job
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+    # BOUCLES / EXÉCUTION
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+    async def _job_loop(self, job: ScheduledJob):
+        while True:
+            tick = job.schedule.next_after(datetime.now())
+            job.next_tick = tick
+            fire_at = tick + timedelta(seconds=random.uniform(0, job.jitter_seconds))
+
+            while True:
+                remaining = (fire_at - datetime.now()).total_seconds()
+                if remaining <= 0:
+                    break
+                await asyncio.sleep(min(remaining, _MAX_SLEEP_SECONDS))
+
+            await self._execute(job, tick)
+
+    def _claim(self, job: ScheduledJob, tick: datetime):
+        """
+        Verrou consultatif de session + réclamation de l'échéance
+
+        Returns:
+            Connexion portant le verrou (à rendre via _release), None si déjà prise
+        """
+        from app.core.db_pool import get_connection, put_connection
+
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('SELECT pg_try_advisory_lock(%s, %s)', (SCHEDULER_LOCK_CLASS, job.lock_key))
+            if not cursor.fetchone()[0]:
+                conn.rollback()
+                put_connection(conn)
+                return None
+
+            cursor.execute('''
+                INSERT INTO scheduled_job_runs (job_name, last_tick, last_started_at)
+                VALUES (%s, %s, NOW())
+                ON CONFLICT (job_name) DO UPDATE
+                SET last_tick = EXCLUDED.last_tick, last_started_at = NOW()
+                WHERE scheduled_job_runs.last_tick < EXCLUDED.last_tick
+                RETURNING job_name
+            ''', (job.name, tick))
+            claimed = cursor.fetchone() is not None
+            conn.commit()
+
+            if not claimed:
+                cursor.execute('SELECT pg_advisory_unlock(%s, %s)', (SCHEDULER_LOCK_CLASS, job.lock_key))
+                conn.commit()
+                put_connection(conn)
+                return None
+            return conn
+        except Exception:
+            conn.rollback()
+            put_connection(conn)
+            raise
+
+    def _release(self, conn, job: ScheduledJob, status: str, duration_ms: float, error: Optional[str]):
+        """Enregistre le résultat partagé et relâche le verrou"""
+        from app.core.db_pool import put_connection
+
+        try:
+            cursor = conn.cursor()
+            cursor.execute('''
+                UPDATE scheduled_job_runs
+                SET last_finished_at = NOW(),
+                    last_duration_ms = %s,
+                    last_status = %s,
+                    last_error = %s,
+                    run_count = run_count + 1,
+                    failure_count = failure_count + %s
+                WHERE job_name = %s
+            ''', (duration_ms, status, error, 1 if status == 'failed' else 0, job.name))
+            cursor.execute('SELECT pg_advisory_unlock(%s, %s)', (SCHEDULER_LOCK_CLASS, job.lock_key))
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"❌ Could not record scheduled job {job.name}: {e}")
+        finally:
+            put_connection(conn)
+
+    async def _execute(self, job: ScheduledJob, tick: datetime) -> Optional[str]:
+        """Exécute une échéance si cette instance la remporte; renvoie le statut"""
+        if job.running:
+            job.skipped += 1
+            return None
+
+        try:
+            conn = await asyncio.to_thread(self._claim, job, tick)
+        except Exception as e:
+            job.skipped += 1
+            logger.error(f"❌ Scheduled job {job.name} could not be claimed: {e}")
+            return None
+        if conn is None:
+            job.skipped += 1
+            return None
+
+        job.running = True
+        job.last_started_at = time.time()
+        started = time.perf_counter()
+        status, error = 'succeeded', None
+        try:
+            if asyncio.iscoroutinefunction(job.func):
+                result = await job.func()
+            else:
+                result = await asyncio.to_thread(job.func)
+            if result is not None:
+                logger.info(f"⏰ {job.name}: {result}")
+        except Exception as e:
+            status, error = 'failed', str(e)[:500]
+            logger.error(f"❌ Scheduled job {job.name} failed: {e}")
+        finally:
+            duration_ms = (time.perf_counter() - started) * 1000
+            job.running = False
+            job.observe(duration_ms, status, error)
+            await asyncio.to_thread(self._release, conn, job, status, duration_ms, error)
+
+        logger.info(f"⏰ Scheduled job {job.name} {status} in {duration_ms:.0f} ms")
+        return status
+
+    async def run_now(self, name: str) -> Optional[str]:
+        """Exécution manuelle immédiate (mêmes verrous que l'exécution planifiée)"""
+        return await self._execute(self._jobs[name], datetime.now())
+
+    def start(self):
+        """Démarre une boucle par tâche, dans la boucle courante"""
+        if self.running:
+            return
+        self._tasks = [
+            asyncio.create_task(self._job_loop(job), name=f"scheduler-{job.name}")
+            for job in self._jobs.values()
+        ]
+        logger.info(f"⏰ Maintenance scheduler started ({len(self._jobs)} jobs)")
+
+    @property
+    def running(self) -> bool:
+        return any(not task.done() for task in self._tasks)
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+    # MÉTRIQUES
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+    def get_stats(self) -> Dict:
+        jobs = {}
+        for job in self._jobs.values():
+            jobs[job.name] = {
+                'cron': job.schedule.expression,
+                'next_tick': job.next_tick.isoformat() if job.next_tick else None,
+                'running': job.running,
+                'runs': job.runs,
+                'failures': job.failures,
+                'skipped': job.skipped,
+                'last_status': job.last_status,
+                'last_error': job.last_error,
+                'last_started_at': job.last_started_at,
+                'last_duration_ms': round(job.last_duration_ms, 1) if job.last_duration_ms is not None else None,
+                'avg_duration_ms': round(job.total_duration_ms / job.runs, 1) if job.runs else None,
+                'max_duration_ms': round(job.max_duration_ms, 1),
+            }
+        return {'running': self.running, 'jobs': jobs}
+
+    def prometheus_lines(self) -> List[str]:
+        """Histogramme des durées et compteurs par tâche au format d'exposition Prometheus"""
+        lines = [
+            '# HELP scheduler_job_duration_seconds Scheduled maintenance job duration',
+            '# TYPE scheduler_job_duration_seconds histogram'
+        ]
+        for job in self._jobs.values():
+            cumulative = 0
+            for bound, bucket_count in zip(DURATION_BUCKETS_SECONDS, job.buckets):
+                cumulative += bucket_count
+                le = '+Inf' if bound == float('inf') else f"{bound:g}"
+                lines.append(f'scheduler_job_duration_seconds_bucket{{job="{job.name}",le="{le}"}} {cumulative}')
+            lines.append(f'scheduler_job_duration_seconds_sum{{job="{job.name}"}} {job.total_duration_ms / 1000:.3f}')
+            lines.append(f'scheduler_job_duration_seconds_count{{job="{job.name}"}} {job.runs}')
+
+        lines.append('# TYPE scheduler_job_failures_total counter')
+        lines.extend(f'scheduler_job_failures_total{{job="{job.name}"}} {job.failures}' for job in self._jobs.values())
+        lines.append('# TYPE scheduler_job_skipped_total counter')
+        lines.extend(f'scheduler_job_skipped_total{{job="{job.name}"}} {job.skipped}' for job in self._jobs.values())
+        return lines
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# TÂCHES DE MAINTENANCE
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+def _cleanup_download_tokens():
+    from app.domain.repositories.download_repo import DownloadRepository
+    return f"{DownloadRepository.cleanup_expired_tokens()} expired tokens deleted"
+
+
+def _cleanup_rate_limits():
+    from app.domain.repositories.rate_limit_repo import RateLimitRepository
+    return f"{RateLimitRepository.cleanup_expired()} expired rate limit entries deleted"
+
+
+async def _retry_undelivered_files():
+    from app.tasks.retry_undelivered_files import retry_undelivered_files
+    await retry_undelivered_files()
+
+
+def _cleanup_deleted_products():
+    from app.tasks.cleanup_deleted_products import cleanup_old_deleted_products
+    stats = cleanup_old_deleted_products(dry_run=False)
+    if 'error' in stats:
+        raise RuntimeError(stats['error'])
+    return stats
+
+
+def _cleanup_import_jobs():
+    from app.domain.repositories.import_job_repo import ImportJobRepository
+    from app.services.import_jobs import IMPORT_JOB_RETENTION_DAYS
+    return f"{ImportJobRepository.cleanup_finished_jobs(IMPORT_JOB_RETENTION_DAYS)} finished import jobs deleted"
+
+
+def _cleanup_email_outbox():
+    from app.core.email_outbox import EMAIL_OUTBOX_RETENTION_DAYS
+    from app.domain.repositories.email_outbox_repo import EmailOutboxRepository
+    return f"{EmailOutboxRepository.cleanup_finished(EMAIL_OUTBOX_RETENTION_DAYS)} finished emails deleted"
+
+
+def _ensure_partitions():
+    from app.core.partitioning import maintain_partitions
+    return f"{len(maintain_partitions())} partitions created"
+
+
+def _archive_partitions():
+    from app.tasks.partition_maintenance import archive_cold_partitions
+    stats = archive_cold_partitions()
+    if stats['errors']:
+        raise RuntimeError(f"Archiving failed for {stats['errors']}")
+    return stats
+
+
+def _backup_database():
+    from app.tasks.backup_database import run_backup
+    if not run_backup():
+        raise RuntimeError("Database backup failed")
+
+
+def register_maintenance_jobs(scheduler: MaintenanceScheduler):
+    """Tâches de app/tasks et purges des tables de tokens (heure locale du serveur)"""
+    scheduler.register('download_tokens_cleanup', '*/30 * * * *', _cleanup_download_tokens)
+    scheduler.register('rate_limits_cleanup', '15 * * * *', _cleanup_rate_limits)
+    scheduler.register('retry_undelivered_files', '5 * * * *', _retry_undelivered_files)
+    scheduler.register('import_jobs_cleanup', '45 3 * * *', _cleanup_import_jobs)
+    scheduler.register('email_outbox_cleanup', '50 3 * * *', _cleanup_email_outbox)
+    scheduler.register('partitions_ensure', '30 4 * * *', _ensure_partitions)
+    scheduler.register('partitions_archive', '0 4 1 * *', _archive_partitions, jitter_seconds=300)
+    scheduler.register('cleanup_deleted_products', '0 5 * * 0', _cleanup_deleted_products, jitter_seconds=300)
+    # Sauvegarde: uniquement si pg_dump est présent dans l'image
+    if shutil.which('pg_dump'):
+        scheduler.register('database_backup', '0 3 * * *', _backup_database, jitter_seconds=300)
+
+
+# Global scheduler instance
+_scheduler: Optional[MaintenanceScheduler] = None
+
+
+def init_maintenance_scheduler(**kwargs) -> Optional[MaintenanceScheduler]:
+    """Crée le planificateur global, enregistre les tâches et le démarre (boucle du serveur)"""
+    global _scheduler
+    if not SCHEDULER_ENABLED:
+        logger.info("⏭️ Maintenance scheduler disabled (SCHEDULER_ENABLED=false)")
+        return None
+
+    _scheduler = MaintenanceScheduler(**kwargs)
+    register_maintenance_jobs(_scheduler)
+    _scheduler.start()
+    return _scheduler
+
+
+def get_maintenance_scheduler() -> Optional[MaintenanceScheduler]:
+    return _scheduler
+
+
+async def shutdown_maintenance_scheduler():
+    global _scheduler
+    if _scheduler:
+        await _scheduler.stop()
+        _scheduler = None
@@ -9,6 +9,10 @@ from datetime import datetime
 from typing import Optional, Dict
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
 
+from app.core.outbound_messages import (
+    send_telegram_message, PRIORITY_TRANSACTIONAL, PRIORITY_MARKETING
+)
+
 logger = logging.getLogger(__name__)
 
 
@@ -62,14 +66,19 @@ Vous serez notifié dès confirmation blockchain.
             ])
 
             # Envoyer notification
-            await bot.application.bot.send_message(
-                chat_id=telegram_id,
-                text=notification_text,
+            # File d'envoi centralisée (pacing Telegram + fusion des notifications vendeur)
+            await send_telegram_message(
+                telegram_id,
+                notification_text,
+                priority=PRIORITY_TRANSACTIONAL,
+                coalesce_key=f"seller:{seller_id}",
+                bot=bot.application.bot,
+                wait=False,
                 parse_mode='Markdown',
                 reply_markup=keyboard
             )
 
-            logger.info(f"✅ Purchase notification sent to seller {seller_id} (telegram: {telegram_id})")
+            logger.info(f"✅ Purchase notification queued for seller {seller_id} (telegram: {telegram_id})")
 
         except Exception as e:
             logger.error(f"❌ Error sending purchase notification: {e}")
@@ -134,14 +143,19 @@ Vous serez notifié dès confirmation blockchain.
                 [InlineKeyboardButton("Analytics", callback_data='analytics_dashboard')]
             ])
 
-            await bot.application.bot.send_message(
-                chat_id=telegram_id,
-                text=notification_text,
+            # File d'envoi centralisée (pacing Telegram + fusion des notifications vendeur)
+            await send_telegram_message(
+                telegram_id,
+                notification_text,
+                priority=PRIORITY_TRANSACTIONAL,
+                coalesce_key=f"seller:{seller_id}",
+                bot=bot.application.bot,
+                wait=False,
                 parse_mode='Markdown',
                 reply_markup=keyboard
             )
 
-            logger.info(f"✅ Payment confirmation notification sent to seller {seller_id}")
+            logger.info(f"✅ Payment confirmation notification queued for seller {seller_id}")
 
         except Exception as e:
             logger.error(f"❌ Error sending payment confirmation: {e}")
@@ -192,14 +206,19 @@ _{review_snippet}_
                 [InlineKeyboardButton("📊 Analytics Produit", callback_data='analytics_products')]
             ])
 
-            await bot.application.bot.send_message(
-                chat_id=telegram_id,
-                text=notification_text,
+            # File d'envoi centralisée (pacing Telegram + fusion des notifications vendeur)
+            await send_telegram_message(
+                telegram_id,
+                notification_text,
+                priority=PRIORITY_MARKETING,
+                coalesce_key=f"seller:{seller_id}",
+                bot=bot.application.bot,
+                wait=False,
                 parse_mode='Markdown',
                 reply_markup=keyboard
             )
 
-            logger.info(f"✅ Review notification sent to seller {seller_id}")
+            logger.info(f"✅ Review notification queued for seller {seller_id}")
 
         except Exception as e:
             logger.error(f"❌ Error sending review notification: {e}")
@@ -261,14 +280,19 @@ _{review_snippet}_
                 [InlineKeyboardButton(" Mes Revenus", callback_data='my_revenue')]
             ])
 
-            await bot.application.bot.send_message(
-                chat_id=telegram_id,
-                text=notification_text,
+            # File d'envoi centralisée (pacing Telegram + fusion des notifications vendeur)
+            await send_telegram_message(
+                telegram_id,
+                notification_text,
+                priority=PRIORITY_MARKETING,
+                coalesce_key=f"seller:{seller_id}",
+                bot=bot.application.bot,
+                wait=False,
                 parse_mode='Markdown',
                 reply_markup=keyboard
             )
 
-            logger.info(f"✅ Daily summary sent to seller {seller_id}")
+            logger.info(f"✅ Daily summary queued for seller {seller_id}")
 
         except Exception as e:
             logger.error(f"❌ Error sending daily summary: {e}")
@@ -334,14 +358,19 @@ _{review_snippet}_
                 [InlineKeyboardButton("🚀 Dashboard", callback_data='seller_dashboard')]
             ])
 
-            await bot.application.bot.send_message(
-                chat_id=telegram_id,
-                text=notification_text,
+            # File d'envoi centralisée (pacing Telegram + fusion des notifications vendeur)
+            await send_telegram_message(
+                telegram_id,
+                notification_text,
+                priority=PRIORITY_MARKETING,
+                coalesce_key=f"seller:{seller_id}",
+                bot=bot.application.bot,
+                wait=False,
                 parse_mode='Markdown',
                 reply_markup=keyboard
             )
 
-            logger.info(f"✅ Milestone notification sent to seller {seller_id}")
+            logger.info(f"✅ Milestone notification queued for seller {seller_id}")
 
         except Exception as e:
             logger.error(f"❌ Error sending milestone notification: {e}")
@@ -1,7 +1,7 @@
 """
 State Manager - Gestion centralisée des états utilisateur
 """
-from typing import Dict, Any, Optional
+from typing import Callable, Dict, Any, List, Optional
 import logging
 from app.core.settings import settings
 
@@ -12,6 +12,21 @@ class StateManager:
 
     def __init__(self):
         self.user_states: Dict[int, Dict[str, Any]] = {}
+        # callback(user_id, clés retirées) appelé après chaque reset
+        self._reset_listeners: List[Callable[[int, Dict[str, Any]], None]] = []
+
+    def add_reset_listener(self, callback: Callable[[int, Dict[str, Any]], None]) -> None:
+        """Libération des ressources liées à un flux quand son état est effacé (/start, autre flux)"""
+        self._reset_listeners.append(callback)
+
+    def _notify_reset(self, user_id: int, removed: Dict[str, Any]) -> None:
+        if not removed:
+            return
+        for callback in self._reset_listeners:
+            try:
+                callback(user_id, removed)
+            except Exception as e:
+                logger.error(f"State reset listener failed for user {user_id}: {e}")
 
     def get_state(self, user_id: int) -> Dict[str, Any]:
         """Récupère l'état complet d'un utilisateur"""
@@ -37,13 +52,14 @@ class StateManager:
         if user_id not in self.user_states:
             return
 
+        old_state = self.user_states[user_id]
         if keep:
-            old_state = self.user_states[user_id]
             self.user_states[user_id] = {k: v for k, v in old_state.items() if k in keep}
         else:
             self.user_states[user_id] = {}
 
         logger.debug(f"State reset for user {user_id}, kept: {keep}")
+        self._notify_reset(user_id, {k: v for k, v in old_state.items() if k not in (keep or ())})
 
     def reset_conflicting_states(self, user_id: int, keep: Optional[set] = None) -> None:
         """Remet à zéro les états conflictuels tout en gardant certaines clés"""
@@ -56,11 +72,13 @@ class StateManager:
         user_state = self.user_states[user_id]
 
         # Supprimer tous les états conflictuels sauf ceux à garder
+        removed = {}
         for key in conflicting_keys:
             if key not in keep_set and key in user_state:
-                del user_state[key]
+                removed[key] = user_state.pop(key)
 
         logger.debug(f"Conflicting states reset for user {user_id}, kept: {keep_set}")
+        self._notify_reset(user_id, removed)
 
     def is_user_in_state(self, user_id: int, state_key: str) -> bool:
         """Vérifie si un utilisateur est dans un état spécifique"""
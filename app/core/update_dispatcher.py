@@ -0,0 +1,336 @@
+"""
+Update Dispatcher - Traitement concurrent des updates Telegram reçues en webhook
+
+Le webhook répond dès que l'update est en file; les workers la traitent ensuite.
+- Concurrence bornée: max_concurrency updates traitées en même temps, par défaut la
+  taille max du pool PostgreSQL (un handler peut garder sa connexion pendant un await:
+  plus de workers que de connexions = PoolError pour les suivants)
+- Ordre strict par utilisateur: une file (lane) par utilisateur, jamais deux updates
+  du même utilisateur en parallèle (création de produit, imports, états du bot...);
+  un worker traite une update puis remet l'utilisateur en fin de tour (équité)
+- File bornée (backpressure): pleine = update refusée, le webhook répond 503 et
+  Telegram la renvoie plus tard
+- Délestage: au-delà de max_pending_per_user updates en attente pour un même
+  utilisateur (rafale de clics), les nouvelles sont abandonnées
+- Doublons (update renvoyée par Telegram après un timeout) ignorés
+- Métriques via get_stats(): profondeur de file, en cours, attente et durée de
+  traitement (moyenne, p95, max), refus et délestages
+"""
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, List, Optional
+
+from app.core.db_pool import get_pool_status
+from app.core.logging import set_correlation_id
+
+logger = logging.getLogger(__name__)
+
+# 0 = taille max du pool PostgreSQL
+UPDATE_CONCURRENCY = int(os.getenv('UPDATE_CONCURRENCY', '0'))
+UPDATE_QUEUE_SIZE = int(os.getenv('UPDATE_QUEUE_SIZE', '1000'))
+UPDATE_MAX_PENDING_PER_USER = int(os.getenv('UPDATE_MAX_PENDING_PER_USER', '20'))
+
+# update_id récents gardés pour ignorer les renvois de Telegram
+RECENT_UPDATE_IDS = 2000
+
+# Échantillons gardés pour les percentiles de get_stats()
+LATENCY_SAMPLES = 1000
+
+# Bornes des histogrammes Prometheus (attente en file, traitement)
+LATENCY_BUCKETS_SECONDS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, float('inf'))
+
+
+def update_key(update) -> Hashable:
+    """Clé d'ordonnancement: utilisateur, sinon chat, sinon l'update seule (pas d'ordre)"""
+    if update.effective_user:
+        return update.effective_user.id
+    if update.effective_chat:
+        return ('chat', update.effective_chat.id)
+    return ('update', update.update_id)
+
+
+def default_concurrency() -> int:
+    """UPDATE_CONCURRENCY, sinon une update par connexion du pool PostgreSQL"""
+    pool_size = get_pool_status()['max_connections']
+    if UPDATE_CONCURRENCY:
+        if pool_size and UPDATE_CONCURRENCY > pool_size:
+            logger.warning(f"⚠️ UPDATE_CONCURRENCY={UPDATE_CONCURRENCY} exceeds the connection pool "
+                           f"({pool_size}): busy handlers will get PoolError")
+        return UPDATE_CONCURRENCY
+    return pool_size or 10
+
+
+def _percentile(samples, fraction: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class _LatencyHistogram:
+    __slots__ = ('count', 'total_seconds', 'buckets', 'samples_ms')
+
+    def __init__(self):
+        self.count = 0
+        self.total_seconds = 0.0
+        self.buckets = [0] * len(LATENCY_BUCKETS_SECONDS)
+        self.samples_ms: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+
+    def observe(self, seconds: float):
+        self.count += 1
+        self.total_seconds += seconds
+        self.samples_ms.append(seconds * 1000)
+        for index, bound in enumerate(LATENCY_BUCKETS_SECONDS):
+            if seconds <= bound:
+                self.buckets[index] += 1
+                break
+
+
+class UpdateDispatcher:
+    """
+    File d'updates avec lanes par utilisateur et pool de workers.
+
+    Les clés prêtes (lane non vide, aucun worker dessus) sont dans _ready; un worker
+    prend une clé, traite la première update de sa lane, puis remet la clé dans
+    _ready si la lane n'est pas vide. Une clé n'est donc jamais dans _ready et
+    chez un worker à la fois: l'ordre par utilisateur est garanti.
+    """
+
+    def __init__(self, process: Callable[[Any], Awaitable[Any]],
+                 max_concurrency: Optional[int] = None,
+                 max_queue: int = UPDATE_QUEUE_SIZE,
+                 max_pending_per_user: int = UPDATE_MAX_PENDING_PER_USER):
+        """
+        Args:
+            process: Coroutine de traitement d'une update (Application.process_update)
+            max_concurrency: Updates traitées simultanément (utilisateurs différents),
+                défaut default_concurrency()
+            max_queue: Updates en attente max, tous utilisateurs confondus
+            max_pending_per_user: Updates en attente max pour un même utilisateur
+        """
+        self.process = process
+        self.max_concurrency = max_concurrency or default_concurrency()
+        self.max_queue = max_queue
+        self.max_pending_per_user = max_pending_per_user
+
+        # clé -> updates en attente (update, instant de mise en file)
+        self._lanes: Dict[Hashable, Deque] = {}
+        self._ready: asyncio.Queue = asyncio.Queue()
+        self._queued = 0
+        self._in_flight = 0
+        self._recent_ids: OrderedDict = OrderedDict()
+        self._saturated = False
+
+        self._workers: list = []
+
+        self._latency = {'wait': _LatencyHistogram(), 'handle': _LatencyHistogram()}
+        self._stats = {
+            'accepted': 0,
+            'processed': 0,
+            'failed': 0,
+            'rejected_full': 0,
+            'shed_per_user': 0,
+            'duplicates': 0,
+            'max_queued': 0,
+            'max_wait_ms': 0.0,
+            'max_handle_ms': 0.0,
+        }
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+    # CYCLE DE VIE
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+    def start(self):
+        """Démarre les workers dans la boucle courante"""
+        if self.running:
+            return
+        self._workers = [
+            asyncio.create_task(self._run(), name=f"update-worker-{i}")
+            for i in range(self.max_concurrency)
+        ]
+        logger.info(f"📥 Update dispatcher started ({self.max_concurrency} workers, "
+                    f"queue {self.max_queue}, {self.max_pending_per_user} pending per user)")
+
+    @property
+    def running(self) -> bool:
+        return any(not worker.done() for worker in self._workers)
+
+    async def stop(self, drain_timeout: float = 10.0):
+        """Arrête les workers après avoir tenté de traiter les updates en attente"""
+        if not self.running:
+            return
+
+        deadline = time.monotonic() + drain_timeout
+        while (self._queued or self._in_flight) and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+        if self._queued:
+            logger.warning(f"⚠️ Update dispatcher stopped with {self._queued} unprocessed updates")
+        self._lanes.clear()
+        self._ready = asyncio.Queue()
+        self._queued = 0
+
+        logger.info("📥 Update dispatcher stopped")
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+    # API
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+    def submit(self, update) -> bool:
+        """
+        Met une update en file sans attendre son traitement.
+
+        Returns:
+            bool: False si la file est pleine (à renvoyer par Telegram plus tard);
+                  True si acceptée, délestée ou doublon (rien à renvoyer)
+        """
+        if update.update_id in self._recent_ids:
+            self._stats['duplicates'] += 1
+            return True
+
+        if self._queued >= self.max_queue:
+            self._stats['rejected_full'] += 1
+            if not self._saturated:
+                # Un seul log par épisode de saturation (les refus sont comptés)
+                self._saturated = True
+                logger.warning("⚠️ Update queue full (%d) - rejecting updates until it drains", self._queued)
+            return False
+        self._saturated = False
+
+        self._remember(update.update_id)
+
+        key = update_key(update)
+        lane = self._lanes.get(key)
+        if lane is not None and len(lane) >= self.max_pending_per_user:
+            self._stats['shed_per_user'] += 1
+            logger.info("⚠️ %d updates pending for %s - shedding update %s", len(lane), key, update.update_id)
+            return True
+
+        if lane is None:
+            # Clé absente = ni en attente ni chez un worker: elle devient prête
+            lane = self._lanes[key] = deque()
+            self._ready.put_nowait(key)
+
+        lane.append((update, time.monotonic()))
+        self._queued += 1
+        self._stats['accepted'] += 1
+        self._stats['max_queued'] = max(self._stats['max_queued'], self._queued)
+        return True
+
+    def get_stats(self) -> Dict:
+        stats = {
+            **self._stats,
+            'queued': self._queued,
+            'in_flight': self._in_flight,
+            'active_users': len(self._lanes),
+            'max_concurrency': self.max_concurrency,
+            'max_queue': self.max_queue,
+        }
+        for phase, histogram in self._latency.items():
+            stats[f'avg_{phase}_ms'] = round(histogram.total_seconds * 1000 / histogram.count, 1) if histogram.count else 0.0
+            stats[f'p95_{phase}_ms'] = round(_percentile(histogram.samples_ms, 0.95), 1)
+        return stats
+
+    def prometheus_lines(self) -> List[str]:
+        """Profondeur de file, updates en cours, compteurs et histogrammes attente / traitement"""
+        lines = [
+            '# TYPE telegram_updates_queued gauge',
+            f"telegram_updates_queued {self._queued}",
+            '# TYPE telegram_updates_in_flight gauge',
+            f"telegram_updates_in_flight {self._in_flight}",
+            '# TYPE telegram_updates_total counter',
+        ]
+        for outcome in ('processed', 'failed', 'rejected_full', 'shed_per_user', 'duplicates'):
+            lines.append(f'telegram_updates_total{{outcome="{outcome}"}} {self._stats[outcome]}')
+
+        lines.append('# HELP telegram_update_seconds Update queue wait and handler duration')
+        lines.append('# TYPE telegram_update_seconds histogram')
+        for phase, histogram in self._latency.items():
+            cumulative = 0
+            for bound, bucket_count in zip(LATENCY_BUCKETS_SECONDS, histogram.buckets):
+                cumulative += bucket_count
+                le = '+Inf' if bound == float('inf') else f"{bound:g}"
+                lines.append(f'telegram_update_seconds_bucket{{phase="{phase}",le="{le}"}} {cumulative}')
+            lines.append(f'telegram_update_seconds_sum{{phase="{phase}"}} {histogram.total_seconds:.3f}')
+            lines.append(f'telegram_update_seconds_count{{phase="{phase}"}} {histogram.count}')
+        return lines
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+    # WORKERS
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+    def _remember(self, update_id: int):
+        self._recent_ids[update_id] = None
+        if len(self._recent_ids) > RECENT_UPDATE_IDS:
+            self._recent_ids.popitem(last=False)
+
+    async def _run(self):
+        while True:
+            key = await self._ready.get()
+
+            lane = self._lanes[key]
+            update, enqueued_at = lane.popleft()
+            self._queued -= 1
+            self._in_flight += 1
+
+            try:
+                await self._handle(update, enqueued_at)
+            finally:
+                self._in_flight -= 1
+                if lane:
+                    # Suite de la lane après les autres utilisateurs prêts
+                    self._ready.put_nowait(key)
+                else:
+                    del self._lanes[key]
+
+    async def _handle(self, update, enqueued_at: float):
+        started = time.monotonic()
+        wait = started - enqueued_at
+        self._latency['wait'].observe(wait)
+        self._stats['max_wait_ms'] = max(self._stats['max_wait_ms'], round(wait * 1000, 1))
+
+        set_correlation_id(f"upd-{update.update_id}")
+        try:
+            await self.process(update)
+            self._stats['processed'] += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._stats['failed'] += 1
+            logger.error("❌ Error processing update %s: %s", update.update_id, e, exc_info=True)
+        finally:
+            duration = time.monotonic() - started
+            self._latency['handle'].observe(duration)
+            self._stats['max_handle_ms'] = max(self._stats['max_handle_ms'], round(duration * 1000, 1))
+
+
+# Global dispatcher instance
+_dispatcher: Optional[UpdateDispatcher] = None
+
+
+def init_update_dispatcher(process: Callable[[Any], Awaitable[Any]], **kwargs) -> UpdateDispatcher:
+    """Crée et démarre le dispatcher global (mode webhook, dans la boucle du serveur)"""
+    global _dispatcher
+    _dispatcher = UpdateDispatcher(process, **kwargs)
+    _dispatcher.start()
+    return _dispatcher
+
+
+def get_update_dispatcher() -> Optional[UpdateDispatcher]:
+    """Dispatcher global, None hors mode webhook"""
+    return _dispatcher
+
+
+async def shutdown_update_dispatcher():
+    global _dispatcher
+    if _dispatcher:
+        await _dispatcher.stop()
+        _dispatcher = None
@@ -0,0 +1,208 @@
+"""
+WebApp Auth - Authentification Mini App Telegram
+Vérification initData (HMAC WebAppData) + sessions signées courte durée
+
+- La clé secrète WebAppData est dérivée une seule fois du token bot
+- Un petit LRU garde les digests d'initData déjà vérifiés
+- /api/session échange un initData vérifié contre un session token signé:
+  les appels suivants ne coûtent qu'un HMAC + compare_digest (temps constant)
+"""
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+from urllib.parse import parse_qsl
+
+from app.core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# initData Telegram accepté pendant 24h (comme verify_telegram_webapp_data)
+INIT_DATA_MAX_AGE_SECONDS = 86400
+
+
+@dataclass(frozen=True)
+class WebAppUser:
+    """Utilisateur authentifié par la Mini App (user_id None en mode dev)"""
+    user_id: Optional[int]
+    username: Optional[str] = None
+    language_code: Optional[str] = None
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + '=' * (-len(data) % 4))
+
+
+class WebAppAuthenticator:
+    """Vérifie initData et émet/valide les session tokens"""
+
+    def __init__(self, bot_token: str, session_ttl_seconds: int = 3600, cache_size: int = 512):
+        """
+        Args:
+            bot_token: Token du bot Telegram
+            session_ttl_seconds: Durée de vie d'un session token
+            cache_size: Nombre d'initData vérifiés gardés en LRU
+        """
+        # Dérivations faites une seule fois
+        self._webapp_secret = hmac.new(b"WebAppData", bot_token.encode(), hashlib.sha256).digest()
+        self._session_secret = hmac.new(b"WebAppSession", bot_token.encode(), hashlib.sha256).digest()
+
+        self.session_ttl_seconds = session_ttl_seconds
+        self.cache_size = cache_size
+        # {sha256(init_data): (WebAppUser, auth_date)}
+        self._verified: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def verify_init_data(self, init_data: str) -> Optional[WebAppUser]:
+        """
+        Vérifie l'intégrité d'un initData Telegram (avec cache LRU)
+
+        Returns:
+            WebAppUser si valide, None sinon
+        """
+        if not init_data:
+            return None
+
+        digest = hashlib.sha256(init_data.encode()).digest()
+
+        with self._lock:
+            cached = self._verified.get(digest)
+            if cached is not None:
+                self._verified.move_to_end(digest)
+
+        if cached is not None:
+            user, auth_date = cached
+            if time.time() - auth_date > INIT_DATA_MAX_AGE_SECONDS:
+                logger.warning("⚠️ Telegram WebApp data expired")
+                return None
+            return user
+
+        user, auth_date = self._verify_uncached(init_data)
+        if user is None:
+            return None
+
+        with self._lock:
+            self._verified[digest] = (user, auth_date)
+            if len(self._verified) > self.cache_size:
+                self._verified.popitem(last=False)
+
+        return user
+
+    def _verify_uncached(self, init_data: str):
+        try:
+            parsed_data = dict(parse_qsl(init_data, keep_blank_values=True))
+
+            received_hash = parsed_data.pop('hash', None)
+            if not received_hash:
+                return None, 0
+
+            auth_date = int(parsed_data.get('auth_date', 0))
+            if time.time() - auth_date > INIT_DATA_MAX_AGE_SECONDS:
+                logger.warning("⚠️ Telegram WebApp data expired")
+                return None, 0
+
+            # Format: key=value triés par clé, séparés par \n
+            data_check_string = '\n'.join(f"{k}={v}" for k, v in sorted(parsed_data.items()))
+            calculated_hash = hmac.new(self._webapp_secret, data_check_string.encode(), hashlib.sha256).hexdigest()
+
+            if not hmac.compare_digest(calculated_hash, received_hash):
+                logger.warning("❌ WebApp Auth Failed: invalid hash")
+                return None, 0
+
+            # initData signé sans utilisateur (chat, inline query): pas d'identité à vérifier
+            user_data = json.loads(parsed_data.get('user') or '{}')
+            if not isinstance(user_data, dict) or not isinstance(user_data.get('id'), int):
+                logger.warning("❌ WebApp Auth Failed: initData without user id")
+                return None, 0
+
+            user = WebAppUser(
+                user_id=user_data['id'],
+                username=user_data.get('username'),
+                language_code=user_data.get('language_code')
+            )
+            logger.debug(f"✅ WebApp Auth Success User: {user.user_id}")
+            return user, auth_date
+
+        except Exception as e:
+            logger.error(f"❌ Auth Exception: {e}")
+            return None, 0
+
+    def issue_session(self, user: WebAppUser) -> str:
+        """
+        Crée un session token signé pour un utilisateur vérifié
+
+        Format: base64url(payload_json).base64url(hmac_sha256)
+        """
+        payload = json.dumps({
+            'u': user.user_id,
+            'n': user.username,
+            'l': user.language_code,
+            'e': int(time.time()) + self.session_ttl_seconds
+        }, separators=(',', ':')).encode()
+        signature = hmac.new(self._session_secret, payload, hashlib.sha256).digest()
+        return f"{_b64encode(payload)}.{_b64encode(signature)}"
+
+    def verify_session(self, token: str) -> Optional[WebAppUser]:
+        """
+        Valide un session token (HMAC + compare_digest, pas de parsing initData)
+
+        Returns:
+            WebAppUser si valide et non expiré, None sinon
+        """
+        try:
+            payload_part, signature_part = token.split('.', 1)
+            payload = _b64decode(payload_part)
+            signature = _b64decode(signature_part)
+        except (ValueError, TypeError):
+            return None
+
+        expected = hmac.new(self._session_secret, payload, hashlib.sha256).digest()
+        if not hmac.compare_digest(expected, signature):
+            return None
+
+        data = json.loads(payload)
+        if data.get('e', 0) < time.time() or not isinstance(data.get('u'), int):
+            return None
+
+        return WebAppUser(user_id=data.get('u'), username=data.get('n'), language_code=data.get('l'))
+
+
+def is_dev_mode() -> bool:
+    """Auth Mini App désactivée en dev local (WEBAPP_URL localhost)"""
+    webapp_url = os.getenv('WEBAPP_URL', '')
+    return 'localhost' in webapp_url or '127.0.0.1' in webapp_url
+
+
+# Global authenticator instance
+_authenticator: Optional[WebAppAuthenticator] = None
+
+
+def get_webapp_authenticator() -> WebAppAuthenticator:
+    """
+    Get global WebApp authenticator (secret derived once from bot token).
+
+    Raises:
+        RuntimeError: If TELEGRAM_BOT_TOKEN is not configured
+    """
+    global _authenticator
+
+    if _authenticator is None:
+        if not settings.TELEGRAM_BOT_TOKEN:
+            raise RuntimeError("TELEGRAM_BOT_TOKEN not configured - cannot verify WebApp data")
+        _authenticator = WebAppAuthenticator(
+            settings.TELEGRAM_BOT_TOKEN,
+            session_ttl_seconds=int(os.getenv('WEBAPP_SESSION_TTL_SECONDS', '3600'))
+        )
+
+    return _authenticator
@@ -1,78 +1,19 @@
 """
 Download Repository
-Gestion des tokens de telechargement et rate limiting
+Gestion des tokens de telechargement
 """
 from datetime import datetime, timedelta
 from typing import Optional, Tuple
 import uuid
 
 from app.core.database_init import get_postgresql_connection
+from app.core.db_helpers import delete_in_batches
 from app.core.db_pool import put_connection
 
 
 class DownloadRepository:
     """Repository pour gestion downloads et tokens"""
 
-    @staticmethod
-    def check_and_update_rate_limit(user_id: int, max_tokens: int = 10, window_seconds: int = 3600) -> Tuple[bool, Optional[str]]:
-        """
-        Verifie et met a jour le rate limit pour un user
-
-        Returns:
-            (is_allowed, error_message)
-        """
-        conn = get_postgresql_connection()
-        try:
-            cursor = conn.cursor()
-            current_time = datetime.now()
-
-            cursor.execute('''
-                SELECT tokens_generated_count, window_start
-                FROM download_rate_limits
-                WHERE user_id = %s
-            ''', (user_id,))
-
-            result = cursor.fetchone()
-
-            if result:
-                count, window_start = result
-                # Check if window expired
-                if (current_time - window_start).total_seconds() > window_seconds:
-                    # Reset window
-                    cursor.execute('''
-                        UPDATE download_rate_limits
-                        SET tokens_generated_count = 1,
-                            window_start = %s,
-                            last_token_at = %s
-                        WHERE user_id = %s
-                    ''', (current_time, current_time, user_id))
-                    conn.commit()
-                    return (True, None)
-                elif count >= max_tokens:
-                    # Rate limit exceeded
-                    return (False, f"Rate limit exceeded: {count}/{max_tokens} tokens used")
-                else:
-                    # Increment counter
-                    cursor.execute('''
-                        UPDATE download_rate_limits
-                        SET tokens_generated_count = tokens_generated_count + 1,
-                            last_token_at = %s
-                        WHERE user_id = %s
-                    ''', (current_time, user_id))
-                    conn.commit()
-                    return (True, None)
-            else:
-                # First token for this user
-                cursor.execute('''
-                    INSERT INTO download_rate_limits (user_id, tokens_generated_count, window_start, last_token_at)
-                    VALUES (%s, 1, %s, %s)
-                ''', (user_id, current_time, current_time))
-                conn.commit()
-                return (True, None)
-
-        finally:
-            put_connection(conn)
-
     @staticmethod
     def verify_order_ownership(order_id: str, user_id: int) -> Optional[Tuple[str, str, float]]:
         """
@@ -81,9 +22,26 @@ class DownloadRepository:
         Returns:
             (main_file_url, title, file_size_mb) ou None
         """
+        # Index en mémoire (avant le checkout: un index à charger prend sa propre connexion)
+        from app.services.buyer_library import get_buyer_library
+        product_id = get_buyer_library().product_for_order(user_id, order_id)
+
         conn = get_postgresql_connection()
         try:
             cursor = conn.cursor()
+
+            # Commande -> produit, puis lecture du produit par clé primaire
+            if product_id:
+                cursor.execute('''
+                    SELECT main_file_url, title, file_size_mb
+                    FROM products
+                    WHERE product_id = %s
+                ''', (product_id,))
+                row = cursor.fetchone()
+                if row:
+                    return row
+
+            # Commande absente de l'index (achat antérieur du même produit, index pas encore rafraîchi)
             cursor.execute('''
                 SELECT p.main_file_url, p.title, p.file_size_mb
                 FROM orders o
@@ -196,22 +154,65 @@ class DownloadRepository:
             put_connection(conn)
 
     @staticmethod
-    def cleanup_expired_tokens(older_than_hours: int = 24):
-        """Nettoie les tokens expires (cron job)"""
+    def redeem_order_download(order_id: str, user_id: int) -> Optional[Tuple[str, str, float]]:
+        """
+        Verifie l'ownership et incremente download_count en une seule requete
+        (remplace verify_order_ownership + increment_download_count a la redemption)
+
+        Returns:
+            (main_file_url, title, file_size_mb) ou None
+        """
         conn = get_postgresql_connection()
         try:
             cursor = conn.cursor()
-            cutoff = datetime.now() - timedelta(hours=older_than_hours)
-
             cursor.execute('''
-                DELETE FROM download_tokens
-                WHERE expires_at < %s
-            ''', (cutoff,))
+                UPDATE orders o
+                SET download_count = COALESCE(o.download_count, 0) + 1,
+                    last_download_at = CURRENT_TIMESTAMP
+                FROM products p
+                WHERE o.order_id = %s
+                  AND o.buyer_user_id = %s
+                  AND o.payment_status = 'completed'
+                  AND p.product_id = o.product_id
+                RETURNING p.main_file_url, p.title, p.file_size_mb
+            ''', (order_id, user_id))
 
-            deleted_count = cursor.rowcount
+            result = cursor.fetchone()
             conn.commit()
+            return result
 
-            return deleted_count
+        finally:
+            put_connection(conn)
+
+    @staticmethod
+    def record_token_redemption(nonce: str, expires_at: int) -> bool:
+        """
+        Enregistre l'utilisation d'un token signe (replay set partage multi-workers)
+
+        Returns:
+            True si premiere utilisation, False si deja utilise
+        """
+        conn = get_postgresql_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT INTO download_token_redemptions (nonce, expires_at)
+                VALUES (%s, to_timestamp(%s))
+                ON CONFLICT (nonce) DO NOTHING
+            ''', (nonce, expires_at))
+
+            inserted = cursor.rowcount == 1
+            conn.commit()
+            return inserted
 
         finally:
             put_connection(conn)
+
+    @staticmethod
+    def cleanup_expired_tokens(older_than_hours: int = 24):
+        """Nettoie les tokens expires par lots (tâche planifiée download_tokens_cleanup)"""
+        cutoff = datetime.now() - timedelta(hours=older_than_hours)
+
+        deleted_count = delete_in_batches('download_tokens', 'expires_at < %s', (cutoff,))
+        deleted_count += delete_in_batches('download_token_redemptions', 'expires_at < %s', (cutoff,))
+        return deleted_count
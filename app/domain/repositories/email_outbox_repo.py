@@ -0,0 +1,162 @@
+"""Email Outbox Repository - Emails transactionnels en attente d'envoi (migration 0008)"""
+
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import psycopg2
+import psycopg2.extras
+
+from app.core.db_helpers import delete_in_batches
+from app.core.db_pool import get_connection, put_connection
+
+
+class EmailOutboxRepository:
+    """Persistance des messages de l'outbox: mise en file, réclamation par lots, résultats"""
+
+    def enqueue(self, to_email: str, subject: str, html_body: str, text_body: Optional[str] = None) -> int:
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT INTO email_outbox (to_email, subject, html_body, text_body)
+                VALUES (%s, %s, %s, %s)
+                RETURNING id
+            ''', (to_email, subject, html_body, text_body))
+            message_id = cursor.fetchone()[0]
+            conn.commit()
+            return message_id
+        except psycopg2.Error:
+            conn.rollback()
+            raise
+        finally:
+            put_connection(conn)
+
+    def claim_due(self, limit: int) -> List[Dict]:
+        """
+        Réclame jusqu'à limit messages échus (queued -> sending), les plus anciens d'abord
+
+        FOR UPDATE SKIP LOCKED: deux instances ne réclament jamais le même message
+        """
+        conn = get_connection()
+        try:
+            cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+            cursor.execute('''
+                UPDATE email_outbox
+                SET status = 'sending', claimed_at = CURRENT_TIMESTAMP, attempts = attempts + 1
+                WHERE id IN (
+                    SELECT id FROM email_outbox
+                    WHERE status = 'queued' AND next_attempt_at <= CURRENT_TIMESTAMP
+                    ORDER BY next_attempt_at
+                    LIMIT %s
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING id, to_email, subject, html_body, text_body, attempts
+            ''', (limit,))
+            rows = cursor.fetchall()
+            conn.commit()
+            return sorted(rows, key=lambda row: row['id'])
+        finally:
+            put_connection(conn)
+
+    def next_due_in(self) -> Optional[float]:
+        """Secondes avant la prochaine échéance (0 si un message est déjà échu), None si file vide"""
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT GREATEST(EXTRACT(EPOCH FROM MIN(next_attempt_at) - CURRENT_TIMESTAMP), 0)
+                FROM email_outbox
+                WHERE status = 'queued'
+            ''')
+            seconds = cursor.fetchone()[0]
+            return float(seconds) if seconds is not None else None
+        finally:
+            put_connection(conn)
+
+    def mark_sent(self, sent: List[Tuple[int, Optional[str]]]):
+        """[(id, identifiant Mailjet)] en une requête"""
+        if not sent:
+            return
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            psycopg2.extras.execute_values(cursor, '''
+                UPDATE email_outbox o
+                SET status = 'sent', sent_at = CURRENT_TIMESTAMP, claimed_at = NULL,
+                    provider_message_id = v.provider_message_id, last_error = NULL
+                FROM (VALUES %s) AS v (id, provider_message_id)
+                WHERE o.id = v.id
+            ''', sent)
+            conn.commit()
+        finally:
+            put_connection(conn)
+
+    def mark_retry(self, retries: List[Tuple[int, float, str]]):
+        """[(id, délai avant nouvelle tentative en secondes, erreur)] en une requête"""
+        if not retries:
+            return
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            psycopg2.extras.execute_values(cursor, '''
+                UPDATE email_outbox o
+                SET status = 'queued', claimed_at = NULL, last_error = v.error,
+                    next_attempt_at = CURRENT_TIMESTAMP + make_interval(secs => v.delay)
+                FROM (VALUES %s) AS v (id, delay, error)
+                WHERE o.id = v.id
+            ''', retries, template='(%s, %s::double precision, %s)')
+            conn.commit()
+        finally:
+            put_connection(conn)
+
+    def mark_failed(self, failures: List[Tuple[int, str]]):
+        """[(id, erreur)] définitivement en échec"""
+        if not failures:
+            return
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            psycopg2.extras.execute_values(cursor, '''
+                UPDATE email_outbox o
+                SET status = 'failed', claimed_at = NULL, last_error = v.error
+                FROM (VALUES %s) AS v (id, error)
+                WHERE o.id = v.id
+            ''', failures)
+            conn.commit()
+        finally:
+            put_connection(conn)
+
+    def release_stale_claims(self, older_than_seconds: int = 300) -> int:
+        """Remet en file les messages réclamés par une instance arrêtée en cours d'envoi"""
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('''
+                UPDATE email_outbox
+                SET status = 'queued', claimed_at = NULL, next_attempt_at = CURRENT_TIMESTAMP
+                WHERE status = 'sending' AND claimed_at < CURRENT_TIMESTAMP - make_interval(secs => %s)
+            ''', (older_than_seconds,))
+            conn.commit()
+            return cursor.rowcount
+        finally:
+            put_connection(conn)
+
+    def count_by_status(self) -> Dict[str, int]:
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('SELECT status, COUNT(*) FROM email_outbox GROUP BY status')
+            return dict(cursor.fetchall())
+        finally:
+            put_connection(conn)
+
+    @staticmethod
+    def cleanup_finished(older_than_days: int = 30) -> int:
+        """Supprime par lots les messages envoyés / en échec (tâche planifiée email_outbox_cleanup)"""
+        cutoff = datetime.now() - timedelta(days=older_than_days)
+        return delete_in_batches(
+            'email_outbox',
+            "status IN ('sent', 'failed') AND created_at < %s",
+            (cutoff,),
+            batch_size=1000
+        )
@@ -0,0 +1,250 @@
+"""Import Job Repository - Jobs d'import de boutique et produits scrapés (migration 0007)"""
+
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import psycopg2
+import psycopg2.extras
+
+from app.core.db_helpers import delete_in_batches
+from app.core.db_pool import get_connection, put_connection
+from app.core.utils import logger
+
+# États terminaux: le job n'est plus repris au démarrage
+FINISHED_STATUSES = ('completed', 'failed', 'cancelled')
+
+
+class ImportJobRepository:
+    """Persistance des jobs d'import (état, progression) et de leurs résultats"""
+
+    def create_job(self, user_id: int, chat_id: int, source_url: str,
+                   status_message_id: Optional[int] = None) -> str:
+        job_id = uuid.uuid4().hex
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT INTO import_jobs (job_id, user_id, chat_id, status_message_id, source_url)
+                VALUES (%s, %s, %s, %s, %s)
+            ''', (job_id, user_id, chat_id, status_message_id, source_url))
+            conn.commit()
+            return job_id
+        finally:
+            put_connection(conn)
+
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        conn = get_connection()
+        try:
+            cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+            cursor.execute('SELECT * FROM import_jobs WHERE job_id = %s', (job_id,))
+            return cursor.fetchone()
+        finally:
+            put_connection(conn)
+
+    def get_latest_completed_job(self, user_id: int) -> Optional[Dict]:
+        """Dernier job terminé avec succès (mini-app sans état bot, après redémarrage)"""
+        conn = get_connection()
+        try:
+            cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+            cursor.execute('''
+                SELECT * FROM import_jobs
+                WHERE user_id = %s AND status = 'completed'
+                ORDER BY created_at DESC
+                LIMIT 1
+            ''', (user_id,))
+            return cursor.fetchone()
+        finally:
+            put_connection(conn)
+
+    def get_resumable_job_ids(self) -> List[str]:
+        """Jobs interrompus par un arrêt du serveur (idx_import_jobs_pending)"""
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT job_id FROM import_jobs
+                WHERE status IN ('queued', 'running')
+                ORDER BY created_at
+            ''')
+            return [row[0] for row in cursor.fetchall()]
+        finally:
+            put_connection(conn)
+
+    def start_job(self, job_id: str) -> Optional[Dict]:
+        """Passe le job en running (tentative +1); None s'il est déjà terminé"""
+        conn = get_connection()
+        try:
+            cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+            cursor.execute('''
+                UPDATE import_jobs
+                SET status = 'running', attempts = attempts + 1, updated_at = CURRENT_TIMESTAMP
+                WHERE job_id = %s AND status IN ('queued', 'running')
+                RETURNING *
+            ''', (job_id,))
+            job = cursor.fetchone()
+            conn.commit()
+            return job
+        finally:
+            put_connection(conn)
+
+    def finish_job(self, job_id: str, status: str, error: Optional[str] = None) -> bool:
+        """Statut terminal (failed / cancelled); sans effet sur un job déjà terminé"""
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('''
+                UPDATE import_jobs
+                SET status = %s, error = %s, finished_at = CURRENT_TIMESTAMP, updated_at = CURRENT_TIMESTAMP
+                WHERE job_id = %s AND status NOT IN %s
+            ''', (status, error, job_id, FINISHED_STATUSES))
+            conn.commit()
+            return cursor.rowcount == 1
+        finally:
+            put_connection(conn)
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+    # PRODUITS SCRAPÉS
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+    def store_listing(self, job_id: str, products: List[Dict], enriched: bool = False):
+        """Liste de la page profil: une ligne par produit, pages produit à récupérer comptées"""
+        pages_total = 0 if enriched else sum(1 for product in products if product.get('gumroad_url'))
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('DELETE FROM import_job_products WHERE job_id = %s', (job_id,))
+            if products:
+                psycopg2.extras.execute_values(cursor, '''
+                    INSERT INTO import_job_products (job_id, position, product, enriched) VALUES %s
+                ''', [
+                    (job_id, position, psycopg2.extras.Json(product), enriched or not product.get('gumroad_url'))
+                    for position, product in enumerate(products)
+                ])
+            cursor.execute('''
+                UPDATE import_jobs
+                SET pages_total = %s, pages_fetched = 0, updated_at = CURRENT_TIMESTAMP
+                WHERE job_id = %s
+            ''', (pages_total, job_id))
+            conn.commit()
+        finally:
+            put_connection(conn)
+
+    def get_scraped_products(self, job_id: str) -> List[Tuple[int, Dict, bool]]:
+        """[(position, produit, enriched)] dans l'ordre de la page profil"""
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT position, product, enriched
+                FROM import_job_products
+                WHERE job_id = %s
+                ORDER BY position
+            ''', (job_id,))
+            return cursor.fetchall()
+        finally:
+            put_connection(conn)
+
+    def save_enriched_product(self, job_id: str, position: int, product: Dict):
+        """Résultat d'une page produit + compteur de progression, dans la même transaction"""
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('''
+                UPDATE import_job_products
+                SET product = %s, enriched = TRUE
+                WHERE job_id = %s AND position = %s AND NOT enriched
+            ''', (psycopg2.extras.Json(product), job_id, position))
+            if cursor.rowcount:
+                cursor.execute('''
+                    UPDATE import_jobs
+                    SET pages_fetched = pages_fetched + 1, updated_at = CURRENT_TIMESTAMP
+                    WHERE job_id = %s
+                ''', (job_id,))
+            conn.commit()
+        finally:
+            put_connection(conn)
+
+    def complete_job(self, job_id: str, products: List[Dict], excluded: List[Dict]):
+        """Résultat final: produits retenus renumérotés 0..n-1, produits exclus résumés"""
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('DELETE FROM import_job_products WHERE job_id = %s', (job_id,))
+            if products:
+                psycopg2.extras.execute_values(cursor, '''
+                    INSERT INTO import_job_products (job_id, position, product, enriched) VALUES %s
+                ''', [(job_id, position, psycopg2.extras.Json(product), True)
+                      for position, product in enumerate(products)])
+            cursor.execute('''
+                UPDATE import_jobs
+                SET status = 'completed', product_count = %s, excluded_products = %s,
+                    covers_total = %s, error = NULL,
+                    finished_at = CURRENT_TIMESTAMP, updated_at = CURRENT_TIMESTAMP
+                WHERE job_id = %s AND status = 'running'
+            ''', (
+                len(products),
+                psycopg2.extras.Json(excluded),
+                sum(1 for product in products if product.get('image_url')),
+                job_id
+            ))
+            conn.commit()
+        finally:
+            put_connection(conn)
+
+    def get_product(self, job_id: str, position: int) -> Optional[Dict]:
+        """Un produit du carrousel (clé primaire)"""
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT product FROM import_job_products
+                WHERE job_id = %s AND position = %s
+            ''', (job_id, position))
+            row = cursor.fetchone()
+            return row[0] if row else None
+        except psycopg2.Error as e:
+            logger.error(f"Error loading import product {job_id}/{position}: {e}")
+            return None
+        finally:
+            put_connection(conn)
+
+    def get_products(self, job_id: str) -> List[Dict]:
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT product FROM import_job_products
+                WHERE job_id = %s
+                ORDER BY position
+            ''', (job_id,))
+            return [row[0] for row in cursor.fetchall()]
+        finally:
+            put_connection(conn)
+
+    def record_cover_uploaded(self, job_id: str):
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('''
+                UPDATE import_jobs
+                SET covers_uploaded = covers_uploaded + 1, updated_at = CURRENT_TIMESTAMP
+                WHERE job_id = %s
+            ''', (job_id,))
+            conn.commit()
+        except psycopg2.Error as e:
+            conn.rollback()
+            logger.error(f"Error recording cover upload for import job {job_id}: {e}")
+        finally:
+            put_connection(conn)
+
+    @staticmethod
+    def cleanup_finished_jobs(older_than_days: int = 7) -> int:
+        """Supprime par lots les jobs terminés et leurs produits (tâche planifiée import_jobs_cleanup)"""
+        cutoff = datetime.now() - timedelta(days=older_than_days)
+        return delete_in_batches(
+            'import_jobs',
+            'status IN %s AND updated_at < %s',
+            (FINISHED_STATUSES, cutoff),
+            batch_size=500
+        )
@@ -0,0 +1,84 @@
+"""Library Repository - Projection buyer_purchases (achats par acheteur, migration 0004)"""
+
+import psycopg2
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from app.core.utils import logger
+from app.core.db_pool import get_connection, put_connection
+from app.domain.views import LibraryItem
+
+
+class LibraryRepository:
+    """Lectures de la bibliothèque acheteur (une ligne par produit possédé)"""
+
+    def get_purchase_index(self, buyer_user_id: int) -> List[Tuple[datetime, str, str]]:
+        """
+        Index compact des achats d'un acheteur (chargé dans BuyerLibrary)
+
+        Returns:
+            [(last_purchased_at, product_id, order_id)] du plus récent au plus ancien
+        """
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT last_purchased_at, product_id, order_id
+                FROM buyer_purchases
+                WHERE buyer_user_id = %s
+                ORDER BY last_purchased_at DESC, product_id DESC
+            ''', (buyer_user_id,))
+            return cursor.fetchall()
+        finally:
+            put_connection(conn)
+
+    def get_library_page(self, buyer_user_id: int, limit: int = 20,
+                         after: Optional[Tuple[datetime, str]] = None) -> List[LibraryItem]:
+        """
+        Page de bibliothèque en keyset sur idx_buyer_purchases_recent
+
+        Args:
+            after: (last_purchased_at, product_id) du dernier élément de la page précédente
+        """
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            keyset_filter = 'AND (bp.last_purchased_at, bp.product_id) < (%s, %s)' if after else ''
+            params = (buyer_user_id, *after, limit) if after else (buyer_user_id, limit)
+            cursor.execute(f'''
+                SELECT {LibraryItem.select_list()}
+                FROM buyer_purchases bp
+                JOIN products p ON p.product_id = bp.product_id
+                JOIN users u ON u.user_id = p.seller_user_id
+                LEFT JOIN orders o ON o.order_id = bp.order_id
+                WHERE bp.buyer_user_id = %s {keyset_filter}
+                ORDER BY bp.last_purchased_at DESC, bp.product_id DESC
+                LIMIT %s
+            ''', params)
+            return LibraryItem.from_rows(cursor.fetchall())
+        except psycopg2.Error as e:
+            logger.error(f"Error loading library page: {e}")
+            return []
+        finally:
+            put_connection(conn)
+
+    def get_purchase_details(self, order_id: str) -> Optional[Tuple]:
+        """
+        Détails de téléchargement d'une commande possédée (lecture par clé primaire)
+
+        Returns:
+            (product_id, title, file_size_mb, main_file_url, order_id, download_count, last_download_at)
+        """
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT p.product_id, p.title, p.file_size_mb, p.main_file_url,
+                       o.order_id, o.download_count, o.last_download_at
+                FROM orders o
+                JOIN products p ON o.product_id = p.product_id
+                WHERE o.order_id = %s
+            ''', (order_id,))
+            return cursor.fetchone()
+        finally:
+            put_connection(conn)
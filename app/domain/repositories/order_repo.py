@@ -4,6 +4,7 @@ from typing import Optional, Dict, List
 
 from app.core.db_pool import get_connection
 from app.core.db_pool import put_connection
+from app.domain.views import OrderSummary
 
 
 class OrderRepository:
@@ -20,7 +21,7 @@ class OrderRepository:
                 (order_id, buyer_user_id, product_id, seller_user_id, product_title, product_price_usd,
                  seller_revenue_usd, platform_commission_usd, payment_currency, payment_status,
                  nowpayments_id, payment_id, payment_address)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s) ON CONFLICT DO NOTHING
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
                 ''',
                 (
                     order['order_id'],
@@ -41,6 +42,7 @@ class OrderRepository:
             conn.commit()
             return True
         except psycopg2.Error:
+            # order_id déjà utilisé: unique_violation levée par le registre order_ids (migration 0010)
             conn.rollback()
             return False
         finally:
@@ -62,6 +64,7 @@ class OrderRepository:
     def update_payment_status(self, order_id: str, status: str, payment_id: str = None) -> bool:
         conn = get_connection()
         cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        completed = None
         try:
             # Mettre à jour le statut (et payment_id si fourni)
             if payment_id:
@@ -79,10 +82,10 @@ class OrderRepository:
             if status == 'completed':
                 # Récupérer product_id, seller_user_id et prix
                 cursor.execute(
-                    'SELECT product_id, seller_user_id, product_price_usd FROM orders WHERE order_id = %s',
+                    'SELECT product_id, seller_user_id, buyer_user_id, product_price_usd FROM orders WHERE order_id = %s',
                     (order_id,)
                 )
-                row = cursor.fetchone()
+                row = completed = cursor.fetchone()
                 if row:
                     product_id = row['product_id']
                     seller_user_id = row['seller_user_id']
@@ -101,59 +104,57 @@ class OrderRepository:
                     )
 
             conn.commit()
-            return cursor.rowcount > 0
+            updated = cursor.rowcount > 0
+
+            # Bibliothèque acheteur: visible immédiatement (la projection est maintenue par trigger)
+            from app.services.buyer_library import get_buyer_library
+            if status == 'completed' and completed:
+                get_buyer_library().record_purchase(
+                    completed['buyer_user_id'], completed['product_id'], order_id
+                )
+            return updated
         except psycopg2.Error:
             conn.rollback()
             return False
         finally:
             put_connection(conn)
 
-    def get_orders_by_buyer(self, buyer_user_id: int) -> List[Dict]:
+    def get_orders_by_buyer(self, buyer_user_id: int) -> List[OrderSummary]:
         conn = get_connection()
-        # PostgreSQL uses RealDictCursor
-        cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        cursor = conn.cursor()
         try:
             cursor.execute(
-                'SELECT * FROM orders WHERE buyer_user_id = %s ORDER BY created_at DESC',
+                f'SELECT {OrderSummary.select_list()} FROM orders WHERE buyer_user_id = %s ORDER BY created_at DESC',
                 (buyer_user_id,)
             )
-            rows = cursor.fetchall()
-            return [row for row in rows]
+            return OrderSummary.from_rows(cursor.fetchall())
         except psycopg2.Error:
             return []
         finally:
             put_connection(conn)
 
-    def get_orders_by_seller(self, seller_user_id: int) -> List[Dict]:
+    def get_orders_by_seller(self, seller_user_id: int) -> List[OrderSummary]:
         conn = get_connection()
-        # PostgreSQL uses RealDictCursor
-        cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        cursor = conn.cursor()
         try:
             cursor.execute(
-                'SELECT * FROM orders WHERE seller_user_id = %s ORDER BY created_at DESC',
+                f'SELECT {OrderSummary.select_list()} FROM orders WHERE seller_user_id = %s ORDER BY created_at DESC',
                 (seller_user_id,)
             )
-            rows = cursor.fetchall()
-            return [row for row in rows]
+            return OrderSummary.from_rows(cursor.fetchall())
         except psycopg2.Error:
             return []
         finally:
             put_connection(conn)
 
     def check_user_purchased_product(self, buyer_user_id: int, product_id: str) -> bool:
-        conn = get_connection()
-        cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        """Possession via l'index en mémoire de l'acheteur (buyer_purchases)"""
+        from app.services.buyer_library import get_buyer_library
+
         try:
-            cursor.execute(
-                'SELECT COUNT(*) as count FROM orders WHERE buyer_user_id = %s AND product_id = %s AND payment_status = %s',
-                (buyer_user_id, product_id, 'completed')
-            )
-            count = cursor.fetchone()['count']
-            return count > 0
+            return get_buyer_library().owns(buyer_user_id, product_id)
         except psycopg2.Error:
             return False
-        finally:
-            put_connection(conn)
 
     def increment_download_count(self, product_id: str, buyer_user_id: int) -> bool:
         conn = get_connection()
@@ -4,6 +4,8 @@ import logging
 from typing import Optional, Dict, List, Tuple
 
 from app.core.db_pool import get_connection, put_connection
+from app.domain.views import ProductAdmin, ProductCard, ProductDetail
+from app.services.category_service import get_category_catalogue
 
 logger = logging.getLogger(__name__)
 
@@ -12,95 +14,137 @@ class ProductRepository:
     def __init__(self) -> None:
         pass
 
+    @staticmethod
+    def _insert_row(product: Dict) -> Tuple:
+        """Ligne VALUES de insert_products_bulk (ordre des colonnes de l'INSERT)"""
+        return (
+            product['product_id'],
+            product['seller_user_id'],
+            product['title'],
+            product.get('description'),
+            product.get('category'),
+            product.get('price_usd', product.get('price_eur', 0)),  # fallback to price_eur if needed
+            product.get('main_file_url'),
+            product.get('file_size_mb'),
+            product.get('cover_image_url'),
+            product.get('thumbnail_url'),
+            product.get('preview_url'),  # URL aperçu PDF généré côté client
+            product.get('status', 'active'),
+            product.get('sales_count', 0),
+            product.get('rating', 0),
+            product.get('reviews_count', 0),
+            product.get('imported_rating', 0),
+            product.get('imported_reviews_count', 0),
+            product.get('imported_from'),
+            product.get('imported_url'),
+            product.get('source_profile'),
+        )
+
     def insert_product(self, product: Dict) -> bool:
+        try:
+            return bool(self.insert_products_bulk([product]))
+        except psycopg2.Error:
+            return False
+
+    def insert_products_bulk(self, products: List[Dict], page_size: int = 500) -> List[str]:
+        """
+        Insère N produits en une transaction (import de boutique, outils admin)
+
+        - Un INSERT multi-lignes (execute_values) par page de page_size produits
+        - product_id déjà existant ignoré (ON CONFLICT DO NOTHING), absent du résultat
+        - Compteurs de catégories ajustés par un seul upsert agrégé (une ligne par catégorie)
+        - Catalogue en mémoire mis à jour après le commit
+
+        Returns:
+            product_id effectivement créés, dans l'ordre d'insertion
+
+        Raises:
+            psycopg2.Error: transaction annulée, aucun produit créé
+        """
+        if not products:
+            return []
+
         conn = get_connection()
-        cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        cursor = conn.cursor()
         try:
-            cursor.execute(
+            inserted = psycopg2.extras.execute_values(
+                cursor,
                 '''
                 INSERT INTO products
-                (product_id, seller_user_id, title, description, category, price_usd, main_file_url, file_size_mb, cover_image_url, thumbnail_url, preview_url, status, sales_count, rating, reviews_count, imported_rating, imported_reviews_count)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                (product_id, seller_user_id, title, description, category, price_usd, main_file_url, file_size_mb, cover_image_url, thumbnail_url, preview_url, status, sales_count, rating, reviews_count, imported_rating, imported_reviews_count, imported_from, imported_url, source_profile)
+                VALUES %s
+                ON CONFLICT (product_id) DO NOTHING
+                RETURNING product_id, category, status
                 ''',
-                (
-                    product['product_id'],
-                    product['seller_user_id'],
-                    product['title'],
-                    product.get('description'),
-                    product.get('category'),
-                    product.get('price_usd', product.get('price_eur', 0)),  # fallback to price_eur if needed
-                    product.get('main_file_url'),
-                    product.get('file_size_mb'),
-                    product.get('cover_image_url'),
-                    product.get('thumbnail_url'),
-                    product.get('preview_url'),  # URL aperçu PDF généré côté client
-                    product.get('status', 'active'),
-                    product.get('sales_count', 0),
-                    product.get('rating', 0),
-                    product.get('reviews_count', 0),
-                    product.get('imported_rating', 0),
-                    product.get('imported_reviews_count', 0),
-                ),
+                [self._insert_row(product) for product in products],
+                page_size=page_size,
+                fetch=True
             )
 
-            # Update category product count
-            category = product.get('category')
-            if category:
-                cursor.execute(
-                    'UPDATE categories SET products_count = products_count + 1 WHERE name = %s',
-                    (category,)
+            # Update category product counts (crée les catégories si besoin, une seule requête)
+            category_counts: Dict[str, int] = {}
+            for _, category, status in inserted:
+                if category:
+                    category_counts[category] = category_counts.get(category, 0) + (1 if status == 'active' else 0)
+            if category_counts:
+                psycopg2.extras.execute_values(
+                    cursor,
+                    '''
+                    INSERT INTO categories (name, products_count) VALUES %s
+                    ON CONFLICT (name) DO UPDATE
+                    SET products_count = categories.products_count + EXCLUDED.products_count
+                    ''',
+                    sorted(category_counts.items())
                 )
-                # If category doesn't exist, create it
-                if cursor.rowcount == 0:
-                    cursor.execute(
-                        'INSERT INTO categories (name, products_count) VALUES (%s, 1) ON CONFLICT DO NOTHING',
-                        (category,)
-                    )
 
             conn.commit()
-            return True
-        except psycopg2.Error:
+        except psycopg2.Error as e:
             conn.rollback()
-            return False
+            logger.error(f"Error inserting {len(products)} product(s): {e}")
+            raise
         finally:
             put_connection(conn)
 
-    def get_product_by_id(self, product_id: str) -> Optional[Dict]:
+        catalogue = get_category_catalogue()
+        for _, category, status in inserted:
+            catalogue.product_added(category, status)
+
+        if len(inserted) < len(products):
+            logger.warning(f"Bulk insert: {len(products) - len(inserted)} product(s) skipped (product_id already exists)")
+        return [product_id for product_id, _, _ in inserted]
+
+    def get_product_by_id(self, product_id: str) -> Optional[ProductDetail]:
         conn = get_connection()
-        # PostgreSQL uses RealDictCursor
-        cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        cursor = conn.cursor()
         try:
             # Join with users table to get seller info
-            cursor.execute('''
-                SELECT p.*, u.seller_name, u.seller_bio
+            cursor.execute(f'''
+                SELECT {ProductDetail.select_list()}
                 FROM products p
                 LEFT JOIN users u ON p.seller_user_id = u.user_id
                 WHERE p.product_id = %s
             ''', (product_id,))
-            row = cursor.fetchone()
-            return row if row else None
+            return ProductDetail.from_row(cursor.fetchone())
         except psycopg2.Error:
             return None
         finally:
             put_connection(conn)
 
-    def get_product_with_seller_info(self, product_id: str) -> Optional[Dict]:
+    def get_product_with_seller_info(self, product_id: str) -> Optional[ProductDetail]:
         """Récupère un produit avec les informations du vendeur"""
         conn = get_connection()
-        # PostgreSQL uses RealDictCursor
-        cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        cursor = conn.cursor()
 
         try:
             cursor.execute(
-                '''
-                SELECT p.*, u.seller_name, u.seller_rating, u.seller_bio
+                f'''
+                SELECT {ProductDetail.select_list()}
                 FROM products p
                 JOIN users u ON p.seller_user_id = u.user_id
                 WHERE p.product_id = %s AND p.status = 'active'
                 ''', (product_id,))
 
-            row = cursor.fetchone()
-            return row if row else None
+            return ProductDetail.from_row(cursor.fetchone())
         except psycopg2.Error as e:
             logger.error(f"Erreur récupération produit avec seller: {e}")
             return None
@@ -127,12 +171,21 @@ class ProductRepository:
         conn = get_connection()
         cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
         try:
+            # Ancien statut lu dans la même requête (self-join: valeurs avant UPDATE)
             cursor.execute(
-                'UPDATE products SET status = %s WHERE product_id = %s',
+                '''
+                UPDATE products p SET status = %s
+                FROM products old
+                WHERE old.product_id = p.product_id AND p.product_id = %s
+                RETURNING p.category, old.status AS old_status
+                ''',
                 (status, product_id)
             )
+            row = cursor.fetchone()
             conn.commit()
-            return cursor.rowcount > 0
+            if row:
+                get_category_catalogue().product_status_changed(row['category'], row['old_status'], status)
+            return row is not None
         except psycopg2.Error:
             conn.rollback()
             return False
@@ -152,9 +205,10 @@ class ProductRepository:
                 logger.warning(f"❌ DELETE CHECK: Product {product_id} NOT FOUND in database")
 
             # Get category before deletion to update count
-            cursor.execute('SELECT category FROM products WHERE product_id = %s AND seller_user_id = %s', (product_id, seller_user_id))
+            cursor.execute('SELECT category, status FROM products WHERE product_id = %s AND seller_user_id = %s', (product_id, seller_user_id))
             result = cursor.fetchone()
             category = result['category'] if result else None
+            status = result['status'] if result else None
 
             if not category:
                 logger.warning(f"❌ DELETE FAILED: Product {product_id} not found for seller {seller_user_id} (ownership mismatch or product doesn't exist)")
@@ -167,14 +221,16 @@ class ProductRepository:
             deleted_count = cursor.rowcount
             logger.info(f"🗑️ DELETE RESULT: Deleted {deleted_count} rows for product {product_id}")
 
-            # Update category product count if deletion was successful
-            if deleted_count > 0 and category:
+            # Update category product count if deletion was successful (produits actifs uniquement)
+            if deleted_count > 0 and category and status == 'active':
                 cursor.execute(
                     'UPDATE categories SET products_count = CASE WHEN products_count > 0 THEN products_count - 1 ELSE 0 END WHERE name = %s',
                     (category,)
                 )
 
             conn.commit()
+            if deleted_count > 0:
+                get_category_catalogue().product_removed(category, status)
             return deleted_count > 0
         except psycopg2.Error as e:
             logger.error(f"❌ DELETE ERROR: {e}")
@@ -183,18 +239,19 @@ class ProductRepository:
         finally:
             put_connection(conn)
 
-    def get_products_by_seller(self, seller_user_id: int, limit: int = None, offset: int = 0) -> List[Dict]:
+    def get_products_by_seller(self, seller_user_id: int, limit: int = None, offset: int = 0,
+                               active_only: bool = False) -> List[ProductCard]:
         conn = get_connection()
-        # PostgreSQL uses RealDictCursor
-        cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        cursor = conn.cursor()
         try:
+            status_filter = "AND p.status = 'active'" if active_only else ''
             if limit is not None:
                 cursor.execute(
-                    '''
-                    SELECT p.*, u.seller_name, u.seller_rating, u.seller_bio
+                    f'''
+                    SELECT {ProductCard.select_list()}
                     FROM products p
                     LEFT JOIN users u ON p.seller_user_id = u.user_id
-                    WHERE p.seller_user_id = %s
+                    WHERE p.seller_user_id = %s {status_filter}
                     ORDER BY p.created_at DESC
                     LIMIT %s OFFSET %s
                     ''',
@@ -202,17 +259,16 @@ class ProductRepository:
                 )
             else:
                 cursor.execute(
-                    '''
-                    SELECT p.*, u.seller_name, u.seller_rating, u.seller_bio
+                    f'''
+                    SELECT {ProductCard.select_list()}
                     FROM products p
                     LEFT JOIN users u ON p.seller_user_id = u.user_id
-                    WHERE p.seller_user_id = %s
+                    WHERE p.seller_user_id = %s {status_filter}
                     ORDER BY p.created_at DESC
                     ''',
                     (seller_user_id,)
                 )
-            rows = cursor.fetchall()
-            return [row for row in rows]
+            return ProductCard.from_rows(cursor.fetchall())
         except psycopg2.Error:
             return []
         finally:
@@ -233,14 +289,13 @@ class ProductRepository:
         finally:
             put_connection(conn)
 
-    def get_products_by_category(self, category: str, limit: int = 10, offset: int = 0) -> List[Dict]:
+    def get_products_by_category(self, category: str, limit: int = 10, offset: int = 0) -> List[ProductCard]:
         conn = get_connection()
-        # PostgreSQL uses RealDictCursor
-        cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        cursor = conn.cursor()
         try:
             cursor.execute(
-                '''
-                SELECT p.*, u.seller_name, u.seller_rating, u.seller_bio
+                f'''
+                SELECT {ProductCard.select_list()}
                 FROM products p
                 LEFT JOIN users u ON p.seller_user_id = u.user_id
                 WHERE p.category = %s AND p.status = 'active'
@@ -249,8 +304,7 @@ class ProductRepository:
                 ''',
                 (category, limit, offset)
             )
-            rows = cursor.fetchall()
-            return [row for row in rows]
+            return ProductCard.from_rows(cursor.fetchall())
         except psycopg2.Error:
             return []
         finally:
@@ -347,14 +401,15 @@ class ProductRepository:
         finally:
             put_connection(conn)
 
-    def get_all_products(self, limit: int = 100):
+    def get_all_products(self, limit: int = 100) -> List[ProductAdmin]:
         conn = get_connection()
-        # PostgreSQL uses RealDictCursor
-        cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        cursor = conn.cursor()
         try:
-            cursor.execute("SELECT * FROM products ORDER BY created_at DESC LIMIT %s", (limit,))
-            rows = cursor.fetchall()
-            return [row for row in rows]
+            cursor.execute(
+                f"SELECT {ProductAdmin.select_list()} FROM products p ORDER BY p.created_at DESC LIMIT %s",
+                (limit,)
+            )
+            return ProductAdmin.from_rows(cursor.fetchall())
         except psycopg2.Error:
             return []
         finally:
@@ -371,7 +426,7 @@ class ProductRepository:
         finally:
             put_connection(conn)
 
-    def search_products(self, query: str, limit: int = 10):
+    def search_products(self, query: str, limit: int = 10) -> List[ProductCard]:
         """
         Recherche full-text dans titre + description des produits
 
@@ -380,25 +435,24 @@ class ProductRepository:
             limit: Nombre max de résultats
 
         Returns:
-            Liste de produits correspondants
+            Liste de cartes produit correspondantes
         """
         conn = get_connection()
-        # PostgreSQL uses RealDictCursor
-        cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        cursor = conn.cursor()
         try:
             search_pattern = f'%{query}%'
-            cursor.execute('''
-                SELECT * FROM products
-                WHERE (title LIKE %s OR description LIKE %s)
-                  AND status = 'active'
-                ORDER BY sales_count DESC, created_at DESC
+            cursor.execute(f'''
+                SELECT {ProductCard.select_list()}
+                FROM products p
+                LEFT JOIN users u ON p.seller_user_id = u.user_id
+                WHERE (p.title LIKE %s OR p.description LIKE %s)
+                  AND p.status = 'active'
+                ORDER BY p.sales_count DESC, p.created_at DESC
                 LIMIT %s
             ''', (search_pattern, search_pattern, limit))
-            rows = cursor.fetchall()
-            return [row for row in rows]
+            return ProductCard.from_rows(cursor.fetchall())
         except psycopg2.Error as e:
-            import logging
-            logging.error(f"Search error: {e}")
+            logger.error(f"Search error: {e}")
             return []
         finally:
             put_connection(conn)
@@ -436,40 +490,57 @@ class ProductRepository:
         else:
             return None
 
-    def recalculate_category_counts(self) -> bool:
-        """Recalcule tous les comptages de produits par catégorie"""
+    def get_category_counts(self) -> List[Tuple[str, int]]:
+        """Catégories et compteurs de produits actifs (chargement du CategoryCatalogue)"""
         conn = get_connection()
-        cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        cursor = conn.cursor()
         try:
-            # Reset all counts to 0
-            cursor.execute('UPDATE categories SET products_count = 0')
+            cursor.execute('SELECT name, products_count FROM categories')
+            return cursor.fetchall()
+        finally:
+            put_connection(conn)
 
-            # Recalculate counts from products table
-            cursor.execute('''
-                UPDATE categories SET products_count = (
-                    SELECT COUNT(*) FROM products
-                    WHERE products.category = categories.name
-                    AND products.status = 'active'
-                )
-            ''')
+    def recalculate_category_counts(self) -> Optional[int]:
+        """
+        Recalcule les comptages de produits actifs par catégorie (réconciliation du catalogue)
+        Un seul GROUP BY sur products; seules les lignes divergentes sont réécrites
 
-            # Insert missing categories with their counts
+        Returns:
+            Nombre de lignes categories corrigées, None en cas d'erreur
+        """
+        conn = get_connection()
+        cursor = conn.cursor()
+        try:
             cursor.execute('''
-                INSERT INTO categories (name, products_count)
-                SELECT DISTINCT category, COUNT(*)
-                FROM products
-                WHERE status = 'active' AND category IS NOT NULL
-                AND category NOT IN (SELECT name FROM categories)
-                GROUP BY category
+                WITH counts AS (
+                    SELECT category AS name, COUNT(*) AS products_count
+                    FROM products
+                    WHERE status = 'active' AND category IS NOT NULL
+                    GROUP BY category
+                ),
+                upserted AS (
+                    INSERT INTO categories (name, products_count)
+                    SELECT name, products_count FROM counts
+                    ON CONFLICT (name) DO UPDATE
+                    SET products_count = EXCLUDED.products_count
+                    WHERE categories.products_count IS DISTINCT FROM EXCLUDED.products_count
+                    RETURNING 1
+                ),
+                zeroed AS (
+                    UPDATE categories c SET products_count = 0
+                    WHERE c.products_count IS DISTINCT FROM 0
+                      AND NOT EXISTS (SELECT 1 FROM counts WHERE counts.name = c.name)
+                    RETURNING 1
+                )
+                SELECT (SELECT COUNT(*) FROM upserted) + (SELECT COUNT(*) FROM zeroed)
             ''')
-
+            corrected = cursor.fetchone()[0]
             conn.commit()
-            logger.info("Category counts recalculated successfully")
-            return True
+            return corrected
         except psycopg2.Error as e:
             conn.rollback()
             logger.error(f"Error recalculating category counts: {e}")
-            return False
+            return None
         finally:
             put_connection(conn)
 
@@ -507,31 +578,21 @@ class ProductRepository:
         Raises:
             Exception: Si insertion echoue
         """
-        conn = get_connection()
-        cursor = conn.cursor()
-
         try:
-            cursor.execute('''
-                INSERT INTO products (
-                    product_id, seller_user_id, title, description,
-                    price_usd, cover_image_url, status,
-                    imported_from, imported_url, source_profile,
-                    created_at
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, CURRENT_TIMESTAMP)
-            ''', (
-                product_id, seller_id, title, description,
-                price_usd, cover_image_url, 'draft',
-                imported_from, imported_url, source_profile
-            ))
-
-            conn.commit()
+            self.insert_products_bulk([{
+                'product_id': product_id,
+                'seller_user_id': seller_id,
+                'title': title,
+                'description': description,
+                'price_usd': price_usd,
+                'cover_image_url': cover_image_url,
+                'status': 'draft',
+                'imported_from': imported_from,
+                'imported_url': imported_url,
+                'source_profile': source_profile,
+            }])
             logger.info(f"Product imported: {product_id} from {imported_from}")
-
             return product_id
 
         except psycopg2.Error as e:
-            conn.rollback()
-            logger.error(f"Error creating imported product: {e}")
             raise Exception(f"Failed to create imported product: {e}")
-        finally:
-            put_connection(conn)
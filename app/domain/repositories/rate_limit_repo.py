@@ -0,0 +1,89 @@
+"""Rate Limit Repository - État GCRA partagé entre workers (migration 0009)"""
+
+from typing import Optional, Tuple
+
+import psycopg2
+
+from app.core.db_helpers import delete_in_batches
+from app.core.db_pool import get_connection, put_connection
+
+
+class RateLimitRepository:
+    """TAT par (limite, clé), horloge de la base commune à tous les workers"""
+
+    @staticmethod
+    def hit(limit_name: str, key: str, emission_interval: float, window_seconds: float) -> Tuple[bool, Optional[float], float]:
+        """
+        Consomme une requête en un UPSERT atomique
+
+        La mise à jour n'a lieu que si la requête est autorisée
+        (max(TAT, now) + T - W <= now); sinon le TAT courant est relu.
+
+        Returns:
+            (allowed, tat, now) - tat = nouveau TAT si autorisé, TAT courant sinon
+        """
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT INTO rate_limit_state (limit_name, limit_key, tat)
+                VALUES (%(name)s, %(key)s, EXTRACT(EPOCH FROM now()) + %(interval)s)
+                ON CONFLICT (limit_name, limit_key) DO UPDATE
+                SET tat = GREATEST(rate_limit_state.tat, EXTRACT(EPOCH FROM now())) + %(interval)s
+                WHERE GREATEST(rate_limit_state.tat, EXTRACT(EPOCH FROM now())) + %(interval)s - %(window)s
+                      <= EXTRACT(EPOCH FROM now())
+                RETURNING tat, EXTRACT(EPOCH FROM now())
+            ''', {'name': limit_name, 'key': key, 'interval': emission_interval, 'window': window_seconds})
+            row = cursor.fetchone()
+            conn.commit()
+
+            if row:
+                return True, row[0], float(row[1])
+
+            tat, now = RateLimitRepository._read_tat(cursor, limit_name, key)
+            return False, tat, now
+        except psycopg2.Error:
+            conn.rollback()
+            raise
+        finally:
+            put_connection(conn)
+
+    @staticmethod
+    def get_tat(limit_name: str, key: str) -> Tuple[Optional[float], float]:
+        """(TAT ou None, now) sans consommer"""
+        conn = get_connection()
+        try:
+            return RateLimitRepository._read_tat(conn.cursor(), limit_name, key)
+        finally:
+            put_connection(conn)
+
+    @staticmethod
+    def _read_tat(cursor, limit_name: str, key: str) -> Tuple[Optional[float], float]:
+        cursor.execute('''
+            SELECT (SELECT tat FROM rate_limit_state WHERE limit_name = %s AND limit_key = %s),
+                   EXTRACT(EPOCH FROM now())
+        ''', (limit_name, key))
+        tat, now = cursor.fetchone()
+        return tat, float(now)
+
+    @staticmethod
+    def reset(limit_name: str, key: str):
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                'DELETE FROM rate_limit_state WHERE limit_name = %s AND limit_key = %s',
+                (limit_name, key)
+            )
+            conn.commit()
+        finally:
+            put_connection(conn)
+
+    @staticmethod
+    def cleanup_expired() -> int:
+        """
+        Supprime par lots les TAT passés (tâche planifiée rate_limits_cleanup)
+
+        Un TAT passé équivaut à une absence de ligne.
+        """
+        return delete_in_batches('rate_limit_state', 'tat < EXTRACT(EPOCH FROM now())')
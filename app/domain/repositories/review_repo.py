@@ -2,10 +2,68 @@
 
 import psycopg2
 import psycopg2.extras
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from app.core.utils import logger
 from app.core.db_pool import get_connection
 from app.core.db_pool import put_connection
+from app.domain.views import ReviewSummary
+
+# Recalcul complet de product_review_stats depuis reviews (migration 0003 + backfill_review_stats.py)
+# SHARE lock: bloque les écritures d'avis le temps du recalcul, pas les lectures
+REVIEW_STATS_BACKFILL_SQL = '''
+    LOCK TABLE reviews IN SHARE MODE;
+
+    INSERT INTO product_review_stats
+        (product_id, review_count, rating_sum, rating_1, rating_2, rating_3, rating_4, rating_5)
+    SELECT
+        product_id,
+        COUNT(*),
+        SUM(rating),
+        COUNT(*) FILTER (WHERE rating = 1),
+        COUNT(*) FILTER (WHERE rating = 2),
+        COUNT(*) FILTER (WHERE rating = 3),
+        COUNT(*) FILTER (WHERE rating = 4),
+        COUNT(*) FILTER (WHERE rating = 5)
+    FROM reviews
+    GROUP BY product_id
+    ON CONFLICT (product_id) DO UPDATE
+    SET review_count = EXCLUDED.review_count,
+        rating_sum = EXCLUDED.rating_sum,
+        rating_1 = EXCLUDED.rating_1,
+        rating_2 = EXCLUDED.rating_2,
+        rating_3 = EXCLUDED.rating_3,
+        rating_4 = EXCLUDED.rating_4,
+        rating_5 = EXCLUDED.rating_5,
+        updated_at = CURRENT_TIMESTAMP;
+
+    DELETE FROM product_review_stats s
+    WHERE NOT EXISTS (SELECT 1 FROM reviews r WHERE r.product_id = s.product_id);
+
+    UPDATE products p
+    SET rating = CASE
+            WHEN (COALESCE(p.imported_reviews_count, 0) + s.review_count) > 0 THEN
+                (COALESCE(p.imported_rating, 0.0) * COALESCE(p.imported_reviews_count, 0) + s.rating_sum)
+                / (COALESCE(p.imported_reviews_count, 0) + s.review_count)
+            ELSE 0.0
+        END,
+        reviews_count = COALESCE(p.imported_reviews_count, 0) + s.review_count
+    FROM product_review_stats s
+    WHERE s.product_id = p.product_id;
+
+    -- Produits sans avis restant (tous supprimés): seuls les avis importés comptent
+    UPDATE products p
+    SET rating = CASE
+            WHEN COALESCE(p.imported_reviews_count, 0) > 0 THEN COALESCE(p.imported_rating, 0.0)
+            ELSE 0.0
+        END,
+        reviews_count = COALESCE(p.imported_reviews_count, 0)
+    WHERE NOT EXISTS (SELECT 1 FROM product_review_stats s WHERE s.product_id = p.product_id)
+      AND (p.reviews_count IS DISTINCT FROM COALESCE(p.imported_reviews_count, 0)
+           OR p.rating IS DISTINCT FROM CASE
+                  WHEN COALESCE(p.imported_reviews_count, 0) > 0 THEN COALESCE(p.imported_rating, 0.0)
+                  ELSE 0.0
+              END);
+'''
 
 
 class ReviewRepository:
@@ -18,14 +76,17 @@ class ReviewRepository:
         """Create database connection"""
         return get_connection()
 
-    def get_product_reviews(self, product_id: str, limit: int = 5, offset: int = 0) -> List[Dict]:
+    def get_product_reviews(self, product_id: str, limit: int = 5, offset: int = 0,
+                            after: Optional[Tuple] = None) -> List[Dict]:
         """
         Get paginated reviews for a product
 
         Args:
             product_id: Product ID
             limit: Number of reviews per page (default 5)
-            offset: Offset for pagination
+            offset: Offset for pagination (ignored when `after` is given)
+            after: Keyset cursor (created_at, buyer_user_id) of the last review of the
+                previous page: seek on idx_reviews_product_created instead of OFFSET
 
         Returns:
             List of review dicts with buyer info
@@ -34,7 +95,16 @@ class ReviewRepository:
             conn = self._get_connection()
             cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
 
-            query = '''
+            if after is not None:
+                keyset_filter = 'AND (r.created_at, r.buyer_user_id) < (%s, %s)'
+                params = (product_id, after[0], after[1], limit)
+                pagination = 'LIMIT %s'
+            else:
+                keyset_filter = ''
+                params = (product_id, limit, offset)
+                pagination = 'LIMIT %s OFFSET %s'
+
+            query = f'''
                 SELECT
                     r.product_id,
                     r.buyer_user_id,
@@ -46,12 +116,12 @@ class ReviewRepository:
                     u.username
                 FROM reviews r
                 LEFT JOIN users u ON r.buyer_user_id = u.user_id
-                WHERE r.product_id = %s
-                ORDER BY r.created_at DESC
-                LIMIT %s OFFSET %s
+                WHERE r.product_id = %s {keyset_filter}
+                ORDER BY r.created_at DESC, r.buyer_user_id DESC
+                {pagination}
             '''
 
-            cursor.execute(query, (product_id, limit, offset))
+            cursor.execute(query, params)
             rows = cursor.fetchall()
             put_connection(conn)
 
@@ -92,44 +162,35 @@ class ReviewRepository:
 
     def get_product_rating_summary(self, product_id: str) -> Dict:
         """
-        Get rating summary for a product
+        Get rating summary for a product (one primary-key lookup on product_review_stats)
 
         Returns:
             Dict with average_rating, total_reviews, rating_distribution
         """
         try:
             conn = self._get_connection()
-            cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+            cursor = conn.cursor()
 
-            # Get average and count
             cursor.execute('''
-                SELECT AVG(rating), COUNT(*)
-                FROM reviews
+                SELECT review_count, rating_sum, rating_1, rating_2, rating_3, rating_4, rating_5
+                FROM product_review_stats
                 WHERE product_id = %s
             ''', (product_id,))
-
-            avg_rating, total = cursor.fetchone()
-            avg_rating = avg_rating if avg_rating else 0.0
-            total = total if total else 0
-
-            # Get rating distribution (1-5 stars)
-            distribution = {}
-            for stars in range(1, 6):
-                cursor.execute('''
-                    SELECT COUNT(*) as count
-                    FROM reviews
-                    WHERE product_id = %s AND rating = %s
-                ''', (product_id, stars))
-
-                count = cursor.fetchone()['count']
-                distribution[stars] = count
-
+            row = cursor.fetchone()
             put_connection(conn)
 
+            if not row or not row[0]:
+                return {
+                    'average_rating': 0.0,
+                    'total_reviews': 0,
+                    'rating_distribution': {1: 0, 2: 0, 3: 0, 4: 0, 5: 0}
+                }
+
+            total, rating_sum = row[0], row[1]
             return {
-                'average_rating': round(avg_rating, 1),
+                'average_rating': round(rating_sum / total, 1),
                 'total_reviews': total,
-                'rating_distribution': distribution
+                'rating_distribution': {stars: row[1 + stars] for stars in range(1, 6)}
             }
 
         except psycopg2.Error as e:
@@ -140,6 +201,53 @@ class ReviewRepository:
                 'rating_distribution': {1: 0, 2: 0, 3: 0, 4: 0, 5: 0}
             }
 
+    def get_review_summary(self, product_id: str) -> Optional[ReviewSummary]:
+        """
+        En-tête de la page d'avis en une requête: produit (titre, prix, note globale)
+        + agrégat local (nombre, somme, histogramme). None si le produit n'existe pas.
+        """
+        try:
+            conn = self._get_connection()
+            cursor = conn.cursor()
+
+            cursor.execute(f'''
+                SELECT {ReviewSummary.select_list()}
+                FROM products p
+                LEFT JOIN product_review_stats s ON s.product_id = p.product_id
+                WHERE p.product_id = %s
+            ''', (product_id,))
+            row = cursor.fetchone()
+            put_connection(conn)
+
+            return ReviewSummary.from_row(row)
+
+        except psycopg2.Error as e:
+            logger.error(f"Error getting review summary: {e}")
+            return None
+
+    def backfill_review_stats(self) -> int:
+        """
+        Recalcule product_review_stats (et products.rating / reviews_count) depuis reviews
+
+        Returns:
+            Nombre de produits ayant au moins un avis
+        """
+        conn = self._get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(REVIEW_STATS_BACKFILL_SQL)
+            cursor.execute('SELECT COUNT(*) FROM product_review_stats')
+            count = cursor.fetchone()[0]
+            conn.commit()
+            logger.info(f"✅ Review aggregates backfilled for {count} products")
+            return count
+        except psycopg2.Error as e:
+            conn.rollback()
+            logger.error(f"Error backfilling review aggregates: {e}")
+            raise
+        finally:
+            put_connection(conn)
+
     def add_review(self, product_id: str, buyer_user_id: int,
                    rating: int, review_text: str = None) -> bool:
         """
@@ -4,6 +4,7 @@ from typing import Optional, Dict
 
 from app.core.db_pool import get_connection
 from app.core.db_pool import put_connection
+from app.domain.views import UserAdmin
 
 
 class UserRepository:
@@ -115,13 +116,15 @@ class UserRepository:
             put_connection(conn)
 
     def get_all_users(self, limit: int = 100):
+        """Liste admin: projection UserAdmin (sans secrets de connexion)"""
         conn = get_connection()
-        # PostgreSQL uses RealDictCursor
-        cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        cursor = conn.cursor()
         try:
-            cursor.execute('SELECT * FROM users ORDER BY registration_date DESC LIMIT %s', (limit,))
-            rows = cursor.fetchall()
-            return [row for row in rows]
+            cursor.execute(
+                f'SELECT {UserAdmin.select_list()} FROM users ORDER BY registration_date DESC LIMIT %s',
+                (limit,)
+            )
+            return UserAdmin.from_rows(cursor.fetchall())
         except psycopg2.Error:
             return []
         finally:
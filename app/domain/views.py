@@ -0,0 +1,229 @@
+"""
+Read Views - Projections typées par cas d'usage (au lieu de SELECT p.* + RealDictRow)
+
+Chaque vue déclare ses colonnes (COLUMNS) et la requête les sélectionne explicitement
+via PROJECTION: seules les colonnes utiles transitent et chaque ligne reste le tuple
+renvoyé par le curseur standard (pas de dict par ligne).
+
+Les vues restent compatibles avec le code existant écrit pour des dicts:
+product['title'], product.get('rating', 0), dict(product), 'x' in product.
+Accès attribut également disponible: product.title
+
+- ProductCard:   carrousels / recherche / boutique (légende courte + image + clavier)
+- ProductDetail: page détail, livraison, édition vendeur
+- ProductAdmin:  listes et exports admin
+- UserAdmin:     listes et exports admin (sans hash / sel de mot de passe)
+- OrderSummary:  historiques acheteur / vendeur
+- ReviewSummary: en-tête de page d'avis (produit + agrégat product_review_stats)
+- LibraryItem:   bibliothèque acheteur (projection buyer_purchases)
+"""
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+
+class RowView:
+    """Ligne en lecture seule adossée à un tuple (__slots__, zéro dict par ligne)"""
+
+    __slots__ = ('_row', '_extra')
+
+    COLUMNS: Tuple[str, ...] = ()
+    # Expressions SQL alignées sur COLUMNS (défaut: nom de colonne)
+    PROJECTION: Tuple[str, ...] = ()
+    _INDEX: Dict[str, int] = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if not cls.PROJECTION:
+            cls.PROJECTION = cls.COLUMNS
+        if len(cls.PROJECTION) != len(cls.COLUMNS):
+            raise TypeError(f"{cls.__name__}: PROJECTION and COLUMNS lengths differ")
+        cls._INDEX = {name: index for index, name in enumerate(cls.COLUMNS)}
+        for index, name in enumerate(cls.COLUMNS):
+            setattr(cls, name, property(lambda self, i=index: self._row[i]))
+
+    def __init__(self, row: tuple):
+        self._row = row
+        self._extra = None
+
+    @classmethod
+    def select_list(cls) -> str:
+        """Liste SELECT de la projection, ex: 'p.product_id, p.title, u.seller_name'"""
+        return ', '.join(cls.PROJECTION)
+
+    @classmethod
+    def from_rows(cls, rows) -> list:
+        return [cls(row) for row in rows]
+
+    @classmethod
+    def from_row(cls, row) -> Optional['RowView']:
+        return cls(row) if row is not None else None
+
+    # Protocole mapping (compatibilité avec les appelants écrits pour RealDictRow)
+
+    def __getitem__(self, key: str) -> Any:
+        index = self._INDEX.get(key)
+        if index is not None:
+            return self._row[index]
+        if self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value: Any):
+        """Annotations d'affichage (ex: seller_bio_display); les colonnes restent immuables"""
+        if key in self._INDEX:
+            raise TypeError(f"{type(self).__name__}.{key} is read-only")
+        if self._extra is None:
+            self._extra = {}
+        self._extra[key] = value
+
+    def get(self, key: str, default: Any = None) -> Any:
+        index = self._INDEX.get(key)
+        if index is not None:
+            # Comme dict.get: une colonne NULL renvoie None, pas le défaut
+            return self._row[index]
+        if self._extra is not None:
+            return self._extra.get(key, default)
+        return default
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._INDEX or (self._extra is not None and key in self._extra)
+
+    def keys(self):
+        if self._extra:
+            return list(self.COLUMNS) + list(self._extra)
+        return self.COLUMNS
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    def __len__(self) -> int:
+        return len(self.COLUMNS) + (len(self._extra) if self._extra else 0)
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def values(self):
+        return [self[key] for key in self.keys()]
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = dict(zip(self.COLUMNS, self._row))
+        if self._extra:
+            data.update(self._extra)
+        return data
+
+    def __repr__(self) -> str:
+        key = self.COLUMNS[0] if self.COLUMNS else '?'
+        return f"<{type(self).__name__} {key}={self._row[0]!r}>" if self._row else f"<{type(self).__name__}>"
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# PRODUITS (alias: p = products, u = users)
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+class ProductCard(RowView):
+    """Carte carrousel: légende courte, badges, image, clavier (+ extrait pour le carrousel vendeur)"""
+    __slots__ = ()
+
+    COLUMNS = (
+        'product_id', 'seller_user_id', 'title', 'category', 'price_usd', 'file_size_mb',
+        'cover_image_url', 'thumbnail_url', 'views_count', 'sales_count', 'rating',
+        'reviews_count', 'status', 'created_at', 'seller_name', 'description_excerpt'
+    )
+    PROJECTION = (
+        'p.product_id', 'p.seller_user_id', 'p.title', 'p.category', 'p.price_usd', 'p.file_size_mb',
+        'p.cover_image_url', 'p.thumbnail_url', 'p.views_count', 'p.sales_count', 'p.rating',
+        'p.reviews_count', 'p.status', 'p.created_at', 'u.seller_name', 'LEFT(p.description, 200)'
+    )
+
+
+class ProductDetail(RowView):
+    """Page détail / livraison / édition: description et fichier, sans métadonnées d'import"""
+    __slots__ = ()
+
+    COLUMNS = (
+        'product_id', 'seller_user_id', 'title', 'description', 'category', 'price_usd',
+        'main_file_url', 'file_size_mb', 'cover_image_url', 'thumbnail_url', 'preview_url',
+        'views_count', 'sales_count', 'rating', 'reviews_count', 'status',
+        'deactivated_by_admin', 'admin_deactivation_reason', 'created_at',
+        'seller_name', 'seller_bio', 'seller_rating'
+    )
+    PROJECTION = tuple(f'p.{c}' for c in COLUMNS[:19]) + ('u.seller_name', 'u.seller_bio', 'u.seller_rating')
+
+
+class ProductAdmin(RowView):
+    """Listes et exports admin (CSV compris)"""
+    __slots__ = ()
+
+    COLUMNS = (
+        'product_id', 'seller_user_id', 'title', 'category', 'price_usd', 'status',
+        'sales_count', 'deactivated_by_admin', 'created_at'
+    )
+    PROJECTION = tuple(f'p.{c}' for c in COLUMNS)
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# UTILISATEURS / COMMANDES
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+class UserAdmin(RowView):
+    """Listes et exports admin: jamais de password_hash / password_salt"""
+    __slots__ = ()
+
+    COLUMNS = (
+        'user_id', 'username', 'first_name', 'language_code', 'registration_date',
+        'last_activity', 'is_seller', 'seller_name', 'email', 'total_sales',
+        'total_revenue', 'is_suspended'
+    )
+
+
+class OrderSummary(RowView):
+    """Historique acheteur / vendeur (sans adresses ni payloads de paiement)"""
+    __slots__ = ()
+
+    COLUMNS = (
+        'order_id', 'buyer_user_id', 'seller_user_id', 'product_id', 'product_title',
+        'product_price_usd', 'payment_status', 'created_at', 'completed_at', 'download_count'
+    )
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# AVIS (alias: p = products, s = product_review_stats)
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+class ReviewSummary(RowView):
+    """En-tête de page d'avis: carte produit + agrégat (local_*: avis déposés sur la marketplace)"""
+    __slots__ = ()
+
+    COLUMNS = (
+        'product_id', 'title', 'price_usd', 'rating', 'reviews_count',
+        'local_review_count', 'local_rating_sum',
+        'rating_1', 'rating_2', 'rating_3', 'rating_4', 'rating_5'
+    )
+    PROJECTION = (
+        'p.product_id', 'p.title', 'p.price_usd', 'p.rating', 'p.reviews_count',
+        'COALESCE(s.review_count, 0)', 'COALESCE(s.rating_sum, 0)',
+        'COALESCE(s.rating_1, 0)', 'COALESCE(s.rating_2, 0)', 'COALESCE(s.rating_3, 0)',
+        'COALESCE(s.rating_4, 0)', 'COALESCE(s.rating_5, 0)'
+    )
+
+    @property
+    def rating_distribution(self) -> Dict[int, int]:
+        return {stars: self._row[6 + stars] for stars in range(1, 6)}
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# BIBLIOTHÈQUE (alias: bp = buyer_purchases, p = products, u = users, o = orders)
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+class LibraryItem(RowView):
+    """Carte bibliothèque: produit acheté + dernier achat (clé keyset: completed_at, product_id)"""
+    __slots__ = ()
+
+    COLUMNS = (
+        'product_id', 'seller_user_id', 'title', 'price_usd', 'category', 'file_size_mb',
+        'thumbnail_url', 'cover_image_url', 'seller_name', 'completed_at', 'order_id', 'download_count'
+    )
+    PROJECTION = (
+        'p.product_id', 'p.seller_user_id', 'p.title', 'p.price_usd', 'p.category', 'p.file_size_mb',
+        'p.thumbnail_url', 'p.cover_image_url', 'COALESCE(u.seller_name, u.first_name)',
+        'bp.last_purchased_at', 'bp.order_id', 'COALESCE(o.download_count, 0)'
+    )
@@ -2,14 +2,15 @@
 IPN Server avec support Webhook Telegram et Mini App Auth (Corrigé)
 """
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, Request, HTTPException
+from fastapi import FastAPI, Request, HTTPException, Depends
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse
 from fastapi.responses import RedirectResponse
+from fastapi.responses import PlainTextResponse
+from fastapi.responses import JSONResponse, Response
 from pydantic import BaseModel
 from typing import Optional
-from datetime import datetime
 import hmac
 import hashlib
 import json
@@ -18,8 +19,7 @@ import logging
 import asyncio
 import sys
 import uuid
-# IMPORT CRITIQUE POUR LE FIX 401
-from urllib.parse import parse_qsl
+import psycopg2
 
 # Gestion du path pour les imports relatifs
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
@@ -28,13 +28,35 @@ from telegram import Bot, Update
 from telegram.ext import Application
 
 from app.core import settings as core_settings
-from app.core.database_init import get_postgresql_connection
-from app.core.db_pool import put_connection
+from app.core.db_pool import get_connection, get_pool_status, put_connection
+from app.core.query_stats import get_query_stats
+from app.core.partitioning import maintain_partitions
+from app.core.scheduler import (
+    get_maintenance_scheduler, init_maintenance_scheduler, shutdown_maintenance_scheduler
+)
 from app.core.file_utils import get_b2_presigned_url
-from app.services.b2_storage_service import B2StorageService
+from app.services.b2_storage_service import B2StorageService, get_storage_service
 from app.domain.repositories.order_repo import OrderRepository
 from app.domain.repositories.download_repo import DownloadRepository
+from app.domain.repositories.library_repo import LibraryRepository
+from app.services.buyer_library import get_buyer_library
+from app.services.category_service import (
+    CATEGORIES_CACHE_CONTROL, get_category_catalogue, init_category_catalogue,
+    shutdown_category_catalogue
+)
+from app.core.download_tokens import get_download_token_service, init_download_token_service
+from app.core.webapp_auth import WebAppUser, get_webapp_authenticator, is_dev_mode
+from app.core.outbound_messages import (
+    PRIORITY_DELIVERY, get_outbound_scheduler, init_outbound_scheduler,
+    send_telegram_message, shutdown_outbound_scheduler
+)
 from app.services.seller_payout_service import SellerPayoutService
+from app.domain.repositories.import_job_repo import ImportJobRepository
+from app.services.import_jobs import get_import_engine, init_import_engine, shutdown_import_engine
+from app.core.email_outbox import get_email_outbox, init_email_outbox, shutdown_email_outbox
+from app.core.logging import get_logging_stats, reset_correlation_id, set_correlation_id
+from app.core.update_dispatcher import get_update_dispatcher, init_update_dispatcher, shutdown_update_dispatcher
+from app.services.cover_ingest import get_cover_ingestor, shutdown_cover_ingestor
 
 # --- IMPORTS DU BOT ---
 from app.integrations.telegram.app_builder import build_application
@@ -59,6 +81,25 @@ async def lifespan(app: FastAPI):
     """
     global telegram_application
 
+    # Tokens de téléchargement: configuration vérifiée au démarrage (replay set partagé
+    # obligatoire avec plusieurs workers)
+    init_download_token_service()
+
+    # Catalogue des catégories: réconciliation au démarrage puis périodique
+    init_category_catalogue()
+
+    # Partitions mensuelles orders / seller_payouts des prochains mois
+    try:
+        await asyncio.to_thread(maintain_partitions)
+    except Exception as e:
+        logger.error(f"❌ Partition maintenance failed: {e}")
+
+    # Tâches de maintenance planifiées (purges, relivraisons, partitions, sauvegarde)
+    init_maintenance_scheduler()
+
+    # Emails transactionnels: envoi groupé en arrière-plan (messages en attente repris)
+    init_email_outbox()
+
     logger.info("🚀 Initialisation du Bot Telegram dans le lifespan...")
 
     if not core_settings.TELEGRAM_BOT_TOKEN:
@@ -74,12 +115,24 @@ async def lifespan(app: FastAPI):
             await telegram_application.initialize()
             await telegram_application.start()
 
+            # File d'envoi sortante (rate limits Telegram global / par chat)
+            init_outbound_scheduler(telegram_application.bot)
+
+            # Imports de boutique en arrière-plan (jobs interrompus repris au démarrage)
+            init_import_engine(
+                telegram_application.bot,
+                on_finished=lambda job: bot_instance.import_handlers.on_import_job_finished(bot_instance, job)
+            )
+
             # 3. Configurer Webhook OU Polling
             webhook_url = core_settings.WEBHOOK_URL
             # On active le webhook seulement si c'est une URL https distante (pas localhost)
             use_webhook = webhook_url and 'localhost' not in webhook_url and webhook_url.startswith('https')
 
             if use_webhook:
+                # Updates traitées par les workers du dispatcher: le webhook répond immédiatement
+                init_update_dispatcher(telegram_application.process_update)
+
                 webhook_full_url = f"{webhook_url}/webhook/telegram"
                 await telegram_application.bot.set_webhook(
                     url=webhook_full_url,
@@ -103,6 +156,13 @@ async def lifespan(app: FastAPI):
 
     # Arrêt propre
     logger.info("🛑 Arrêt du Bot Telegram...")
+    await shutdown_update_dispatcher()
+    await shutdown_maintenance_scheduler()
+    await shutdown_import_engine()
+    await shutdown_cover_ingestor()
+    await shutdown_outbound_scheduler()
+    await shutdown_email_outbox()
+    await shutdown_category_catalogue()
     if telegram_application:
         try:
             await telegram_application.stop()
@@ -125,6 +185,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+
+@app.middleware("http")
+async def correlation_id_middleware(request: Request, call_next):
+    """Identifiant de corrélation par requête (X-Request-ID entrant ou généré), renvoyé au client"""
+    request_id = request.headers.get('x-request-id') or uuid.uuid4().hex[:16]
+    token = set_correlation_id(f"req-{request_id}")
+    try:
+        response = await call_next(request)
+    finally:
+        reset_correlation_id(token)
+    response.headers['X-Request-ID'] = request_id
+    return response
+
 # Montage des fichiers statiques pour la Mini App (JS/CSS)
 # Assurez-vous que le dossier existe : app/integrations/telegram/static
 app.mount("/static", StaticFiles(directory="app/integrations/telegram/static"), name="static")
@@ -142,16 +216,67 @@ async def health_check():
         "bot_ready": telegram_application is not None
     }
     try:
-        conn = get_postgresql_connection()
+        # Attente courte hors boucle: un pool saturé ne doit pas bloquer /health
+        conn = await asyncio.to_thread(get_connection, 1.0)
         put_connection(conn)
         checks["postgres"] = True
     except Exception:
         checks["postgres"] = False
 
+    checks["db_pool"] = get_pool_status()
+    checks["storage_cache"] = B2StorageService.get_cache_stats()
+    checks["buyer_library"] = get_buyer_library().get_stats()
+    checks["categories"] = get_category_catalogue().get_stats()
+
+    outbound_scheduler = get_outbound_scheduler()
+    if outbound_scheduler:
+        checks["outbound_messages"] = outbound_scheduler.get_stats()
+
+    maintenance_scheduler = get_maintenance_scheduler()
+    if maintenance_scheduler:
+        checks["scheduler"] = maintenance_scheduler.get_stats()
+
+    import_engine = get_import_engine()
+    if import_engine:
+        checks["import_jobs"] = import_engine.get_stats()
+    checks["cover_ingest"] = get_cover_ingestor().get_stats()
+
+    email_outbox = get_email_outbox()
+    if email_outbox:
+        checks["email_outbox"] = email_outbox.get_stats()
+    checks["logging"] = get_logging_stats()
+
+    update_dispatcher = get_update_dispatcher()
+    if update_dispatcher:
+        checks["update_dispatcher"] = update_dispatcher.get_stats()
+
     if not checks["postgres"]:
         return checks, 503
     return checks
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Métriques au format d'exposition Prometheus (pool, latence des requêtes par méthode, tâches planifiées, covers importées, updates Telegram)"""
+    lines = []
+    pool_status = get_pool_status()
+    for key, value in pool_status.items():
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            continue
+        lines.append(f"# TYPE db_pool_{key} gauge")
+        lines.append(f"db_pool_{key} {value}")
+
+    lines.extend(get_query_stats().prometheus_histograms())
+
+    maintenance_scheduler = get_maintenance_scheduler()
+    if maintenance_scheduler:
+        lines.extend(maintenance_scheduler.prometheus_lines())
+    lines.extend(get_cover_ingestor().prometheus_lines())
+
+    update_dispatcher = get_update_dispatcher()
+    if update_dispatcher:
+        lines.extend(update_dispatcher.prometheus_lines())
+    return PlainTextResponse("\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
+
 @app.get("/")
 async def root():
     return {"service": "Uzeur Marketplace Server", "status": "running"}
@@ -168,7 +293,13 @@ async def telegram_webhook(request: Request):
     try:
         data = await request.json()
         update = Update.de_json(data, telegram_application.bot)
-        await telegram_application.process_update(update)
+
+        dispatcher = get_update_dispatcher()
+        if dispatcher is None:
+            await telegram_application.process_update(update)
+        elif not dispatcher.submit(update):
+            # File pleine: Telegram renverra l'update plus tard (backpressure)
+            return JSONResponse(status_code=503, content={"ok": False, "error": "update queue full"})
         return {"ok": True}
     except Exception as e:
         logger.error(f"Error processing update: {e}")
@@ -182,64 +313,92 @@ async def telegram_webhook(request: Request):
 def verify_telegram_webapp_data(init_data: str) -> bool:
     """
     Vérifie l'intégrité des données reçues de la WebApp Telegram.
-    Utilise parse_qsl pour gérer correctement le décodage URL.
+    Clé secrète dérivée une seule fois + cache LRU des initData déjà vérifiés.
     """
     # SKIP AUTH EN DEV LOCAL
-    webapp_url = os.getenv('WEBAPP_URL', '')
-    if 'localhost' in webapp_url or '127.0.0.1' in webapp_url:
-        logger.warning("⚠️ DEV MODE: Skipping WebApp auth")
+    if is_dev_mode():
         return True
 
-    if not init_data:
+    try:
+        return get_webapp_authenticator().verify_init_data(init_data) is not None
+    except Exception as e:
+        logger.error(f"❌ Auth Exception: {e}")
         return False
 
-    try:
-        # 1. Parsing correct des données URL-encodées
-        parsed_data = dict(parse_qsl(init_data, keep_blank_values=True))
-
-        # 2. Extraction du hash reçu
-        received_hash = parsed_data.pop('hash', None)
-        if not received_hash:
-            return False
-
-        # 3. Vérification expiration (24h max)
-        auth_date = int(parsed_data.get('auth_date', 0))
-        if (datetime.now().timestamp() - auth_date) > 86400:
-             logger.warning("⚠️ Telegram WebApp data expired")
-             return False
-
-        # 4. Reconstruction de la chaîne de vérification
-        # Format: key=value triés par clé, séparés par \n
-        data_check_string = '\n'.join(
-            f"{k}={v}" for k, v in sorted(parsed_data.items())
-        )
 
-        # 5. Calcul HMAC-SHA256
-        secret_key = hmac.new(
-            "WebAppData".encode(),
-            core_settings.TELEGRAM_BOT_TOKEN.encode(),
-            hashlib.sha256
-        ).digest()
+async def authenticate_webapp(request: Request) -> WebAppUser:
+    """
+    Dépendance FastAPI: injecte l'utilisateur Mini App authentifié.
 
-        calculated_hash = hmac.new(
-            secret_key,
-            data_check_string.encode(),
-            hashlib.sha256
-        ).hexdigest()
+    Ordre de résolution:
+    1. Authorization: Bearer <session_token> (émis par /api/session) - HMAC temps constant
+    2. Header X-Telegram-Init-Data
+    3. Champ telegram_init_data du body JSON (compatibilité anciens clients)
+    """
+    if is_dev_mode():
+        return WebAppUser(user_id=None)
 
-        # 6. Comparaison
-        is_valid = calculated_hash == received_hash
+    authenticator = get_webapp_authenticator()
 
-        if is_valid:
-            logger.info(f"✅ WebApp Auth Success User: {parsed_data.get('user')}")
-        else:
-            logger.warning(f"❌ WebApp Auth Failed. Calc: {calculated_hash} != Recv: {received_hash}")
+    authorization = request.headers.get('Authorization', '')
+    if authorization.startswith('Bearer '):
+        user = authenticator.verify_session(authorization[7:])
+        if user:
+            return user
+        raise HTTPException(status_code=401, detail="Unauthorized - Invalid or expired session")
+
+    init_data = request.headers.get('X-Telegram-Init-Data', '')
+    if not init_data and request.method == 'POST':
+        try:
+            body = await request.json()
+            init_data = (body.get('telegram_init_data') or '') if isinstance(body, dict) else ''
+        except ValueError:
+            init_data = ''
 
-        return is_valid
+    user = authenticator.verify_init_data(init_data)
+    if not user:
+        raise HTTPException(status_code=401, detail="Unauthorized - Invalid Init Data")
 
-    except Exception as e:
-        logger.error(f"❌ Auth Exception: {e}")
-        return False
+    return user
+
+
+def ensure_webapp_user(webapp_user: WebAppUser, user_id: int):
+    """
+    Refuse les requêtes dont user_id ne correspond pas à l'utilisateur authentifié.
+    Un utilisateur sans identité (user_id None) n'est accepté qu'en mode dev.
+    """
+    if webapp_user.user_id is None:
+        if is_dev_mode():
+            return
+        logger.warning(f"🚫 WebApp request without authenticated user (requested={user_id})")
+        raise HTTPException(status_code=401, detail="Unauthorized - No Telegram user")
+    if webapp_user.user_id != user_id:
+        logger.warning(f"🚫 WebApp user mismatch: authenticated={webapp_user.user_id}, requested={user_id}")
+        raise HTTPException(status_code=403, detail="Forbidden - User mismatch")
+
+
+class SessionRequest(BaseModel):
+    telegram_init_data: str
+
+
+@app.post("/api/session")
+async def create_session(request: SessionRequest):
+    """Échange un initData vérifié contre un session token signé courte durée"""
+    if is_dev_mode():
+        # Pas de session en dev local: les clients retombent sur telegram_init_data
+        return {"session_token": None, "expires_in": 0, "user_id": None}
+
+    authenticator = get_webapp_authenticator()
+    user = authenticator.verify_init_data(request.telegram_init_data)
+
+    if not user:
+        raise HTTPException(status_code=401, detail="Unauthorized - Invalid Init Data")
+
+    return {
+        "session_token": authenticator.issue_session(user),
+        "expires_in": authenticator.session_ttl_seconds,
+        "user_id": user.user_id
+    }
 
 
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
@@ -250,20 +409,20 @@ class GenerateUploadURLRequest(BaseModel):
     file_name: str
     file_type: str
     user_id: int
-    telegram_init_data: str
+    telegram_init_data: Optional[str] = None
 
 class GetB2UploadURLRequest(BaseModel):
     object_key: str
     content_type: str
     user_id: int
-    telegram_init_data: str
+    telegram_init_data: Optional[str] = None
 
 class UploadCompleteRequest(BaseModel):
     object_key: str
     file_name: str
     file_size: int
     user_id: int
-    telegram_init_data: str
+    telegram_init_data: Optional[str] = None
     preview_url: Optional[str] = None  # URL aperçu PDF généré côté client
 
 class ClientErrorRequest(BaseModel):
@@ -272,10 +431,9 @@ class ClientErrorRequest(BaseModel):
     user_id: int
 
 @app.post("/api/generate-upload-url")
-async def generate_upload_url(request: GenerateUploadURLRequest):
+async def generate_upload_url(request: GenerateUploadURLRequest, webapp_user: WebAppUser = Depends(authenticate_webapp)):
     """Étape 1: Le frontend demande une URL d'upload B2 Native API (CORS-compatible)"""
-    if not verify_telegram_webapp_data(request.telegram_init_data):
-        raise HTTPException(status_code=401, detail="Unauthorized - Invalid Init Data")
+    ensure_webapp_user(webapp_user, request.user_id)
 
     try:
         from app.core.utils import generate_product_id
@@ -310,7 +468,7 @@ async def generate_upload_url(request: GenerateUploadURLRequest):
         object_key = f"products/{request.user_id}/{product_id}/{clean_filename}"
 
         # Appel service B2 Native API
-        b2 = B2StorageService()
+        b2 = get_storage_service()
         upload_data = b2.get_native_upload_url(
             object_key,
             content_type=request.file_type or 'application/octet-stream'
@@ -341,14 +499,13 @@ async def generate_upload_url(request: GenerateUploadURLRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/get-b2-upload-url")
-async def get_b2_upload_url(request: GetB2UploadURLRequest):
+async def get_b2_upload_url(request: GetB2UploadURLRequest, webapp_user: WebAppUser = Depends(authenticate_webapp)):
     """Obtenir URL B2 pour un chemin spécifique (preview, etc.)"""
-    if not verify_telegram_webapp_data(request.telegram_init_data):
-        raise HTTPException(status_code=401, detail="Unauthorized")
+    ensure_webapp_user(webapp_user, request.user_id)
 
     try:
         # Appel service B2 pour ce chemin spécifique
-        b2 = B2StorageService()
+        b2 = get_storage_service()
         upload_data = b2.get_native_upload_url(
             request.object_key,
             content_type=request.content_type
@@ -380,22 +537,18 @@ async def log_client_error(request: ClientErrorRequest):
     return {"status": "logged"}
 
 @app.post("/api/upload-complete")
-async def upload_complete(request: UploadCompleteRequest):
+async def upload_complete(request: UploadCompleteRequest, webapp_user: WebAppUser = Depends(authenticate_webapp)):
     """Étape 2: Le frontend confirme que l'upload est fini - Création du produit"""
     logger.info(f"🔵 START upload-complete - User: {request.user_id}, File: {request.file_name}, Size: {request.file_size}")
 
-    if not verify_telegram_webapp_data(request.telegram_init_data):
-        logger.error(f"❌ Auth failed for user {request.user_id}")
-        raise HTTPException(status_code=401, detail="Unauthorized")
-
-    logger.info(f"✅ Auth OK for user {request.user_id}")
+    ensure_webapp_user(webapp_user, request.user_id)
 
     try:
         from telegram import InlineKeyboardButton, InlineKeyboardMarkup
 
         # Vérification B2
         logger.info(f"🔍 Checking B2 file existence: {request.object_key}")
-        b2 = B2StorageService()
+        b2 = get_storage_service()
         if not b2.file_exists(request.object_key):
             logger.error(f"❌ File not found on B2: {request.object_key}")
             raise HTTPException(status_code=404, detail="File not found on B2 after upload")
@@ -459,7 +612,7 @@ async def upload_complete(request: UploadCompleteRequest):
 
                 # ✅ Finaliser la création du produit avec product_id existant
                 logger.info(f"🔨 Calling create_product with pre-generated ID: {product_id}")
-                returned_product_id = bot_instance.create_product(product_data)
+                returned_product_id = await asyncio.to_thread(bot_instance.create_product, product_data)
                 logger.info(f"🎯 create_product returned: {returned_product_id}")
 
                 # Vérifier que l'ID retourné correspond bien
@@ -484,7 +637,7 @@ async def upload_complete(request: UploadCompleteRequest):
                         user_repo = UserRepository()
                         product_repo = ProductRepository()
 
-                        user_data = user_repo.get_user(request.user_id)
+                        user_data = await asyncio.to_thread(user_repo.get_user, request.user_id)
 
                         if user_data and user_data.get('email'):
                             await email_service.send_product_added_email(
@@ -496,7 +649,7 @@ async def upload_complete(request: UploadCompleteRequest):
                             )
 
                             # Email premier produit si applicable
-                            total_products = product_repo.count_products_by_seller(request.user_id)
+                            total_products = await asyncio.to_thread(product_repo.count_products_by_seller, request.user_id)
                             if total_products == 1:
                                 await email_service.send_first_product_published_notification(
                                     to_email=user_data['email'],
@@ -554,86 +707,62 @@ async def upload_complete(request: UploadCompleteRequest):
 class VerifyPurchaseRequest(BaseModel):
     product_id: str
     user_id: int
-    telegram_init_data: str
+    telegram_init_data: Optional[str] = None
 
 class GenerateDownloadURLRequest(BaseModel):
     product_id: str
     order_id: str
     user_id: int
-    telegram_init_data: str
+    telegram_init_data: Optional[str] = None
 
 @app.post("/api/verify-purchase")
-async def verify_purchase(request: VerifyPurchaseRequest):
+async def verify_purchase(request: VerifyPurchaseRequest, webapp_user: WebAppUser = Depends(authenticate_webapp)):
     """
     Vérifie qu'un utilisateur a acheté un produit
     Utilisé par MiniApp download pour validation avant téléchargement
     """
     logger.info(f"🔍 [VERIFY-API] Request received: user_id={request.user_id}, product_id={request.product_id}")
 
-    # 1. Authentification Telegram
-    auth_valid = verify_telegram_webapp_data(request.telegram_init_data)
-    logger.info(f"🔐 [VERIFY-API] Auth validation result: {auth_valid}")
-
-    if not auth_valid:
-        logger.error(f"❌ [VERIFY-API] Auth failed for user {request.user_id}")
-        raise HTTPException(status_code=401, detail="Unauthorized - Invalid Init Data")
+    # 1. Authentification Telegram (dépendance authenticate_webapp)
+    ensure_webapp_user(webapp_user, request.user_id)
 
     try:
-        # 2. Vérifier l'achat dans la DB
-        from app.domain.repositories.product_repo import ProductRepository
-
-        logger.info(f"💾 [VERIFY-API] Querying DB for user {request.user_id}, product {request.product_id}")
-        conn = get_postgresql_connection()
-        try:
-            cursor = conn.cursor()
-
-            # Query similaire à library_handlers.py:212-218
-            cursor.execute('''
-                SELECT
-                    p.product_id,
-                    p.title,
-                    p.file_size_mb,
-                    p.main_file_url,
-                    o.order_id,
-                    o.download_count,
-                    o.last_download_at
-                FROM orders o
-                JOIN products p ON o.product_id = p.product_id
-                WHERE o.buyer_user_id = %s
-                  AND o.product_id = %s
-                  AND o.payment_status = 'completed'
-                LIMIT 1
-            ''', (request.user_id, request.product_id))
-
-            result = cursor.fetchone()
-
-            if not result:
-                logger.warning(f"⚠️ [VERIFY-API] No completed purchase found for user {request.user_id}, product {request.product_id}")
-                raise HTTPException(
-                    status_code=404,
-                    detail="Product not purchased or payment not completed"
-                )
+        # 2. Vérifier l'achat: index en mémoire de l'acheteur (absence revérifiée sur un index récent)
+        library = get_buyer_library()
+        order_id = await asyncio.to_thread(library.order_for_product, request.user_id, request.product_id)
+
+        if not order_id:
+            logger.warning(f"⚠️ [VERIFY-API] No completed purchase found for user {request.user_id}, product {request.product_id}")
+            raise HTTPException(
+                status_code=404,
+                detail="Product not purchased or payment not completed"
+            )
 
-            product_id, title, file_size_mb, main_file_url, order_id, download_count, last_download_at = result
+        # 3. Détails de la commande possédée (lecture par clé primaire)
+        result = await asyncio.to_thread(LibraryRepository().get_purchase_details, order_id)
+        if not result:
+            raise HTTPException(
+                status_code=404,
+                detail="Product not purchased or payment not completed"
+            )
 
-            logger.info(f"✅ [VERIFY-API] Purchase verified: order_id={order_id}, title={title}, has_file={bool(main_file_url)}")
+        product_id, title, file_size_mb, main_file_url, order_id, download_count, last_download_at = result
 
-            # 3. Retourner les infos pour le MiniApp
-            response_data = {
-                "valid": True,
-                "product_id": product_id,
-                "product_title": title,
-                "file_size_mb": file_size_mb,
-                "order_id": order_id,
-                "download_count": download_count or 0,
-                "last_download_at": last_download_at.isoformat() if last_download_at else None,
-                "has_file": bool(main_file_url)
-            }
-            logger.info(f"📤 [VERIFY-API] Returning response: {response_data}")
-            return response_data
+        logger.info(f"✅ [VERIFY-API] Purchase verified: order_id={order_id}, title={title}, has_file={bool(main_file_url)}")
 
-        finally:
-            put_connection(conn)
+        # 4. Retourner les infos pour le MiniApp
+        response_data = {
+            "valid": True,
+            "product_id": product_id,
+            "product_title": title,
+            "file_size_mb": file_size_mb,
+            "order_id": order_id,
+            "download_count": download_count or 0,
+            "last_download_at": last_download_at.isoformat() if last_download_at else None,
+            "has_file": bool(main_file_url)
+        }
+        logger.info(f"📤 [VERIFY-API] Returning response: {response_data}")
+        return response_data
 
     except HTTPException:
         raise
@@ -645,133 +774,106 @@ async def verify_purchase(request: VerifyPurchaseRequest):
 
 
 @app.post("/api/generate-download-url")
-async def generate_download_url(request: GenerateDownloadURLRequest):
+async def generate_download_url(request: GenerateDownloadURLRequest, webapp_user: WebAppUser = Depends(authenticate_webapp)):
     """
     Génère une URL présignée B2 pour téléchargement direct (Browser → B2)
     Architecture identique à l'upload, mais sens inverse
     """
     logger.info(f"📥 [GEN-URL-API] Request received: user_id={request.user_id}, order_id={request.order_id}, product_id={request.product_id}")
 
-    # 1. Authentification Telegram
-    auth_valid = verify_telegram_webapp_data(request.telegram_init_data)
-    logger.info(f"🔐 [GEN-URL-API] Auth validation result: {auth_valid}")
-
-    if not auth_valid:
-        logger.error(f"❌ [GEN-URL-API] Auth failed for user {request.user_id}")
-        raise HTTPException(status_code=401, detail="Unauthorized - Invalid Init Data")
+    # 1. Authentification Telegram (dépendance authenticate_webapp)
+    ensure_webapp_user(webapp_user, request.user_id)
 
     try:
-        logger.info(f"💾 [GEN-URL-API] Connecting to DB...")
-        conn = get_postgresql_connection()
+        # 2. Re-vérifier l'achat (sécurité) - hors de la boucle: attente du pool dans un thread
+        logger.info(f"🔍 [GEN-URL-API] Verifying order {request.order_id} for user {request.user_id}")
+        result = await asyncio.to_thread(
+            DownloadRepository.verify_order_ownership, request.order_id, request.user_id
+        )
+
+        if not result:
+            logger.warning(f"⚠️ [GEN-URL-API] Order not found or unauthorized: order={request.order_id}, user={request.user_id}")
+            raise HTTPException(status_code=404, detail="Order not found or unauthorized")
+
+        main_file_url, title, file_size_mb = result
+
+        logger.info(f"📂 [GEN-URL-API] Found product: title={title}, file_url={main_file_url}, size={file_size_mb}MB")
+
+        if not main_file_url:
+            logger.error(f"❌ [GEN-URL-API] Product file URL is null for order {request.order_id}")
+            raise HTTPException(status_code=404, detail="Product file not available")
+
+        # 3. Extraire object_key depuis l'URL (R2 ou B2)
+        # R2: https://xxx.r2.cloudflarestorage.com/uzeur/products/...
+        # B2: https://s3.backblazeb2.com/Uzeur-StockFiles/products/...
         try:
-            cursor = conn.cursor()
+            logger.info(f"🔧 [GEN-URL-API] Extracting object_key from URL: {main_file_url}")
+
+            # Detect storage provider from URL
+            if "r2.cloudflarestorage.com" in main_file_url:
+                r2_bucket = os.getenv('R2_BUCKET_NAME', 'uzeur')
+                if f"/{r2_bucket}/" in main_file_url:
+                    object_key = main_file_url.split(f"/{r2_bucket}/")[1]
+                else:
+                    object_key = main_file_url.split(f"{r2_bucket}/")[-1]
+                logger.info(f"✅ [GEN-URL-API] Extracted R2 object_key: {object_key}")
+            elif "backblazeb2.com" in main_file_url:
+                b2_bucket = os.getenv('B2_BUCKET_NAME')
+                if f"/{b2_bucket}/" in main_file_url:
+                    object_key = main_file_url.split(f"/{b2_bucket}/")[1]
+                else:
+                    object_key = main_file_url.split('.com/')[-1]
+                logger.info(f"✅ [GEN-URL-API] Extracted B2 object_key: {object_key}")
+            else:
+                # Generic fallback
+                object_key = main_file_url.split('.com/')[-1]
+                logger.warning(f"⚠️ [GEN-URL-API] Unknown storage provider, using fallback: {object_key}")
+        except Exception as e:
+            logger.error(f"❌ [GEN-URL-API] Error extracting object_key from {main_file_url}: {e}")
+            raise HTTPException(status_code=500, detail="Invalid file URL format")
 
-            # 2. Re-vérifier l'achat (sécurité)
-            logger.info(f"🔍 [GEN-URL-API] Verifying order {request.order_id} for user {request.user_id}")
-            cursor.execute('''
-                SELECT p.main_file_url, p.title, p.file_size_mb
-                FROM orders o
-                JOIN products p ON o.product_id = p.product_id
-                WHERE o.order_id = %s
-                  AND o.buyer_user_id = %s
-                  AND o.payment_status = 'completed'
-                LIMIT 1
-            ''', (request.order_id, request.user_id))
+        # 4. Vérifier que le fichier existe sur B2 avant de générer l'URL
+        b2_service = get_storage_service()
+        logger.info(f"🔍 [GEN-URL-API] Checking if file exists on B2: {object_key}")
 
-            result = cursor.fetchone()
+        file_exists = await asyncio.to_thread(b2_service.file_exists, object_key)
+        logger.info(f"📂 [GEN-URL-API] File exists check result: {file_exists}")
 
-            if not result:
-                logger.warning(f"⚠️ [GEN-URL-API] Order not found or unauthorized: order={request.order_id}, user={request.user_id}")
-                raise HTTPException(status_code=404, detail="Order not found or unauthorized")
+        if not file_exists:
+            logger.error(f"❌ [GEN-URL-API] File does not exist on B2: {object_key}")
+            raise HTTPException(status_code=404, detail=f"File not found on storage: {object_key}")
 
-            main_file_url, title, file_size_mb = result
+        # 5. Générer URL avec B2 Native API (CORS-compatible, comme pour upload)
+        logger.info(f"🔗 [GEN-URL-API] Generating Native B2 download URL for object_key: {object_key}")
+        download_url = await asyncio.to_thread(b2_service.get_native_download_url, object_key, 3600)
 
-            logger.info(f"📂 [GEN-URL-API] Found product: title={title}, file_url={main_file_url}, size={file_size_mb}MB")
+        if not download_url:
+            logger.error(f"❌ [GEN-URL-API] B2 service failed to generate presigned URL")
+            raise HTTPException(status_code=500, detail="Failed to generate download URL")
 
-            if not main_file_url:
-                logger.error(f"❌ [GEN-URL-API] Product file URL is null for order {request.order_id}")
-                raise HTTPException(status_code=404, detail="Product file not available")
+        logger.info(f"✅ [GEN-URL-API] Presigned URL generated: {download_url[:100]}...")
 
-            # 3. Extraire object_key depuis l'URL (R2 ou B2)
-            # R2: https://xxx.r2.cloudflarestorage.com/uzeur/products/...
-            # B2: https://s3.backblazeb2.com/Uzeur-StockFiles/products/...
-            try:
-                logger.info(f"🔧 [GEN-URL-API] Extracting object_key from URL: {main_file_url}")
+        # 6. Extraire filename depuis object_key
+        file_name = object_key.split('/')[-1]
+        logger.info(f"📄 [GEN-URL-API] Extracted filename: {file_name}")
 
-                # Detect storage provider from URL
-                if "r2.cloudflarestorage.com" in main_file_url:
-                    r2_bucket = os.getenv('R2_BUCKET_NAME', 'uzeur')
-                    if f"/{r2_bucket}/" in main_file_url:
-                        object_key = main_file_url.split(f"/{r2_bucket}/")[1]
-                    else:
-                        object_key = main_file_url.split(f"{r2_bucket}/")[-1]
-                    logger.info(f"✅ [GEN-URL-API] Extracted R2 object_key: {object_key}")
-                elif "backblazeb2.com" in main_file_url:
-                    b2_bucket = os.getenv('B2_BUCKET_NAME')
-                    if f"/{b2_bucket}/" in main_file_url:
-                        object_key = main_file_url.split(f"/{b2_bucket}/")[1]
-                    else:
-                        object_key = main_file_url.split('.com/')[-1]
-                    logger.info(f"✅ [GEN-URL-API] Extracted B2 object_key: {object_key}")
-                else:
-                    # Generic fallback
-                    object_key = main_file_url.split('.com/')[-1]
-                    logger.warning(f"⚠️ [GEN-URL-API] Unknown storage provider, using fallback: {object_key}")
-            except Exception as e:
-                logger.error(f"❌ [GEN-URL-API] Error extracting object_key from {main_file_url}: {e}")
-                raise HTTPException(status_code=500, detail="Invalid file URL format")
-
-            # 4. Vérifier que le fichier existe sur B2 avant de générer l'URL
-            b2_service = B2StorageService()
-            logger.info(f"🔍 [GEN-URL-API] Checking if file exists on B2: {object_key}")
-
-            file_exists = b2_service.file_exists(object_key)
-            logger.info(f"📂 [GEN-URL-API] File exists check result: {file_exists}")
-
-            if not file_exists:
-                logger.error(f"❌ [GEN-URL-API] File does not exist on B2: {object_key}")
-                raise HTTPException(status_code=404, detail=f"File not found on storage: {object_key}")
-
-            # 5. Générer URL avec B2 Native API (CORS-compatible, comme pour upload)
-            logger.info(f"🔗 [GEN-URL-API] Generating Native B2 download URL for object_key: {object_key}")
-            download_url = b2_service.get_native_download_url(object_key, expires_in=3600)
-
-            if not download_url:
-                logger.error(f"❌ [GEN-URL-API] B2 service failed to generate presigned URL")
-                raise HTTPException(status_code=500, detail="Failed to generate download URL")
-
-            logger.info(f"✅ [GEN-URL-API] Presigned URL generated: {download_url[:100]}...")
-
-            # 6. Extraire filename depuis object_key
-            file_name = object_key.split('/')[-1]
-            logger.info(f"📄 [GEN-URL-API] Extracted filename: {file_name}")
-
-            # 7. Incrémenter download_count
-            logger.info(f"📊 [GEN-URL-API] Incrementing download count for order {request.order_id}")
-            cursor.execute('''
-                UPDATE orders
-                SET download_count = COALESCE(download_count, 0) + 1,
-                    last_download_at = CURRENT_TIMESTAMP
-                WHERE order_id = %s
-            ''', (request.order_id,))
-            conn.commit()
-
-            logger.info(f"✅ [GEN-URL-API] Download count updated successfully")
-
-            # 8. Retourner URL au MiniApp
-            response_data = {
-                "download_url": download_url,
-                "file_name": file_name,
-                "file_size_mb": file_size_mb,
-                "product_title": title,
-                "expires_in": 3600  # 1 hour
-            }
-            logger.info(f"📤 [GEN-URL-API] Returning response: file_name={file_name}, size={file_size_mb}MB, expires=3600s")
-            logger.info(f"🔗 [GEN-URL-API] FULL PRESIGNED URL FOR DEBUGGING: {download_url}")
-            return response_data
-
-        finally:
-            put_connection(conn)
+        # 7. Incrémenter download_count
+        logger.info(f"📊 [GEN-URL-API] Incrementing download count for order {request.order_id}")
+        await asyncio.to_thread(DownloadRepository.increment_download_count, request.order_id)
+
+        logger.info(f"✅ [GEN-URL-API] Download count updated successfully")
+
+        # 8. Retourner URL au MiniApp
+        response_data = {
+            "download_url": download_url,
+            "file_name": file_name,
+            "file_size_mb": file_size_mb,
+            "product_title": title,
+            "expires_in": 3600  # 1 hour
+        }
+        logger.info(f"📤 [GEN-URL-API] Returning response: file_name={file_name}, size={file_size_mb}MB, expires=3600s")
+        logger.info(f"🔗 [GEN-URL-API] FULL PRESIGNED URL FOR DEBUGGING: {download_url}")
+        return response_data
 
     except HTTPException:
         raise
@@ -783,111 +885,77 @@ async def generate_download_url(request: GenerateDownloadURLRequest):
 
 
 @app.post("/api/stream-download")
-async def stream_download(request: GenerateDownloadURLRequest):
+async def stream_download(request: GenerateDownloadURLRequest, webapp_user: WebAppUser = Depends(authenticate_webapp)):
     """
     Proxy download: Backend stream depuis B2 vers frontend
     Evite CORS car tout passe par Railway (meme origine)
     """
-    logger.error(f"========== STREAM-DOWNLOAD ENDPOINT CALLED ==========")
-    logger.error(f"[STREAM-DOWNLOAD] NEW PROXY ENDPOINT ACTIVE")
-    logger.info(f"[STREAM-DOWNLOAD] Request received: user_id={request.user_id}, order_id={request.order_id}, product_id={request.product_id}")
+    logger.info(
+        "[STREAM-DOWNLOAD] Request received: user_id=%s, order_id=%s, product_id=%s",
+        request.user_id, request.order_id, request.product_id
+    )
 
-    # 1. Authentification Telegram
-    auth_valid = verify_telegram_webapp_data(request.telegram_init_data)
-    logger.info(f"[STREAM-DOWNLOAD] Auth validation result: {auth_valid}")
-
-    if not auth_valid:
-        logger.error(f"[STREAM-DOWNLOAD] Auth failed for user {request.user_id}")
-        raise HTTPException(status_code=401, detail="Unauthorized - Invalid Init Data")
+    # 1. Authentification Telegram (dépendance authenticate_webapp)
+    ensure_webapp_user(webapp_user, request.user_id)
 
     try:
-        logger.info(f"[STREAM-DOWNLOAD] Connecting to DB...")
-        conn = get_postgresql_connection()
-        try:
-            cursor = conn.cursor()
-
-            # 2. Verifier ownership order
-            logger.info(f"[STREAM-DOWNLOAD] Verifying order {request.order_id} for user {request.user_id}")
-            cursor.execute('''
-                SELECT p.main_file_url, p.title, p.file_size_mb
-                FROM orders o
-                JOIN products p ON o.product_id = p.product_id
-                WHERE o.order_id = %s
-                  AND o.buyer_user_id = %s
-                  AND o.payment_status = 'completed'
-                LIMIT 1
-            ''', (request.order_id, request.user_id))
-
-            result = cursor.fetchone()
+        # 2. Verifier ownership order (hors de la boucle: attente du pool dans un thread)
+        result = await asyncio.to_thread(
+            DownloadRepository.verify_order_ownership, request.order_id, request.user_id
+        )
 
-            if not result:
-                logger.warning(f"[STREAM-DOWNLOAD] Order not found or unauthorized: order={request.order_id}, user={request.user_id}")
-                raise HTTPException(status_code=404, detail="Order not found or unauthorized")
+        if not result:
+            logger.warning("[STREAM-DOWNLOAD] Order not found or unauthorized: order=%s, user=%s", request.order_id, request.user_id)
+            raise HTTPException(status_code=404, detail="Order not found or unauthorized")
 
-            main_file_url, title, file_size_mb = result
+        main_file_url, title, file_size_mb = result
 
-            logger.info(f"[STREAM-DOWNLOAD] Found product: title={title}, file_url={main_file_url}, size={file_size_mb}MB")
+        logger.debug("[STREAM-DOWNLOAD] Found product: title=%s, file_url=%s, size=%sMB", title, main_file_url, file_size_mb)
 
-            if not main_file_url:
-                logger.error(f"[STREAM-DOWNLOAD] Product file URL is null for order {request.order_id}")
-                raise HTTPException(status_code=404, detail="Product file not available")
+        if not main_file_url:
+            logger.error("[STREAM-DOWNLOAD] Product file URL is null for order %s", request.order_id)
+            raise HTTPException(status_code=404, detail="Product file not available")
 
-            # 3. Extraire object_key pour telecharger (R2 ou B2)
-            logger.info(f"[STREAM-DOWNLOAD] Extracting object_key from: {main_file_url}")
+        # 3. Extraire object_key pour telecharger (R2 ou B2)
 
-            # Initialize B2StorageService to get configured bucket
-            b2_service = B2StorageService()
-            configured_bucket = b2_service.bucket_name
+        # Initialize B2StorageService to get configured bucket
+        b2_service = get_storage_service()
+        configured_bucket = b2_service.bucket_name
 
-            try:
-                # Detect storage provider from URL and extract object_key
-                if "r2.cloudflarestorage.com" in main_file_url or "media.uzeur.com" in main_file_url:
-                    # R2 URL detected
-                    r2_bucket = os.getenv('R2_BUCKET_NAME', 'uzeur')
-                    if f"/{r2_bucket}/" in main_file_url:
-                        object_key = main_file_url.split(f"/{r2_bucket}/")[1]
-                    else:
-                        # Custom domain format: https://media.uzeur.com/products/...
-                        object_key = main_file_url.split('.com/')[-1]
-                elif "backblazeb2.com" in main_file_url:
-                    # B2 URL detected
-                    b2_bucket = os.getenv('B2_BUCKET_NAME')
-                    if f"/{b2_bucket}/" in main_file_url:
-                        object_key = main_file_url.split(f"/{b2_bucket}/")[1]
-                    else:
-                        object_key = main_file_url.split('.com/')[-1]
+        try:
+            # Detect storage provider from URL and extract object_key
+            if "r2.cloudflarestorage.com" in main_file_url or "media.uzeur.com" in main_file_url:
+                # R2 URL detected
+                r2_bucket = os.getenv('R2_BUCKET_NAME', 'uzeur')
+                if f"/{r2_bucket}/" in main_file_url:
+                    object_key = main_file_url.split(f"/{r2_bucket}/")[1]
                 else:
-                    # Generic format - assume after domain is the object key
+                    # Custom domain format: https://media.uzeur.com/products/...
                     object_key = main_file_url.split('.com/')[-1]
+            elif "backblazeb2.com" in main_file_url:
+                # B2 URL detected
+                b2_bucket = os.getenv('B2_BUCKET_NAME')
+                if f"/{b2_bucket}/" in main_file_url:
+                    object_key = main_file_url.split(f"/{b2_bucket}/")[1]
+                else:
+                    object_key = main_file_url.split('.com/')[-1]
+            else:
+                # Generic format - assume after domain is the object key
+                object_key = main_file_url.split('.com/')[-1]
 
-                object_key = object_key.split('?')[0]  # Remove query params
-                logger.info(f"[STREAM-DOWNLOAD] Object key: {object_key}, Bucket: {configured_bucket}")
-            except Exception as e:
-                logger.error(f"[STREAM-DOWNLOAD] Failed to extract object_key: {e}")
-                raise HTTPException(status_code=500, detail="Invalid file URL")
-
-            # 4. Incrementer download_count
-            logger.info(f"[STREAM-DOWNLOAD] Incrementing download count for order {request.order_id}")
-            cursor.execute('''
-                UPDATE orders
-                SET download_count = COALESCE(download_count, 0) + 1,
-                    last_download_at = CURRENT_TIMESTAMP
-                WHERE order_id = %s
-            ''', (request.order_id,))
-            conn.commit()
-
-            logger.info(f"[STREAM-DOWNLOAD] Download count updated successfully")
+            object_key = object_key.split('?')[0]  # Remove query params
+            logger.debug("[STREAM-DOWNLOAD] Object key: %s, Bucket: %s", object_key, configured_bucket)
+        except Exception as e:
+            logger.error("[STREAM-DOWNLOAD] Failed to extract object_key: %s", e)
+            raise HTTPException(status_code=500, detail="Invalid file URL")
 
-        finally:
-            put_connection(conn)
+        # 4. Incrementer download_count
+        await asyncio.to_thread(DownloadRepository.increment_download_count, request.order_id)
 
         # 5. Telecharger depuis R2/B2 avec boto3 (authentifie avec credentials)
-        logger.info(f"[STREAM-DOWNLOAD] Downloading from {b2_service.storage_type.upper()} using bucket: {configured_bucket}")
+        logger.debug("[STREAM-DOWNLOAD] Downloading from %s using bucket: %s", b2_service.storage_type, configured_bucket)
 
         # Telecharger le fichier en memoire
-        import io
-        import asyncio
-
         def download_from_b2_sync():
             """Download file using boto3 with credentials"""
             try:
@@ -898,15 +966,15 @@ async def stream_download(request: GenerateDownloadURLRequest):
                 # Lire tout le contenu
                 return response['Body'].read()
             except Exception as e:
-                logger.error(f"[STREAM-DOWNLOAD] boto3 download failed: {e}")
+                logger.error("[STREAM-DOWNLOAD] boto3 download failed: %s", e)
                 raise
 
         # Execute download dans thread pool (boto3 est synchrone)
         try:
             file_content = await asyncio.to_thread(download_from_b2_sync)
-            logger.error(f"[STREAM-DOWNLOAD] Downloaded {len(file_content)} bytes from B2")
+            logger.info("[STREAM-DOWNLOAD] Downloaded %d bytes from storage", len(file_content))
         except Exception as e:
-            logger.error(f"[STREAM-DOWNLOAD] Download error: {e}")
+            logger.error("[STREAM-DOWNLOAD] Download error: %s", e)
             raise HTTPException(status_code=502, detail=f"B2 download failed: {str(e)}")
 
         # Stream le contenu vers le frontend
@@ -920,9 +988,9 @@ async def stream_download(request: GenerateDownloadURLRequest):
                 yield chunk
 
                 if (i // chunk_size) % 10 == 0:
-                    logger.info(f"[STREAM-DOWNLOAD] Streamed chunk {i//chunk_size}/{total_chunks}")
+                    logger.debug("[STREAM-DOWNLOAD] Streamed chunk %d/%d", i // chunk_size, total_chunks)
 
-            logger.error(f"[STREAM-DOWNLOAD] Stream completed, {total_chunks} chunks sent")
+            logger.info("[STREAM-DOWNLOAD] Stream completed, %d chunks sent", total_chunks)
 
         # 6. Retourner streaming response
         filename = object_key.split('/')[-1]
@@ -934,8 +1002,7 @@ async def stream_download(request: GenerateDownloadURLRequest):
             'Content-Length': str(content_length)
         }
 
-        logger.error(f"[STREAM-DOWNLOAD] Returning StreamingResponse: filename={filename}, size={content_length}")
-        logger.error(f"[STREAM-DOWNLOAD] Headers: {headers}")
+        logger.debug("[STREAM-DOWNLOAD] Returning StreamingResponse: filename=%s, size=%d", filename, content_length)
 
         return StreamingResponse(
             download_stream(),
@@ -946,48 +1013,47 @@ async def stream_download(request: GenerateDownloadURLRequest):
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"[STREAM-DOWNLOAD] Exception: {e}")
-        import traceback
-        logger.error(f"[STREAM-DOWNLOAD] Traceback:\n{traceback.format_exc()}")
+        logger.error("[STREAM-DOWNLOAD] Exception: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
 @app.post("/api/generate-download-token")
-async def generate_download_token(request: GenerateDownloadURLRequest):
+async def generate_download_token(request: GenerateDownloadURLRequest, webapp_user: WebAppUser = Depends(authenticate_webapp)):
     """
-    Generate a one-time download token (uses DownloadRepository)
+    Generate a one-time download token (signed, stateless - no DB insert)
     Frontend will redirect to GET /download/{token}
     """
     logger.info(f"[TOKEN] Request: user_id={request.user_id}, order_id={request.order_id}, product_id={request.product_id}")
 
-    # Verify auth
-    if not verify_telegram_webapp_data(request.telegram_init_data):
-        logger.error(f"[TOKEN] Auth failed for user {request.user_id}")
-        raise HTTPException(status_code=401, detail="Unauthorized")
+    # Verify auth (dépendance authenticate_webapp)
+    ensure_webapp_user(webapp_user, request.user_id)
 
-    # Rate limiting (10 tokens per hour)
-    is_allowed, error_msg = DownloadRepository.check_and_update_rate_limit(request.user_id, max_tokens=10, window_seconds=3600)
+    token_service = get_download_token_service()
+
+    # Rate limiting (limite nommée "downloads"; backend postgres possible via
+    # RATE_LIMIT_BACKEND_DOWNLOADS: hors de la boucle)
+    is_allowed, error_msg = await asyncio.to_thread(token_service.check_rate_limit, request.user_id)
     if not is_allowed:
         logger.error(f"[TOKEN] {error_msg}")
         raise HTTPException(status_code=429, detail="Too many download requests. Please try again later.")
 
     # Verify order ownership
-    logger.info(f"[TOKEN] Verifying order ownership...")
-    order_info = DownloadRepository.verify_order_ownership(request.order_id, request.user_id)
+    order_info = await asyncio.to_thread(
+        DownloadRepository.verify_order_ownership, request.order_id, request.user_id
+    )
 
     if not order_info:
         logger.error(f"[TOKEN] Order not found: order={request.order_id}, user={request.user_id}")
         raise HTTPException(status_code=404, detail="Order not found")
 
-    # Create token
-    token = DownloadRepository.create_download_token(
+    # Create signed token (expires in 5 minutes)
+    token = token_service.issue(
         user_id=request.user_id,
         order_id=request.order_id,
-        product_id=request.product_id,
-        expires_minutes=5
+        product_id=request.product_id
     )
 
-    logger.info(f"[TOKEN] Token generated: {token}")
+    logger.info(f"[TOKEN] Token generated for user {request.user_id}, order {request.order_id}")
     return {'download_token': token}
 
 
@@ -997,20 +1063,23 @@ async def download_file_with_token(token: str):
     Download file using one-time token - DIRECT B2 redirect (no Railway bandwidth)
     Generates presigned B2 URL and redirects browser directly to B2
     """
-    logger.info(f"[DOWNLOAD-GET] Request with token: {token}")
-
-    # Validate and consume token (one-time use)
-    token_data = DownloadRepository.get_and_validate_token(token)
+    # Validate and consume token (signature + expiry + one-time use). Replay set partagé
+    # (PostgreSQL) en multi-worker: rédemption hors de la boucle, base indisponible = 503
+    try:
+        token_data = await asyncio.to_thread(get_download_token_service().redeem, token)
+    except psycopg2.Error as e:
+        logger.error(f"[DOWNLOAD-GET] Token redemption unavailable: {e}")
+        raise HTTPException(status_code=503, detail="Download temporarily unavailable, please retry")
 
     if not token_data:
-        logger.error(f"[DOWNLOAD-GET] Invalid, expired, or already used token: {token}")
+        logger.error(f"[DOWNLOAD-GET] Invalid, expired, or already used token")
         raise HTTPException(status_code=404, detail="Invalid or expired token")
 
     user_id, order_id, product_id = token_data
     logger.info(f"[DOWNLOAD-GET] Token valid, user {user_id}, order {order_id}")
 
-    # Get file info
-    order_info = DownloadRepository.verify_order_ownership(order_id, user_id)
+    # Get file info + increment download counter (single statement)
+    order_info = await asyncio.to_thread(DownloadRepository.redeem_order_download, order_id, user_id)
 
     if not order_info:
         raise HTTPException(status_code=404, detail="Order not found")
@@ -1038,12 +1107,9 @@ async def download_file_with_token(token: str):
 
     object_key = object_key.split('?')[0]  # Remove query params
 
-    # Increment download counter
-    DownloadRepository.increment_download_count(order_id)
-
     # Generate presigned URL (direct download, no Railway proxy)
     logger.info(f"[DOWNLOAD-GET] Generating presigned URL for: {object_key}")
-    b2_service = B2StorageService()
+    b2_service = get_storage_service()
 
     # 2 hour expiration for large files (10GB with slow connection)
     presigned_url = b2_service.get_download_url(object_key, expires_in=7200)
@@ -1063,56 +1129,54 @@ async def download_file_with_token(token: str):
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 
 @app.get("/api/categories")
-async def get_categories():
-    """Get all categories from database"""
+async def get_categories(request: Request):
+    """Liste des catégories depuis le catalogue en mémoire (ETag: 304 si inchangée)"""
     try:
-        import psycopg2.extras
-        from app.core.db_pool import get_connection, put_connection
+        catalogue = get_category_catalogue()
+        etag = await asyncio.to_thread(catalogue.etag)
+        headers = {"ETag": etag, "Cache-Control": CATEGORIES_CACHE_CONTROL}
 
-        conn = get_connection()
-        try:
-            cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-            cursor.execute('SELECT name FROM categories ORDER BY name')
-            categories = cursor.fetchall()
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers=headers)
 
-            logger.info(f"[CATEGORIES] Retrieved {len(categories)} categories from DB")
-            return {"categories": [cat['name'] for cat in categories]}
-        finally:
-            put_connection(conn)
+        return JSONResponse({"categories": catalogue.names()}, headers=headers)
 
     except Exception as e:
         logger.error(f"[CATEGORIES] Error fetching categories: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch categories")
 
 
-@app.get("/api/import-products")
-async def get_import_products(user_id: int, request: Request):
-    """Récupérer les produits scrapés pour l'import depuis user_state"""
-    logger.info(f"[IMPORT-API] Fetching products for user {user_id}")
+def _resolve_import_job(user_id: int) -> Optional[dict]:
+    """Job d'import courant de l'utilisateur (état bot), sinon son dernier job terminé"""
+    job_id = None
+    if telegram_application:
+        bot_instance = telegram_application.bot_data.get('bot_instance')
+        if bot_instance:
+            job_id = bot_instance.get_user_state(user_id).get('import_job_id')
 
-    # Verify Telegram WebApp auth
-    init_data = request.headers.get('X-Telegram-Init-Data', '')
-    if not verify_telegram_webapp_data(init_data):
-        logger.error(f"[IMPORT-API] Auth failed for user {user_id}")
-        raise HTTPException(status_code=401, detail="Unauthorized")
+    import_jobs = ImportJobRepository()
+    job = import_jobs.get_job(job_id) if job_id else None
+    if not job or job['user_id'] != user_id or job['status'] != 'completed':
+        job = import_jobs.get_latest_completed_job(user_id)
+    return job
 
-    global telegram_application
-    if not telegram_application:
-        raise HTTPException(status_code=500, detail="Bot not initialized")
 
-    bot_instance = telegram_application.bot_data.get('bot_instance')
-    if not bot_instance:
-        raise HTTPException(status_code=500, detail="Bot instance not found")
+@app.get("/api/import-products")
+async def get_import_products(user_id: int, webapp_user: WebAppUser = Depends(authenticate_webapp)):
+    """Récupérer les produits scrapés pour l'import (table import_job_products)"""
+    logger.info(f"[IMPORT-API] Fetching products for user {user_id}")
 
-    # Get user state
-    user_state = bot_instance.get_user_state(user_id)
-    products = user_state.get('import_products', [])
+    # Verify Telegram WebApp auth (dépendance authenticate_webapp)
+    ensure_webapp_user(webapp_user, user_id)
 
-    if not products:
+    job = await asyncio.to_thread(_resolve_import_job, user_id)
+    if not job:
         logger.warning(f"[IMPORT-API] No products found for user {user_id}")
         return {"products": []}
 
-    logger.info(f"[IMPORT-API] Returning {len(products)} products for user {user_id}")
+    products = await asyncio.to_thread(ImportJobRepository().get_products, job['job_id'])
+
+    logger.info(f"[IMPORT-API] Returning {len(products)} products for user {user_id} (job {job['job_id']})")
     return {"products": products}
 
 
@@ -1121,27 +1185,25 @@ class ImportCompleteRequest(BaseModel):
     file_name: str
     file_size: int
     user_id: int
-    telegram_init_data: str
+    telegram_init_data: Optional[str] = None
     product_metadata: dict  # {title, description, price, category, imported_from, imported_url, cover_image_url}
     preview_url: Optional[str] = None  # URL apercu PDF genere cote client
 
 
 @app.post("/api/import-complete")
-async def import_complete(request: ImportCompleteRequest):
+async def import_complete(request: ImportCompleteRequest, webapp_user: WebAppUser = Depends(authenticate_webapp)):
     """
     Finaliser l'import d'un produit Gumroad
     Similaire à upload-complete mais avec métadonnées pré-remplies
     """
     logger.info(f"[IMPORT-COMPLETE] User: {request.user_id}, File: {request.file_name}")
 
-    if not verify_telegram_webapp_data(request.telegram_init_data):
-        logger.error(f"[IMPORT-COMPLETE] Auth failed for user {request.user_id}")
-        raise HTTPException(status_code=401, detail="Unauthorized")
+    ensure_webapp_user(webapp_user, request.user_id)
 
     try:
         # Verify file exists on B2
         logger.info(f"[IMPORT-COMPLETE] Checking B2 file: {request.object_key}")
-        b2 = B2StorageService()
+        b2 = get_storage_service()
         if not b2.file_exists(request.object_key):
             logger.error(f"[IMPORT-COMPLETE] File not found: {request.object_key}")
             raise HTTPException(status_code=404, detail="File not found on B2")
@@ -1156,17 +1218,13 @@ async def import_complete(request: ImportCompleteRequest):
 
         logger.info(f"[IMPORT-COMPLETE] File URL: {file_url}")
 
-        global telegram_application
-        if not telegram_application:
-            raise HTTPException(status_code=500, detail="Bot not initialized")
-
-        bot_instance = telegram_application.bot_data.get('bot_instance')
+        bot_instance = telegram_application.bot_data.get('bot_instance') if telegram_application else None
         if not bot_instance:
-            raise HTTPException(status_code=500, detail="Bot instance not found")
+            raise HTTPException(status_code=503, detail="Bot not initialized")
 
-        # Get user state for source_profile
-        user_state = bot_instance.get_user_state(request.user_id)
-        source_profile = user_state.get('import_source_url', '')
+        # source_profile: URL de la boutique du job d'import
+        import_job = await asyncio.to_thread(_resolve_import_job, request.user_id)
+        source_profile = import_job['source_url'] if import_job else ''
 
         # Extraire product_id depuis object_key (genere par generate-upload-url)
         # Format: products/{user_id}/{product_id}/main_file.ext
@@ -1188,17 +1246,10 @@ async def import_complete(request: ImportCompleteRequest):
             logger.error(f"[IMPORT-COMPLETE] Category missing for product {metadata.get('title', 'N/A')}")
             raise HTTPException(status_code=400, detail="Categorie requise")
 
-        # Vérifier que catégorie existe en DB
-        from app.core.db_pool import get_connection, put_connection
-        conn = get_connection()
-        try:
-            cursor = conn.cursor()
-            cursor.execute('SELECT name FROM categories WHERE name = %s', (category,))
-            if not cursor.fetchone():
-                logger.error(f"[IMPORT-COMPLETE] Invalid category {category} for product {metadata.get('title', 'N/A')}")
-                raise HTTPException(status_code=400, detail=f"Categorie invalide: {category}")
-        finally:
-            put_connection(conn)
+        # Vérifier que catégorie existe (catalogue en mémoire)
+        if not get_category_catalogue().exists(category):
+            logger.error(f"[IMPORT-COMPLETE] Invalid category {category} for product {metadata.get('title', 'N/A')}")
+            raise HTTPException(status_code=400, detail=f"Categorie invalide: {category}")
 
         # Cover image : uploadee par le frontend (mini-app) directement sur R2
         cover_image_url = None
@@ -1240,6 +1291,10 @@ async def import_complete(request: ImportCompleteRequest):
                     cover_image_url = gumroad_image_url
                     thumbnail_url = gumroad_image_url
 
+        # Progression du job: cover stockée sur notre bucket
+        if import_job and cover_image_url and '/cover.jpg' in cover_image_url:
+            await asyncio.to_thread(ImportJobRepository().record_cover_uploaded, import_job['job_id'])
+
         product_data = {
             'product_id': product_id,
             'seller_id': request.user_id,
@@ -1261,7 +1316,7 @@ async def import_complete(request: ImportCompleteRequest):
         logger.info(f"[IMPORT-COMPLETE] Creating product: {product_data['title']} cover={cover_image_url} thumb={thumbnail_url} preview={request.preview_url}")
 
         # Create product
-        returned_product_id = bot_instance.create_product(product_data)
+        returned_product_id = await asyncio.to_thread(bot_instance.create_product, product_data)
 
         if returned_product_id:
             logger.info(f"[IMPORT-COMPLETE] ✅ Product created: {returned_product_id}")
@@ -1274,7 +1329,7 @@ async def import_complete(request: ImportCompleteRequest):
                 email_service = EmailService()
                 user_repo = UserRepository()
 
-                user_data = user_repo.get_user(request.user_id)
+                user_data = await asyncio.to_thread(user_repo.get_user, request.user_id)
 
                 if user_data and user_data.get('email'):
                     await email_service.send_product_added_email(
@@ -1291,7 +1346,7 @@ async def import_complete(request: ImportCompleteRequest):
             # Send notification to user
             try:
                 # Get user language
-                lang = user_state.get('lang', 'fr')
+                lang = bot_instance.get_user_language(request.user_id)
 
                 # Message de succès (fonction unifiée)
                 from app.integrations.telegram.utils.message_utils import create_product_success_message
@@ -1316,6 +1371,8 @@ async def import_complete(request: ImportCompleteRequest):
             logger.error(f"[IMPORT-COMPLETE] Failed to create product")
             raise HTTPException(status_code=500, detail="Failed to create product")
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"[IMPORT-COMPLETE] Error: {e}")
         import traceback
@@ -1338,7 +1395,7 @@ async def send_formation_to_buyer(buyer_user_id: int, order_id: str, product_id:
     from app.domain.repositories.product_repo import ProductRepository
 
     repo = ProductRepository()
-    product = repo.get_product_by_id(product_id)
+    product = await asyncio.to_thread(repo.get_product_by_id, product_id)
 
     if not product or not product.get('main_file_url'):
         logger.error(f"❌ Produit introuvable ou sans fichier: {product_id}")
@@ -1358,13 +1415,15 @@ async def send_formation_to_buyer(buyer_user_id: int, order_id: str, product_id:
     # Utilise le bot global s'il est là, sinon une instance temporaire
     bot = telegram_application.bot if telegram_application else Bot(core_settings.TELEGRAM_BOT_TOKEN)
 
-    try:
-        await bot.send_message(chat_id=buyer_user_id, text=msg, parse_mode='Markdown')
+    # Priorité livraison: passe devant les notifications dans la file d'envoi
+    sent = await send_telegram_message(
+        buyer_user_id, msg, priority=PRIORITY_DELIVERY, bot=bot, parse_mode='Markdown'
+    )
+    if sent:
         logger.info(f"✅ Fichier envoyé à {buyer_user_id}")
-        return True
-    except Exception as e:
-        logger.error(f"❌ Echec envoi fichier: {e}")
-        return False
+    else:
+        logger.error(f"❌ Echec envoi fichier: {buyer_user_id}")
+    return sent
 
 @app.post("/ipn/nowpayments")
 async def nowpayments_ipn(request: Request):
@@ -1398,8 +1457,8 @@ async def nowpayments_ipn(request: Request):
         order_repo = OrderRepository()
         payout_service = SellerPayoutService()
 
-        # Vérifier si l'order existe
-        order = order_repo.get_order_by_id(order_id)
+        # Vérifier si l'order existe (accès DB hors de la boucle)
+        order = await asyncio.to_thread(order_repo.get_order_by_id, order_id)
 
         if not order:
             logger.error(f"❌ Order {order_id} not found in DB")
@@ -1415,7 +1474,7 @@ async def nowpayments_ipn(request: Request):
             return {"status": "ok", "message": "Already completed"}
 
         # Mettre à jour le statut (incrémente automatiquement sales_count, total_sales, total_revenue)
-        success = order_repo.update_payment_status(order_id, 'completed', payment_id)
+        success = await asyncio.to_thread(order_repo.update_payment_status, order_id, 'completed', payment_id)
 
         if not success:
             logger.error(f"❌ Failed to update payment status for order {order_id}")
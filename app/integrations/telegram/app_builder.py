@@ -1,8 +1,9 @@
-from telegram.ext import Application, CommandHandler, CallbackQueryHandler, MessageHandler, filters
-from telegram import BotCommand, BotCommandScopeDefault
+from telegram.ext import Application, CommandHandler, CallbackQueryHandler, MessageHandler, TypeHandler, filters
+from telegram import BotCommand, BotCommandScopeDefault, Update
 
 from app.core import settings as core_settings
 from app.core.i18n import t as i18n
+from app.core.logging import set_correlation_id
 
 
 def build_application(bot_instance) -> Application:
@@ -11,6 +12,12 @@ def build_application(bot_instance) -> Application:
     # ✅ CRITICAL: Store bot_instance in bot_data for miniapp access
     application.bot_data['bot_instance'] = bot_instance
 
+    # Identifiant de corrélation des logs: posé avant tous les handlers (groupe -1)
+    async def set_update_correlation_id(update, context):
+        set_correlation_id(f"upd-{update.update_id}")
+
+    application.add_handler(TypeHandler(Update, set_update_correlation_id), group=-1)
+
     # Use handlers instead of direct bot methods
     application.add_handler(CommandHandler("start", lambda update, context: bot_instance.core_handlers.start_command(bot_instance, update, context)))
     
@@ -38,6 +45,27 @@ def build_application(bot_instance) -> Application:
 
     application.add_handler(CommandHandler("admin", admin_command_wrapper))
 
+    async def dbstats_command_wrapper(update, context):
+        """Admin: latence des requêtes DB par méthode (voir app.core.query_stats)"""
+        if update.effective_user.id != core_settings.ADMIN_USER_ID:
+            await update.message.reply_text(i18n('fr', 'bot_access_denied'))
+            return
+
+        class MockQuery:
+            def __init__(self, user, update_obj):
+                self.from_user = user
+                self.message = update_obj.message
+                self.effective_chat = update_obj.effective_chat
+            async def edit_message_text(self, text, reply_markup=None, parse_mode=None):
+                await self.message.reply_text(text, reply_markup=reply_markup, parse_mode=parse_mode)
+            async def answer(self):
+                pass
+
+        lang = bot_instance.get_user_language(update.effective_user.id)
+        await bot_instance.admin_handlers.admin_db_stats(MockQuery(update.effective_user, update), lang)
+
+    application.add_handler(CommandHandler("dbstats", dbstats_command_wrapper))
+
     # Help/support commands
     application.add_handler(CommandHandler("help", lambda update, context: bot_instance.core_handlers.help_command(bot_instance, update, context)))
     application.add_handler(CommandHandler("support", lambda update, context: bot_instance.support_handlers.support_command(bot_instance, update, context)))
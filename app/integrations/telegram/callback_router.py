@@ -1,12 +1,11 @@
 """
 Callback Router - Routage centralisé des callbacks Telegram
 """
+import asyncio
 from typing import Dict, Any, Callable
 from telegram import CallbackQuery, InputMediaPhoto
 import logging
 import os
-import psycopg2
-import psycopg2.extras
 
 logger = logging.getLogger(__name__)
 
@@ -38,6 +37,7 @@ class CallbackRouter:
             'admin_products': lambda query, lang: self.bot.admin_handlers.admin_products(query, lang),
             'admin_payouts': lambda query, lang: self.bot.admin_handlers.admin_payouts(query, lang),
             'admin_marketplace_stats': lambda query, lang: self.bot.admin_handlers.admin_marketplace_stats(query, lang),
+            'admin_db_stats': lambda query, lang: self.bot.admin_handlers.admin_db_stats(query, lang),
             'admin_search_user': lambda query, lang: self.bot.admin_handlers.admin_search_user_prompt(query, lang),
             'admin_search_product': lambda query, lang: self.bot.admin_handlers.admin_search_product_prompt(query, lang),
             'admin_suspend_product': lambda query, lang: self.bot.admin_handlers.admin_suspend_product_prompt(query, lang),
@@ -150,8 +150,7 @@ class CallbackRouter:
         user_id = query.from_user.id
         lang = self.bot.get_user_language(user_id)
 
-        logger.info(f"DEBUG: Routing callback: {callback_data} for user {user_id}")
-        logger.debug(f"Routing callback: {callback_data} for user {user_id}")
+        logger.info("Routing callback %s for user %s", callback_data, user_id)
 
         # Handle state-setting admin routes
         if callback_data == 'admin_search_user':
@@ -194,7 +193,7 @@ class CallbackRouter:
         if await self._route_prefixes(query, callback_data, lang):
             return True
 
-        logger.warning(f"No route found for callback: {callback_data}")
+        logger.warning("No route found for callback: %s", callback_data)
         return False
 
     async def _route_patterns(self, query: CallbackQuery, callback_data: str, lang: str) -> bool:
@@ -487,46 +486,8 @@ class CallbackRouter:
                 index = int(callback_data.replace('library_carousel_', ''))
                 user_id = query.from_user.id
 
-                # Get all purchases for this user
-                conn = self.bot.get_db_connection()
-                cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-                cursor.execute('''
-                   SELECT
-                        p.product_id,
-                        p.title,
-                        p.description,
-                        p.price_usd,
-                        p.thumbnail_url,
-                        p.category,
-                        p.file_size_mb,
-                        COALESCE(u.seller_name, u.first_name) as seller_name,
-                        MAX(o.completed_at) as completed_at,
-                        o.download_count
-                    FROM orders o
-                    JOIN products p ON o.product_id = p.product_id
-                    JOIN users u ON p.seller_user_id = u.user_id
-                    WHERE o.buyer_user_id = %s AND o.payment_status = 'completed'
-                    GROUP BY p.product_id, p.title, p.description, p.price_usd, p.thumbnail_url, p.category, p.file_size_mb, u.seller_name, u.first_name, o.download_count
-                    ORDER BY MAX(o.completed_at) DESC
-                ''', (user_id,))
-                purchases_raw = cursor.fetchall()
-                put_connection(conn)
-
-                # Convert to dict
-                purchases = []
-                for row in purchases_raw:
-                    purchases.append({
-                        'product_id': row['product_id'],
-                        'title': row['title'],
-                        'description': row['description'],
-                        'price_eur': row['price_usd'],
-                        'thumbnail_url': row['thumbnail_url'],
-                        'category': row['category'],
-                        'file_size_mb': row['file_size_mb'],
-                        'seller_name': row['seller_name'],
-                        'completed_at': row['completed_at'],
-                        'download_count': row['download_count']
-                    })
+                # Seule la fiche demandée est chargée (keyset, borne depuis l'index acheteur)
+                purchases = await asyncio.to_thread(self.bot.library_handlers.load_library_window, user_id, index)
 
                 if purchases:
                     await self.bot.library_handlers.show_library_carousel(
@@ -766,6 +727,12 @@ class CallbackRouter:
             await self.bot.buy_handlers.check_payment_handler(self.bot, query, order_id, lang)
             return True
 
+        # Re-open pending payment QR code
+        if callback_data.startswith('show_payment_qr_'):
+            order_id = callback_data.replace('show_payment_qr_', '')
+            await self.bot.buy_handlers.show_payment_qr(self.bot, query, order_id, lang)
+            return True
+
         # Report order problem (within 24h)
         if callback_data.startswith('report_problem_'):
             order_id = callback_data.replace('report_problem_', '')
@@ -5,6 +5,9 @@ from app.core.i18n import t as i18n
 from app.core.database_init import get_postgresql_connection
 from app.core.db_pool import put_connection
 from app.core.settings import settings
+from app.core.query_stats import get_query_stats
+from app.services.category_service import get_category_catalogue
+import html
 import logging
 import psycopg2
 import psycopg2.extras
@@ -31,6 +34,7 @@ class AdminHandlers:
              InlineKeyboardButton(" Products", callback_data='admin_products_menu')],
             [InlineKeyboardButton(i18n(lang, 'admin_payouts'), callback_data='admin_payouts'),
              InlineKeyboardButton(i18n(lang, 'admin_stats'), callback_data='admin_marketplace_stats')],
+            [InlineKeyboardButton("🗄️ DB Stats", callback_data='admin_db_stats')],
             [InlineKeyboardButton(i18n(lang, 'admin_back'), callback_data='back_main')]
         ]
 
@@ -499,6 +503,57 @@ class AdminHandlers:
             await query.edit_message_text(f"❌ Erreur: {str(e)}")
             await query.answer()
 
+    async def admin_db_stats(self, query, lang):
+        """Stats requêtes DB: méthodes les plus coûteuses + dernières requêtes lentes"""
+        await query.answer()
+
+        stats = get_query_stats()
+        lines = ["🗄️ <b>DB QUERY STATS</b>", f"Seuil lent: {stats.slow_query_ms:g}ms", ""]
+
+        top_methods = stats.top_methods(limit=10)
+        if top_methods:
+            lines.append("<b>Top méthodes (temps total)</b>" if lang == 'fr' else "<b>Top methods (total time)</b>")
+            for row in top_methods:
+                # module.Classe.méthode → Classe.méthode (lisible sur mobile)
+                method = html.escape('.'.join(row['method'].split('.')[-2:]))
+                lines.append(
+                    f"• <code>{method}</code>\n"
+                    f"   {row['count']}× avg {row['avg_ms']:.1f}ms p95 ≤{row['p95_ms']:g}ms max {row['max_ms']:.0f}ms"
+                )
+        else:
+            lines.append("Aucune requête mesurée" if lang == 'fr' else "No queries recorded")
+
+        slow_queries = stats.slow_queries(limit=3)
+        if slow_queries:
+            lines.append("")
+            lines.append("<b>Requêtes lentes récentes</b>" if lang == 'fr' else "<b>Recent slow queries</b>")
+            for sample in slow_queries:
+                lines.append(
+                    f"• {sample['at']} {sample['duration_ms']:.0f}ms ({sample['rows']} rows)\n"
+                    f"   <code>{html.escape(sample['fingerprint'][:160])}</code>"
+                )
+
+        keyboard = [
+            [InlineKeyboardButton("🔄 Rafraîchir" if lang == 'fr' else "🔄 Refresh", callback_data='admin_db_stats')],
+            [InlineKeyboardButton("🔙 Menu Admin" if lang == 'fr' else "🔙 Admin Menu", callback_data='admin_menu')]
+        ]
+
+        # Limite Telegram: 4096 caractères - coupe entre deux entrées (chacune ferme ses balises HTML)
+        text = lines[0]
+        for index, line in enumerate(lines[1:], start=1):
+            if len(text) + len(line) + 1 > 4000:
+                text += f"\n… {len(lines) - index} " + ("lignes omises" if lang == 'fr' else "lines omitted")
+                break
+            text += "\n" + line
+
+        try:
+            await query.edit_message_text(
+                text,
+                reply_markup=InlineKeyboardMarkup(keyboard),
+                parse_mode='HTML')
+        except Exception as e:
+            logger.debug(f"DB stats message unchanged: {e}")
+
     async def admin_search_user_prompt(self, query, lang):
         """Prompt recherche utilisateur"""
         await query.answer()
@@ -639,6 +694,9 @@ class AdminHandlers:
             conn.commit()
             put_connection(conn)
 
+            # Changement de statut en masse: compteurs de catégories recalculés
+            get_category_catalogue().reconcile()
+
             # Préparer les données pour affichage
             username = user_data.get('username') or 'N/A'
             first_name = user_data.get('first_name') or 'N/A'
@@ -650,7 +708,7 @@ class AdminHandlers:
                     from app.core.email_service import EmailService
                     email_service = EmailService()
 
-                    success = email_service.send_account_suspended_notification(
+                    success = await email_service.send_account_suspended_notification(
                         to_email=user_email,
                         user_name=first_name or 'Utilisateur',
                         reason="Violation des règles de la plateforme",
@@ -791,6 +849,9 @@ class AdminHandlers:
             conn.commit()
             put_connection(conn)
 
+            # Changement de statut en masse: compteurs de catégories recalculés
+            get_category_catalogue().reconcile()
+
             username = user_data.get('username') or 'N/A'
             first_name = user_data.get('first_name') or 'N/A'
 
@@ -1118,7 +1179,7 @@ class AdminHandlers:
                         if seller and seller.get('email'):
                             from app.core.email_service import EmailService
                             email_service = EmailService()
-                            email_service.send_product_suspended_notification(
+                            await email_service.send_product_suspended_notification(
                                 to_email=seller['email'],
                                 seller_name=seller.get('seller_name', seller.get('username', 'Vendeur')),
                                 product_title=product['title'],
@@ -4,9 +4,10 @@ import re
 import asyncio
 import uuid
 import os
-from app.core.utils import logger
+import logging
 import time
 from typing import Optional, Dict, List
+from collections import OrderedDict
 from datetime import datetime
 from io import BytesIO
 import psycopg2
@@ -19,10 +20,15 @@ from app.core.i18n import t as i18n
 from app.core import settings as core_settings
 from app.core.error_messages import get_error_message
 from app.core.seller_notifications import SellerNotifications
-from app.core.db_pool import put_connection
+from app.core.db_pool import get_connection_async, put_connection
+from app.services.payment_artifact_service import get_payment_artifact_renderer
+from app.services.buyer_library import get_buyer_library
+from app.services.category_service import get_category_catalogue
 from app.integrations.telegram.keyboards import buy_menu_keyboard, back_to_main_button
 from app.integrations.telegram.utils import safe_transition_to_text
 
+logger = logging.getLogger(__name__)
+
 
 class BuyHandlers:
     def __init__(self, product_repo, order_repo, payment_service, review_repo=None):
@@ -30,6 +36,8 @@ class BuyHandlers:
         self.order_repo = order_repo
         self.payment_service = payment_service
         self.review_repo = review_repo  # V2: Added for reviews functionality
+        # Curseurs keyset des pages d'avis: (product_id, page) -> (created_at, buyer_user_id) du dernier avis
+        self._review_page_cursors: OrderedDict = OrderedDict()
 
     # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
     # V2 WORKFLOW: HELPER FUNCTIONS (Refactored to eliminate code duplication)
@@ -206,7 +214,7 @@ class BuyHandlers:
         seller_id = product.get('seller_user_id')
         thumbnail_path = product.get('thumbnail_url')
 
-        logger.info(f"🖼️ Image lookup - Product: {product_id}")
+        logger.debug("🖼️ Image lookup - Product: %s", product_id)
 
         # 1. PRIORITY: Check Telegram file_id cache (instantaneous, free)
         if product_id:
@@ -214,12 +222,12 @@ class BuyHandlers:
             file_id = telegram_cache.get_product_image_file_id(product_id, 'thumb')
 
             if file_id:
-                logger.info(f"⚡ Using cached Telegram file_id: {product_id}")
+                logger.debug("⚡ Using cached Telegram file_id: %s", product_id)
                 return (file_id, True)
 
         # 2. Check if thumbnail_url is already a B2 URL (starts with https://)
         if thumbnail_path and thumbnail_path.startswith('https://'):
-            logger.info(f"🌐 Thumbnail is B2 URL: {thumbnail_path}")
+            logger.debug("🌐 Thumbnail is B2 URL: %s", thumbnail_path)
             # Try to download from B2 to local cache
             if product_id and seller_id:
                 image_sync = ImageSyncService()
@@ -229,7 +237,7 @@ class BuyHandlers:
                     image_type='thumb'
                 )
                 if local_path and os.path.exists(local_path):
-                    logger.info(f"📥 Downloaded from B2 to cache: {local_path}")
+                    logger.info("📥 Downloaded from B2 to cache: %s", local_path)
                     return (local_path, False)
 
         # 3. Check local cache (legacy or recent downloads)
@@ -237,12 +245,12 @@ class BuyHandlers:
             thumbnail_path_abs = get_absolute_path(thumbnail_path) if not thumbnail_path.startswith('https://') else None
 
             if thumbnail_path_abs and os.path.exists(thumbnail_path_abs):
-                logger.info(f"✅ Using cached local image: {thumbnail_path_abs}")
+                logger.debug("✅ Using cached local image: %s", thumbnail_path_abs)
                 return (thumbnail_path_abs, False)
 
         # 4. Try to download from B2 if we have the IDs
         if product_id and seller_id:
-            logger.warning(f"⚠️ Image not in cache, downloading from B2...")
+            logger.warning("⚠️ Image not in cache for %s, downloading from B2...", product_id)
             image_sync = ImageSyncService()
             b2_thumbnail_path = image_sync.get_image_path_with_fallback(
                 product_id=product_id,
@@ -251,11 +259,11 @@ class BuyHandlers:
             )
 
             if b2_thumbnail_path and os.path.exists(b2_thumbnail_path):
-                logger.info(f"✅ Downloaded from B2: {b2_thumbnail_path}")
+                logger.info("✅ Downloaded from B2: %s", b2_thumbnail_path)
                 return (b2_thumbnail_path, False)
 
         # 5. FALLBACK: Generate placeholder
-        logger.info(f"🎨 Generating placeholder for {product_id}")
+        logger.info("🎨 Generating placeholder for %s", product_id)
         placeholder_path = ImageUtils.create_or_get_placeholder(
             product_title=product['title'],
             category=product.get('category', 'General'),
@@ -567,16 +575,10 @@ class BuyHandlers:
 
         # V2: Load first category and show carousel immediately
         try:
-            conn = bot.get_db_connection()
-            cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+            # Get first category (most active products, catalogue en mémoire)
+            category_name = get_category_catalogue().most_popular()
 
-            # Get first category (ordered by products_count DESC = most popular)
-            cursor.execute('SELECT name FROM categories ORDER BY products_count DESC LIMIT 1')
-            first_category = cursor.fetchone()
-            put_connection(conn)
-
-            if first_category:
-                category_name = first_category['name']
+            if category_name:
                 # Show products in carousel for this category
                 await self.show_category_products(bot, query, category_name, lang, page=0)
             else:
@@ -858,17 +860,25 @@ Contact support with your Order ID"""
                 )
                 return
 
-            # Get product for context
-            product = bot.get_product_by_id(product_id)
+            # Produit + agrégat d'avis en une lecture (product_review_stats)
+            product = self.review_repo.get_review_summary(product_id)
             if not product:
                 await safe_transition_to_text(query, i18n(lang, 'err_product_not_found'))
                 return
 
-            # Get reviews (5 per page)
+            # Get reviews (5 per page): keyset depuis la page précédente si connue, sinon OFFSET
             reviews_per_page = 5
-            reviews = self.review_repo.get_product_reviews(product_id, limit=reviews_per_page, offset=page * reviews_per_page)
+            after = self._review_page_cursors.get((product_id, page - 1)) if page > 0 else None
+            reviews = self.review_repo.get_product_reviews(
+                product_id, limit=reviews_per_page, offset=page * reviews_per_page, after=after
+            )
+            if reviews:
+                self._remember_review_cursor(product_id, page, reviews[-1])
+
+            # Note / total affichés: avis importés inclus; pagination: avis locaux uniquement
             total_reviews = product.get('reviews_count', 0)
             avg_rating = product.get('rating', 0.0)
+            local_reviews = product['local_review_count']
 
             # Build message - Format simplifié
             text = f"**⭐ AVIS CLIENTS**\n\n"
@@ -877,6 +887,15 @@ Contact support with your Order ID"""
             # Rating summary
             if total_reviews > 0:
                 text += f"⭐ **{avg_rating:.1f}/5** ({total_reviews})\n\n"
+
+                # Histogramme des avis marketplace (agrégat, sans requête supplémentaire)
+                if local_reviews > 0:
+                    distribution = product.rating_distribution
+                    for stars in range(5, 0, -1):
+                        count = distribution[stars]
+                        bar = "█" * round(count * 8 / local_reviews)
+                        text += f"{stars}⭐ {bar or '·'} {count}\n"
+                    text += "\n"
             else:
                 text += "⭐ Aucun avis\n\n"
                 text += ("Soyez le premier à donner votre avis après l'achat!\n\n"
@@ -942,7 +961,7 @@ Contact support with your Order ID"""
             # Row 1: BUY/LIBRARY BUTTON - Vérifier ownership pour éviter achats en double
             user_id = query.from_user.id
 
-            if self.order_repo.check_user_purchased_product(user_id, product_id):
+            if await asyncio.to_thread(self.order_repo.check_user_purchased_product, user_id, product_id):
                 # Utilisateur possède déjà ce produit → Bouton bibliothèque
                 keyboard.append([
                     InlineKeyboardButton(
@@ -966,9 +985,9 @@ Contact support with your Order ID"""
                 ])
 
             # Row 2: Pagination (if needed) - Asymétrique sans boutons vides
-            if total_reviews > reviews_per_page:
+            if local_reviews > reviews_per_page:
                 nav_row = []
-                total_pages = (total_reviews + reviews_per_page - 1) // reviews_per_page
+                total_pages = (local_reviews + reviews_per_page - 1) // reviews_per_page
 
                 # Build pagination callbacks with context
                 if category_key and index is not None:
@@ -1021,6 +1040,14 @@ Contact support with your Order ID"""
                 ]])
             )
 
+    def _remember_review_cursor(self, product_id: str, page: int, last_review: Dict, max_entries: int = 2000):
+        """Mémorise la borne keyset de fin de page (la page suivante évite OFFSET)"""
+        key = (product_id, page)
+        self._review_page_cursors[key] = (last_review['created_at'], last_review['buyer_user_id'])
+        self._review_page_cursors.move_to_end(key)
+        while len(self._review_page_cursors) > max_entries:
+            self._review_page_cursors.popitem(last=False)
+
     async def collapse_product_details(self, bot, query, product_id: str, category_key: str, index: int, lang: str = 'fr') -> None:
         """
         V2 SPEC - NEW FEATURE: Collapse details back to carousel (short card)
@@ -1035,7 +1062,7 @@ Contact support with your Order ID"""
         """
         try:
             # Get all products in category
-            conn = bot.get_db_connection()
+            conn = await get_connection_async()
             cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
 
             # Check if this is a seller shop (pseudo-category)
@@ -1122,12 +1149,8 @@ Contact support with your Order ID"""
 
         # Keyboard builder for buy carousel
         def build_keyboard(product, index, total, lang):
-            # Get all categories for navigation
-            conn = bot.get_db_connection()
-            cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-            cursor.execute('SELECT name FROM categories ORDER BY products_count DESC')
-            all_categories = [row['name'] for row in cursor.fetchall()]
-            put_connection(conn)
+            # Get all categories for navigation (catalogue en mémoire)
+            all_categories = get_category_catalogue().by_popularity()
 
             # Use existing helper
             keyboard_markup = self._build_product_keyboard(
@@ -1233,7 +1256,7 @@ Contact support with your Order ID"""
             category_key: Optional category key for "Réduire" button context
             index: Optional product index for "Réduire" button context
         """
-        product = bot.get_product_by_id(product_id)
+        product = await asyncio.to_thread(bot.get_product_by_id, product_id)
 
         if not product:
             await query.edit_message_text(
@@ -1249,7 +1272,7 @@ Contact support with your Order ID"""
             await query.answer()
             return
 
-        self.product_repo.increment_views(product_id)
+        await asyncio.to_thread(self.product_repo.increment_views, product_id)
 
         # V2: Display full details with helper functions
         await self._show_product_visual_v2(bot, query, product, lang, category_key, index)
@@ -1327,7 +1350,7 @@ Contact support with your Order ID"""
 
         # Si ça ressemble à un ID (format TBF-XXX ou contient des tirets)
         if 'TBF-' in product_id_upper or '-' in search_input:
-            product = bot.get_product_by_id(product_id_upper)
+            product = await asyncio.to_thread(bot.get_product_by_id, product_id_upper)
             if product:
                 logger.info(f"✅ Product found by ID: {product_id_upper}")
                 await self.show_product_details_from_search(bot, update, product)
@@ -1536,7 +1559,7 @@ Contact support with your Order ID"""
         # Show loading toast (doesn't create a message)
         await query.answer("🔍 Vérification en cours...", show_alert=False)
 
-        conn = bot.get_db_connection()
+        conn = await get_connection_async()
         cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
         try:
             cursor.execute('SELECT * FROM orders WHERE order_id = %s', (order_id, ))
@@ -1546,6 +1569,7 @@ Contact support with your Order ID"""
             return
 
         if not order:
+            put_connection(conn)
             await query.message.reply_text("❌ Commande introuvable!")
             return
         logger.info(order)
@@ -1611,6 +1635,9 @@ Contact support with your Order ID"""
                     # Partner commission removed - referral system deleted
 
                     conn.commit()
+                    get_buyer_library().record_purchase(
+                        order['buyer_user_id'], order['product_id'], order_id
+                    )
                 except (psycopg2.Error, Exception) as e:
                     conn.rollback()
                     put_connection(conn)
@@ -1750,7 +1777,9 @@ Contact support with your Order ID"""
                 put_connection(conn)
                 status_text = (f"⏳ **PAYMENT IN PROGRESS**\n\n🔍 **Status:** {status}\n\n💡 Confirmations can take 5-30 min" if lang == 'en' else f"⏳ **PAIEMENT EN COURS**\n\n🔍 **Statut :** {status}\n\n💡 Les confirmations peuvent prendre 5-30 min")
                 keyboard = InlineKeyboardMarkup([[InlineKeyboardButton(
-                    "🔄 Refresh" if lang == 'en' else "🔄 Rafraîchir", callback_data=f'check_payment_{order_id}')]])
+                    "🔄 Refresh" if lang == 'en' else "🔄 Rafraîchir", callback_data=f'check_payment_{order_id}')
+                ], [InlineKeyboardButton(
+                    "📱 Show QR code" if lang == 'en' else "📱 Afficher le QR code", callback_data=f'show_payment_qr_{order_id}')]])
                 await query.message.reply_text(status_text, reply_markup=keyboard, parse_mode='Markdown')
         else:
             put_connection(conn)
@@ -1775,7 +1804,7 @@ Contact support with your Order ID"""
         """
         try:
             # Get product details
-            product = bot.get_product_by_id(product_id)
+            product = await asyncio.to_thread(bot.get_product_by_id, product_id)
             if not product:
                 keyboard = InlineKeyboardMarkup([[
                     InlineKeyboardButton(i18n(lang, 'btn_back'), callback_data='back_main')
@@ -1785,7 +1814,7 @@ Contact support with your Order ID"""
 
             # Check if user already owns this product
             user_id = query.from_user.id
-            if self.order_repo.check_user_purchased_product(user_id, product_id):
+            if await asyncio.to_thread(self.order_repo.check_user_purchased_product, user_id, product_id):
                 # User already owns this product, redirect to library
                 already_owned_text = (
                     "✅ **YOU ALREADY OWN THIS PRODUCT**\n\n"
@@ -1901,7 +1930,7 @@ Contact support with your Order ID"""
         """Create payment with selected crypto using NowPayments"""
         try:
             # Get product details
-            product = bot.get_product_by_id(product_id)
+            product = await asyncio.to_thread(bot.get_product_by_id, product_id)
             if not product:
                 keyboard = InlineKeyboardMarkup([[
                     InlineKeyboardButton(i18n(lang, 'btn_back'), callback_data='back_main')
@@ -1955,10 +1984,7 @@ Contact support with your Order ID"""
                 return
 
             # Store order in database
-            from app.core.database_init import get_postgresql_connection
-            from app.core.db_pool import put_connection
-
-            conn = get_postgresql_connection()
+            conn = await get_connection_async()
             cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
             cursor.execute('''
                 INSERT INTO orders (order_id, buyer_user_id, seller_user_id, product_id,
@@ -2011,7 +2037,7 @@ Contact support with your Order ID"""
             pass  # Pas grave si ça échoue
 
         from app.core.utils import escape_markdown
-        product = self.product_repo.get_product_by_id(product_id)
+        product = await asyncio.to_thread(self.product_repo.get_product_by_id, product_id)
         if not product:
             from app.core.i18n import t as i18n
             await query.edit_message_text(i18n(lang, 'err_product_not_found'))
@@ -2242,7 +2268,7 @@ Contact support with your Order ID"""
             user_id = query.from_user.id
 
             # Create mock order in database
-            conn = bot.get_db_connection()
+            conn = await get_connection_async()
             cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
 
             # Insert order
@@ -2258,7 +2284,7 @@ Contact support with your Order ID"""
             put_connection(conn)
 
             # Get product details for confirmation
-            product = bot.get_product_by_id(product_id)
+            product = await asyncio.to_thread(bot.get_product_by_id, product_id)
             title = product.get('title', 'Produit') if product else 'Produit'
 
             await query.edit_message_text(
@@ -2295,7 +2321,9 @@ Contact support with your Order ID"""
             exact_amount = payment_details.get('amount') or payment_data.get('exact_crypto_amount')
             formatted_amount = payment_data.get('formatted_amount', f"{exact_amount:.8f}" if exact_amount else "N/A")
             network = payment_details.get('network', crypto_code.upper())
-            qr_code = payment_data.get('qr_code')
+            qr_key = payment_data.get('qr_key')
+            qr_png = payment_data.get('qr_png')
+            renderer = get_payment_artifact_renderer()
 
             # Utiliser la fonction centralisée de génération de texte
             text = self._build_payment_confirmation_text(
@@ -2320,16 +2348,10 @@ Contact support with your Order ID"""
                 [InlineKeyboardButton(back_label, callback_data=f'buy_product_{product_id}')]
             ]
 
-            # Try to send QR code image if available
-            if qr_code:
+            # QR précalculé (PNG bruts) - file_id Telegram réutilisé si déjà envoyé
+            if qr_key and (qr_png or renderer.get_file_id(qr_key)):
                 try:
-                    import base64
-                    from io import BytesIO
-
-                    # Decode base64 QR code
-                    img_data = base64.b64decode(qr_code)
-                    img_buffer = BytesIO(img_data)
-                    img_buffer.name = f'payment_qr_{order_id}.png'
+                    renderer.bind_order(order_id, query.from_user.id, qr_key)
 
                     # Delete the original message first
                     try:
@@ -2338,9 +2360,7 @@ Contact support with your Order ID"""
                         pass
 
                     # Send QR code as photo WITHOUT caption (separate messages)
-                    await query.message.reply_photo(
-                        photo=img_buffer
-                    )
+                    await self._send_payment_qr(query.message, order_id, qr_key, qr_png)
 
                     # Send payment details as separate text message with buttons
                     await query.message.reply_text(
@@ -2375,6 +2395,78 @@ Contact support with your Order ID"""
             )
             await query.answer()
 
+    async def _send_payment_qr(self, message, order_id: str, qr_key, qr_png: Optional[bytes]):
+        """
+        Envoie le QR de paiement: file_id Telegram si connu, sinon upload des PNG bruts
+
+        Returns None sans rien envoyer si aucun PNG n'est disponible (rendu échoué):
+        l'appelant garde alors le message texte (adresse + montant) seul
+        """
+        renderer = get_payment_artifact_renderer()
+
+        file_id = renderer.get_file_id(qr_key)
+        if file_id:
+            try:
+                return await message.reply_photo(photo=file_id)
+            except Exception as e:
+                logger.warning(f"⚠️ Cached payment QR file_id rejected for {order_id}: {e}")
+                renderer.invalidate_file_id(qr_key)
+                if qr_png is None:
+                    _, qr_png = await renderer.render(qr_key[0], float(qr_key[1]), qr_key[2])
+
+        if qr_png is None:
+            logger.warning(f"⚠️ Payment QR unavailable for {order_id} - text only")
+            return None
+
+        img_buffer = BytesIO(qr_png)
+        img_buffer.name = f'payment_qr_{order_id}.png'
+        sent = await message.reply_photo(photo=img_buffer)
+        if sent and sent.photo:
+            renderer.save_file_id(qr_key, sent.photo[-1].file_id)
+        return sent
+
+    async def show_payment_qr(self, bot, query, order_id: str, lang: str):
+        """Ré-affiche le QR d'un paiement en attente (file_id réutilisé, pas de nouveau rendu)"""
+        await query.answer()
+        renderer = get_payment_artifact_renderer()
+
+        # Clé liée à (commande, acheteur): le callback d'un autre utilisateur ne trouve rien
+        qr_key = renderer.get_order_key(order_id, query.from_user.id)
+        qr_png = None
+
+        if qr_key is None:
+            # Process redémarré: retrouver adresse/montant depuis NowPayments
+            order = await asyncio.to_thread(self.order_repo.get_order_by_id, order_id)
+            if not order or order.get('buyer_user_id') != query.from_user.id:
+                await query.message.reply_text(i18n(lang, 'err_verify'))
+                return
+
+            payment_id = order.get('payment_id') or order.get('nowpayments_id')
+            payment_status = await self.payment_service.check_payment_status(payment_id) if payment_id else None
+            if not payment_status or not payment_status.get('pay_address'):
+                await query.message.reply_text(i18n(lang, 'err_verify'))
+                return
+
+            qr_key, qr_png = await renderer.render(
+                payment_status['pay_address'],
+                float(payment_status.get('pay_amount') or 0),
+                payment_status.get('pay_currency', '')
+            )
+            if qr_png is None:
+                await query.message.reply_text(i18n(lang, 'err_verify'))
+                return
+            renderer.bind_order(order_id, query.from_user.id, qr_key)
+
+        elif renderer.get_file_id(qr_key) is None:
+            _, qr_png = await renderer.render(qr_key[0], float(qr_key[1]), qr_key[2])
+
+        if await self._send_payment_qr(query.message, order_id, qr_key, qr_png) is None:
+            address, amount, currency = qr_key[:3]
+            await query.message.reply_text(
+                f"💳 <b>{amount} {currency.upper()}</b>\n<code>{address}</code>",
+                parse_mode='HTML'
+            )
+
     async def _safe_edit_message(self, query, text: str, reply_markup=None):
         """Safely edit message, handling photo messages and identical content"""
         try:
@@ -8,13 +8,19 @@ import os
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, InputMediaPhoto, WebAppInfo
 from telegram.ext import ContextTypes
 
-from app.services.gumroad_scraper import scrape_gumroad_profile, GumroadScraperException, download_cover_image
+from app.services.gumroad_scraper import download_cover_image
+from app.services.cover_ingest import get_cover_ingestor
+from app.services.import_jobs import get_import_engine, render_progress
+from app.domain.repositories.import_job_repo import ImportJobRepository
 from app.core.i18n import t as i18n
 from app.integrations.telegram.utils import safe_transition_to_text
 from app.core.settings import Settings
 
 logger = logging.getLogger(__name__)
 
+# Covers préchargées en avance sur le produit dont le vendeur envoie le fichier
+IMPORT_COVER_PREFETCH = int(os.getenv('IMPORT_COVER_PREFETCH', '3'))
+
 
 class ImportHandlers:
     """Handle import functionality from external platforms"""
@@ -22,6 +28,7 @@ class ImportHandlers:
     def __init__(self, user_repo, product_repo):
         self.user_repo = user_repo
         self.product_repo = product_repo
+        self.import_jobs = ImportJobRepository()
 
     @staticmethod
     def _escape_markdown(text: str) -> str:
@@ -77,7 +84,6 @@ class ImportHandlers:
     async def handle_shop_url(self, bot, update, context):
         """Recevoir URL et lancer scraping avec indicateur progression"""
         user_id = update.effective_user.id
-        lang = bot.get_user_language(user_id)
         url = update.message.text.strip()
 
         # Normaliser URL
@@ -96,111 +102,51 @@ class ImportHandlers:
             )
             return
 
-        # Message avec indicateur progression
+        engine = get_import_engine()
+        if engine is None:
+            await update.message.reply_text("❌ Import indisponible pour le moment. Réessayez plus tard.")
+            return
+
+        # Message de statut: la progression réelle y est poussée par le moteur d'import
         status_msg = await update.message.reply_text(
-            "🔍 **Scraping en cours...**\n\n"
-            "⏳ Temps estimé: 10-30 secondes\n"
-            "Veuillez patienter...",
+            render_progress(0, 0, phase='queued'),
             parse_mode='Markdown'
         )
 
-        # Optionnel: Update message avec progression
-        async def update_progress():
-            for i in range(3):
-                await asyncio.sleep(8)
-                try:
-                    await status_msg.edit_text(
-                        f"🔍 **Scraping en cours...**\n\n"
-                        f"⏳ {'.' * (i+1)}\n"
-                        f"Analyse de votre boutique...",
-                        parse_mode='Markdown'
-                    )
-                except:
-                    pass
-
-        # Lancer update progression en background
-        progress_task = asyncio.create_task(update_progress())
-
-        try:
-            # Scraping
-            all_products = await scrape_gumroad_profile(url)
-
-            # Annuler progression
-            progress_task.cancel()
+        job_id = await engine.submit(
+            user_id,
+            update.effective_chat.id,
+            url,
+            status_message_id=status_msg.message_id
+        )
+        bot.state_manager.update_state(user_id, step='scraping', import_job_id=job_id, import_source_url=url)
 
-            # Filtrer produits avec prix invalides (0 < prix < 9.99)
-            valid_products = []
-            invalid_products = []
+    async def on_import_job_finished(self, bot, job):
+        """
+        Fin d'un job d'import (hook du moteur, y compris pour un job repris après redémarrage)
+        Remplace le message de statut par le carrousel ou par l'erreur.
+        """
+        user_id = job['user_id']
+        chat_id = job['chat_id']
+        telegram_bot = bot.application.bot if hasattr(bot, 'application') else bot
+        lang = bot.get_user_language(user_id)
 
-            for product in all_products:
-                price = product.get('price', 0.0)
-                if price > 0 and price < 9.99:
-                    invalid_products.append(product)
-                else:
-                    valid_products.append(product)
-
-            # Informer user des produits filtres
-            if invalid_products:
-                invalid_list = '\n'.join([
-                    f"  \\- {self._escape_markdown(p['title'])}: ${p['price']:.2f}"
-                    for p in invalid_products[:5]
-                ])
-                if len(invalid_products) > 5:
-                    invalid_list += f"\n  \\- \\.\\.\\. et {len(invalid_products) - 5} autres"
-
-                await status_msg.edit_text(
-                    f"**{len(invalid_products)} produits ignores** \\(prix \\< 9\\.99$\\):\n\n"
-                    f"{invalid_list}\n\n"
-                    f"Continuer avec {len(valid_products)} produits valides\\.\\.\\.",
-                    parse_mode='MarkdownV2'
-                )
-                await asyncio.sleep(3)
-
-            products = valid_products
-
-            if not products:
-                await status_msg.edit_text(
-                    "⚠️ **Aucun produit trouvé**\n\n"
-                    "Vérifiez que:\n"
-                    "• Le profil est public\n"
-                    "• Le profil contient des produits\n"
-                    "• L'URL est correcte\n\n"
-                    "Utilisez /import pour réessayer.",
-                    parse_mode='Markdown'
+        async def edit_status(text, parse_mode='Markdown'):
+            try:
+                await telegram_bot.edit_message_text(
+                    chat_id=chat_id, message_id=job['status_message_id'], text=text, parse_mode=parse_mode
                 )
-                bot.state_manager.update_state(user_id, importing_shop=False, step=None)
-                return
-
-            # Télécharger toutes les cover images Gumroad vers B2
-            await status_msg.edit_text(
-                f"📸 **Téléchargement des images...**\n\n"
-                f"{len(products)} produits trouvés\n"
-                f"Upload des images vers votre stockage...",
-                parse_mode='Markdown'
-            )
+            except Exception:
+                await telegram_bot.send_message(chat_id=chat_id, text=text, parse_mode=parse_mode)
 
-            # Garder URLs Gumroad pour preview (pas de download)
-            logger.info(f"[IMPORT] Keeping {len(products)} Gumroad image URLs for preview")
-
-            # Stocker produits dans state
-            bot.state_manager.update_state(
-                user_id,
-                step='previewing_products',
-                import_products=products,
-                import_source_url=url,
-                import_current_index=0
-            )
-
-            # Afficher carrousel
-            await self.show_import_carousel(bot, status_msg, products, 0, lang, is_new_message=True)
+        # L'utilisateur a pu lancer un autre import entre-temps
+        current_job = bot.state_manager.get_state(user_id).get('import_job_id')
+        if current_job and current_job != job['job_id']:
+            return
 
-        except GumroadScraperException as e:
+        if job['status'] == 'failed':
             # Exception personnalisee avec message specifique utilisateur
-            progress_task.cancel()
-            logger.warning(f"[IMPORT] Gumroad scraping failed: {e}")
-
-            # Determiner emoji selon type erreur
-            error_msg = str(e)
+            error_msg = job.get('error') or ''
             if "n'existe pas" in error_msg:
                 emoji = "❌"
             elif "refuse" in error_msg or "Bot" in error_msg:
@@ -212,69 +158,113 @@ class ImportHandlers:
             else:
                 emoji = "⚠️"
 
-            await status_msg.edit_text(
+            await edit_status(
                 f"{emoji} **Erreur Gumroad**\n\n"
                 f"{error_msg}\n\n"
-                "Utilisez /import pour réessayer.",
-                parse_mode='Markdown'
+                "Utilisez /import pour réessayer."
             )
-            bot.state_manager.update_state(user_id, importing_shop=False, step=None)
+            bot.state_manager.update_state(user_id, importing_shop=False, step=None, import_job_id=None)
+            return
 
-        except Exception as e:
-            # Erreurs inattendues (bugs code, etc.)
-            progress_task.cancel()
-            logger.error(f"[IMPORT] Unexpected error during scraping: {e}")
-            await status_msg.edit_text(
-                f"❌ **Erreur inattendue:**\n{str(e)}\n\n"
-                "Si le problème persiste, contactez le support.\n"
-                "Utilisez /import pour recommencer.",
-                parse_mode='Markdown'
+        if job['status'] != 'completed':
+            return
+
+        # Informer user des produits filtres (prix invalides 0 < prix < 9.99)
+        invalid_products = job.get('excluded_products') or []
+        if invalid_products:
+            invalid_list = '\n'.join([
+                f"  \\- {self._escape_markdown(p['title'])}: ${p['price']:.2f}"
+                for p in invalid_products[:5]
+            ])
+            if len(invalid_products) > 5:
+                invalid_list += f"\n  \\- \\.\\.\\. et {len(invalid_products) - 5} autres"
+
+            await edit_status(
+                f"**{len(invalid_products)} produits ignores** \\(prix \\< 9\\.99$\\):\n\n"
+                f"{invalid_list}\n\n"
+                f"Continuer avec {job['product_count']} produits valides\\.\\.\\.",
+                parse_mode='MarkdownV2'
+            )
+            await asyncio.sleep(3)
+
+        if not job['product_count']:
+            await edit_status(
+                "⚠️ **Aucun produit trouvé**\n\n"
+                "Vérifiez que:\n"
+                "• Le profil est public\n"
+                "• Le profil contient des produits\n"
+                "• L'URL est correcte\n\n"
+                "Utilisez /import pour réessayer."
             )
-            bot.state_manager.update_state(user_id, importing_shop=False, step=None)
+            bot.state_manager.update_state(user_id, importing_shop=False, step=None, import_job_id=None)
+            return
 
-    async def show_import_carousel(self, bot, query_or_message, products, index, lang, is_new_message=False):
-        """Afficher carrousel import avec format exact des carrousels existants"""
+        # Garder URLs Gumroad pour preview (pas de download)
+        logger.info(f"[IMPORT] Job {job['job_id']} ready: {job['product_count']} products for user {user_id}")
+
+        # Produits en base (import_job_products): seul l'identifiant du job est gardé en state
+        bot.state_manager.update_state(
+            user_id,
+            importing_shop=True,
+            step='previewing_products',
+            import_job_id=job['job_id'],
+            import_product_count=job['product_count'],
+            import_source_url=job['source_url'],
+            import_current_index=0
+        )
 
-        if index >= len(products):
-            index = 0
+        # Supprimer message de statut, afficher carrousel
+        try:
+            await telegram_bot.delete_message(chat_id=chat_id, message_id=job['status_message_id'])
+        except Exception:
+            pass
+
+        product = self.import_jobs.get_product(job['job_id'], 0)
+        await self._send_import_carousel(telegram_bot, chat_id, product, 0, job['product_count'], lang)
+
+    async def _send_import_carousel(self, telegram_bot, chat_id, product, index, total, lang):
+        """Envoyer le carrousel import dans un nouveau message"""
+        caption = self._build_import_caption(product, index, total, lang)
+        keyboard = self._build_import_keyboard(product, index, total, lang)
+        image_url = product.get('image_url')
+
+        if image_url and image_url.startswith('http'):
+            await telegram_bot.send_photo(
+                chat_id=chat_id,
+                photo=image_url,
+                caption=caption,
+                reply_markup=InlineKeyboardMarkup(keyboard),
+                parse_mode='HTML'
+            )
+        else:
+            await telegram_bot.send_message(
+                chat_id=chat_id,
+                text=caption,
+                reply_markup=InlineKeyboardMarkup(keyboard),
+                parse_mode='HTML'
+            )
 
-        product = products[index]
+    async def show_import_carousel(self, bot, query_or_message, product, index, total, lang, is_new_message=False):
+        """Afficher carrousel import avec format exact des carrousels existants"""
 
         # Build caption (Image AVANT texte, titre après)
-        caption = self._build_import_caption(product, index, len(products), lang)
+        caption = self._build_import_caption(product, index, total, lang)
 
         # Build keyboard (4 lignes comme spécifié)
-        keyboard = self._build_import_keyboard(product, index, len(products), lang)
+        keyboard = self._build_import_keyboard(product, index, total, lang)
 
         # Get image
         image_url = product.get('image_url')
 
-        # Si nouveau message (après scraping)
+        # Si nouveau message
         if is_new_message:
-            # Supprimer message "Scraping en cours..."
             try:
                 await query_or_message.delete()
             except:
                 pass
 
-            # Envoyer nouveau message avec carrousel
             telegram_bot = bot.application.bot if hasattr(bot, 'application') else bot
-
-            if image_url and image_url.startswith('http'):
-                await telegram_bot.send_photo(
-                    chat_id=query_or_message.chat.id,
-                    photo=image_url,
-                    caption=caption,
-                    reply_markup=InlineKeyboardMarkup(keyboard),
-                    parse_mode='HTML'
-                )
-            else:
-                await telegram_bot.send_message(
-                    chat_id=query_or_message.chat.id,
-                    text=caption,
-                    reply_markup=InlineKeyboardMarkup(keyboard),
-                    parse_mode='HTML'
-                )
+            await self._send_import_carousel(telegram_bot, query_or_message.chat.id, product, index, total, lang)
         else:
             # Update message existant (navigation)
             if image_url and image_url.startswith('http'):
@@ -471,19 +461,26 @@ class ImportHandlers:
         lang = bot.get_user_language(user_id)
         user_state = bot.state_manager.get_state(user_id)
 
-        products = user_state.get('import_products', [])
+        job_id = user_state.get('import_job_id')
+        total = user_state.get('import_product_count', 0)
+        if not job_id or not total:
+            return
 
         # Bounds check
         if new_index < 0:
             new_index = 0
-        elif new_index >= len(products):
-            new_index = len(products) - 1
+        elif new_index >= total:
+            new_index = total - 1
+
+        product = self.import_jobs.get_product(job_id, new_index)
+        if not product:
+            return
 
         # Update state
         bot.state_manager.update_state(user_id, import_current_index=new_index)
 
         # Show updated carousel
-        await self.show_import_carousel(bot, query, products, new_index, lang, is_new_message=False)
+        await self.show_import_carousel(bot, query, product, new_index, total, lang, is_new_message=False)
 
     async def show_product_details(self, bot, query, lang, index):
         """Afficher description complète du produit"""
@@ -492,12 +489,13 @@ class ImportHandlers:
         user_id = query.from_user.id
         user_state = bot.state_manager.get_state(user_id)
 
-        products = user_state.get('import_products', [])
-
-        if index >= len(products):
+        total = user_state.get('import_product_count', 0)
+        if index >= total:
             return
 
-        product = products[index]
+        product = self.import_jobs.get_product(user_state.get('import_job_id'), index)
+        if not product:
+            return
 
         title = product['title']
         price = product.get('price', 0.0)
@@ -544,7 +542,7 @@ class ImportHandlers:
         if gumroad_url:
             text += f"🔗 <a href='{gumroad_url}'>Voir sur Gumroad</a>\n\n"
 
-        text += f"<i>Produit {index + 1}/{len(products)}</i>"
+        text += f"<i>Produit {index + 1}/{total}</i>"
 
         keyboard = [
             [InlineKeyboardButton("⬅️ Retour au carrousel", callback_data=f'import_nav_{index}')]
@@ -594,16 +592,16 @@ class ImportHandlers:
 
         # Si DÉJÀ vendeur → Ouvrir mini-app import
         user_state = bot.state_manager.get_state(user_id)
-        products = user_state.get('import_products', [])
+        product_count = user_state.get('import_product_count', 0)
 
-        if not products:
+        if not product_count:
             await safe_transition_to_text(
                 query,
                 "❌ Aucun produit à importer"
             )
             return
 
-        logger.info(f"[IMPORT] Opening import mini-app for user {user_id} with {len(products)} products")
+        logger.info(f"[IMPORT] Opening import mini-app for user {user_id} with {product_count} products")
 
         # Construire URL mini-app
         settings = Settings()
@@ -620,7 +618,7 @@ class ImportHandlers:
 
         # Message avec bouton WebApp pour ouvrir mini-app
         text = (
-            f"📦 **Import Gumroad - {len(products)} produits**\n\n"
+            f"📦 **Import Gumroad - {product_count} produits**\n\n"
             f"Cliquez sur le bouton ci-dessous pour démarrer l'import.\n\n"
             f"**Dans la mini-app:**\n"
             f"• Carousel avec tous vos produits\n"
@@ -632,7 +630,7 @@ class ImportHandlers:
 
         keyboard = [[
             InlineKeyboardButton(
-                f"📦 Importer {len(products)} Produits",
+                f"📦 Importer {product_count} Produits",
                 web_app=WebAppInfo(url=miniapp_url)
             )
         ]]
@@ -739,40 +737,79 @@ class ImportHandlers:
         user_id = query.from_user.id
         user_state = bot.state_manager.get_state(user_id)
 
-        products = user_state.get('import_products', [])
-        source_url = user_state.get('import_source_url', '')
+        job_id = user_state.get('import_job_id')
+        total = user_state.get('import_product_count', 0)
 
-        if not products:
+        if not job_id or not total:
             await safe_transition_to_text(
                 query,
                 "❌ Aucun produit à importer"
             )
             return
 
+        # Séquence précédente jamais terminée: ses covers préchargées ne serviront plus
+        await self._discard_prefetched_covers(user_id, user_state)
+
+        # IDs produits réservés dès maintenant: les covers des prochains produits sont
+        # ingérées pendant que le vendeur envoie ses fichiers un par un
+        from app.core.utils import generate_product_id
+        product_ids = await asyncio.to_thread(lambda: [generate_product_id() for _ in range(total)])
+        await self._prefetch_covers(user_id, job_id, product_ids, 0, IMPORT_COVER_PREFETCH)
+
         # Init upload state
         bot.state_manager.update_state(
             user_id,
             step='uploading_files',
             upload_current_index=0,
-            upload_results=[]
+            upload_results=[],
+            upload_product_ids=product_ids
         )
 
         # Demander premier fichier
-        await self.request_next_file(bot, query.message if hasattr(query, 'message') else query, products, 0, lang)
+        await self.request_next_file(bot, query.message if hasattr(query, 'message') else query, job_id, 0, total, lang)
+
+    async def _prefetch_covers(self, user_id: int, job_id: str, product_ids: list, start: int, stop: int):
+        """Lance l'ingestion des covers des produits [start, stop) en arrière-plan"""
+        ingestor = get_cover_ingestor()
+        for position in range(start, min(stop, len(product_ids))):
+            product = await asyncio.to_thread(self.import_jobs.get_product, job_id, position) or {}
+            if product.get('image_url'):
+                ingestor.prefetch(product['image_url'], user_id, product_ids[position],
+                                  referer_url=product.get('gumroad_url'))
+
+    async def _discard_prefetched_covers(self, user_id: int, user_state: dict):
+        """Covers préchargées des produits pas encore traités: annulées et supprimées"""
+        product_ids = user_state.get('upload_product_ids') or []
+        remaining = product_ids[user_state.get('upload_current_index') or 0:]
+        if remaining:
+            await get_cover_ingestor().discard_many(remaining, user_id)
+
+    def on_state_reset(self, user_id: int, removed: dict):
+        """
+        Listener du StateManager: état d'import effacé (/start, autre flux) pendant
+        l'upload séquentiel -> covers préchargées abandonnées
+        """
+        if not removed.get('upload_product_ids'):
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # hors boucle: aucune ingestion n'a pu être lancée
+        loop.create_task(self._discard_prefetched_covers(user_id, removed))
 
-    async def request_next_file(self, bot, message, products, index, lang):
+    async def request_next_file(self, bot, message, job_id, index, total, lang):
         """Demander fichier pour produit N"""
 
-        if index >= len(products):
+        if index >= total:
             # Tous fichiers traités → Finaliser
             return
 
-        product = products[index]
-        title = product['title']
-        price = product['price']
+        product = self.import_jobs.get_product(job_id, index) or {}
+        title = product.get('title', '')
+        price = product.get('price', 0.0)
 
         text = (
-            f"📎 **Upload fichier {index + 1}/{len(products)}**\n\n"
+            f"📎 **Upload fichier {index + 1}/{total}**\n\n"
             f"**Produit:** {title}\n"
             f"**Prix:** ${price:.2f}\n\n"
             f"Envoyez le fichier (PDF, ZIP, etc.)\n"
@@ -798,19 +835,25 @@ class ImportHandlers:
         if user_state.get('step') != 'uploading_files':
             return  # Pas en mode upload import
 
-        products = user_state.get('import_products', [])
+        job_id = user_state.get('import_job_id')
+        total = user_state.get('import_product_count', 0)
         current_index = user_state.get('upload_current_index', 0)
         upload_results = user_state.get('upload_results', [])
 
-        if current_index >= len(products):
+        if not job_id or current_index >= total:
             return
 
-        product = products[current_index]
+        product = self.import_jobs.get_product(job_id, current_index) or {}
 
         # Upload fichier vers R2
         try:
             from app.core.utils import generate_product_id
-            product_id = generate_product_id()
+            product_ids = user_state.get('upload_product_ids') or []
+            product_id = product_ids[current_index] if current_index < len(product_ids) else generate_product_id()
+
+            # La fenêtre de préchargement avance d'un produit
+            next_prefetch = current_index + IMPORT_COVER_PREFETCH
+            await self._prefetch_covers(user_id, job_id, product_ids, next_prefetch, next_prefetch + 1)
 
             file = await update.message.document.get_file()
             file_bytes = await file.download_as_bytearray()
@@ -818,8 +861,8 @@ class ImportHandlers:
             file_size_mb = len(file_bytes) / (1024 * 1024)
 
             # Upload vers R2
-            from app.services.b2_storage_service import B2StorageService
-            b2 = B2StorageService()
+            from app.services.b2_storage_service import get_storage_service
+            b2 = get_storage_service()
 
             object_key = f"products/{product_id}/main/{file_name}"
 
@@ -839,21 +882,27 @@ class ImportHandlers:
             gumroad_product_url = product.get('gumroad_url')
             if gumroad_image_url:
                 try:
-                    cover_url = await download_cover_image(
-                        gumroad_image_url,
-                        product_id,
-                        seller_id=user_id,
-                        referer_url=gumroad_product_url
-                    )
+                    # Cover préchargée au début de la séquence, sinon ingestion maintenant
+                    cover_url = await get_cover_ingestor().collect(product_id)
+                    if cover_url is None:
+                        cover_url = await download_cover_image(
+                            gumroad_image_url,
+                            product_id,
+                            seller_id=user_id,
+                            referer_url=gumroad_product_url
+                        )
+                    if cover_url:
+                        self.import_jobs.record_cover_uploaded(job_id)
                 except Exception as e:
                     logger.warning(f"Failed download cover to R2: {e}")
                     # FALLBACK: Utiliser URL Gumroad directement si R2 upload echoue
                     cover_url = gumroad_image_url
                     logger.info(f"Using Gumroad URL as fallback: {gumroad_image_url}")
 
-            # Store result
+            # Store result (position du produit: les métadonnées restent en base)
             upload_results.append({
-                'product': product,
+                'position': current_index,
+                'title': product.get('title', ''),
                 'product_id': product_id,
                 'main_file_url': main_file_url,
                 'file_size_mb': file_size_mb,
@@ -862,7 +911,7 @@ class ImportHandlers:
             })
 
             await update.message.reply_text(
-                f"✅ Fichier reçu pour: **{product['title']}**",
+                f"✅ Fichier reçu pour: **{product.get('title', '')}**",
                 parse_mode='Markdown'
             )
 
@@ -870,7 +919,8 @@ class ImportHandlers:
             logger.error(f"Upload error: {e}")
 
             upload_results.append({
-                'product': product,
+                'position': current_index,
+                'title': product.get('title', ''),
                 'status': 'error',
                 'error': str(e)
             })
@@ -889,8 +939,8 @@ class ImportHandlers:
         )
 
         # Passer au suivant ou finaliser
-        if next_index < len(products):
-            await self.request_next_file(bot, update.message, products, next_index, lang)
+        if next_index < total:
+            await self.request_next_file(bot, update.message, job_id, next_index, total, lang)
         else:
             await self.finalize_import(bot, update, upload_results, lang)
 
@@ -901,21 +951,33 @@ class ImportHandlers:
         user_id = query.from_user.id
         user_state = bot.state_manager.get_state(user_id)
 
-        products = user_state.get('import_products', [])
+        job_id = user_state.get('import_job_id')
+        total = user_state.get('import_product_count', 0)
         current_index = user_state.get('upload_current_index', 0)
         upload_results = user_state.get('upload_results', [])
 
-        product = products[current_index]
+        if not job_id or current_index >= total:
+            return
+
+        product = self.import_jobs.get_product(job_id, current_index) or {}
+
+        # Cover préchargée inutile: annulée / supprimée du stockage
+        product_ids = user_state.get('upload_product_ids') or []
+        if current_index < len(product_ids):
+            await get_cover_ingestor().discard(product_ids[current_index], user_id)
+        next_prefetch = current_index + IMPORT_COVER_PREFETCH
+        await self._prefetch_covers(user_id, job_id, product_ids, next_prefetch, next_prefetch + 1)
 
         # Marquer comme skipped
         upload_results.append({
-            'product': product,
+            'position': current_index,
+            'title': product.get('title', ''),
             'status': 'skipped'
         })
 
         await safe_transition_to_text(
             query,
-            f"⏭️ Produit skippé: **{product['title']}**"
+            f"⏭️ Produit skippé: **{product.get('title', '')}**"
         )
 
         # Passer au suivant
@@ -926,8 +988,8 @@ class ImportHandlers:
             upload_results=upload_results
         )
 
-        if next_index < len(products):
-            await self.request_next_file(bot, query.message, products, next_index, lang)
+        if next_index < total:
+            await self.request_next_file(bot, query.message, job_id, next_index, total, lang)
         else:
             await self.finalize_import(bot, query.message, upload_results, lang)
 
@@ -943,10 +1005,12 @@ class ImportHandlers:
 
         user_state = bot.state_manager.get_state(user_id)
         source_url = user_state.get('import_source_url', '')
+        job_id = user_state.get('import_job_id')
+        products = self.import_jobs.get_products(job_id) if job_id else []
 
-        imported_count = 0
         skipped_count = 0
         errors = []
+        new_products = []
 
         for result in upload_results:
             if result['status'] == 'skipped':
@@ -954,47 +1018,54 @@ class ImportHandlers:
                 continue
 
             if result['status'] == 'error':
-                errors.append(f"• {result['product']['title']}: {result.get('error', 'Unknown')}")
+                errors.append(f"• {result['title']}: {result.get('error', 'Unknown')}")
                 continue
 
-            # Créer produit en DB (status='active')
-            try:
-                product_data = result['product']
-
-                # Use cover_image_url from R2 upload (download_cover_image deja appele)
-                cover_image = result.get('cover_image_url')
-
-                # Construire thumbnail_url
-                thumbnail_image = None
-                if cover_image:
-                    # Si URL R2 (contient /cover.jpg), remplacer par /thumb.jpg
-                    if '/cover.jpg' in cover_image:
-                        thumbnail_image = cover_image.replace('/cover.jpg', '/thumb.jpg')
-                    else:
-                        # Si URL Gumroad (fallback), utiliser meme URL pour cover et thumb
-                        thumbnail_image = cover_image
-
-                self.product_repo.insert_product({
-                    'product_id': result['product_id'],
-                    'seller_user_id': user_id,
-                    'title': product_data['title'],
-                    'description': product_data.get('description', ''),
-                    'price_usd': product_data['price'],
-                    'main_file_url': result['main_file_url'],
-                    'file_size_mb': result['file_size_mb'],
-                    'cover_image_url': cover_image,
-                    'thumbnail_url': thumbnail_image,
-                    'status': 'active',  # Publié direct
-                    'imported_from': 'gumroad',
-                    'imported_url': product_data.get('gumroad_url'),
-                    'source_profile': source_url
-                })
-
-                imported_count += 1
+            product_data = products[result['position']] if result['position'] < len(products) else None
+            if product_data is None:
+                errors.append(f"• {result['title']}: DB error")
+                continue
+
+            # Use cover_image_url from R2 upload (download_cover_image deja appele)
+            cover_image = result.get('cover_image_url')
+
+            # Construire thumbnail_url
+            thumbnail_image = None
+            if cover_image:
+                # Si URL R2 (contient /cover.jpg), remplacer par /thumb.jpg
+                if '/cover.jpg' in cover_image:
+                    thumbnail_image = cover_image.replace('/cover.jpg', '/thumb.jpg')
+                else:
+                    # Si URL Gumroad (fallback), utiliser meme URL pour cover et thumb
+                    thumbnail_image = cover_image
+
+            new_products.append({
+                'product_id': result['product_id'],
+                'seller_user_id': user_id,
+                'title': product_data['title'],
+                'description': product_data.get('description', ''),
+                'price_usd': product_data['price'],
+                'main_file_url': result['main_file_url'],
+                'file_size_mb': result['file_size_mb'],
+                'cover_image_url': cover_image,
+                'thumbnail_url': thumbnail_image,
+                'status': 'active',  # Publié direct
+                'imported_from': 'gumroad',
+                'imported_url': product_data.get('gumroad_url'),
+                'source_profile': source_url
+            })
 
+        # Créer tous les produits en DB en une seule transaction (status='active')
+        imported_count = 0
+        if new_products:
+            try:
+                created = set(await asyncio.to_thread(self.product_repo.insert_products_bulk, new_products))
+                imported_count = len(created)
+                errors.extend(f"• {product['title']}: DB error"
+                              for product in new_products if product['product_id'] not in created)
             except Exception as e:
-                logger.error(f"Error creating product: {e}")
-                errors.append(f"• {product_data['title']}: DB error")
+                logger.error(f"Error creating imported products: {e}")
+                errors.extend(f"• {product['title']}: DB error" for product in new_products)
 
         # Message final
         result_text = "✅ **Import terminé!**\n\n"
@@ -1019,9 +1090,12 @@ class ImportHandlers:
             importing_shop=False,
             creating_seller_for_import=False,
             step=None,
-            import_products=None,
+            import_job_id=None,
+            import_product_count=None,
+            import_current_index=None,
             upload_current_index=None,
-            upload_results=None
+            upload_results=None,
+            upload_product_ids=None
         )
 
         await message.reply_text(
@@ -1035,13 +1109,28 @@ class ImportHandlers:
 
         user_id = query.from_user.id
 
+        # Job encore en cours de scraping: l'arrêter
+        user_state = bot.state_manager.get_state(user_id)
+        job_id = user_state.get('import_job_id')
+        engine = get_import_engine()
+        if job_id and engine:
+            await engine.cancel(job_id)
+
+        # Covers préchargées des produits pas encore traités
+        await self._discard_prefetched_covers(user_id, user_state)
+
         # Cleanup state
         bot.state_manager.update_state(
             user_id,
             importing_shop=False,
             creating_seller_for_import=False,
             step=None,
-            import_products=None,
+            import_job_id=None,
+            import_product_count=None,
+            import_current_index=None,
+            upload_current_index=None,
+            upload_results=None,
+            upload_product_ids=None,
             pending_import=None
         )
 
@@ -1,5 +1,6 @@
 """Library Handlers - User library with downloads, reviews, ratings and support"""
 
+import asyncio
 import os
 import time
 from datetime import datetime
@@ -10,7 +11,9 @@ from telegram import InlineKeyboardButton, InlineKeyboardMarkup, WebAppInfo
 
 from app.core.utils import logger, escape_markdown
 from app.core.i18n import t as i18n
-from app.core.db_pool import put_connection
+from app.core.db_pool import get_connection_async, put_connection
+from app.domain.repositories.library_repo import LibraryRepository
+from app.services.buyer_library import get_buyer_library, LibraryWindow
 from app.integrations.telegram.keyboards import back_to_main_button
 from app.integrations.telegram.utils import safe_transition_to_text
 
@@ -20,6 +23,19 @@ class LibraryHandlers:
         self.product_repo = product_repo
         self.order_repo = order_repo
         self.user_repo = user_repo
+        self.library_repo = LibraryRepository()
+
+    def load_library_window(self, user_id: int, index: int, page_size: int = 1) -> LibraryWindow:
+        """
+        Fenêtre de bibliothèque autour de `index` (carousel: total réel, une page keyset chargée)
+        Borne keyset lue dans l'index en mémoire de l'acheteur: pas d'OFFSET
+        """
+        library = get_buyer_library()
+        index = max(0, index)
+        items = self.library_repo.get_library_page(
+            user_id, limit=page_size, after=library.keyset_bound(user_id, index)
+        )
+        return LibraryWindow(items, offset=index, total=library.count(user_id))
 
     async def show_library(self, bot, query, lang: str, page: int = 0):
         """Affiche la bibliothèque de l'utilisateur avec carousel visuel"""
@@ -31,33 +47,14 @@ class LibraryHandlers:
         bot.reset_user_state(user_id, keep={'lang'})
 
         try:
-            conn = bot.get_db_connection()
-            cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+            # Une fiche par page de carousel: seule la fiche affichée est chargée (keyset)
+            purchases = await asyncio.to_thread(self.load_library_window, user_id, page)
 
-            # Récupérer tous les achats pour carousel
-            cursor.execute('''
-               SELECT
-                    p.product_id,
-                    p.title,
-                    p.description,
-                    p.price_usd,
-                    p.thumbnail_url,
-                    p.category,
-                    p.file_size_mb,
-                    COALESCE(u.seller_name, u.first_name) as seller_name,
-                    MAX(o.completed_at) as completed_at,
-                    o.download_count
-                FROM orders o
-                JOIN products p ON o.product_id = p.product_id
-                JOIN users u ON p.seller_user_id = u.user_id
-                WHERE o.buyer_user_id = %s AND o.payment_status = 'completed'
-                GROUP BY p.product_id, p.title, p.description, p.price_usd, p.thumbnail_url, p.category, p.file_size_mb, u.seller_name, u.first_name, o.download_count
-                ORDER BY MAX(o.completed_at) DESC
-            ''', (user_id,))
-            purchases_raw = cursor.fetchall()
-            put_connection(conn)
+            if not purchases and page > 0:
+                purchases = await asyncio.to_thread(self.load_library_window, user_id, 0)
+                page = 0
 
-            if not purchases_raw:
+            if not purchases:
                 empty_text = (
                     "📚 **MY LIBRARY**\n\n"
                     "Your library is empty. Start exploring products!\n\n"
@@ -84,25 +81,7 @@ class LibraryHandlers:
                 )
                 return
 
-            # Convert to dict format for carousel
-            purchases = []
-            for row in purchases_raw:
-                purchases.append({
-                    'product_id': row['product_id'],
-                    'title': row['title'],
-                    'description': row['description'],
-                    'price_usd': row['price_usd'],
-                    'thumbnail_url': row['thumbnail_url'],
-                    'category': row['category'],
-                    'file_size_mb': row['file_size_mb'],
-                    'seller_name': row['seller_name'],
-                    'completed_at': row['completed_at'],
-                    'download_count': row['download_count']
-                })
-
-            # Launch carousel mode starting at index 0
-            # [CORRECTION] Ajout de 'await' car la méthode est async
-            await self.show_library_carousel(bot, query, purchases, index=0, lang=lang)
+            await self.show_library_carousel(bot, query, purchases, index=page, lang=lang)
 
         except Exception as e:
             logger.error(f"Error loading library: {e}")
@@ -246,7 +225,7 @@ class LibraryHandlers:
         user_id = query.from_user.id
 
         try:
-            conn = bot.get_db_connection()
+            conn = await get_connection_async()
             cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
 
             # Créer ou mettre à jour l'avis
@@ -351,7 +330,7 @@ class LibraryHandlers:
         user_id = query.from_user.id
 
         try:
-            conn = bot.get_db_connection()
+            conn = await get_connection_async()
             cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
 
             # Créer ou mettre à jour la note
@@ -429,7 +408,7 @@ class LibraryHandlers:
             return
 
         try:
-            conn = bot.get_db_connection()
+            conn = await get_connection_async()
             cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
 
             # Mettre à jour l'avis
@@ -474,7 +453,7 @@ class LibraryHandlers:
         user_id = query.from_user.id
 
         try:
-            conn = bot.get_db_connection()
+            conn = await get_connection_async()
             cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
 
             # Récupérer les infos du vendeur
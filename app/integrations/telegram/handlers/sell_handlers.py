@@ -8,6 +8,7 @@ import psycopg2
 import psycopg2.extras
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, WebAppInfo
 from app.core.db_pool import put_connection
+from app.core.partitioning import ORDERS_RECENT_FILTER
 from app.core.i18n import t as i18n
 from app.integrations.telegram.keyboards import sell_menu_keyboard, back_to_main_button
 from app.core.validation import validate_email, validate_solana_address
@@ -398,7 +399,7 @@ class SellHandlers:
             global_stats = cursor.fetchone()
 
             # Données 30 derniers jours pour graphiques
-            cursor.execute("""
+            cursor.execute(f"""
                 SELECT
                     DATE(completed_at) as date,
                     COALESCE(SUM(product_price_usd), 0) as revenue,
@@ -407,6 +408,7 @@ class SellHandlers:
                 WHERE seller_user_id = %s
                   AND payment_status = 'completed'
                   AND completed_at >= NOW() - INTERVAL '30 days'
+                  AND {ORDERS_RECENT_FILTER}
                 GROUP BY DATE(completed_at)
                 ORDER BY date ASC
             """, (seller_id,))
@@ -590,7 +592,7 @@ class SellHandlers:
             cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
 
             # Données 30 derniers jours
-            cursor.execute("""
+            cursor.execute(f"""
                 SELECT
                     DATE(completed_at) as date,
                     COALESCE(SUM(product_price_usd), 0) as revenue,
@@ -599,6 +601,7 @@ class SellHandlers:
                 WHERE seller_user_id = %s
                   AND payment_status = 'completed'
                   AND completed_at >= NOW() - INTERVAL '30 days'
+                  AND {ORDERS_RECENT_FILTER}
                 GROUP BY DATE(completed_at)
                 ORDER BY date ASC
             """, (seller_id,))
@@ -921,8 +924,9 @@ class SellHandlers:
                     caption += f" <i>({product.get('reviews_count', 0)} avis)</i>"
             caption += "\n\n"
 
-            if product.get('description'):
-                desc = product['description']
+            # Cartes produit: extrait de description (200 car.) calculé côté SQL
+            desc = product.get('description_excerpt') or product.get('description')
+            if desc:
                 if len(desc) > 160:
                     desc = desc[:160].rsplit(' ', 1)[0] + "..."
                 caption += f"{html.escape(desc)}\n\n"
@@ -1805,7 +1809,7 @@ class SellHandlers:
 
                 # --- CORRECTIF UPLOAD B2 (Thread non-bloquant) ---
                 from app.core.file_utils import get_product_file_path
-                from app.services.b2_storage_service import B2StorageService
+                from app.services.b2_storage_service import get_storage_service
 
                 logger.info(f"📤 Preparing B2 upload for product {product_id}")
                 local_file_path = get_product_file_path(filename)
@@ -1816,7 +1820,7 @@ class SellHandlers:
                     return
 
                 # 1. On utilise le service directement (pas via helper obscure)
-                b2_service = B2StorageService()
+                b2_service = get_storage_service()
 
                 # 2. Construire le chemin B2 complet (comme pour cover/thumb)
                 # ✅ NOUVELLE STRUCTURE: products/seller_id/product_id/filename
@@ -1915,7 +1919,7 @@ class SellHandlers:
             from app.core.database_init import get_postgresql_connection
             from app.core.db_pool import put_connection
             from app.core import settings as core_settings
-            from app.services.b2_storage_service import B2StorageService
+            from app.services.b2_storage_service import get_storage_service
 
             old_dir = os.path.join('data', 'product_images', str(seller_id), temp_product_id)
             new_dir = os.path.join('data', 'product_images', str(seller_id), final_product_id)
@@ -1926,7 +1930,7 @@ class SellHandlers:
                 logger.info(f"📁 Renamed directory: {old_dir} -> {new_dir}")
 
                 # Initialize B2 service
-                b2_service = B2StorageService()
+                b2_service = get_storage_service()
 
                 # Upload images to B2 and get URLs
                 cover_b2_url = None
@@ -2230,8 +2234,8 @@ class SellHandlers:
             if success:
                 # Supprimer fichiers de l'object storage
                 try:
-                    from app.services.b2_storage_service import B2StorageService
-                    b2 = B2StorageService()
+                    from app.services.b2_storage_service import get_storage_service
+                    b2 = get_storage_service()
 
                     # Chemins predictables pour cover/thumb/preview
                     files_to_delete = [
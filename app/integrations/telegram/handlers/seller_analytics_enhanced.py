@@ -13,6 +13,7 @@ from app.services.chart_service import ChartService
 from app.services.export_service import ExportService
 from app.core.database_init import get_postgresql_connection
 from app.core.db_pool import put_connection
+from app.core.partitioning import ORDERS_RECENT_FILTER
 
 logger = logging.getLogger(__name__)
 
@@ -61,7 +62,7 @@ class SellerAnalyticsEnhanced:
             global_stats = cursor.fetchone()
 
             # Données 30 derniers jours pour graphiques
-            cursor.execute("""
+            cursor.execute(f"""
                 SELECT
                     DATE(completed_at) as date,
                     COALESCE(SUM(product_price_usd), 0) as revenue,
@@ -70,6 +71,7 @@ class SellerAnalyticsEnhanced:
                 WHERE seller_user_id = %s
                   AND payment_status = 'completed'
                   AND completed_at >= NOW() - INTERVAL '30 days'
+                  AND {ORDERS_RECENT_FILTER}
                 GROUP BY DATE(completed_at)
                 ORDER BY date ASC
             """, (seller_id,))
@@ -242,7 +244,7 @@ class SellerAnalyticsEnhanced:
             cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
 
             # Données 30 derniers jours
-            cursor.execute("""
+            cursor.execute(f"""
                 SELECT
                     DATE(completed_at) as date,
                     COALESCE(SUM(product_price_usd), 0) as revenue,
@@ -251,6 +253,7 @@ class SellerAnalyticsEnhanced:
                 WHERE seller_user_id = %s
                   AND payment_status = 'completed'
                   AND completed_at >= NOW() - INTERVAL '30 days'
+                  AND {ORDERS_RECENT_FILTER}
                 GROUP BY DATE(completed_at)
                 ORDER BY date ASC
             """, (seller_id,))
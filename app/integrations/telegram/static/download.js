@@ -145,9 +145,7 @@ async function verifyPurchase() {
 
         const response = await fetch('/api/verify-purchase', {
             method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-            },
+            headers: await miniAppAuthHeaders({'Content-Type': 'application/json'}),
             body: JSON.stringify(requestBody)
         });
 
@@ -222,7 +220,7 @@ function setupDownloadButton() {
             // Step 1: Generate one-time token
             const tokenResponse = await fetch('/api/generate-download-token', {
                 method: 'POST',
-                headers: {'Content-Type': 'application/json'},
+                headers: await miniAppAuthHeaders({'Content-Type': 'application/json'}),
                 body: JSON.stringify({
                     product_id: purchaseData.product_id,
                     order_id: purchaseData.order_id,
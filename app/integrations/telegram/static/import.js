@@ -126,9 +126,9 @@ async function init() {
         console.log('[IMPORT] Fetching products...');
 
         const response = await fetch(`/api/import-products?user_id=${userId}`, {
-            headers: {
+            headers: await miniAppAuthHeaders({
                 'X-Telegram-Init-Data': tg.initData
-            }
+            })
         });
 
         if (!response.ok) {
@@ -316,9 +316,7 @@ async function getB2UploadUrlForPath(objectKey, contentType) {
 
     const response = await fetch('/api/get-b2-upload-url', {
         method: 'POST',
-        headers: {
-            'Content-Type': 'application/json',
-        },
+        headers: await miniAppAuthHeaders({'Content-Type': 'application/json'}),
         body: JSON.stringify({
             object_key: objectKey,
             content_type: contentType,
@@ -527,9 +525,7 @@ async function requestPresignedUploadURL(fileName, fileType, userId) {
 
     const response = await fetch('/api/generate-upload-url', {
         method: 'POST',
-        headers: {
-            'Content-Type': 'application/json',
-        },
+        headers: await miniAppAuthHeaders({'Content-Type': 'application/json'}),
         body: JSON.stringify({
             file_name: fileName,
             file_type: fileType,
@@ -712,9 +708,7 @@ async function notifyImportComplete(objectKey, fileName, fileSize, previewUrl, p
 
     const response = await fetch('/api/import-complete', {
         method: 'POST',
-        headers: {
-            'Content-Type': 'application/json',
-        },
+        headers: await miniAppAuthHeaders({'Content-Type': 'application/json'}),
         body: JSON.stringify(payload)
     });
 
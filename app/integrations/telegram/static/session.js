@@ -0,0 +1,47 @@
+// Session Mini App: échange initData contre un session token signé (/api/session)
+// Les appels API suivants envoient "Authorization: Bearer <token>" (vérification serveur en temps constant)
+const miniAppSession = {
+    token: null,
+    expiresAt: 0,
+    pending: null
+};
+
+async function fetchMiniAppSession() {
+    const tg = window.Telegram.WebApp;
+    const response = await fetch('/api/session', {
+        method: 'POST',
+        headers: {'Content-Type': 'application/json'},
+        body: JSON.stringify({telegram_init_data: tg.initData})
+    });
+
+    if (!response.ok) {
+        throw new Error(`Session error: HTTP ${response.status}`);
+    }
+
+    const data = await response.json();
+    miniAppSession.token = data.session_token;
+    // Renouveler 60s avant expiration
+    miniAppSession.expiresAt = Date.now() + Math.max(0, data.expires_in - 60) * 1000;
+}
+
+// Retourne les headers à utiliser pour les appels API authentifiés
+async function miniAppAuthHeaders(extraHeaders = {}) {
+    if (!miniAppSession.token || Date.now() >= miniAppSession.expiresAt) {
+        if (!miniAppSession.pending) {
+            miniAppSession.pending = fetchMiniAppSession()
+                .catch((error) => {
+                    // Fallback: le serveur accepte toujours telegram_init_data dans le body
+                    console.warn('[SESSION] Session unavailable, falling back to initData:', error);
+                    miniAppSession.token = null;
+                })
+                .finally(() => { miniAppSession.pending = null; });
+        }
+        await miniAppSession.pending;
+    }
+
+    const headers = {...extraHeaders};
+    if (miniAppSession.token) {
+        headers['Authorization'] = `Bearer ${miniAppSession.token}`;
+    }
+    return headers;
+}
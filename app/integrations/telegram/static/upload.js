@@ -230,9 +230,7 @@ async function requestPresignedUploadURL(fileName, fileType, userId) {
 
     const response = await fetch('/api/generate-upload-url', {
         method: 'POST',
-        headers: {
-            'Content-Type': 'application/json',
-        },
+        headers: await miniAppAuthHeaders({'Content-Type': 'application/json'}),
         body: JSON.stringify({
             file_name: fileName,
             file_type: fileType,
@@ -259,9 +257,7 @@ async function getB2UploadUrlForPath(objectKey, contentType) {
 
     const response = await fetch('/api/get-b2-upload-url', {
         method: 'POST',
-        headers: {
-            'Content-Type': 'application/json',
-        },
+        headers: await miniAppAuthHeaders({'Content-Type': 'application/json'}),
         body: JSON.stringify({
             object_key: objectKey,
             content_type: contentType,
@@ -391,9 +387,7 @@ async function notifyUploadComplete(objectKey, fileName, fileSize, previewUrl =
 
     const response = await fetch('/api/upload-complete', {
         method: 'POST',
-        headers: {
-            'Content-Type': 'application/json',
-        },
+        headers: await miniAppAuthHeaders({'Content-Type': 'application/json'}),
         body: JSON.stringify(payload)
     });
 
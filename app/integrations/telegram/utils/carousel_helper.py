@@ -177,8 +177,8 @@ class CarouselHelper:
         # 4.5. Construire URL directe vers object storage (produits sans thumbnail_url en DB)
         if product_id and seller_id:
             try:
-                from app.services.b2_storage_service import B2StorageService
-                b2 = B2StorageService()
+                from app.services.b2_storage_service import get_storage_service
+                b2 = get_storage_service()
                 thumb_key = f"products/{seller_id}/{product_id}/thumb.jpg"
 
                 if b2.storage_type == 'r2':
@@ -9,13 +9,109 @@ import os
 import asyncio
 import base64
 import requests
-from typing import Optional, BinaryIO, Dict
+import threading
+import time
+from typing import Optional, BinaryIO, Dict, Any, List, Tuple
 from botocore.exceptions import ClientError
 from botocore.config import Config
 from app.core import settings
 
 logger = logging.getLogger(__name__)
 
+# B2 authorization tokens are valid 24h - refresh 1h before expiry
+B2_AUTH_TTL_SECONDS = 23 * 3600
+# Bucket IDs never change for a given bucket name
+BUCKET_ID_TTL_SECONDS = 7 * 24 * 3600
+# HEAD results (existence + size) - only positive results are cached
+HEAD_TTL_SECONDS = 300
+# Presigned URLs are reused while at least this fraction of their lifetime remains
+PRESIGNED_MIN_REMAINING_RATIO = 0.75
+
+
+class StorageMetadataCache:
+    """
+    Expiry-aware cache for storage metadata shared by all B2StorageService instances.
+
+    Sections:
+    - auth: B2 Native API authorization (token, api_url, account_id)
+    - bucket_id: bucket name -> bucket ID
+    - head: object key -> HEAD metadata (ContentLength, ...)
+    - presigned: (operation, object key, expires_in) -> signed URL
+
+    Every hit is a remote call (or a signing operation) avoided.
+    """
+
+    SECTIONS = ('auth', 'bucket_id', 'head', 'presigned')
+
+    def __init__(self, max_entries: int = 5000):
+        self.max_entries = max_entries
+        self._entries: Dict[str, Dict[Any, Tuple[float, Any]]] = {section: {} for section in self.SECTIONS}
+        self._hits: Dict[str, int] = {section: 0 for section in self.SECTIONS}
+        self._misses: Dict[str, int] = {section: 0 for section in self.SECTIONS}
+        self._lock = threading.Lock()
+
+    def get(self, section: str, key: Any) -> Optional[Any]:
+        """Return cached value if not expired (counts hit/miss)"""
+        with self._lock:
+            entry = self._entries[section].get(key)
+            if entry is not None and entry[0] > time.time():
+                self._hits[section] += 1
+                return entry[1]
+
+            if entry is not None:
+                del self._entries[section][key]
+            self._misses[section] += 1
+            return None
+
+    def set(self, section: str, key: Any, value: Any, ttl_seconds: float):
+        """Store value for ttl_seconds"""
+        with self._lock:
+            entries = self._entries[section]
+            if len(entries) >= self.max_entries:
+                # Drop expired entries first, then the oldest inserted ones
+                now = time.time()
+                for stale_key in [k for k, (expires_at, _) in entries.items() if expires_at <= now]:
+                    del entries[stale_key]
+                while len(entries) >= self.max_entries:
+                    del entries[next(iter(entries))]
+            entries[key] = (time.time() + ttl_seconds, value)
+
+    def invalidate(self, section: str, key: Any = None):
+        """Invalidate one key, or a whole section if key is None"""
+        with self._lock:
+            if key is None:
+                self._entries[section].clear()
+            else:
+                self._entries[section].pop(key, None)
+
+    def invalidate_object(self, object_key: str):
+        """Forget everything cached about an object (after upload/delete)"""
+        with self._lock:
+            self._entries['head'].pop(object_key, None)
+            presigned = self._entries['presigned']
+            for key in [k for k in presigned if k[1] == object_key]:
+                del presigned[key]
+
+    def get_stats(self) -> Dict:
+        """
+        Returns:
+            dict: Per-section hits/misses/size and total remote calls avoided
+        """
+        with self._lock:
+            sections = {
+                section: {
+                    'hits': self._hits[section],
+                    'misses': self._misses[section],
+                    'entries': len(self._entries[section])
+                }
+                for section in self.SECTIONS
+            }
+        return {
+            'sections': sections,
+            'remote_calls_avoided': sum(self._hits.values())
+        }
+
+
 class B2StorageService:
     """
     Service for managing files on Cloud Object Storage (Singleton Pattern)
@@ -24,6 +120,7 @@ class B2StorageService:
 
     _client_instance = None
     _storage_type = None  # 'r2' or 'b2'
+    _cache = StorageMetadataCache()  # Shared metadata cache (auth, bucket, HEAD, presigned)
 
     def __init__(self):
         """Initialize storage client using S3-compatible API (R2 priority, B2 fallback)"""
@@ -100,6 +197,8 @@ class B2StorageService:
                     object_key
                 )
 
+            self._cache.invalidate_object(object_key)
+
             # Generate URL based on storage type
             if self.storage_type == 'r2':
                 custom_domain = os.getenv('R2_CUSTOM_DOMAIN', 'https://media.uzeur.com')
@@ -128,6 +227,12 @@ class B2StorageService:
         """
         return await asyncio.to_thread(self._upload_file_blocking, file_path, object_key)
 
+    def upload_file_sync(self, file_path: str, object_key: str) -> Optional[str]:
+        """
+        Upload a file to B2 (bloquant): tâches de maintenance et threads hors event loop
+        """
+        return self._upload_file_blocking(file_path, object_key)
+
     def _upload_fileobj_blocking(self, file_obj: BinaryIO, object_key: str) -> Optional[str]:
         """Blocking file object upload to cloud storage"""
         if not self.client:
@@ -141,6 +246,8 @@ class B2StorageService:
                 object_key
             )
 
+            self._cache.invalidate_object(object_key)
+
             # Generate URL based on storage type
             if self.storage_type == 'r2':
                 custom_domain = os.getenv('R2_CUSTOM_DOMAIN', 'https://media.uzeur.com')
@@ -162,6 +269,62 @@ class B2StorageService:
     async def upload_fileobj(self, file_obj: BinaryIO, object_key: str) -> Optional[str]:
         return await asyncio.to_thread(self._upload_fileobj_blocking, file_obj, object_key)
 
+    def public_url(self, object_key: str) -> str:
+        """Public URL of an object (R2 custom domain, or B2 S3 endpoint)"""
+        if self.storage_type == 'r2':
+            custom_domain = os.getenv('R2_CUSTOM_DOMAIN', 'https://media.uzeur.com')
+            return f"{custom_domain}/{object_key}"
+        return f"{settings.B2_ENDPOINT}/{self.bucket_name}/{object_key}"
+
+    def _put_bytes_blocking(self, data: bytes, object_key: str, content_type: Optional[str] = None) -> Optional[str]:
+        """Blocking single-request upload of an in-memory object"""
+        if not self.client:
+            logger.error(f"❌ [{self.storage_type.upper() if self.storage_type else 'STORAGE'}] Client not initialized")
+            return None
+
+        try:
+            extra = {'ContentType': content_type} if content_type else {}
+            self.client.put_object(Bucket=self.bucket_name, Key=object_key, Body=data, **extra)
+            self._cache.invalidate_object(object_key)
+            logger.info(f"✅ Object uploaded ({len(data)} bytes): {object_key}")
+            return self.public_url(object_key)
+
+        except ClientError as e:
+            logger.error(f"❌ [{self.storage_type.upper()}] Upload failed: {e}")
+            return None
+        except Exception as e:
+            logger.error(f"❌ Unexpected error during upload: {e}")
+            return None
+
+    async def put_bytes(self, data: bytes, object_key: str, content_type: Optional[str] = None) -> Optional[str]:
+        return await asyncio.to_thread(self._put_bytes_blocking, data, object_key, content_type)
+
+    def _create_multipart_blocking(self, object_key: str, content_type: Optional[str] = None) -> str:
+        extra = {'ContentType': content_type} if content_type else {}
+        response = self.client.create_multipart_upload(Bucket=self.bucket_name, Key=object_key, **extra)
+        return response['UploadId']
+
+    def _upload_part_blocking(self, object_key: str, upload_id: str, part_number: int, data: bytes) -> str:
+        response = self.client.upload_part(
+            Bucket=self.bucket_name, Key=object_key, UploadId=upload_id,
+            PartNumber=part_number, Body=data
+        )
+        return response['ETag']
+
+    def _complete_multipart_blocking(self, object_key: str, upload_id: str, parts: List[Tuple[int, str]]) -> str:
+        self.client.complete_multipart_upload(
+            Bucket=self.bucket_name, Key=object_key, UploadId=upload_id,
+            MultipartUpload={'Parts': [{'PartNumber': number, 'ETag': etag} for number, etag in parts]}
+        )
+        self._cache.invalidate_object(object_key)
+        return self.public_url(object_key)
+
+    def _abort_multipart_blocking(self, object_key: str, upload_id: str):
+        try:
+            self.client.abort_multipart_upload(Bucket=self.bucket_name, Key=object_key, UploadId=upload_id)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not abort multipart upload {object_key}: {e}")
+
     def _download_file_blocking(self, object_key: str, destination_path: str) -> bool:
         """Blocking file download from B2"""
         if not self.client:
@@ -198,12 +361,15 @@ class B2StorageService:
         R2: Supports ResponseContentDisposition - forces download
         B2: Does not support ResponseContentDisposition - files open in browser
         """
-        logger.info(f"🔗 [{self.storage_type.upper() if self.storage_type else 'STORAGE'}-DOWNLOAD] get_download_url called with object_key={object_key}, expires_in={expires_in}")
-
         if not self.client:
             logger.error(f"❌ [{self.storage_type.upper() if self.storage_type else 'STORAGE'}-DOWNLOAD] Client not initialized")
             return None
 
+        cache_key = ('get_object', object_key, expires_in)
+        cached_url = self._cache.get('presigned', cache_key)
+        if cached_url:
+            return cached_url
+
         try:
             # Extract filename for Content-Disposition header
             filename = object_key.split('/')[-1]
@@ -222,9 +388,6 @@ class B2StorageService:
             if self.storage_type == 'r2':
                 # RFC 5987 format: attachment; filename*=UTF-8''encoded_name
                 params['ResponseContentDisposition'] = f"attachment; filename*=UTF-8''{encoded_filename}"
-                logger.info(f"🔧 [R2-DOWNLOAD] Using ResponseContentDisposition for forced download (RFC 5987)")
-            else:
-                logger.info(f"🔧 [B2-DOWNLOAD] ResponseContentDisposition not supported - files may open in browser")
 
             url = self.client.generate_presigned_url(
                 'get_object',
@@ -232,8 +395,8 @@ class B2StorageService:
                 ExpiresIn=expires_in
             )
 
-            logger.info(f"✅ [{self.storage_type.upper()}-DOWNLOAD] Presigned URL generated successfully: {url[:100]}...")
-            logger.info(f"🔍 [{self.storage_type.upper()}-DOWNLOAD] URL length: {len(url)}, contains bucket: {self.bucket_name in url}")
+            self._cache.set('presigned', cache_key, url, expires_in * (1 - PRESIGNED_MIN_REMAINING_RATIO))
+            logger.info(f"✅ [{self.storage_type.upper()}-DOWNLOAD] Presigned URL generated for {object_key} (expires_in={expires_in})")
 
             return url
 
@@ -300,6 +463,7 @@ class B2StorageService:
                 Bucket=self.bucket_name,
                 Key=object_key
             )
+            self._cache.invalidate_object(object_key)
             logger.info(f"✅ File deleted from B2: {object_key}")
             return True
 
@@ -310,20 +474,39 @@ class B2StorageService:
             logger.error(f"❌ Unexpected error during delete: {e}")
             return False
 
+    def _head_object(self, object_key: str) -> Optional[Dict]:
+        """
+        HEAD request with metadata cache (positive results only, so a file
+        checked right before its upload finishes is not reported missing later)
+
+        Raises:
+            ClientError: If the object does not exist or is not accessible
+        """
+        cached = self._cache.get('head', object_key)
+        if cached is not None:
+            return cached
+
+        response = self.client.head_object(
+            Bucket=self.bucket_name,
+            Key=object_key
+        )
+        metadata = {
+            'ContentLength': response.get('ContentLength', 0),
+            'ContentType': response.get('ContentType'),
+            'ETag': response.get('ETag')
+        }
+        self._cache.set('head', object_key, metadata, HEAD_TTL_SECONDS)
+        return metadata
+
     def file_exists(self, object_key: str) -> bool:
         """Check if a file exists in B2"""
-        logger.info(f"🔍 [B2-EXISTS] Checking if file exists: bucket={self.bucket_name}, key={object_key}")
-
         if not self.client:
             logger.error("❌ [B2-EXISTS] B2 client not initialized")
             return False
 
         try:
-            response = self.client.head_object(
-                Bucket=self.bucket_name,
-                Key=object_key
-            )
-            logger.info(f"✅ [B2-EXISTS] File exists: {object_key}, size={response.get('ContentLength', 0)} bytes")
+            metadata = self._head_object(object_key)
+            logger.info(f"✅ [B2-EXISTS] File exists: {object_key}, size={metadata['ContentLength']} bytes")
             return True
 
         except ClientError as e:
@@ -340,11 +523,7 @@ class B2StorageService:
             return None
 
         try:
-            response = self.client.head_object(
-                Bucket=self.bucket_name,
-                Key=object_key
-            )
-            return response['ContentLength']
+            return self._head_object(object_key)['ContentLength']
 
         except ClientError as e:
             logger.error(f"❌ Failed to get file size: {e}")
@@ -354,7 +533,11 @@ class B2StorageService:
             return None
 
     def _get_b2_auth_token(self) -> Optional[tuple]:
-        """Authenticate with B2 Native API and get authorization token"""
+        """Authenticate with B2 Native API and get authorization token (cached ~23h)"""
+        cached = self._cache.get('auth', 'b2_account')
+        if cached:
+            return cached
+
         # Clean credentials
         key_id = settings.B2_KEY_ID.split('#')[0] if settings.B2_KEY_ID else None
         app_key = settings.B2_APPLICATION_KEY.split('#')[0] if settings.B2_APPLICATION_KEY else None
@@ -378,14 +561,20 @@ class B2StorageService:
                 return None
 
             data = response.json()
-            return data['authorizationToken'], data['apiUrl'], data['accountId']
+            auth_result = (data['authorizationToken'], data['apiUrl'], data['accountId'])
+            self._cache.set('auth', 'b2_account', auth_result, B2_AUTH_TTL_SECONDS)
+            return auth_result
 
         except Exception as e:
             logger.error(f"❌ B2 Auth exception: {e}")
             return None
 
     def _get_bucket_id(self, auth_token: str, api_url: str, account_id: str) -> Optional[str]:
-        """Get bucket ID from bucket name"""
+        """Get bucket ID from bucket name (cached)"""
+        cached = self._cache.get('bucket_id', self.bucket_name)
+        if cached:
+            return cached
+
         try:
             response = requests.post(
                 f"{api_url}/b2api/v2/b2_list_buckets",
@@ -398,6 +587,8 @@ class B2StorageService:
 
             if response.status_code != 200:
                 logger.error(f"❌ Failed to list buckets: {response.text}")
+                if response.status_code == 401:
+                    self._cache.invalidate('auth')
                 return None
 
             data = response.json()
@@ -407,7 +598,9 @@ class B2StorageService:
                 logger.error(f"❌ Bucket '{self.bucket_name}' not found")
                 return None
 
-            return buckets[0]['bucketId']
+            bucket_id = buckets[0]['bucketId']
+            self._cache.set('bucket_id', self.bucket_name, bucket_id, BUCKET_ID_TTL_SECONDS)
+            return bucket_id
 
         except Exception as e:
             logger.error(f"❌ Get bucket ID exception: {e}")
@@ -464,6 +657,8 @@ class B2StorageService:
 
             if response.status_code != 200:
                 logger.error(f"❌ Failed to get upload URL: {response.text}")
+                if response.status_code == 401:
+                    self._cache.invalidate('auth')
                 return None
 
             data = response.json()
@@ -494,6 +689,11 @@ class B2StorageService:
             return self.get_download_url(object_key, expires_in)
 
         # B2: Use B2 Native API
+        cache_key = ('b2_download_authorization', object_key, expires_in)
+        cached_url = self._cache.get('presigned', cache_key)
+        if cached_url:
+            return cached_url
+
         logger.info(f"🔗 [B2-NATIVE-DOWNLOAD] Getting native download URL for: {object_key}")
 
         # Step 1: Authenticate
@@ -524,6 +724,8 @@ class B2StorageService:
 
             if response.status_code != 200:
                 logger.error(f"❌ [B2-NATIVE-DOWNLOAD] Failed to get download auth: {response.text}")
+                if response.status_code == 401:
+                    self._cache.invalidate('auth')
                 return None
 
             data = response.json()
@@ -533,6 +735,7 @@ class B2StorageService:
             # Format: https://f{bucket_id}.backblazeb2.com/file/{bucket_name}/{object_key}?Authorization={token}
             download_url = f"https://f{bucket_id[:3]}{bucket_id[3:]}.backblazeb2.com/file/{self.bucket_name}/{object_key}?Authorization={download_auth_token}"
 
+            self._cache.set('presigned', cache_key, download_url, expires_in * (1 - PRESIGNED_MIN_REMAINING_RATIO))
             logger.info(f"✅ [B2-NATIVE-DOWNLOAD] Native download URL generated: {download_url[:100]}...")
             return download_url
 
@@ -541,3 +744,117 @@ class B2StorageService:
             import traceback
             logger.error(traceback.format_exc())
             return None
+
+    @classmethod
+    def get_cache_stats(cls) -> Dict:
+        """
+        Get storage metadata cache statistics.
+
+        Returns:
+            dict: Hits/misses per section and remote calls avoided
+        """
+        return cls._cache.get_stats()
+
+
+class StreamingUpload:
+    """
+    Upload of an object of unknown size from a stream, without temp files.
+
+    Chunks are buffered in memory up to part_size. The first full part starts an S3
+    multipart upload and each part is sent while the source keeps streaming (at most
+    one part in flight, so memory stays under two parts). Objects smaller than one
+    part - most images - are sent with a single PUT.
+    """
+
+    MIN_PART_SIZE = 5 * 1024 * 1024  # S3 / R2 minimum for every part but the last
+
+    def __init__(self, storage: 'B2StorageService', object_key: str,
+                 content_type: Optional[str] = None, part_size: int = 8 * 1024 * 1024):
+        self.storage = storage
+        self.object_key = object_key
+        self.content_type = content_type
+        self.part_size = max(part_size, self.MIN_PART_SIZE)
+        self.size = 0
+        self._buffer = bytearray()
+        self._upload_id: Optional[str] = None
+        self._parts: List[Tuple[int, str]] = []
+        self._in_flight: Optional[asyncio.Task] = None
+
+    async def _send_part(self, data: bytes):
+        if self._in_flight:
+            self._parts.append(await self._in_flight)
+        part_number = len(self._parts) + 1
+        self._in_flight = asyncio.create_task(self._upload_part(part_number, data))
+
+    async def _upload_part(self, part_number: int, data: bytes) -> Tuple[int, str]:
+        etag = await asyncio.to_thread(
+            self.storage._upload_part_blocking, self.object_key, self._upload_id, part_number, data
+        )
+        return part_number, etag
+
+    async def write(self, chunk: bytes):
+        self.size += len(chunk)
+        self._buffer += chunk
+        if len(self._buffer) < self.part_size:
+            return
+        if self._upload_id is None:
+            if not self.storage.client:
+                raise RuntimeError("Storage client not initialized")
+            self._upload_id = await asyncio.to_thread(
+                self.storage._create_multipart_blocking, self.object_key, self.content_type
+            )
+        data, self._buffer = bytes(self._buffer), bytearray()
+        await self._send_part(data)
+
+    async def close(self) -> Optional[str]:
+        """Sends the remaining bytes and returns the object URL (None on failure)"""
+        try:
+            if self._upload_id is None:
+                return await self.storage.put_bytes(bytes(self._buffer), self.object_key, self.content_type)
+
+            if self._buffer:
+                await self._send_part(bytes(self._buffer))
+                self._buffer = bytearray()
+            if self._in_flight:
+                self._parts.append(await self._in_flight)
+                self._in_flight = None
+            url = await asyncio.to_thread(
+                self.storage._complete_multipart_blocking, self.object_key, self._upload_id, self._parts
+            )
+            logger.info(f"✅ Multipart upload completed ({len(self._parts)} parts, {self.size} bytes): {self.object_key}")
+            return url
+        except Exception as e:
+            logger.error(f"❌ Streaming upload failed for {self.object_key}: {e}")
+            await self.abort()
+            return None
+
+    async def abort(self):
+        if self._in_flight:
+            try:
+                await self._in_flight
+            except Exception:
+                pass
+            self._in_flight = None
+        if self._upload_id is not None:
+            await asyncio.to_thread(self.storage._abort_multipart_blocking, self.object_key, self._upload_id)
+            self._upload_id = None
+
+
+# Shared storage service instance (singleton)
+_storage_service: Optional[B2StorageService] = None
+
+
+def get_storage_service() -> B2StorageService:
+    """
+    Get the shared storage service instance.
+    Use this instead of B2StorageService() in request/handler hot paths.
+
+    Returns:
+        B2StorageService: Shared instance
+    """
+    global _storage_service
+
+    if _storage_service is None or _storage_service.client is None:
+        _storage_service = B2StorageService()
+
+    return _storage_service
@@ -0,0 +1,184 @@
+"""
+Bibliothèque acheteur - index des achats en mémoire par utilisateur actif
+
+- Source de vérité: projection buyer_purchases (migration 0004, maintenue par trigger)
+- Un acheteur actif est chargé une fois (une requête), puis:
+    owns(acheteur, produit)        -> O(1) en mémoire (page produit, avis, bouton acheter)
+    order_for_product / product_for_order -> vérifications de téléchargement sans JOIN
+    keyset_bound(acheteur, position)      -> borne keyset de la page de bibliothèque
+- Complétion d'une commande dans ce process: record_purchase() met l'index à jour
+  immédiatement; les changements externes (autre process, SQL manuel) sont repris
+  après CACHE_TTL
+- Réponses négatives (produit / commande absents) non gardées: un index chargé depuis
+  plus de MISS_TTL secondes est rechargé avant de répondre « non acheté »
+- LRU borné: seuls les acheteurs récemment actifs restent en mémoire
+"""
+import logging
+import os
+import threading
+import time
+from bisect import insort
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from app.domain.repositories.library_repo import LibraryRepository
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_TTL = float(os.getenv('BUYER_LIBRARY_TTL', '600'))
+DEFAULT_MAX_BUYERS = int(os.getenv('BUYER_LIBRARY_MAX_BUYERS', '5000'))
+# Âge max d'un index pour confirmer une absence (rafales d'affichage d'une même page)
+DEFAULT_MISS_TTL = float(os.getenv('BUYER_LIBRARY_MISS_TTL', '2'))
+
+
+class _PurchaseSet:
+    """Achats d'un acheteur: accès par produit, par commande, et ordre keyset"""
+    __slots__ = ('loaded_at', 'by_product', 'by_order', 'ordered')
+
+    def __init__(self, rows: List[Tuple[datetime, str, str]]):
+        self.loaded_at = time.monotonic()
+        self.by_product: Dict[str, Tuple[datetime, str]] = {}
+        self.by_order: Dict[str, str] = {}
+        # Clés keyset (last_purchased_at, product_id), triées par ordre décroissant
+        self.ordered: List[Tuple[datetime, str]] = []
+        for purchased_at, product_id, order_id in rows:
+            self.by_product[product_id] = (purchased_at, order_id)
+            self.by_order[order_id] = product_id
+            self.ordered.append((purchased_at, product_id))
+
+    def add(self, product_id: str, order_id: str, purchased_at: datetime):
+        previous = self.by_product.get(product_id)
+        if previous is not None:
+            if previous[0] > purchased_at:
+                return
+            self.ordered.remove((previous[0], product_id))
+            self.by_order.pop(previous[1], None)
+        self.by_product[product_id] = (purchased_at, order_id)
+        self.by_order[order_id] = product_id
+        # Liste décroissante: insertion triée sur la clé inversée
+        self.ordered.reverse()
+        insort(self.ordered, (purchased_at, product_id))
+        self.ordered.reverse()
+
+
+class BuyerLibrary:
+    """Cache des achats par acheteur actif (vérifications de possession en O(1))"""
+
+    def __init__(self, repository: Optional[LibraryRepository] = None,
+                 ttl: float = DEFAULT_CACHE_TTL, max_buyers: int = DEFAULT_MAX_BUYERS,
+                 miss_ttl: float = DEFAULT_MISS_TTL):
+        self.repository = repository or LibraryRepository()
+        self.ttl = ttl
+        self.miss_ttl = miss_ttl
+        self.max_buyers = max_buyers
+        self._lock = threading.Lock()
+        self._buyers: 'OrderedDict[int, _PurchaseSet]' = OrderedDict()
+        self._stats = {'hits': 0, 'loads': 0, 'misses': 0, 'recorded': 0}
+
+    def _get(self, buyer_user_id: int, max_age: Optional[float] = None) -> _PurchaseSet:
+        max_age = self.ttl if max_age is None else max_age
+        now = time.monotonic()
+        with self._lock:
+            purchases = self._buyers.get(buyer_user_id)
+            if purchases is not None and now - purchases.loaded_at < max_age:
+                self._buyers.move_to_end(buyer_user_id)
+                self._stats['hits'] += 1
+                return purchases
+
+        # Chargement hors verrou (requête DB)
+        purchases = _PurchaseSet(self.repository.get_purchase_index(buyer_user_id))
+
+        with self._lock:
+            self._buyers[buyer_user_id] = purchases
+            self._buyers.move_to_end(buyer_user_id)
+            self._stats['loads'] += 1
+            while len(self._buyers) > self.max_buyers:
+                self._buyers.popitem(last=False)
+        return purchases
+
+    def _lookup(self, buyer_user_id: int, index: str, key: str):
+        """Entrée de by_product / by_order; une absence est confirmée sur un index récent"""
+        entry = getattr(self._get(buyer_user_id), index).get(key)
+        if entry is None:
+            purchases = self._get(buyer_user_id, max_age=self.miss_ttl)
+            entry = getattr(purchases, index).get(key)
+            with self._lock:
+                self._stats['misses'] += 1
+        return entry
+
+    def owns(self, buyer_user_id: int, product_id: str) -> bool:
+        return self._lookup(buyer_user_id, 'by_product', product_id) is not None
+
+    def order_for_product(self, buyer_user_id: int, product_id: str) -> Optional[str]:
+        """Dernière commande complétée de l'acheteur pour ce produit"""
+        entry = self._lookup(buyer_user_id, 'by_product', product_id)
+        return entry[1] if entry else None
+
+    def product_for_order(self, buyer_user_id: int, order_id: str) -> Optional[str]:
+        """Produit d'une commande de l'acheteur (dernière commande par produit uniquement)"""
+        return self._lookup(buyer_user_id, 'by_order', order_id)
+
+    def count(self, buyer_user_id: int) -> int:
+        return len(self._get(buyer_user_id).ordered)
+
+    def keyset_bound(self, buyer_user_id: int, position: int) -> Optional[Tuple[datetime, str]]:
+        """Clé keyset de l'élément précédant `position` (None pour la première page)"""
+        if position <= 0:
+            return None
+        ordered = self._get(buyer_user_id).ordered
+        if position > len(ordered):
+            return ordered[-1] if ordered else None
+        return ordered[position - 1]
+
+    def record_purchase(self, buyer_user_id: int, product_id: str, order_id: str,
+                        purchased_at: Optional[datetime] = None):
+        """Commande complétée: l'acheteur, s'il est en cache, voit le produit immédiatement"""
+        with self._lock:
+            purchases = self._buyers.get(buyer_user_id)
+            if purchases is not None:
+                purchases.add(product_id, order_id, purchased_at or datetime.now())
+            self._stats['recorded'] += 1
+
+    def invalidate(self, buyer_user_id: int):
+        with self._lock:
+            self._buyers.pop(buyer_user_id, None)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {'buyers_cached': len(self._buyers), **self._stats}
+
+
+# Global library instance
+_buyer_library: Optional[BuyerLibrary] = None
+
+
+def get_buyer_library() -> BuyerLibrary:
+    """Get global buyer library (partagée par le bot et l'API)"""
+    global _buyer_library
+
+    if _buyer_library is None:
+        _buyer_library = BuyerLibrary()
+
+    return _buyer_library
+
+
+class LibraryWindow:
+    """
+    Séquence « bibliothèque complète » pour CarouselHelper, adossée à une seule page keyset:
+    len() = nombre total d'achats, [index] valide pour les index de la page chargée
+    """
+
+    def __init__(self, items: list, offset: int, total: int):
+        self.items = items
+        self.offset = offset
+        self.total = total
+
+    def __len__(self) -> int:
+        return self.total
+
+    def __bool__(self) -> bool:
+        return bool(self.items)
+
+    def __getitem__(self, index: int):
+        return self.items[index - self.offset]
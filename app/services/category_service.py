@@ -0,0 +1,199 @@
+"""
+Catalogue des catégories en mémoire (liste + nombre de produits actifs)
+
+- Chargé une fois depuis categories, puis servi sans requête:
+    /api/categories (ETag / Cache-Control), menu Acheter, navigation du carousel,
+    validation de catégorie à l'import
+- Tenu à jour par les événements d'écriture produit (ProductRepository, après commit):
+    product_added / product_removed / product_status_changed
+- Réconciliation périodique depuis products (une requête GROUP BY, seules les lignes
+  divergentes sont réécrites) au démarrage du serveur puis toutes les
+  CATEGORY_RECONCILE_INTERVAL secondes: remplace le recomptage manuel
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RECONCILE_INTERVAL = float(os.getenv('CATEGORY_RECONCILE_INTERVAL', '900'))
+
+# Liste publique: cache navigateur court, revalidation par ETag ensuite
+CATEGORIES_CACHE_CONTROL = 'public, max-age=60, stale-while-revalidate=300'
+
+
+class CategoryCatalogue:
+    """Liste des catégories et compteurs de produits actifs, servis depuis la mémoire"""
+
+    def __init__(self, reconcile_interval: float = DEFAULT_RECONCILE_INTERVAL):
+        self.reconcile_interval = reconcile_interval
+        self._lock = threading.Lock()
+        self._counts: Dict[str, int] = {}
+        self._loaded = False
+        self._names: List[str] = []
+        self._popular: List[str] = []
+        self._etag = ''
+        self._task: Optional[asyncio.Task] = None
+        self._stats = {'loads': 0, 'events': 0, 'reconciliations': 0,
+                       'rows_corrected': 0, 'last_reconciled_at': None}
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+    # LECTURES (mémoire)
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self.reload()
+
+    def names(self) -> List[str]:
+        """Catégories par ordre alphabétique"""
+        self._ensure_loaded()
+        return self._names
+
+    def by_popularity(self) -> List[str]:
+        """Catégories par nombre de produits actifs décroissant"""
+        self._ensure_loaded()
+        return self._popular
+
+    def most_popular(self) -> Optional[str]:
+        popular = self.by_popularity()
+        return popular[0] if popular else None
+
+    def exists(self, name: str) -> bool:
+        self._ensure_loaded()
+        return name in self._counts
+
+    def count(self, name: str) -> int:
+        self._ensure_loaded()
+        return self._counts.get(name, 0)
+
+    def etag(self) -> str:
+        """ETag de la liste publique (stable tant que les noms ne changent pas)"""
+        self._ensure_loaded()
+        return self._etag
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+    # ÉVÉNEMENTS D'ÉCRITURE PRODUIT
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+    def _apply(self, category: Optional[str], delta: int):
+        if not category or not self._loaded:
+            return
+        with self._lock:
+            self._counts[category] = max(0, self._counts.get(category, 0) + delta)
+            self._stats['events'] += 1
+            self._rebuild()
+
+    def product_added(self, category: Optional[str], status: str = 'active'):
+        if status == 'active':
+            self._apply(category, +1)
+        elif category and self._loaded and category not in self._counts:
+            self._apply(category, 0)
+
+    def product_removed(self, category: Optional[str], status: str = 'active'):
+        if status == 'active':
+            self._apply(category, -1)
+
+    def product_status_changed(self, category: Optional[str], old_status: Optional[str], new_status: str):
+        if old_status == new_status:
+            return
+        if new_status == 'active':
+            self._apply(category, +1)
+        elif old_status == 'active':
+            self._apply(category, -1)
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+    # CHARGEMENT / RÉCONCILIATION
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+    def _rebuild(self):
+        """Recalcule les vues triées et l'ETag (appelé sous verrou)"""
+        names = sorted(self._counts)
+        if names != self._names:
+            digest = hashlib.sha1('\n'.join(names).encode('utf-8')).hexdigest()[:16]
+            self._etag = f'W/"categories-{digest}"'
+        self._names = names
+        self._popular = sorted(names, key=lambda name: -self._counts[name])
+
+    def reload(self):
+        """Recharge liste et compteurs depuis la table categories"""
+        from app.domain.repositories.product_repo import ProductRepository
+
+        rows = ProductRepository().get_category_counts()
+        with self._lock:
+            self._counts = {name: count or 0 for name, count in rows}
+            self._loaded = True
+            self._stats['loads'] += 1
+            self._rebuild()
+
+    def reconcile(self) -> int:
+        """Recompte les produits actifs par catégorie et corrige la table, puis recharge"""
+        from app.domain.repositories.product_repo import ProductRepository
+
+        corrected = ProductRepository().recalculate_category_counts()
+        self.reload()
+        self._stats['reconciliations'] += 1
+        self._stats['rows_corrected'] += corrected or 0
+        self._stats['last_reconciled_at'] = time.time()
+        if corrected:
+            logger.info(f"🗂️ Category counts reconciled ({corrected} rows corrected)")
+        return corrected or 0
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.reconcile)
+            except Exception as e:
+                logger.error(f"❌ Category reconciliation failed: {e}")
+            await asyncio.sleep(self.reconcile_interval)
+
+    def start(self):
+        """Réconciliation immédiate puis périodique, dans la boucle courante"""
+        if self._task and not self._task.done():
+            return
+        self._task = asyncio.create_task(self._run(), name="category-reconcile")
+        logger.info(f"🗂️ Category catalogue started (reconcile every {self.reconcile_interval:g}s)")
+
+    async def stop(self):
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {'categories': len(self._counts), 'etag': self._etag, **self._stats}
+
+
+# Global catalogue instance
+_catalogue: Optional[CategoryCatalogue] = None
+
+
+def get_category_catalogue() -> CategoryCatalogue:
+    """Catalogue global (chargé à la première lecture, réconcilié si démarré par le serveur)"""
+    global _catalogue
+
+    if _catalogue is None:
+        _catalogue = CategoryCatalogue()
+
+    return _catalogue
+
+
+def init_category_catalogue(**kwargs) -> CategoryCatalogue:
+    """Crée le catalogue global et démarre la réconciliation (à appeler dans la boucle du serveur)"""
+    global _catalogue
+    _catalogue = CategoryCatalogue(**kwargs)
+    _catalogue.start()
+    return _catalogue
+
+
+async def shutdown_category_catalogue():
+    if _catalogue:
+        await _catalogue.stop()
@@ -0,0 +1,431 @@
+"""
+Ingestion des images de couverture importées (CDN Gumroad -> R2/B2)
+
+- Flux direct: l'image est lue en streaming depuis le CDN et envoyée au fil de l'eau
+  (StreamingUpload: PUT unique, ou multipart au-delà d'une part), sans fichier temporaire
+- Miniature générée depuis les octets en mémoire, dans un thread (ImageUtils.thumbnail_bytes)
+- Plusieurs covers traitées en parallèle: concurrence bornée + budget d'octets global
+  (taille annoncée réservée avant le téléchargement)
+- Cache HTTP disque (http_cache): une cover déjà vue est revalidée (304) au lieu d'être
+  retéléchargée, une URL partagée par plusieurs produits n'est lue qu'une fois
+- Durées par étape (download, upload, thumbnail, thumb_upload, total) dans get_stats()
+  et prometheus_lines(): où passe le temps d'un import
+- prefetch(): l'upload séquentiel du bot lance les covers des prochains produits
+  pendant que le vendeur envoie ses fichiers; collect() récupère le résultat, discard()
+  annule et supprime les objets envoyés. Un préchargement jamais récupéré (import
+  abandonné) est supprimé après COVER_PREFETCH_TTL
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import httpx
+
+from app.core.image_utils import ImageUtils
+from app.services.b2_storage_service import StreamingUpload, get_storage_service
+from app.services.http_cache import get_http_cache
+
+logger = logging.getLogger(__name__)
+
+COVER_INGEST_CONCURRENCY = int(os.getenv('COVER_INGEST_CONCURRENCY', '8'))
+COVER_INGEST_BUDGET_MB = float(os.getenv('COVER_INGEST_BUDGET_MB', '64'))
+COVER_MAX_MB = float(os.getenv('COVER_MAX_MB', '20'))
+# Préchargement non récupéré au-delà (secondes): annulé et supprimé du stockage
+COVER_PREFETCH_TTL = float(os.getenv('COVER_PREFETCH_TTL', '3600'))
+
+# Réservation initiale quand le CDN n'annonce pas de Content-Length (agrandie au fil du flux)
+DEFAULT_COVER_RESERVATION = 2 * 1024 * 1024
+STREAM_CHUNK_SIZE = 256 * 1024
+
+STAGES = ('download', 'upload', 'thumbnail', 'thumb_upload', 'total')
+STAGE_BUCKETS_SECONDS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, float('inf'))
+
+# Headers anti-detection avec Referer Gumroad (CRITIQUE pour contourner protections)
+COVER_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'image/avif,image/webp,image/apng,image/svg+xml,image/*,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Accept-Encoding': 'gzip, deflate',
+    'DNT': '1',
+    'Connection': 'keep-alive',
+    'Sec-Fetch-Dest': 'image',
+    'Sec-Fetch-Mode': 'no-cors',
+    'Sec-Fetch-Site': 'same-site',
+    'sec-ch-ua': '"Not_A Brand";v="8", "Chromium";v="120", "Google Chrome";v="120"',
+    'sec-ch-ua-mobile': '?0',
+    'sec-ch-ua-platform': '"Windows"',
+}
+
+
+class CoverIngestError(Exception):
+    """Téléchargement ou upload d'une cover impossible"""
+    pass
+
+
+class ByteBudget:
+    """
+    Octets de covers en mémoire, tous téléchargements confondus
+
+    Une réservation attend que le budget la permette; une réservation seule passe
+    toujours (une image plus grosse que le budget n'est pas bloquée indéfiniment).
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.used = 0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self, size: int) -> int:
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.used == 0 or self.used + size <= self.limit)
+            self.used += size
+        return size
+
+    async def grow(self, size: int) -> int:
+        """
+        Agrandit la réservation d'un téléchargement en cours, sans attendre: il tient déjà
+        une part du budget, attendre pourrait bloquer tous les téléchargements entre eux.
+        Un dépassement fait attendre les réservations suivantes (acquire).
+        """
+        async with self._condition:
+            self.used += size
+        return size
+
+    async def release(self, size: int):
+        async with self._condition:
+            self.used -= size
+            self._condition.notify_all()
+
+
+class _StageTimer:
+    __slots__ = ('count', 'total_seconds', 'max_seconds', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.buckets = [0] * len(STAGE_BUCKETS_SECONDS)
+
+    def observe(self, seconds: float):
+        self.count += 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        for index, bound in enumerate(STAGE_BUCKETS_SECONDS):
+            if seconds <= bound:
+                self.buckets[index] += 1
+                break
+
+
+class CoverIngestor:
+    """Pipeline CDN -> stockage objet pour les covers importées"""
+
+    def __init__(self, concurrency: int = COVER_INGEST_CONCURRENCY,
+                 budget_bytes: int = int(COVER_INGEST_BUDGET_MB * 1024 * 1024),
+                 max_cover_bytes: int = int(COVER_MAX_MB * 1024 * 1024)):
+        self.concurrency = concurrency
+        self.budget_bytes = budget_bytes
+        self.max_cover_bytes = max_cover_bytes
+        # Créés au premier appel, dans la boucle qui les utilise
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._budget: Optional[ByteBudget] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        # product_id -> (tâche, vendeur, instant du préchargement)
+        self._pending: Dict[str, Tuple[asyncio.Task, int, float]] = {}
+        self._timers = {stage: _StageTimer() for stage in STAGES}
+        self._stats = {'ingested': 0, 'failed': 0, 'cache_hits': 0, 'bytes': 0}
+
+    def _ensure_started(self):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            self._budget = ByteBudget(self.budget_bytes)
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(timeout=30.0, follow_redirects=True, headers=COVER_HEADERS)
+
+    def _observe(self, stage: str, started: float) -> float:
+        elapsed = time.perf_counter() - started
+        self._timers[stage].observe(elapsed)
+        return elapsed
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+    # INGESTION
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+    async def ingest(self, image_url: str, seller_id: int, product_id: str,
+                     referer_url: Optional[str] = None) -> str:
+        """
+        Cover -> products/{seller_id}/{product_id}/cover.jpg + thumb.jpg (+ cache local)
+
+        Returns:
+            URL de la cover sur R2/B2
+
+        Raises:
+            CoverIngestError: téléchargement ou upload impossible
+        """
+        self._ensure_started()
+        async with self._semaphore:
+            started = time.perf_counter()
+            try:
+                cover_url = await self._ingest(image_url, seller_id, product_id, referer_url)
+            except Exception:
+                self._stats['failed'] += 1
+                raise
+            elapsed = self._observe('total', started)
+            self._stats['ingested'] += 1
+            logger.info(f"[COVERS] {product_id} ingested in {elapsed * 1000:.0f} ms")
+            return cover_url
+
+    async def _ingest(self, image_url: str, seller_id: int, product_id: str,
+                      referer_url: Optional[str]) -> str:
+        storage = get_storage_service()
+        cover_key = f"products/{seller_id}/{product_id}/cover.jpg"
+        thumb_key = f"products/{seller_id}/{product_id}/thumb.jpg"
+
+        download_started = time.perf_counter()
+        cached = await self._from_cache(image_url, referer_url)
+        if cached:
+            # Déjà vue (fraîche ou 304): pas de transfert depuis le CDN
+            body, content_type = cached
+            self._stats['cache_hits'] += 1
+            self._observe('download', download_started)
+            reserved = await self._budget.acquire(len(body))
+            try:
+                upload_started = time.perf_counter()
+                cover_url = await storage.put_bytes(body, cover_key, content_type)
+                self._observe('upload', upload_started)
+                return await self._finish(storage, product_id, cover_key, thumb_key, cover_url, body, content_type)
+            finally:
+                await self._budget.release(reserved)
+
+        reserved = 0
+        upload = None
+        try:
+            async with self._client.stream('GET', image_url, headers={'Referer': referer_url or 'https://gumroad.com/'}) as resp:
+                if resp.status_code != 200:
+                    raise CoverIngestError(f"Failed to download image: HTTP {resp.status_code}")
+                content_type = resp.headers.get('content-type')
+                announced = int(resp.headers.get('content-length') or 0)
+                if announced > self.max_cover_bytes:
+                    raise CoverIngestError(f"Cover too large: {announced} bytes")
+                reserved = await self._budget.acquire(min(announced or DEFAULT_COVER_RESERVATION, self.budget_bytes))
+
+                # Streaming: chaque chunk part vers le stockage pendant que le suivant arrive;
+                # les octets gardés (miniature, cache) restent couverts par la réservation
+                upload = StreamingUpload(storage, cover_key, content_type)
+                body = bytearray()
+                async for chunk in resp.aiter_bytes(STREAM_CHUNK_SIZE):
+                    if len(body) + len(chunk) > self.max_cover_bytes:
+                        raise CoverIngestError(f"Cover larger than {self.max_cover_bytes} bytes")
+                    body += chunk
+                    if len(body) > reserved:
+                        reserved += await self._budget.grow(
+                            min(max(len(body) - reserved, DEFAULT_COVER_RESERVATION),
+                                self.max_cover_bytes - reserved)
+                        )
+                    await upload.write(chunk)
+                self._observe('download', download_started)
+
+                upload_started = time.perf_counter()
+                cover_url = await upload.close()
+                upload = None
+                self._observe('upload', upload_started)
+
+                cache = get_http_cache()
+                if cache and 'no-store' not in resp.headers.get('cache-control', ''):
+                    await asyncio.to_thread(cache.store, image_url, resp.headers, body)
+
+            return await self._finish(storage, product_id, cover_key, thumb_key, cover_url, body, content_type)
+
+        except httpx.HTTPError as e:
+            raise CoverIngestError(f"Cover download error: {e}") from e
+        finally:
+            if upload is not None:
+                await upload.abort()
+            if reserved:
+                await self._budget.release(reserved)
+
+    async def _from_cache(self, image_url: str, referer_url: Optional[str]):
+        """(octets, content-type) depuis le cache HTTP: entrée fraîche, ou revalidée par un 304"""
+        cache = get_http_cache()
+        meta = await asyncio.to_thread(cache.lookup, image_url) if cache else None
+        if not meta:
+            return None
+
+        if time.time() - meta['stored_at'] < cache.ttl:
+            body = await asyncio.to_thread(cache.read_body, image_url)
+        else:
+            headers = {'Referer': referer_url or 'https://gumroad.com/'}
+            if meta['headers'].get('etag'):
+                headers['If-None-Match'] = meta['headers']['etag']
+            if meta['headers'].get('last-modified'):
+                headers['If-Modified-Since'] = meta['headers']['last-modified']
+            try:
+                # Corps non lu si l'image a changé: le téléchargement complet se fait en streaming
+                async with self._client.stream('GET', image_url, headers=headers) as resp:
+                    if resp.status_code != 304:
+                        return None
+                    validators = resp.headers
+            except httpx.HTTPError:
+                return None
+            body = await asyncio.to_thread(cache.revalidated, image_url, meta, validators)
+
+        return (body, meta['headers'].get('content-type')) if body is not None else None
+
+    async def _finish(self, storage, product_id: str, cover_key: str, thumb_key: str,
+                      cover_url: Optional[str], body: bytes, content_type: Optional[str]) -> str:
+        """Miniature depuis les octets en mémoire (thread) + upload + cache local"""
+        if not cover_url:
+            raise CoverIngestError(f"Cover upload failed: {cover_key}")
+        self._stats['bytes'] += len(body)
+
+        thumb_started = time.perf_counter()
+        try:
+            thumb = await asyncio.to_thread(ImageUtils.thumbnail_bytes, body)
+            thumb_type = 'image/jpeg'
+        except Exception as e:
+            # Repli: l'image d'origine sert de miniature (comportement historique de l'import)
+            logger.warning(f"[COVERS] Thumbnail generation failed for {product_id}, using original: {e}")
+            thumb, thumb_type = body, content_type
+        self._observe('thumbnail', thumb_started)
+
+        thumb_upload_started = time.perf_counter()
+        await storage.put_bytes(thumb, thumb_key, thumb_type)
+        self._observe('thumb_upload', thumb_upload_started)
+
+        await asyncio.to_thread(_write_local_thumb, product_id, thumb)
+        return cover_url
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+    # PRÉCHARGEMENT (upload séquentiel du bot)
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+    def prefetch(self, image_url: str, seller_id: int, product_id: str, referer_url: Optional[str] = None):
+        """Lance l'ingestion en tâche de fond; résultat récupéré par collect(product_id)"""
+        self._discard_expired()
+        if product_id in self._pending:
+            return
+        task = asyncio.ensure_future(self.ingest(image_url, seller_id, product_id, referer_url))
+        self._pending[product_id] = (task, seller_id, time.monotonic())
+
+    def _discard_expired(self):
+        """Préchargements jamais récupérés (import abandonné sans reset d'état)"""
+        expired_before = time.monotonic() - COVER_PREFETCH_TTL
+        for product_id, (_, seller_id, queued_at) in list(self._pending.items()):
+            if queued_at < expired_before:
+                logger.info(f"[COVERS] Prefetched cover {product_id} never collected - discarding")
+                asyncio.ensure_future(self.discard(product_id, seller_id))
+
+    async def collect(self, product_id: str) -> Optional[str]:
+        """
+        URL de la cover préchargée (attend la fin si besoin)
+
+        Returns:
+            URL, ou None si aucune ingestion n'a été lancée pour ce produit
+
+        Raises:
+            CoverIngestError: l'ingestion a échoué
+        """
+        entry = self._pending.pop(product_id, None)
+        if entry is None:
+            return None
+        return await entry[0]
+
+    async def discard(self, product_id: str, seller_id: int):
+        """Produit non importé: ingestion annulée, objets déjà envoyés supprimés"""
+        entry = self._pending.pop(product_id, None)
+        if entry is None:
+            return
+        task = entry[0]
+        task.cancel()
+        try:
+            await task
+        except (asyncio.CancelledError, Exception):
+            pass
+        # Annulée en cours de route, la cover peut déjà être envoyée sans la miniature
+        storage = get_storage_service()
+        for name in ('cover.jpg', 'thumb.jpg'):
+            await asyncio.to_thread(storage.delete_file, f"products/{seller_id}/{product_id}/{name}")
+
+    async def discard_many(self, product_ids: Iterable[str], seller_id: int):
+        """discard() des produits encore préchargés (les covers déjà récupérées sont gardées)"""
+        for product_id in product_ids:
+            await self.discard(product_id, seller_id)
+
+    async def close(self):
+        for task, _, _ in self._pending.values():
+            task.cancel()
+        self._pending.clear()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+    # MÉTRIQUES
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+    def get_stats(self) -> Dict:
+        return {
+            **self._stats,
+            'pending': len(self._pending),
+            'budget_used_mb': round(self._budget.used / (1024 * 1024), 1) if self._budget else 0.0,
+            'stages_ms': {
+                stage: {
+                    'count': timer.count,
+                    'avg': round(timer.total_seconds * 1000 / timer.count, 1) if timer.count else None,
+                    'max': round(timer.max_seconds * 1000, 1),
+                }
+                for stage, timer in self._timers.items()
+            },
+        }
+
+    def prometheus_lines(self) -> List[str]:
+        """Histogramme des durées par étape au format d'exposition Prometheus"""
+        lines = [
+            '# HELP cover_ingest_stage_seconds Imported cover ingestion duration per stage',
+            '# TYPE cover_ingest_stage_seconds histogram'
+        ]
+        for stage, timer in self._timers.items():
+            cumulative = 0
+            for bound, bucket_count in zip(STAGE_BUCKETS_SECONDS, timer.buckets):
+                cumulative += bucket_count
+                le = '+Inf' if bound == float('inf') else f"{bound:g}"
+                lines.append(f'cover_ingest_stage_seconds_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+            lines.append(f'cover_ingest_stage_seconds_sum{{stage="{stage}"}} {timer.total_seconds:.3f}')
+            lines.append(f'cover_ingest_stage_seconds_count{{stage="{stage}"}} {timer.count}')
+        lines.append('# TYPE cover_ingest_failures_total counter')
+        lines.append(f"cover_ingest_failures_total {self._stats['failed']}")
+        return lines
+
+
+def _write_local_thumb(product_id: str, thumb: bytes):
+    """Cache local comme l'upload classique: buffer/python-bot/uploads/temp/images/{product_id}/thumb.jpg"""
+    try:
+        cache_dir = os.path.join('buffer', 'python-bot', 'uploads', 'temp', 'images', product_id)
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(os.path.join(cache_dir, 'thumb.jpg'), 'wb') as f:
+            f.write(thumb)
+    except OSError as e:
+        # Cache non critique - juste log warning
+        logger.warning(f"[COVERS] Failed to create local cache (non-critical): {e}")
+
+
+# Global ingestor instance
+_cover_ingestor: Optional[CoverIngestor] = None
+
+
+def get_cover_ingestor() -> CoverIngestor:
+    """Ingestor partagé (bot, mini-app): budget d'octets et concurrence globaux au process"""
+    global _cover_ingestor
+
+    if _cover_ingestor is None:
+        _cover_ingestor = CoverIngestor()
+
+    return _cover_ingestor
+
+
+async def shutdown_cover_ingestor():
+    global _cover_ingestor
+    if _cover_ingestor:
+        await _cover_ingestor.close()
+        _cover_ingestor = None
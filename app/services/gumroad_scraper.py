@@ -1,14 +1,14 @@
 import httpx
 import json
 import asyncio
-import tempfile
-import os
-import random
 import re
-from typing import List, Dict, Optional
+from typing import Awaitable, Callable, List, Dict, Optional, Tuple
 from bs4 import BeautifulSoup
 import logging
 
+from app.services.host_throttle import HostThrottle
+from app.services.http_cache import get_http_cache
+
 logger = logging.getLogger(__name__)
 
 
@@ -17,184 +17,247 @@ class GumroadScraperException(Exception):
     pass
 
 
-async def scrape_gumroad_profile(profile_url: str) -> List[Dict]:
+# Headers anti-detection (moderne, simule Chrome 120 - ULTRA COMPLET)
+# NOTE: Accept-Encoding sans 'br' pour forcer texte clair (brotli peut poser probleme si lib pas installee)
+GUMROAD_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
+    'Accept-Language': 'en-US,en;q=0.9,fr-FR;q=0.8,fr;q=0.7',
+    'Accept-Encoding': 'gzip, deflate',  # Pas 'br' pour eviter probleme decompression Brotli
+    'Referer': 'https://www.google.com/',
+    'Alt-Used': 'gumroad.com',
+    'DNT': '1',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1',
+    'Sec-Fetch-Dest': 'document',
+    'Sec-Fetch-Mode': 'navigate',
+    'Sec-Fetch-Site': 'none',
+    'Sec-Fetch-User': '?1',
+    'Cache-Control': 'max-age=0',
+    'sec-ch-ua': '"Not_A Brand";v="8", "Chromium";v="120", "Google Chrome";v="120"',
+    'sec-ch-ua-mobile': '?0',
+    'sec-ch-ua-platform': '"Windows"',
+}
+
+
+async def _fetch_page(client: httpx.AsyncClient, url: str, throttle: HostThrottle, **kwargs) -> httpx.Response:
+    """
+    GET via le cache HTTP disque puis le limiteur par hote
+
+    Entree fraiche: aucune requete. Sinon requete conditionnelle (304 = corps du cache);
+    le statut de la reponse ajuste le delai de l'hote.
+    """
+    async def send(conditional_headers: Dict[str, str]) -> httpx.Response:
+        try:
+            async with throttle.slot(url):
+                resp = await client.get(url, headers=conditional_headers or None, **kwargs)
+        except httpx.TransportError:
+            throttle.report(url, None)
+            raise
+        throttle.report(url, resp.status_code, resp.headers.get('retry-after'))
+        return resp
+
+    cache = get_http_cache()
+    if cache is None:
+        return await send({})
+    return await cache.fetch(url, send)
+
+
+async def scrape_gumroad_profile(profile_url: str, throttle: Optional[HostThrottle] = None,
+                                 on_page: Optional[Callable[[int, Dict], Awaitable[None]]] = None) -> List[Dict]:
     """
     Scrape profil Gumroad public via extraction __NEXT_DATA__ (Next.js)
-    PUIS deep scraping parallele pour descriptions completes
+    PUIS deep scraping des pages produit (concurrence bornée par hôte) pour descriptions completes
 
-    Strategie:
-    1. Extraction JSON __NEXT_DATA__ depuis page profil (liste produits)
-    2. Deep scraping parallele de chaque page produit pour description complete
-    3. Fusion des donnees
+    Les imports depuis le bot passent par le moteur de jobs (app/services/import_jobs.py),
+    qui enchaine les memes etapes avec persistance et progression.
 
     Args:
         profile_url: https://username.gumroad.com
+        throttle: limiteur partage (sinon un limiteur dedie a cet appel)
+        on_page: coroutine (index, produit enrichi) appelee apres chaque page produit
 
     Returns:
         Liste produits avec metadonnees completes + descriptions enrichies
 
+    Raises:
+        GumroadScraperException: Si fetch echoue avec message specifique
+    """
+    throttle = throttle or HostThrottle()
+    async with httpx.AsyncClient(timeout=30.0, follow_redirects=True, headers=GUMROAD_HEADERS) as client:
+        products, needs_enrichment = await fetch_profile_listing(client, profile_url, throttle)
+        if needs_enrichment:
+            logger.info(f"[GUMROAD] Starting deep scraping for {len(products)} products...")
+            products = await enrich_products_parallel(client, products, GUMROAD_HEADERS, throttle=throttle, on_page=on_page)
+        return products
+
+
+async def fetch_profile_listing(client: httpx.AsyncClient, profile_url: str,
+                                throttle: HostThrottle) -> Tuple[List[Dict], bool]:
+    """
+    Liste des produits depuis la page profil (sans les pages produit)
+
+    Strategie:
+    1. Extraction JSON __NEXT_DATA__ depuis page profil (liste produits)
+    2. JSON dans les autres scripts
+    3. OpenGraph (page produit unique)
+
+    Returns:
+        (produits, pages produit a recuperer pour les descriptions completes)
+
     Raises:
         GumroadScraperException: Si fetch echoue avec message specifique
     """
     products = []
 
-    # Headers anti-detection (moderne, simule Chrome 120 - ULTRA COMPLET)
-    # NOTE: Accept-Encoding sans 'br' pour forcer texte clair (brotli peut poser probleme si lib pas installee)
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
-        'Accept-Language': 'en-US,en;q=0.9,fr-FR;q=0.8,fr;q=0.7',
-        'Accept-Encoding': 'gzip, deflate',  # Pas 'br' pour eviter probleme decompression Brotli
-        'Referer': 'https://www.google.com/',
-        'Alt-Used': 'gumroad.com',
-        'DNT': '1',
-        'Connection': 'keep-alive',
-        'Upgrade-Insecure-Requests': '1',
-        'Sec-Fetch-Dest': 'document',
-        'Sec-Fetch-Mode': 'navigate',
-        'Sec-Fetch-Site': 'none',
-        'Sec-Fetch-User': '?1',
-        'Cache-Control': 'max-age=0',
-        'sec-ch-ua': '"Not_A Brand";v="8", "Chromium";v="120", "Google Chrome";v="120"',
-        'sec-ch-ua-mobile': '?0',
-        'sec-ch-ua-platform': '"Windows"',
-    }
+    try:
+        logger.info(f"[GUMROAD] Fetching profile: {profile_url}")
+        resp = await _fetch_page(client, profile_url, throttle)
+
+        # Gestion erreurs specifiques par status code
+        if resp.status_code == 404:
+            logger.error(f"[GUMROAD] Profile not found: {profile_url}")
+            raise GumroadScraperException("Ce profil Gumroad n'existe pas.")
+        elif resp.status_code == 403:
+            logger.error(f"[GUMROAD] Access forbidden (bot detection or private): {profile_url}")
+            raise GumroadScraperException("Acces refuse par Gumroad (Protection Bot ou profil prive).")
+        elif resp.status_code == 429:
+            logger.error(f"[GUMROAD] Rate limited: {profile_url}")
+            raise GumroadScraperException("Gumroad est surcharge. Reessayez dans 5 minutes.")
+        elif resp.status_code >= 500:
+            logger.error(f"[GUMROAD] Server error: HTTP {resp.status_code}")
+            raise GumroadScraperException(f"Erreur serveur chez Gumroad (HTTP {resp.status_code}).")
+        elif resp.status_code != 200:
+            logger.error(f"[GUMROAD] Unexpected HTTP {resp.status_code}")
+            raise GumroadScraperException(f"Erreur inattendue: HTTP {resp.status_code}")
+
+        html_content = resp.text
+        logger.info(f"[GUMROAD] Profile page fetched ({len(html_content)} chars)")
+
+        # Strategie 1: __NEXT_DATA__ (Next.js) - LA MINE D'OR, decode sans construire de DOM
+        products = parse_profile_listing(html_content, profile_url)
+        if products:
+            logger.info(f"[GUMROAD] Found {len(products)} products in __NEXT_DATA__")
+            # Pages produit (descriptions completes) recuperees par l'appelant
+            return products, True
+
+        # Strategies 2 et 3: DOM BeautifulSoup complet, dans un thread (ne bloque pas le bot)
+        logger.warning("[GUMROAD] __NEXT_DATA__ not usable, falling back to full HTML parsing...")
+        products, needs_enrichment = await asyncio.to_thread(_parse_profile_fallback, html_content, profile_url)
+        if products:
+            return products, needs_enrichment
+
+        # Echec complet - Sauvegarder HTML pour debug
+        logger.error("[GUMROAD] No products found via any extraction method")
+
+        # Sauvegarder HTML pour inspection manuelle (debug)
+        try:
+            debug_file = f"/tmp/gumroad_debug_{profile_url.split('/')[-1]}.html"
+            with open(debug_file, 'w', encoding='utf-8') as f:
+                f.write(html_content)
+            logger.info(f"[GUMROAD] HTML saved to {debug_file} for manual inspection")
+        except Exception as e:
+            logger.debug(f"[GUMROAD] Could not save debug HTML: {e}")
+
+        raise GumroadScraperException("Aucun produit trouve. Verifiez que le profil est public et contient des produits.")
+
+    except httpx.TimeoutException:
+        logger.error(f"[GUMROAD] Timeout fetching {profile_url}")
+        raise GumroadScraperException("Delai d'attente depasse - Gumroad est lent ou inaccessible.")
+    except GumroadScraperException:
+        raise  # Re-raise exceptions personnalisees
+    except Exception as e:
+        logger.error(f"[GUMROAD] Unexpected error: {e}")
+        raise GumroadScraperException(f"Erreur inattendue lors du scraping: {str(e)}")
+
+
+def extract_script_json(html: str, marker: str):
+    """
+    Decode le JSON d'une balise <script> reperee par un marqueur de sa balise ouvrante,
+    sans construire de DOM (une recherche de chaine + json.loads)
+
+    Next.js et les composants React de Gumroad echappent '<' en \\u003c dans le JSON
+    embarque: le premier '</script' apres la balise ouvrante ferme bien ce script.
+
+    Args:
+        html: page HTML brute
+        marker: texte present dans la balise ouvrante (ex: '__NEXT_DATA__', 'ProfileProductPage')
+
+    Returns:
+        Objet JSON decode, ou None si balise absente / JSON invalide
+    """
+    search_from = 0
+    while True:
+        pos = html.find(marker, search_from)
+        if pos == -1:
+            return None
+        search_from = pos + len(marker)
+
+        # Le marqueur doit etre dans une balise <script ...> (pas dans du JS: window.__NEXT_DATA__)
+        tag_start = html.rfind('<', 0, pos)
+        if tag_start == -1 or html[tag_start:tag_start + 7].lower() != '<script' or html.find('>', tag_start, pos) != -1:
+            continue
+        tag_end = html.find('>', pos)
+        body_end = html.find('</script', tag_end)
+        if tag_end == -1 or body_end == -1:
+            return None
 
-    async with httpx.AsyncClient(timeout=30.0, follow_redirects=True, headers=headers) as client:
         try:
-            logger.info(f"[GUMROAD] Fetching profile: {profile_url}")
-            resp = await client.get(profile_url)
-
-            # Gestion erreurs specifiques par status code
-            if resp.status_code == 404:
-                logger.error(f"[GUMROAD] Profile not found: {profile_url}")
-                raise GumroadScraperException("Ce profil Gumroad n'existe pas.")
-            elif resp.status_code == 403:
-                logger.error(f"[GUMROAD] Access forbidden (bot detection or private): {profile_url}")
-                raise GumroadScraperException("Acces refuse par Gumroad (Protection Bot ou profil prive).")
-            elif resp.status_code == 429:
-                logger.error(f"[GUMROAD] Rate limited: {profile_url}")
-                raise GumroadScraperException("Gumroad est surcharge. Reessayez dans 5 minutes.")
-            elif resp.status_code >= 500:
-                logger.error(f"[GUMROAD] Server error: HTTP {resp.status_code}")
-                raise GumroadScraperException(f"Erreur serveur chez Gumroad (HTTP {resp.status_code}).")
-            elif resp.status_code != 200:
-                logger.error(f"[GUMROAD] Unexpected HTTP {resp.status_code}")
-                raise GumroadScraperException(f"Erreur inattendue: HTTP {resp.status_code}")
-
-            html_content = resp.text
-            soup = BeautifulSoup(html_content, 'lxml')
-
-            # DEBUG: Logger preview HTML et chercher __NEXT_DATA__
-            logger.info(f"[GUMROAD] HTML length: {len(html_content)} chars")
-            logger.info(f"[GUMROAD] HTML preview (first 1000 chars): {html_content[:1000]}")
-
-            # Logger aussi les headers de reponse pour detecter redirections
-            logger.info(f"[GUMROAD] Response headers: {dict(resp.headers)}")
-
-            # Chercher si __NEXT_DATA__ existe QUELQUE PART dans le HTML
-            if '__NEXT_DATA__' in html_content:
-                logger.info("[GUMROAD] __NEXT_DATA__ found in HTML content")
-            else:
-                logger.warning("[GUMROAD] __NEXT_DATA__ NOT found in HTML content at all")
-
-            # Lister tous les script tags pour debug
-            all_scripts = soup.find_all('script')
-            logger.info(f"[GUMROAD] Found {len(all_scripts)} total script tags")
-            for idx, script in enumerate(all_scripts[:10]):  # Limit to 10 pour pas spammer
-                script_id = script.get('id', 'no-id')
-                script_type = script.get('type', 'no-type')
-                script_len = len(script.string) if script.string else 0
-                logger.debug(f"[GUMROAD] Script {idx}: id='{script_id}', type='{script_type}', length={script_len}")
-
-            # Strategie 1: __NEXT_DATA__ (Next.js) - LA MINE D'OR
-            logger.info("[GUMROAD] Attempting __NEXT_DATA__ extraction (Next.js)")
-            script_tag = soup.find('script', id='__NEXT_DATA__', type='application/json')
-
-            # Essayer aussi SANS le type attribute (parfois Gumroad ne l'inclut pas)
-            if not script_tag:
-                logger.info("[GUMROAD] Trying without type='application/json' attribute...")
-                script_tag = soup.find('script', id='__NEXT_DATA__')
-
-            if script_tag:
-                try:
-                    data = json.loads(script_tag.string)
-                    logger.info("[GUMROAD] Successfully parsed __NEXT_DATA__ JSON")
-
-                    # Navigation securisee dans structure JSON
-                    # Chemin: props -> pageProps -> products
-                    products_raw = data.get('props', {}).get('pageProps', {}).get('products', [])
-
-                    if not products_raw:
-                        logger.warning("[GUMROAD] __NEXT_DATA__ found but no products in expected path")
-                    else:
-                        logger.info(f"[GUMROAD] Found {len(products_raw)} products in __NEXT_DATA__")
-
-                        # Parser liste produits (donnees basiques)
-                        for p in products_raw:
-                            product = parse_nextjs_product(p, profile_url)
-                            if product:
-                                products.append(product)
-
-                        # Deep scraping parallele pour descriptions completes
-                        if products:
-                            logger.info(f"[GUMROAD] Starting parallel deep scraping for {len(products)} products...")
-                            products = await enrich_products_parallel(client, products, headers)
-
-                        return products
-
-                except json.JSONDecodeError as e:
-                    logger.error(f"[GUMROAD] Failed to parse __NEXT_DATA__ JSON: {e}")
-
-            # Strategie 2: Fallback - Chercher JSON dans TOUS les scripts
-            logger.warning("[GUMROAD] __NEXT_DATA__ not found, trying JSON extraction from all scripts...")
-            products = extract_products_from_scripts(soup, profile_url)
-            if products:
-                logger.info(f"[GUMROAD] ✅ Found {len(products)} products via script JSON extraction")
-                logger.info(f"[GUMROAD] 🔍 Products BEFORE enrichment - checking URLs:")
-                for idx, p in enumerate(products):
-                    logger.info(f"[GUMROAD]   Product {idx+1}: '{p.get('title')}' - URL: {p.get('gumroad_url')} - Desc length: {len(p.get('description', ''))}")
-
-                # Deep scraping parallele pour descriptions completes
-                logger.info(f"[GUMROAD] 🚀 STARTING parallel deep scraping for {len(products)} products...")
-                products = await enrich_products_parallel(client, products, headers)
-                logger.info(f"[GUMROAD] ✅ FINISHED parallel deep scraping")
-
-                logger.info(f"[GUMROAD] 🔍 Products AFTER enrichment - checking descriptions:")
-                for idx, p in enumerate(products):
-                    logger.info(f"[GUMROAD]   Product {idx+1}: '{p.get('title')}' - Desc length: {len(p.get('description', ''))}")
-
-                return products
-
-            # Strategie 3: Fallback OpenGraph (page produit unique)
-            logger.warning("[GUMROAD] Script JSON extraction failed, trying OpenGraph fallback...")
-            og_product = extract_opengraph_product(soup, profile_url)
-            if og_product:
-                logger.info("[GUMROAD] Found product via OpenGraph meta tags")
-                return [og_product]
-
-            # Echec complet - Sauvegarder HTML pour debug
-            logger.error("[GUMROAD] No products found via any extraction method")
-
-            # Sauvegarder HTML pour inspection manuelle (debug)
-            try:
-                debug_file = f"/tmp/gumroad_debug_{profile_url.split('/')[-1]}.html"
-                with open(debug_file, 'w', encoding='utf-8') as f:
-                    f.write(html_content)
-                logger.info(f"[GUMROAD] HTML saved to {debug_file} for manual inspection")
-            except Exception as e:
-                logger.debug(f"[GUMROAD] Could not save debug HTML: {e}")
-
-            raise GumroadScraperException("Aucun produit trouve. Verifiez que le profil est public et contient des produits.")
+            return json.loads(html[tag_end + 1:body_end])
+        except ValueError as e:
+            logger.error(f"[GUMROAD] Failed to parse <script> JSON ({marker}): {e}")
+            return None
 
-        except httpx.TimeoutException:
-            logger.error(f"[GUMROAD] Timeout fetching {profile_url}")
-            raise GumroadScraperException("Delai d'attente depasse - Gumroad est lent ou inaccessible.")
-        except GumroadScraperException:
-            raise  # Re-raise exceptions personnalisees
-        except Exception as e:
-            logger.error(f"[GUMROAD] Unexpected error: {e}")
-            raise GumroadScraperException(f"Erreur inattendue lors du scraping: {str(e)}")
+
+def parse_profile_listing(html: str, profile_url: str) -> Optional[List[Dict]]:
+    """
+    Chemin rapide page profil: produits de __NEXT_DATA__ (props -> pageProps -> products)
+
+    Returns:
+        Liste produits normalises, ou None si __NEXT_DATA__ absent / sans produits
+    """
+    data = extract_script_json(html, '__NEXT_DATA__')
+    if not isinstance(data, dict):
+        logger.warning("[GUMROAD] __NEXT_DATA__ NOT found in HTML content")
+        return None
+
+    products_raw = data.get('props', {}).get('pageProps', {}).get('products', [])
+    if not products_raw:
+        logger.warning("[GUMROAD] __NEXT_DATA__ found but no products in expected path")
+        return None
+
+    products = []
+    for p in products_raw:
+        product = parse_nextjs_product(p, profile_url)
+        if product:
+            products.append(product)
+    return products or None
+
+
+def _parse_profile_fallback(html: str, profile_url: str) -> Tuple[List[Dict], bool]:
+    """
+    Strategies 2 (JSON dans tous les scripts) et 3 (OpenGraph) sur le DOM complet
+
+    Synchrone et couteux: appele via asyncio.to_thread, seulement si __NEXT_DATA__ echoue
+    """
+    soup = BeautifulSoup(html, 'lxml')
+
+    # Strategie 2: Chercher JSON dans TOUS les scripts
+    products = extract_products_from_scripts(soup, profile_url)
+    if products:
+        logger.info(f"[GUMROAD] ✅ Found {len(products)} products via script JSON extraction")
+        for idx, p in enumerate(products):
+            logger.info(f"[GUMROAD]   Product {idx+1}: '{p.get('title')}' - URL: {p.get('gumroad_url')} - Desc length: {len(p.get('description', ''))}")
+        return products, True
+
+    # Strategie 3: OpenGraph (page produit unique)
+    logger.warning("[GUMROAD] Script JSON extraction failed, trying OpenGraph fallback...")
+    og_product = extract_opengraph_product(soup, profile_url)
+    if og_product:
+        logger.info("[GUMROAD] Found product via OpenGraph meta tags")
+        return [og_product], False
+
+    return [], False
 
 
 def parse_nextjs_product(product_data: dict, profile_url: str) -> Optional[Dict]:
@@ -209,10 +272,9 @@ def parse_nextjs_product(product_data: dict, profile_url: str) -> Optional[Dict]
         Dict normalise ou None si invalide
     """
     try:
-        # DEBUG: Logger le JSON COMPLET du produit pour debug (identifier champs prix/description)
-        logger.info(f"[GUMROAD] ===== PRODUCT JSON COMPLET =====")
-        logger.info(f"[GUMROAD] {json.dumps(product_data, indent=2)}")
-        logger.info(f"[GUMROAD] ===== FIN PRODUCT JSON =====")
+        # DEBUG: JSON complet du produit (identifier champs prix/description), json.dumps seulement si actif
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"[GUMROAD] Product JSON: {json.dumps(product_data, indent=2)}")
 
         # Extraire champs Next.js structure
         title = product_data.get('name') or product_data.get('title', 'Sans titre')
@@ -402,79 +464,85 @@ def _extract_gumroad_stats(product_data: dict) -> dict:
     }
 
 
-async def enrich_products_parallel(client: httpx.AsyncClient, products: List[Dict], headers: dict) -> List[Dict]:
+async def enrich_products_parallel(client: httpx.AsyncClient, products: List[Dict], headers: dict,
+                                   throttle: Optional[HostThrottle] = None,
+                                   on_page: Optional[Callable[[int, Dict], Awaitable[None]]] = None) -> List[Dict]:
     """
-    Deep scraping parallele pour enrichir produits avec descriptions completes
+    Deep scraping des pages produit pour enrichir produits avec descriptions completes
 
-    Utilise asyncio.gather pour fetch TOUTES les pages produits en parallele
+    Toutes les pages sont demandees d'un coup mais passent par le limiteur par hote:
+    au plus throttle.max_concurrency requetes simultanees vers Gumroad, espacement
+    allonge automatiquement sur 429 / 5xx.
 
     Args:
         client: httpx client (reutilise pour performance)
         products: Liste produits avec donnees basiques
         headers: HTTP headers
+        throttle: limiteur par hote (partage entre jobs d'import)
+        on_page: coroutine (index, produit enrichi) appelee apres chaque page (progression)
 
     Returns:
         Liste produits enrichis avec descriptions completes
     """
-    logger.info(f"[GUMROAD] 🌟🌟🌟 ENTERING enrich_products_parallel() with {len(products)} products")
-    logger.info(f"[GUMROAD] Launching {len(products)} parallel requests for full descriptions...")
+    throttle = throttle or HostThrottle()
+    logger.info(f"[GUMROAD] Deep scraping {len(products)} product pages (max {throttle.max_concurrency} concurrent per host)...")
 
-    # Creer taches paralleles
-    tasks = []
-    for product in products:
+    async def enrich(index: int, product: Dict) -> Dict:
         product_url = product.get('gumroad_url')
         product_title = product.get('title', 'Unknown')
-        if product_url:
-            logger.debug(f"[GUMROAD] Queuing deep scrape for '{product_title}': {product_url}")
-            tasks.append(fetch_full_description(client, product_url, headers))
-        else:
+        if not product_url:
             logger.warning(f"[GUMROAD] No URL for product '{product_title}', skipping deep scrape")
-            tasks.append(asyncio.sleep(0))  # Placeholder pour garder meme index
+            return product
 
-    # Executer TOUTES les requetes en parallele
-    logger.info(f"[GUMROAD] Executing {len(tasks)} parallel requests...")
-    full_descriptions = await asyncio.gather(*tasks, return_exceptions=True)
-    logger.info(f"[GUMROAD] Parallel requests completed")
+        try:
+            result = await fetch_full_description(client, product_url, headers, throttle=throttle)
+        except Exception as e:
+            logger.warning(f"[GUMROAD] Failed to fetch description for '{product_title}': {e}")
+            result = None
 
-    # Fusionner descriptions et stats avec produits
-    enriched_products = []
-    for idx, product in enumerate(products):
-        result = full_descriptions[idx]
-        product_title = product.get('title', 'Unknown')
+        _merge_product_page(product, result)
+        if on_page:
+            await on_page(index, product)
+        return product
 
-        if isinstance(result, Exception):
-            logger.warning(f"[GUMROAD] Failed to fetch description for '{product_title}': {result}")
-            product['full_description'] = product.get('description', '')
-        elif isinstance(result, dict):
-            # Nouveau format: description + stats depuis page individuelle
-            desc = result.get('description', '')
-            stats = result.get('stats')
-            if desc:
-                product['full_description'] = desc
-                product['description'] = clean_html_for_telegram(desc)
-                logger.info(f"[GUMROAD] Product '{product_title}' - Enriched with full description ({len(desc)} chars)")
-            # Merger stats si extraites (valeurs non-nulles uniquement)
-            if stats:
-                for key in ('rating', 'reviews_count', 'sales_count'):
-                    if stats.get(key):
-                        product[key] = stats[key]
-                logger.info(f"[GUMROAD] Product '{product_title}' - Stats merged: {stats}")
-        elif result:
-            # Ancien format: string seulement (fallbacks HTML/OG/meta)
-            product['full_description'] = result
-            product['description'] = clean_html_for_telegram(result)
-            logger.info(f"[GUMROAD] Product '{product_title}' - Enriched with fallback description ({len(result)} chars)")
-        else:
-            product['full_description'] = product.get('description', '')
-            logger.warning(f"[GUMROAD] Product '{product_title}' - No full description found, using short ({len(product.get('description', ''))} chars)")
-
-        enriched_products.append(product)
+    enriched_products = await asyncio.gather(*(enrich(index, product) for index, product in enumerate(products)))
 
     logger.info(f"[GUMROAD] Successfully enriched {len(enriched_products)} products")
-    return enriched_products
-
-
-async def fetch_full_description(client: httpx.AsyncClient, product_url: str, headers: dict) -> str:
+    return list(enriched_products)
+
+
+def _merge_product_page(product: Dict, result) -> Dict:
+    """Fusionne description et stats d'une page produit dans le produit"""
+    product_title = product.get('title', 'Unknown')
+
+    if isinstance(result, dict):
+        # Nouveau format: description + stats depuis page individuelle
+        desc = result.get('description', '')
+        stats = result.get('stats')
+        if desc:
+            product['full_description'] = desc
+            product['description'] = clean_html_for_telegram(desc)
+            logger.info(f"[GUMROAD] Product '{product_title}' - Enriched with full description ({len(desc)} chars)")
+        # Merger stats si extraites (valeurs non-nulles uniquement)
+        if stats:
+            for key in ('rating', 'reviews_count', 'sales_count'):
+                if stats.get(key):
+                    product[key] = stats[key]
+            logger.info(f"[GUMROAD] Product '{product_title}' - Stats merged: {stats}")
+    elif result:
+        # Ancien format: string seulement (fallbacks HTML/OG/meta)
+        product['full_description'] = result
+        product['description'] = clean_html_for_telegram(result)
+        logger.info(f"[GUMROAD] Product '{product_title}' - Enriched with fallback description ({len(result)} chars)")
+    else:
+        product['full_description'] = product.get('description', '')
+        logger.warning(f"[GUMROAD] Product '{product_title}' - No full description found, using short ({len(product.get('description', ''))} chars)")
+
+    return product
+
+
+async def fetch_full_description(client: httpx.AsyncClient, product_url: str, headers: dict,
+                                 throttle: Optional[HostThrottle] = None) -> str:
     """
     Fetch description complete depuis page produit individuelle avec retry logic
 
@@ -482,128 +550,96 @@ async def fetch_full_description(client: httpx.AsyncClient, product_url: str, he
         client: httpx client
         product_url: URL du produit
         headers: HTTP headers
+        throttle: limiteur par hote (backoff adaptatif sur 429 / 5xx / timeout)
 
     Returns:
         Description HTML complete
     """
-    # Retry logic pour gerer rate limiting et timeouts
+    throttle = throttle or HostThrottle()
+    # Retry logic: l'attente entre tentatives est portee par le limiteur (delai de l'hote)
     max_retries = 3
-    soup = None
+    html_content = None
 
     for attempt in range(max_retries):
         try:
-            # Jitter pour eviter detection pattern (delai aleatoire 0.5-2s)
-            await asyncio.sleep(random.uniform(0.5, 2.0))
-
             logger.info(f"[GUMROAD] Fetching full description from: {product_url} (attempt {attempt + 1}/{max_retries})")
-            resp = await client.get(product_url, timeout=20.0)  # Augmente timeout a 20s
+            resp = await _fetch_page(client, product_url, throttle, timeout=20.0)
 
             if resp.status_code == 200:
-                soup = BeautifulSoup(resp.text, 'lxml')
+                html_content = resp.text
                 break  # Succes, sortir de la boucle retry
-            elif resp.status_code == 429:
-                # Rate limited - exponential backoff
-                wait_time = 2 ** attempt
-                logger.warning(f"[GUMROAD] Rate limited (429), waiting {wait_time}s before retry")
-                await asyncio.sleep(wait_time)
+            elif resp.status_code == 429 or resp.status_code >= 500:
+                logger.warning(f"[GUMROAD] HTTP {resp.status_code} for {product_url}, retrying after host backoff")
             else:
                 logger.error(f"[GUMROAD] HTTP {resp.status_code} for product page: {product_url}")
-                if attempt < max_retries - 1:
-                    await asyncio.sleep(2)
-                else:
-                    return ""
+                return ""
 
-        except asyncio.TimeoutError:
+        except httpx.TimeoutException:
             logger.warning(f"[GUMROAD] Timeout fetching {product_url}, retry {attempt + 1}/{max_retries}")
-            if attempt < max_retries - 1:
-                await asyncio.sleep(2)
-            else:
-                return ""
         except Exception as e:
             logger.error(f"[GUMROAD] Error fetching {product_url}: {e}")
-            if attempt < max_retries - 1:
-                await asyncio.sleep(2)
-            else:
-                return ""
 
-    if not soup:
+    if not html_content:
         logger.error(f"[GUMROAD] Failed to fetch page after {max_retries} attempts: {product_url}")
         return ""
 
-    # Chercher __NEXT_DATA__ dans page produit
-    try:
-        script_tag = soup.find('script', id='__NEXT_DATA__', type='application/json')
-
-        if script_tag:
-            try:
-                data = json.loads(script_tag.string)
-
-                # Dans page produit, structure est: props.pageProps.product (singulier)
-                product_data = data.get('props', {}).get('pageProps', {}).get('product', {})
-
-                # Description HTML complete
-                description_html = (
-                    product_data.get('description_html') or
-                    product_data.get('description') or
-                    ""
-                )
-
-                if description_html:
-                    logger.info(f"[GUMROAD] Found description in __NEXT_DATA__ ({len(description_html)} chars) for {product_url}")
-                    stats = _extract_gumroad_stats(product_data)
-                    logger.info(f"[GUMROAD] Stats from individual page: {stats}")
-                    return {'description': description_html, 'stats': stats}
-                else:
-                    logger.warning(f"[GUMROAD] __NEXT_DATA__ found but no description_html/description fields for {product_url}")
-            except json.JSONDecodeError as e:
-                logger.error(f"[GUMROAD] Failed to parse __NEXT_DATA__ for {product_url}: {e}")
-        else:
-            logger.warning(f"[GUMROAD] No __NEXT_DATA__ found, trying regex extraction from HTML...")
+    # Chemin rapide: JSON embarque (__NEXT_DATA__ / composant React), sans DOM
+    result = parse_product_page(html_content, product_url)
+    if result:
+        return result
 
-            # NOUVEAU: Chercher description dans React component JSON (pour pages ?layout=profile)
-            try:
-                # Chercher le script React component ProfileProductPage
-                react_script = soup.find('script', {'data-component-name': 'ProfileProductPage', 'type': 'application/json'})
+    # Fallbacks regex / DOM complet dans un thread (ne bloque pas la boucle asyncio)
+    return await asyncio.to_thread(_parse_product_page_fallback, html_content, product_url)
 
-                if react_script:
-                    logger.info(f"[GUMROAD] Found React component script tag for {product_url}")
-                    if react_script.string:
-                        logger.info(f"[GUMROAD] React script has content ({len(react_script.string)} chars)")
-                        try:
-                            react_data = json.loads(react_script.string)
-                            logger.info(f"[GUMROAD] Successfully parsed React JSON")
-
-                            product_data = react_data.get('product', {})
-                            logger.info(f"[GUMROAD] product_data keys: {list(product_data.keys())}")
-
-                            desc_html = product_data.get('description_html', '')
-                            if desc_html:
-                                logger.info(f"[GUMROAD] SUCCESS - Found description_html in React component ({len(desc_html)} chars) for {product_url}")
-                                logger.info(f"[GUMROAD] Description preview: {desc_html[:200]}...")
-                                stats = _extract_gumroad_stats(product_data)
-                                logger.info(f"[GUMROAD] Stats from React component: {stats}")
-                                return {'description': desc_html, 'stats': stats}
-                            else:
-                                logger.warning(f"[GUMROAD] React component found but description_html is empty")
-                        except json.JSONDecodeError as e:
-                            logger.warning(f"[GUMROAD] Failed to parse React component JSON: {e}")
-                    else:
-                        logger.warning(f"[GUMROAD] React script tag found but has no content")
-                else:
-                    logger.warning(f"[GUMROAD] No React component script tag found for {product_url}")
 
-                # Fallback: Regex search si React component pas trouvé
-                html_content = str(soup)
-                desc_match = re.search(r'"description_html"\s*:\s*"([^"]*(?:\\.[^"]*)*)"', html_content)
-                if desc_match:
-                    desc_json = desc_match.group(1)
-                    # Decoder echappements
-                    desc_html = desc_json.replace('\\u003c', '<').replace('\\u003e', '>').replace('\\u003cb\u003e', '<b>').replace('\\u003c/b\u003e', '</b>').replace('\\n', '\n').replace('\\"', '"').replace('\\/', '/')
-                    logger.info(f"[GUMROAD] Found description_html via regex fallback ({len(desc_html)} chars) for {product_url}")
-                    return desc_html
+def parse_product_page(html: str, product_url: str) -> Optional[Dict]:
+    """
+    Chemin rapide page produit: description HTML + stats depuis le JSON embarque
+
+    1. __NEXT_DATA__: props -> pageProps -> product (singulier)
+    2. Composant React ProfileProductPage (pages ?layout=profile): product
+
+    Returns:
+        {'description': html, 'stats': {...}} ou None si aucun JSON exploitable
+    """
+    data = extract_script_json(html, '__NEXT_DATA__')
+    if isinstance(data, dict):
+        product_data = data.get('props', {}).get('pageProps', {}).get('product', {})
+        description_html = product_data.get('description_html') or product_data.get('description') or ""
+        if description_html:
+            logger.info(f"[GUMROAD] Found description in __NEXT_DATA__ ({len(description_html)} chars) for {product_url}")
+            return {'description': description_html, 'stats': _extract_gumroad_stats(product_data)}
+        logger.warning(f"[GUMROAD] __NEXT_DATA__ found but no description_html/description fields for {product_url}")
+
+    react_data = extract_script_json(html, 'ProfileProductPage')
+    if isinstance(react_data, dict):
+        product_data = react_data.get('product', {})
+        desc_html = product_data.get('description_html', '')
+        if desc_html:
+            logger.info(f"[GUMROAD] Found description_html in React component ({len(desc_html)} chars) for {product_url}")
+            return {'description': desc_html, 'stats': _extract_gumroad_stats(product_data)}
+        logger.warning(f"[GUMROAD] React component found but description_html is empty for {product_url}")
+
+    return None
+
 
-            except Exception as regex_error:
-                logger.warning(f"[GUMROAD] React component extraction failed: {regex_error}")
+def _parse_product_page_fallback(html_content: str, product_url: str) -> str:
+    """
+    Fallbacks page produit quand le JSON embarque est absent: regex puis DOM BeautifulSoup
+
+    Synchrone et couteux: appele via asyncio.to_thread
+    """
+    try:
+        # Regex sur le HTML brut (avant de construire le DOM)
+        desc_match = re.search(r'"description_html"\s*:\s*"([^"]*(?:\\.[^"]*)*)"', html_content)
+        if desc_match:
+            desc_json = desc_match.group(1)
+            # Decoder echappements
+            desc_html = desc_json.replace('\\u003c', '<').replace('\\u003e', '>').replace('\\u003cb\u003e', '<b>').replace('\\u003c/b\u003e', '</b>').replace('\\n', '\n').replace('\\"', '"').replace('\\/', '/')
+            logger.info(f"[GUMROAD] Found description_html via regex fallback ({len(desc_html)} chars) for {product_url}")
+            return desc_html
+
+        soup = BeautifulSoup(html_content, 'lxml')
 
         # Fallback 1: Chercher dans HTML avec regex ameliore
         desc_elem = None
@@ -662,7 +698,7 @@ async def fetch_full_description(client: httpx.AsyncClient, product_url: str, he
         return ""
 
     except Exception as e:
-        logger.error(f"[GUMROAD] Unexpected error fetching product description: {e}")
+        logger.error(f"[GUMROAD] Unexpected error parsing product description: {e}")
         import traceback
         logger.error(f"[GUMROAD] Traceback: {traceback.format_exc()}")
         return ""
@@ -872,119 +908,35 @@ async def download_cover_image(image_url: str, product_id: str, seller_id: int =
     Telecharger image cover vers B2/R2 ET creer cache local
 
     IMPORTANT: Cette fonction doit reproduire EXACTEMENT le flux d'upload classique:
-    1. Download image depuis Gumroad
+    1. Download image depuis Gumroad (cache HTTP disque: dedupe par URL, 304 si deja vue)
     2. Upload vers R2/B2
     3. Creer cache local (buffer/python-bot/uploads/temp/images/{product_id}/thumb.jpg)
 
+    Les etapes sont executees par le pipeline d'ingestion (app/services/cover_ingest.py):
+    streaming CDN -> stockage sans fichier temporaire, miniature generee en memoire,
+    concurrence et budget d'octets partages avec les autres covers en cours.
+
     Args:
         image_url: URL image Gumroad
         product_id: ID produit genere
-        seller_id: ID vendeur (optionnel, pour cache local)
+        seller_id: ID vendeur (structure products/{seller_id}/{product_id}/)
         referer_url: URL de la page produit Gumroad (pour contourner protections Referer)
 
     Returns:
-        URL B2/R2 de l'image uploadee
+        URL B2/R2 de l'image uploadee (None sans seller_id)
 
     Raises:
         Exception: Si download ou upload echoue
     """
-    from app.services.b2_storage_service import B2StorageService
-
-    # Headers anti-detection avec Referer Gumroad (CRITIQUE pour contourner protections)
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-        'Accept': 'image/avif,image/webp,image/apng,image/svg+xml,image/*,*/*;q=0.8',
-        'Accept-Language': 'en-US,en;q=0.9',
-        'Accept-Encoding': 'gzip, deflate',
-        'Referer': referer_url if referer_url else 'https://gumroad.com/',
-        'DNT': '1',
-        'Connection': 'keep-alive',
-        'Sec-Fetch-Dest': 'image',
-        'Sec-Fetch-Mode': 'no-cors',
-        'Sec-Fetch-Site': 'same-site',
-        'sec-ch-ua': '"Not_A Brand";v="8", "Chromium";v="120", "Google Chrome";v="120"',
-        'sec-ch-ua-mobile': '?0',
-        'sec-ch-ua-platform': '"Windows"',
-    }
+    from app.services.cover_ingest import get_cover_ingestor
 
-    async with httpx.AsyncClient(timeout=30.0, headers=headers) as client:
-        try:
-            logger.info(f"[GUMROAD] Downloading cover image: {image_url}")
-            resp = await client.get(image_url)
-
-            if resp.status_code != 200:
-                raise Exception(f"Failed to download image: HTTP {resp.status_code}")
-
-            # Detecter extension
-            ext = 'jpg'
-            content_type = resp.headers.get('content-type', '')
-            if 'png' in content_type:
-                ext = 'png'
-            elif 'webp' in content_type:
-                ext = 'webp'
-            elif 'gif' in content_type:
-                ext = 'gif'
-            else:
-                # Tenter depuis URL
-                url_ext = image_url.split('.')[-1].split('?')[0].lower()
-                if url_ext in ['jpg', 'jpeg', 'png', 'webp', 'gif']:
-                    ext = url_ext
-
-            # Sauvegarder temporairement avec tempfile
-            with tempfile.NamedTemporaryFile(
-                delete=False,
-                suffix=f".{ext}",
-                prefix=f"gumroad_cover_{product_id}_"
-            ) as temp_file:
-                temp_file.write(resp.content)
-                temp_path = temp_file.name
-
-            try:
-                # Upload vers B2/R2
-                b2 = B2StorageService()
-
-                # Structure: products/{seller_id}/{product_id}/cover.jpg
-                if not seller_id:
-                    logger.error(f"[GUMROAD] seller_id requis pour upload cover, product_id={product_id}")
-                    return None
-
-                cover_key = f"products/{seller_id}/{product_id}/cover.jpg"
-                thumb_key = f"products/{seller_id}/{product_id}/thumb.jpg"
-
-                # Upload cover
-                cover_url = await b2.upload_file(temp_path, cover_key)
-                logger.info(f"[GUMROAD] Cover image uploaded to R2: {cover_url}")
-
-                # Upload thumbnail (meme fichier pour import Gumroad)
-                thumb_url = await b2.upload_file(temp_path, thumb_key)
-                logger.info(f"[GUMROAD] Thumbnail uploaded to R2: {thumb_url}")
-
-                # NOUVEAU: Creer cache local (comme upload classique)
-                # Structure: buffer/python-bot/uploads/temp/images/{product_id}/thumb.jpg
-                try:
-                    cache_dir = os.path.join('buffer', 'python-bot', 'uploads', 'temp', 'images', product_id)
-                    os.makedirs(cache_dir, exist_ok=True)
-
-                    # Copier vers cache local (toujours thumb.jpg pour coherence)
-                    cache_path = os.path.join(cache_dir, 'thumb.jpg')
-
-                    # Si extension n'est pas jpg, convertir ou copier direct
-                    import shutil
-                    shutil.copy2(temp_path, cache_path)
-
-                    logger.info(f"[GUMROAD] Cover image cached locally: {cache_path}")
-
-                except Exception as cache_error:
-                    # Cache non critique - juste log warning
-                    logger.warning(f"[GUMROAD] Failed to create local cache (non-critical): {cache_error}")
-
-                return cover_url
-
-            finally:
-                # Cleanup temp file
-                if os.path.exists(temp_path):
-                    os.remove(temp_path)
+    if not seller_id:
+        logger.error(f"[GUMROAD] seller_id requis pour upload cover, product_id={product_id}")
+        return None
 
-        except Exception as e:
-            logger.error(f"[GUMROAD] Cover image download error: {e}")
-            raise
+    try:
+        logger.info(f"[GUMROAD] Ingesting cover image: {image_url}")
+        return await get_cover_ingestor().ingest(image_url, seller_id, product_id, referer_url=referer_url)
+    except Exception as e:
+        logger.error(f"[GUMROAD] Cover image download error: {e}")
+        raise
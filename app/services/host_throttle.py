@@ -0,0 +1,102 @@
+"""
+Limitation des requêtes sortantes par hôte (scraping Gumroad)
+
+- Concurrence bornée par hôte: une boutique de 200 produits ne lance plus 200 requêtes
+  simultanées vers gumroad.com
+- Espacement adaptatif entre deux requêtes vers le même hôte:
+    429 / 5xx -> délai doublé (Retry-After respecté), hôte mis en pause
+    succès    -> délai réduit progressivement jusqu'au minimum
+- Une instance par boucle asyncio (les sémaphores y sont liés): une par moteur d'import,
+  ou une par appel pour les scripts
+"""
+import asyncio
+import logging
+import random
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After en secondes (la forme date HTTP est ignorée)"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+class HostThrottle:
+    """Sémaphore + délai adaptatif par hôte"""
+
+    def __init__(self, max_concurrency: int = 4, min_delay: float = 0.25,
+                 max_delay: float = 60.0, backoff_floor: float = 2.0):
+        """
+        Args:
+            max_concurrency: requêtes simultanées maximum par hôte
+            min_delay: espacement minimal entre deux débuts de requête (secondes)
+            max_delay: plafond du délai adaptatif
+            backoff_floor: délai minimal appliqué après un 429 / 5xx
+        """
+        self.max_concurrency = max_concurrency
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.backoff_floor = backoff_floor
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._delays: Dict[str, float] = {}
+        self._next_start: Dict[str, float] = {}
+        self._stats = {'requests': 0, 'throttled': 0, 'waited_seconds': 0.0}
+
+    @staticmethod
+    def _host(url: str) -> str:
+        return urlsplit(url).hostname or ''
+
+    @asynccontextmanager
+    async def slot(self, url: str):
+        """Attend une place et l'espacement de l'hôte avant d'émettre la requête"""
+        host = self._host(url)
+        semaphore = self._semaphores.get(host)
+        if semaphore is None:
+            semaphore = self._semaphores[host] = asyncio.Semaphore(self.max_concurrency)
+
+        async with semaphore:
+            loop = asyncio.get_running_loop()
+            now = loop.time()
+            delay = self._delays.get(host, self.min_delay)
+            start_at = max(now, self._next_start.get(host, now))
+            # Réserve le créneau suivant avant d'attendre (jitter: pas de rafales régulières)
+            self._next_start[host] = start_at + delay * random.uniform(1.0, 1.3)
+
+            wait = start_at - now
+            if wait > 0:
+                self._stats['waited_seconds'] += wait
+                await asyncio.sleep(wait)
+            self._stats['requests'] += 1
+            yield
+
+    def report(self, url: str, status_code: Optional[int], retry_after: Optional[str] = None):
+        """Adapte le délai de l'hôte selon la réponse (None = erreur réseau / timeout)"""
+        host = self._host(url)
+        delay = self._delays.get(host, self.min_delay)
+
+        if status_code is None or status_code == 429 or status_code >= 500:
+            pause = parse_retry_after(retry_after)
+            delay = min(self.max_delay, max(delay * 2, self.backoff_floor, pause or 0.0))
+            self._delays[host] = delay
+            # Pause de l'hôte entier: les requêtes en attente partent après
+            now = asyncio.get_running_loop().time()
+            self._next_start[host] = max(self._next_start.get(host, now), now + (pause or delay))
+            self._stats['throttled'] += 1
+            logger.warning(f"[THROTTLE] {host} answered {status_code or 'no response'}, delay now {delay:.1f}s")
+        else:
+            self._delays[host] = max(self.min_delay, delay * 0.8)
+
+    def get_stats(self) -> Dict:
+        return {
+            **self._stats,
+            'waited_seconds': round(self._stats['waited_seconds'], 1),
+            'delays': {host: round(delay, 2) for host, delay in self._delays.items()},
+        }
@@ -0,0 +1,262 @@
+"""
+Cache HTTP sur disque sous le scraper Gumroad (pages profil / produit, images de couverture)
+
+- Une entrée par URL (sha256): corps + métadonnées (ETag, Last-Modified, Content-Type)
+- Fraîche pendant HTTP_CACHE_TTL secondes: servie sans requête (import relancé après échec)
+- Au-delà: requête conditionnelle If-None-Match / If-Modified-Since; un 304 réutilise
+  le corps du cache (un second import de la même boutique ne retélécharge presque rien)
+- Covers dédupliquées par URL: une image partagée par plusieurs produits n'est
+  téléchargée qu'une fois
+- Taille bornée (HTTP_CACHE_MAX_MB): éviction LRU, date d'accès = mtime du fichier corps
+- Seules les réponses 200 sans Cache-Control: no-store sont stockées
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+HTTP_CACHE_ENABLED = os.getenv('HTTP_CACHE_ENABLED', 'true').lower() == 'true'
+HTTP_CACHE_DIR = os.getenv('HTTP_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'uzeur_http_cache'))
+HTTP_CACHE_MAX_MB = float(os.getenv('HTTP_CACHE_MAX_MB', '200'))
+HTTP_CACHE_TTL = float(os.getenv('HTTP_CACHE_TTL', '600'))
+
+# En-têtes conservés avec le corps (revalidation + décodage)
+STORED_HEADERS = ('content-type', 'etag', 'last-modified')
+
+SendRequest = Callable[[Dict[str, str]], Awaitable[httpx.Response]]
+
+
+class HttpCache:
+    """Entrées corps (.body) + métadonnées (.json) dans un dossier, index LRU en mémoire"""
+
+    def __init__(self, directory: str = HTTP_CACHE_DIR, max_bytes: int = int(HTTP_CACHE_MAX_MB * 1024 * 1024),
+                 ttl: float = HTTP_CACHE_TTL):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._index: Optional[OrderedDict] = None  # clé -> taille du corps, du moins au plus récent
+        self._total_bytes = 0
+        self._stats = {'fresh_hits': 0, 'revalidated': 0, 'misses': 0, 'stored': 0, 'evicted': 0}
+
+    @staticmethod
+    def _key(url: str) -> str:
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+    def _paths(self, key: str):
+        return os.path.join(self.directory, f"{key}.json"), os.path.join(self.directory, f"{key}.body")
+
+    def _load_index(self):
+        """Index LRU reconstruit depuis le disque au premier accès (cache conservé entre redémarrages)"""
+        if self._index is not None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.body'):
+                continue
+            try:
+                st = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            entries.append((st.st_mtime, name[:-5], st.st_size))
+        entries.sort()
+        self._index = OrderedDict((key, size) for _, key, size in entries)
+        self._total_bytes = sum(self._index.values())
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+    # OPÉRATIONS DISQUE (synchrones: appelées via asyncio.to_thread)
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+    def lookup(self, url: str) -> Optional[Dict]:
+        key = self._key(url)
+        with self._lock:
+            self._load_index()
+            if key not in self._index:
+                return None
+        meta_path, _ = self._paths(key)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return meta if meta.get('url') == url else None
+
+    def read_body(self, url: str) -> Optional[bytes]:
+        """Corps de l'entrée; marque l'accès (LRU)"""
+        key = self._key(url)
+        _, body_path = self._paths(key)
+        try:
+            with open(body_path, 'rb') as f:
+                body = f.read()
+            os.utime(body_path)
+        except OSError:
+            self._forget(key)
+            return None
+        with self._lock:
+            if key in self._index:
+                self._index.move_to_end(key)
+        return body
+
+    def store(self, url: str, headers: httpx.Headers, content: bytes):
+        if len(content) > self.max_bytes // 10:
+            return  # une entrée ne peut pas occuper plus d'un dixième du cache
+        key = self._key(url)
+        meta_path, body_path = self._paths(key)
+        meta = {
+            'url': url,
+            'stored_at': time.time(),
+            'headers': {name: headers[name] for name in STORED_HEADERS if name in headers},
+        }
+        with self._lock:
+            self._load_index()
+        try:
+            # Écriture atomique: un lecteur concurrent voit l'ancienne ou la nouvelle version
+            for path, data, mode in ((body_path, content, 'wb'), (meta_path, json.dumps(meta), 'w')):
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                with open(tmp_path, mode) as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"[HTTP-CACHE] Could not store {url}: {e}")
+            return
+
+        with self._lock:
+            self._total_bytes += len(content) - self._index.pop(key, 0)
+            self._index[key] = len(content)
+            self._stats['stored'] += 1
+            self._evict_locked()
+
+    def revalidated(self, url: str, meta: Dict, headers: httpx.Headers) -> Optional[bytes]:
+        """304: l'entrée redevient fraîche (nouveaux validateurs éventuels), corps réutilisé"""
+        body = self.read_body(url)
+        if body is None:
+            return None
+        meta['stored_at'] = time.time()
+        for name in ('etag', 'last-modified'):
+            if name in headers:
+                meta['headers'][name] = headers[name]
+        meta_path, _ = self._paths(self._key(url))
+        try:
+            tmp_path = f"{meta_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                f.write(json.dumps(meta))
+            os.replace(tmp_path, meta_path)
+        except OSError as e:
+            logger.debug(f"[HTTP-CACHE] Could not refresh metadata for {url}: {e}")
+        return body
+
+    def _forget(self, key: str):
+        for path in self._paths(key):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        with self._lock:
+            if self._index is not None and key in self._index:
+                self._total_bytes -= self._index.pop(key)
+
+    def _evict_locked(self):
+        """Éviction LRU jusqu'à 90% de la taille maximale (appelé sous self._lock)"""
+        if self._total_bytes <= self.max_bytes:
+            return
+        target = self.max_bytes * 0.9
+        while self._index and self._total_bytes > target:
+            key, size = self._index.popitem(last=False)
+            self._total_bytes -= size
+            self._stats['evicted'] += 1
+            for path in self._paths(key):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+    # REQUÊTE À TRAVERS LE CACHE
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+    async def fetch(self, url: str, send: SendRequest) -> httpx.Response:
+        """
+        GET à travers le cache
+
+        Args:
+            url: URL demandée (clé du cache)
+            send: coroutine (en-têtes conditionnels) -> httpx.Response; l'appelant garde
+                son client, ses en-têtes et son limiteur par hôte
+
+        Returns:
+            Réponse réseau, ou réponse 200 reconstruite depuis le cache (en-tête x-cache)
+        """
+        meta = await asyncio.to_thread(self.lookup, url)
+
+        if meta and time.time() - meta['stored_at'] < self.ttl:
+            body = await asyncio.to_thread(self.read_body, url)
+            if body is not None:
+                self._stats['fresh_hits'] += 1
+                return self._cached_response(url, meta, body, 'HIT')
+
+        conditional = {}
+        if meta:
+            if meta['headers'].get('etag'):
+                conditional['If-None-Match'] = meta['headers']['etag']
+            if meta['headers'].get('last-modified'):
+                conditional['If-Modified-Since'] = meta['headers']['last-modified']
+
+        resp = await send(conditional)
+
+        if resp.status_code == 304 and meta:
+            body = await asyncio.to_thread(self.revalidated, url, meta, resp.headers)
+            if body is not None:
+                self._stats['revalidated'] += 1
+                return self._cached_response(url, meta, body, 'REVALIDATED')
+            # Corps évincé entre-temps: requête complète
+            resp = await send({})
+
+        self._stats['misses'] += 1
+        if resp.status_code == 200 and 'no-store' not in resp.headers.get('cache-control', ''):
+            await asyncio.to_thread(self.store, url, resp.headers, resp.content)
+        return resp
+
+    @staticmethod
+    def _cached_response(url: str, meta: Dict, body: bytes, source: str) -> httpx.Response:
+        return httpx.Response(
+            200,
+            headers={**meta['headers'], 'x-cache': source},
+            content=body,
+            request=httpx.Request('GET', url)
+        )
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                **self._stats,
+                'entries': len(self._index) if self._index is not None else None,
+                'size_mb': round(self._total_bytes / (1024 * 1024), 1),
+                'max_mb': round(self.max_bytes / (1024 * 1024), 1),
+            }
+
+
+# Global cache instance
+_http_cache: Optional[HttpCache] = None
+
+
+def get_http_cache() -> Optional[HttpCache]:
+    """Cache partagé par le scraper et les téléchargements de covers (None si désactivé)"""
+    global _http_cache
+
+    if not HTTP_CACHE_ENABLED:
+        return None
+    if _http_cache is None:
+        _http_cache = HttpCache()
+
+    return _http_cache
@@ -6,7 +6,7 @@ Critical for Railway deployments where local storage is ephemeral.
 import os
 import logging
 from typing import Optional, Tuple
-from app.services.b2_storage_service import B2StorageService
+from app.services.b2_storage_service import get_storage_service
 from app.core.database_init import get_postgresql_connection
 from app.core.db_pool import put_connection
 import psycopg2.extras
@@ -18,7 +18,7 @@ class ImageSyncService:
     """Service to sync product images between local storage and B2"""
 
     def __init__(self):
-        self.b2_service = B2StorageService()
+        self.b2_service = get_storage_service()
 
     async def ensure_product_images_local(self, product_id: str, seller_id: int) -> Tuple[Optional[str], Optional[str]]:
         """
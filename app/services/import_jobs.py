@@ -0,0 +1,322 @@
+"""
+Moteur de jobs d'import de boutique (Gumroad) en tâche de fond
+
+- handle_shop_url soumet un job et rend la main: le scraping ne bloque plus le handler
+- Jobs persistés (import_jobs, migration 0007): un job queued / running au moment d'un
+  arrêt est repris au démarrage suivant, seules les pages produit manquantes sont refaites
+- Requêtes Gumroad via un HostThrottle partagé par tous les jobs: concurrence bornée
+  par hôte et backoff adaptatif (429 / 5xx / Retry-After)
+- Progression réelle (pages produit récupérées / à récupérer) poussée dans le message
+  de statut au plus toutes les IMPORT_PROGRESS_INTERVAL secondes
+- Résultats stockés dans import_job_products, lus produit par produit par le carrousel
+  et la mini-app: rien n'est gardé dans StateManager hormis l'identifiant du job
+- Fin de job (succès ou échec): hook on_finished(job), fourni par ImportHandlers
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+import httpx
+
+from app.domain.repositories.import_job_repo import ImportJobRepository
+from app.services.gumroad_scraper import (
+    GUMROAD_HEADERS, GumroadScraperException, enrich_products_parallel, fetch_profile_listing
+)
+from app.services.host_throttle import HostThrottle
+from app.services.http_cache import get_http_cache
+
+logger = logging.getLogger(__name__)
+
+IMPORT_MAX_CONCURRENT_JOBS = int(os.getenv('IMPORT_MAX_CONCURRENT_JOBS', '2'))
+IMPORT_HOST_CONCURRENCY = int(os.getenv('IMPORT_HOST_CONCURRENCY', '4'))
+IMPORT_PROGRESS_INTERVAL = float(os.getenv('IMPORT_PROGRESS_INTERVAL', '3'))
+IMPORT_JOB_MAX_ATTEMPTS = 3
+IMPORT_JOB_RETENTION_DAYS = int(os.getenv('IMPORT_JOB_RETENTION_DAYS', '7'))
+
+# Produits payants sous ce prix exclus de l'import (0 = gratuit, accepté)
+MIN_PAID_PRICE = 9.99
+
+
+class ImportJobCancelled(Exception):
+    """Job annulé par l'utilisateur pendant le scraping"""
+
+
+def split_importable(products: List[Dict]):
+    """(produits importables, produits exclus pour prix invalide 0 < prix < 9.99)"""
+    valid, excluded = [], []
+    for product in products:
+        price = product.get('price', 0.0) or 0.0
+        if 0 < price < MIN_PAID_PRICE:
+            excluded.append({'title': product.get('title', ''), 'price': price})
+        else:
+            valid.append(product)
+    return valid, excluded
+
+
+def render_progress(fetched: int, total: int, phase: str = 'pages') -> str:
+    """Texte du message de statut (Markdown)"""
+    if phase == 'queued':
+        return "🔍 **Import en file d'attente...**\n\nVotre boutique sera analysée dans un instant."
+    if phase == 'listing':
+        return "🔍 **Analyse de votre boutique...**\n\nLecture de la liste des produits."
+
+    filled = int(10 * fetched / total) if total else 10
+    return (
+        f"🔍 **Import en cours...**\n\n"
+        f"{'▓' * filled}{'░' * (10 - filled)}\n"
+        f"📄 Pages produit: {fetched}/{total}"
+    )
+
+
+class _StatusMessage:
+    """Message de statut Telegram, édité au plus une fois par intervalle"""
+
+    def __init__(self, bot, chat_id: int, message_id: Optional[int], interval: float):
+        self.bot = bot
+        self.chat_id = chat_id
+        self.message_id = message_id
+        self.interval = interval
+        self._last_edit = 0.0
+        self._last_text = None
+
+    async def update(self, text: str, force: bool = False):
+        if not self.bot or not self.message_id or text == self._last_text:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_edit < self.interval:
+            return
+        self._last_edit = now
+        self._last_text = text
+        try:
+            await self.bot.edit_message_text(
+                chat_id=self.chat_id, message_id=self.message_id, text=text, parse_mode='Markdown'
+            )
+        except Exception as e:
+            # Message supprimé / inchangé: la progression n'est qu'informative
+            logger.debug(f"[IMPORT] Progress edit skipped: {e}")
+
+
+class ImportJobEngine:
+    """File de jobs d'import exécutés par un nombre borné de workers asyncio"""
+
+    def __init__(self, bot=None, on_finished: Optional[Callable[[Dict], Awaitable[None]]] = None,
+                 max_concurrent_jobs: int = IMPORT_MAX_CONCURRENT_JOBS,
+                 host_concurrency: int = IMPORT_HOST_CONCURRENCY,
+                 progress_interval: float = IMPORT_PROGRESS_INTERVAL):
+        """
+        Args:
+            bot: telegram.Bot pour éditer les messages de statut
+            on_finished: coroutine appelée avec la ligne import_jobs en fin de job
+        """
+        self.bot = bot
+        self.on_finished = on_finished
+        self.max_concurrent_jobs = max_concurrent_jobs
+        self.host_concurrency = host_concurrency
+        self.progress_interval = progress_interval
+        self.repo = ImportJobRepository()
+        self.throttle: Optional[HostThrottle] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._cancelled: Set[str] = set()
+        self._active: Set[str] = set()
+        self._enrichments: Dict[str, asyncio.Future] = {}
+        self._stats = {'submitted': 0, 'resumed': 0, 'completed': 0, 'failed': 0,
+                       'cancelled': 0, 'pages_fetched': 0}
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+    # API
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+    async def submit(self, user_id: int, chat_id: int, source_url: str,
+                     status_message_id: Optional[int] = None) -> str:
+        """Persiste puis met en file un job; rend la main immédiatement"""
+        job_id = await asyncio.to_thread(
+            self.repo.create_job, user_id, chat_id, source_url, status_message_id
+        )
+        self._stats['submitted'] += 1
+        self._queue.put_nowait(job_id)
+        logger.info(f"[IMPORT] Job {job_id} queued for user {user_id}: {source_url}")
+        return job_id
+
+    async def cancel(self, job_id: str):
+        """Annule un job en file ou en cours (les pages produit en attente sont abandonnées)"""
+        self._cancelled.add(job_id)
+        enrichment = self._enrichments.get(job_id)
+        if enrichment:
+            enrichment.cancel()
+        if await asyncio.to_thread(self.repo.finish_job, job_id, 'cancelled'):
+            self._stats['cancelled'] += 1
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+    # EXÉCUTION
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run_job(job_id)
+            except Exception as e:
+                logger.error(f"[IMPORT] Job {job_id} crashed: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _run_job(self, job_id: str):
+        if job_id in self._cancelled:
+            return
+        job = await asyncio.to_thread(self.repo.start_job, job_id)
+        if job is None:
+            return
+
+        self._active.add(job_id)
+        status = _StatusMessage(self.bot, job['chat_id'], job['status_message_id'], self.progress_interval)
+        try:
+            if job['attempts'] > IMPORT_JOB_MAX_ATTEMPTS:
+                raise GumroadScraperException("L'import a échoué à plusieurs reprises.")
+
+            await self._scrape(job, status)
+            self._stats['completed'] += 1
+
+        except ImportJobCancelled:
+            logger.info(f"[IMPORT] Job {job_id} cancelled")
+            return
+        except GumroadScraperException as e:
+            logger.warning(f"[IMPORT] Job {job_id} failed: {e}")
+            await asyncio.to_thread(self.repo.finish_job, job_id, 'failed', str(e))
+            self._stats['failed'] += 1
+        except Exception as e:
+            logger.error(f"[IMPORT] Unexpected error in job {job_id}: {e}")
+            await asyncio.to_thread(self.repo.finish_job, job_id, 'failed', f"Erreur inattendue: {e}")
+            self._stats['failed'] += 1
+        finally:
+            self._active.discard(job_id)
+
+        if self.on_finished and job_id not in self._cancelled:
+            finished = await asyncio.to_thread(self.repo.get_job, job_id)
+            try:
+                await self.on_finished(finished)
+            except Exception as e:
+                logger.error(f"[IMPORT] on_finished hook failed for job {job_id}: {e}")
+
+    async def _scrape(self, job: Dict, status: _StatusMessage):
+        job_id = job['job_id']
+        rows = await asyncio.to_thread(self.repo.get_scraped_products, job_id)
+
+        async with httpx.AsyncClient(timeout=30.0, follow_redirects=True, headers=GUMROAD_HEADERS) as client:
+            if not rows:
+                await status.update(render_progress(0, 0, phase='listing'), force=True)
+                listing, needs_enrichment = await fetch_profile_listing(client, job['source_url'], self.throttle)
+                await asyncio.to_thread(self.repo.store_listing, job_id, listing, not needs_enrichment)
+                rows = await asyncio.to_thread(self.repo.get_scraped_products, job_id)
+
+            pending = [(position, product) for position, product, enriched in rows if not enriched]
+            total = sum(1 for _, product, _ in rows if product.get('gumroad_url'))
+            fetched = total - len(pending)
+            await status.update(render_progress(fetched, total), force=True)
+
+            async def on_page(index: int, product: Dict):
+                nonlocal fetched
+                await asyncio.to_thread(self.repo.save_enriched_product, job_id, pending[index][0], product)
+                fetched += 1
+                self._stats['pages_fetched'] += 1
+                await status.update(render_progress(fetched, total))
+
+            if pending:
+                # Tâche dédiée: cancel() l'annule, ce qui annule toutes les pages en attente
+                enrichment = asyncio.ensure_future(enrich_products_parallel(
+                    client, [product for _, product in pending], GUMROAD_HEADERS,
+                    throttle=self.throttle, on_page=on_page
+                ))
+                self._enrichments[job_id] = enrichment
+                try:
+                    await enrichment
+                except asyncio.CancelledError:
+                    if job_id in self._cancelled:
+                        raise ImportJobCancelled()
+                    raise
+                finally:
+                    self._enrichments.pop(job_id, None)
+
+        if job_id in self._cancelled:
+            raise ImportJobCancelled()
+
+        products = await asyncio.to_thread(self.repo.get_products, job_id)
+        valid, excluded = split_importable(products)
+        await asyncio.to_thread(self.repo.complete_job, job_id, valid, excluded)
+        logger.info(f"[IMPORT] Job {job_id} completed: {len(valid)} products, {len(excluded)} excluded")
+
+    async def _resume_pending(self):
+        """Remet en file les jobs interrompus par le dernier arrêt"""
+        try:
+            job_ids = await asyncio.to_thread(self.repo.get_resumable_job_ids)
+        except Exception as e:
+            logger.error(f"[IMPORT] Could not load pending import jobs: {e}")
+            return
+        for job_id in job_ids:
+            self._queue.put_nowait(job_id)
+        if job_ids:
+            self._stats['resumed'] += len(job_ids)
+            logger.info(f"[IMPORT] {len(job_ids)} interrupted import job(s) resumed")
+
+    def start(self):
+        """Démarre les workers et la reprise des jobs interrompus, dans la boucle courante"""
+        if self.running:
+            return
+        self.throttle = HostThrottle(max_concurrency=self.host_concurrency)
+        self._queue = asyncio.Queue()
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"import-worker-{index}")
+            for index in range(self.max_concurrent_jobs)
+        ]
+        self._workers.append(asyncio.create_task(self._resume_pending(), name="import-resume"))
+        logger.info(f"📦 Import job engine started ({self.max_concurrent_jobs} workers, "
+                    f"{self.host_concurrency} requests per host)")
+
+    @property
+    def running(self) -> bool:
+        return any(not task.done() for task in self._workers)
+
+    async def stop(self):
+        """Arrête les workers; les jobs en cours restent 'running' et seront repris"""
+        for task in self._workers:
+            task.cancel()
+        for task in self._workers:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._workers = []
+
+    def get_stats(self) -> Dict:
+        return {
+            **self._stats,
+            'queued': self._queue.qsize() if self._queue else 0,
+            'active': len(self._active),
+            'throttle': self.throttle.get_stats() if self.throttle else None,
+            'http_cache': get_http_cache().get_stats() if get_http_cache() else None,
+        }
+
+
+# Global engine instance
+_engine: Optional[ImportJobEngine] = None
+
+
+def init_import_engine(bot=None, **kwargs) -> ImportJobEngine:
+    """Crée le moteur global et le démarre (à appeler dans la boucle du serveur)"""
+    global _engine
+    _engine = ImportJobEngine(bot, **kwargs)
+    _engine.start()
+    return _engine
+
+
+def get_import_engine() -> Optional[ImportJobEngine]:
+    return _engine
+
+
+async def shutdown_import_engine():
+    global _engine
+    if _engine:
+        await _engine.stop()
+        _engine = None
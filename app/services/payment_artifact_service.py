@@ -0,0 +1,229 @@
+"""
+Service de rendu des artefacts de paiement (QR code + carte de paiement)
+
+- Le rendu qrcode/Pillow est bloquant: il tourne dans un executor dédié
+- PNG bruts (bytes), pas d'aller-retour base64
+- Cache LRU par (adresse, montant, devise): un même paiement n'est rendu qu'une fois
+- Le file_id Telegram du premier envoi est réutilisé quand l'acheteur
+  ré-ouvre le même paiement en attente (pas de ré-upload)
+"""
+import asyncio
+import io
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+import qrcode
+
+logger = logging.getLogger(__name__)
+
+# (adresse, montant formaté, devise, carte)
+ArtifactKey = Tuple[str, str, str, bool]
+
+CARD_WIDTH = 600
+CARD_HEADER_HEIGHT = 90
+CARD_FOOTER_HEIGHT = 110
+CARD_BRAND_COLOR = (32, 41, 64)
+CARD_ACCENT_COLOR = (91, 192, 235)
+
+
+class PaymentArtifactRenderer:
+    """Rend et met en cache les QR codes / cartes de paiement"""
+
+    def __init__(self, max_entries: int = 256, max_workers: int = 2,
+                 card_enabled: bool = False, brand_name: str = "Uzeur"):
+        """
+        Args:
+            max_entries: Nombre de PNG (et de file_id) gardés en LRU
+            max_workers: Threads de rendu
+            card_enabled: Composer une carte de paiement brandée autour du QR
+            brand_name: Nom affiché dans l'en-tête de la carte
+        """
+        self.max_entries = max_entries
+        self.card_enabled = card_enabled
+        self.brand_name = brand_name
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="payment-artifact")
+        self._png_cache: OrderedDict = OrderedDict()
+        self._file_ids: OrderedDict = OrderedDict()
+        # order_id -> clé de l'artefact affiché (ré-ouverture sans appel NowPayments)
+        self._order_keys: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._stats = {'renders': 0, 'cache_hits': 0, 'file_id_hits': 0}
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+    # CLÉS / CACHE
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+    def make_key(self, address: str, amount: float, currency: str) -> ArtifactKey:
+        """Clé de cache stable (montant formaté comme affiché à l'acheteur)"""
+        return (address, f"{float(amount):.8f}", (currency or '').lower(), self.card_enabled)
+
+    def _remember(self, cache: OrderedDict, key, value):
+        with self._lock:
+            cache[key] = value
+            cache.move_to_end(key)
+            if len(cache) > self.max_entries:
+                cache.popitem(last=False)
+
+    def _lookup(self, cache: OrderedDict, key):
+        with self._lock:
+            value = cache.get(key)
+            if value is not None:
+                cache.move_to_end(key)
+            return value
+
+    def get_file_id(self, key: ArtifactKey) -> Optional[str]:
+        """file_id Telegram déjà obtenu pour cet artefact (None si jamais envoyé)"""
+        file_id = self._lookup(self._file_ids, key)
+        if file_id:
+            self._stats['file_id_hits'] += 1
+        return file_id
+
+    def save_file_id(self, key: ArtifactKey, file_id: str):
+        """Mémorise le file_id retourné par Telegram après le premier envoi"""
+        if file_id:
+            self._remember(self._file_ids, key, file_id)
+
+    def invalidate_file_id(self, key: ArtifactKey):
+        """Oublie un file_id refusé par Telegram (le PNG sera ré-uploadé)"""
+        with self._lock:
+            self._file_ids.pop(key, None)
+
+    def bind_order(self, order_id: str, buyer_user_id: int, key: ArtifactKey):
+        """Associe une commande en attente (et son acheteur) à son artefact de paiement"""
+        self._remember(self._order_keys, (order_id, buyer_user_id), key)
+
+    def get_order_key(self, order_id: str, buyer_user_id: int) -> Optional[ArtifactKey]:
+        """Artefact de la commande, pour son acheteur uniquement (None pour un autre utilisateur)"""
+        return self._lookup(self._order_keys, (order_id, buyer_user_id))
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                **self._stats,
+                'png_entries': len(self._png_cache),
+                'file_id_entries': len(self._file_ids)
+            }
+
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+    # RENDU
+    # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+    async def render(self, address: str, amount: float, currency: str) -> Tuple[ArtifactKey, Optional[bytes]]:
+        """
+        Rend (ou récupère du cache) le PNG de paiement sans bloquer la boucle
+
+        Returns:
+            (clé, PNG bytes) - bytes None si le rendu a échoué
+        """
+        key = self.make_key(address, amount, currency)
+
+        png = self._lookup(self._png_cache, key)
+        if png is not None:
+            self._stats['cache_hits'] += 1
+            return key, png
+
+        loop = asyncio.get_running_loop()
+        try:
+            png = await loop.run_in_executor(self._executor, self.render_blocking, address, amount, currency)
+        except Exception as e:
+            logger.error(f"Error rendering payment artifact: {e}")
+            return key, None
+
+        self._stats['renders'] += 1
+        self._remember(self._png_cache, key, png)
+        return key, png
+
+    def render_blocking(self, address: str, amount: float, currency: str) -> bytes:
+        """Rendu bloquant (à appeler dans un executor)"""
+        qr_image = self._build_qr_image(address, amount, currency)
+        if self.card_enabled:
+            image = self._compose_card(qr_image, amount, currency)
+        else:
+            image = qr_image
+
+        buffer = io.BytesIO()
+        image.save(buffer, format='PNG', optimize=True)
+        return buffer.getvalue()
+
+    @staticmethod
+    def build_payment_uri(address: str, amount: float, currency: str) -> str:
+        """URI de paiement encodée dans le QR (meilleure UX wallets)"""
+        currency = (currency or '').lower()
+        if currency == 'btc':
+            return f"bitcoin:{address}?amount={amount}"
+        if currency == 'eth':
+            return f"ethereum:{address}?value={amount}"
+        return f"{address}?amount={amount}"
+
+    def _build_qr_image(self, address: str, amount: float, currency: str):
+        qr = qrcode.QRCode(
+            version=1,
+            error_correction=qrcode.constants.ERROR_CORRECT_L,
+            box_size=10,
+            border=4,
+        )
+        qr.add_data(self.build_payment_uri(address, amount, currency))
+        qr.make(fit=True)
+        return qr.make_image(fill_color="black", back_color="white").convert('RGB')
+
+    def _compose_card(self, qr_image, amount: float, currency: str):
+        """Carte brandée: en-tête, QR centré, montant exact en pied"""
+        from PIL import Image, ImageDraw, ImageFont
+
+        qr_size = CARD_WIDTH - 80
+        qr_image = qr_image.resize((qr_size, qr_size), Image.NEAREST)
+
+        height = CARD_HEADER_HEIGHT + qr_size + CARD_FOOTER_HEIGHT
+        card = Image.new('RGB', (CARD_WIDTH, height), (255, 255, 255))
+        draw = ImageDraw.Draw(card)
+
+        draw.rectangle([(0, 0), (CARD_WIDTH, CARD_HEADER_HEIGHT)], fill=CARD_BRAND_COLOR)
+        draw.rectangle([(0, CARD_HEADER_HEIGHT - 6), (CARD_WIDTH, CARD_HEADER_HEIGHT)], fill=CARD_ACCENT_COLOR)
+        card.paste(qr_image, ((CARD_WIDTH - qr_size) // 2, CARD_HEADER_HEIGHT))
+
+        header_font = self._load_font(ImageFont, 40)
+        amount_font = self._load_font(ImageFont, 34)
+
+        self._draw_centered(draw, self.brand_name, header_font, 20, (255, 255, 255))
+        amount_text = f"{float(amount):.8f} {(currency or '').upper()}"
+        self._draw_centered(draw, amount_text, amount_font, CARD_HEADER_HEIGHT + qr_size + 30, CARD_BRAND_COLOR)
+
+        return card
+
+    @staticmethod
+    def _load_font(image_font, size: int):
+        for path in ("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
+                     "/System/Library/Fonts/Helvetica.ttc"):
+            try:
+                return image_font.truetype(path, size)
+            except Exception:
+                continue
+        return image_font.load_default()
+
+    @staticmethod
+    def _draw_centered(draw, text: str, font, y: int, fill):
+        bbox = draw.textbbox((0, 0), text, font=font)
+        draw.text(((CARD_WIDTH - (bbox[2] - bbox[0])) // 2, y), text, font=font, fill=fill)
+
+
+# Global renderer instance
+_renderer: Optional[PaymentArtifactRenderer] = None
+
+
+def get_payment_artifact_renderer() -> PaymentArtifactRenderer:
+    """Get global payment artifact renderer (cache partagé par tous les handlers)"""
+    global _renderer
+
+    if _renderer is None:
+        _renderer = PaymentArtifactRenderer(
+            card_enabled=os.getenv('PAYMENT_CARD_ENABLED', 'false').lower() == 'true',
+            brand_name=os.getenv('PAYMENT_CARD_BRAND', 'Uzeur')
+        )
+
+    return _renderer
@@ -1,14 +1,12 @@
 import logging
 import asyncio
-import qrcode
-import io
-import base64
 from typing import Dict, Optional, List
 import httpx
 import time
 
 from app.core import settings as core_settings
 from app.integrations.nowpayments_client import NowPaymentsClient
+from app.services.payment_artifact_service import get_payment_artifact_renderer
 
 
 logger = logging.getLogger(__name__)
@@ -100,6 +98,17 @@ class PaymentService:
             # Step 3: Enhance payment data with QR code and details
             enhanced_payment = self._enhance_payment_data(payment_data, exact_crypto_amount)
 
+            # Step 3b: Précalcul du QR code (PNG bruts, rendu hors boucle, caché par adresse/montant/devise)
+            payment_address = enhanced_payment.get('pay_address', '')
+            if payment_address:
+                qr_key, qr_png = await get_payment_artifact_renderer().render(
+                    payment_address,
+                    enhanced_payment.get('exact_crypto_amount', exact_crypto_amount),
+                    enhanced_payment.get('pay_currency', '')
+                )
+                enhanced_payment['qr_key'] = qr_key
+                enhanced_payment['qr_png'] = qr_png
+
             # Step 4: Add commission tracking info
             enhanced_payment['commission_info'] = {
                 'commission_percent': commission_percent,
@@ -201,7 +210,7 @@ class PaymentService:
             return None
 
     def _enhance_payment_data(self, payment_data: Dict, exact_crypto_amount: float) -> Dict:
-        """Enhance payment data with QR code, exact amount, and professional details"""
+        """Enhance payment data with exact amount and professional details (QR rendu dans create_payment)"""
         try:
             # CRITIQUE: Utiliser le montant EXACT retourné par NOWPayments (pay_amount)
             # Si absent, fallback sur notre estimation (exact_crypto_amount)
@@ -219,11 +228,7 @@ class PaymentService:
             payment_data['exact_crypto_amount'] = final_amount
             payment_data['formatted_amount'] = f"{final_amount:.8f}"
 
-            # Generate QR code for payment address
             payment_address = payment_data.get('pay_address', '')
-            if payment_address:
-                qr_code_base64 = self._generate_qr_code(payment_address, final_amount, payment_data.get('pay_currency', ''))
-                payment_data['qr_code'] = qr_code_base64
 
             # Add professional payment details
             payment_data['payment_details'] = {
@@ -242,42 +247,6 @@ class PaymentService:
             logger.error(f"Error enhancing payment data: {e}")
             return payment_data
 
-    def _generate_qr_code(self, address: str, amount: float, currency: str) -> str:
-        """Generate QR code for payment address with amount"""
-        try:
-            # Create payment URI for better UX
-            if currency.lower() == 'btc':
-                qr_data = f"bitcoin:{address}?amount={amount}"
-            elif currency.lower() == 'eth':
-                qr_data = f"ethereum:{address}?value={amount}"
-            else:
-                qr_data = f"{address}?amount={amount}"
-
-            # Generate QR code
-            qr = qrcode.QRCode(
-                version=1,
-                error_correction=qrcode.constants.ERROR_CORRECT_L,
-                box_size=10,
-                border=4,
-            )
-            qr.add_data(qr_data)
-            qr.make(fit=True)
-
-            # Create image
-            img = qr.make_image(fill_color="black", back_color="white")
-
-            # Convert to base64
-            buffer = io.BytesIO()
-            img.save(buffer, format='PNG')
-            img_str = base64.b64encode(buffer.getvalue()).decode()
-
-            return img_str
-
-        except Exception as e:
-            logger.error(f"Error generating QR code: {e}")
-            return ""
-
-
     def get_available_currencies(self) -> List[str]:
         try:
             now = time.time()
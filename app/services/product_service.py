@@ -8,6 +8,7 @@ import psycopg2.extras
 from typing import Dict, Any, Optional, List
 from app.core.database_init import get_postgresql_connection
 from app.core.db_pool import put_connection
+from app.services.buyer_library import get_buyer_library
 
 logger = logging.getLogger(__name__)
 
@@ -143,19 +144,9 @@ class ProductService:
             return []
 
     def check_user_has_purchased(self, user_id: int, product_id: str) -> bool:
-        """Check if user has purchased a specific product"""
+        """Check if user has purchased a specific product (index acheteur en mémoire)"""
         try:
-            conn = get_postgresql_connection()
-            cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-            cursor.execute('''
-                SELECT COUNT(*) as count
-                FROM orders
-                WHERE buyer_user_id = %s AND product_id = %s AND payment_status = 'completed'
-            ''', (user_id, product_id))
-
-            count = cursor.fetchone()['count']
-            put_connection(conn)
-            return count > 0
+            return get_buyer_library().owns(user_id, product_id)
 
         except (psycopg2.Error, Exception) as e:
             logger.error(f"❌ Error checking purchase: {e}")
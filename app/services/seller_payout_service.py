@@ -9,6 +9,7 @@ from datetime import datetime, timedelta
 from app.domain.repositories.payout_repo import PayoutRepository
 from app.domain.repositories.order_repo import OrderRepository
 from app.domain.repositories.user_repo import UserRepository
+from app.core.outbound_messages import send_telegram_message, PRIORITY_TRANSACTIONAL
 
 logger = logging.getLogger(__name__)
 
@@ -111,16 +112,6 @@ class SellerPayoutService:
                                             amount: float, currency: str, wallet_address: str):
         """Send Telegram notification to seller when payout is created"""
         try:
-            from telegram import Bot
-            import os
-
-            bot_token = os.getenv('TELEGRAM_BOT_TOKEN') or os.getenv('TELEGRAM_TOKEN')
-            if not bot_token:
-                logger.warning("No bot token available for seller notification")
-                return
-
-            bot = Bot(token=bot_token)
-
             wallet_short = f"{wallet_address[:6]}...{wallet_address[-4:]}" if len(wallet_address) > 10 else wallet_address
 
             message = f"""
@@ -138,8 +129,16 @@ class SellerPayoutService:
 📌 Ce payout sera traité et payé après vérification par notre équipe. Vous recevrez une notification une fois le paiement effectué.
 """
 
-            await bot.send_message(chat_id=seller_user_id, text=message, parse_mode='Markdown')
-            logger.info(f"✅ Payout notification sent to seller {seller_user_id}")
+            # File d'envoi centralisée (fusionnée avec les autres notifications vendeur)
+            await send_telegram_message(
+                seller_user_id,
+                message,
+                priority=PRIORITY_TRANSACTIONAL,
+                coalesce_key=f"seller:{seller_user_id}",
+                wait=False,
+                parse_mode='Markdown'
+            )
+            logger.info(f"✅ Payout notification queued for seller {seller_user_id}")
 
         except Exception as e:
             logger.error(f"Error sending payout notification: {e}")
@@ -1,9 +1,25 @@
 from typing import Optional, List, Dict
 from datetime import datetime
+import asyncio
 import random
 
 from app.domain.repositories.ticket_repo import SupportTicketRepository
 
+# Mises en file d'emails lancées depuis create_ticket (synchrone): références gardées jusqu'à la fin
+_background_emails = set()
+
+
+def _queue_in_background(coro):
+    """Planifie la mise en file d'un email depuis du code synchrone appelé par un handler"""
+    try:
+        task = asyncio.get_running_loop().create_task(coro)
+    except RuntimeError:
+        # Hors boucle asyncio (script): exécution directe
+        asyncio.run(coro)
+        return
+    _background_emails.add(task)
+    task.add_done_callback(_background_emails.discard)
+
 
 class SupportService:
     def __init__(self, ticket_repo: SupportTicketRepository) -> None:
@@ -20,21 +36,21 @@ class SupportService:
             email_service = EmailService()
 
             # Envoyer une notification email à l'admin
-            email_service.send_new_ticket_notification(
+            _queue_in_background(email_service.send_new_ticket_notification(
                 ticket_id=ticket_id,
                 user_id=user_id,
                 subject=subject[:100],
                 message=message[:2000],
                 client_email=client_email
-            )
+            ))
 
             # Envoyer une confirmation au client
-            email_service.send_ticket_confirmation_client(
+            _queue_in_background(email_service.send_ticket_confirmation_client(
                 client_email=client_email,
                 ticket_id=ticket_id,
                 subject=subject[:100],
                 message=message[:2000]
-            )
+            ))
 
         return ticket_id if created else None
 
@@ -7,6 +7,8 @@ Usage:
 
 Cronjob (daily at 3 AM):
     0 3 * * * cd /path/to/Python-bot && python -m app.tasks.backup_database
+
+Scheduled in-process as database_backup when pg_dump is available (see app/core/scheduler.py).
 """
 import os
 import sys
@@ -204,9 +206,8 @@ def send_backup_notification(success: bool, backup_size_mb: float = 0):
         backup_size_mb: Size of backup in MB
     """
     try:
-        from telegram import Bot
-
-        bot = Bot(token=core_settings.TELEGRAM_BOT_TOKEN)
+        import asyncio
+        from app.core.outbound_messages import send_telegram_message, PRIORITY_ADMIN
 
         if success:
             message = f"""✅ **Backup PostgreSQL Réussi**
@@ -224,21 +225,24 @@ def send_backup_notification(success: bool, backup_size_mb: float = 0):
 Commande manuelle :
 `python -m app.tasks.backup_database`"""
 
-        bot.send_message(
-            chat_id=core_settings.ADMIN_USER_ID,
-            text=message,
+        # Script synchrone: la coroutine d'envoi doit être exécutée (et non juste créée)
+        sent = asyncio.run(send_telegram_message(
+            core_settings.ADMIN_USER_ID,
+            message,
+            priority=PRIORITY_ADMIN,
             parse_mode='Markdown'
-        )
+        ))
 
-        logger.info("✅ Notification sent to admin")
+        if sent:
+            logger.info("✅ Notification sent to admin")
 
     except Exception as e:
         logger.error(f"❌ Failed to send notification: {e}")
 
 
-def main():
+def run_backup() -> bool:
     """
-    Main backup workflow:
+    Main backup workflow (also run in-process by the maintenance scheduler):
     1. Create database backup (pg_dump)
     2. Compress backup (gzip)
     3. Upload to Backblaze B2
@@ -284,8 +288,11 @@ def main():
         # Send notification
         send_backup_notification(success, backup_size_mb)
 
-        # Exit with appropriate code
-        sys.exit(0 if success else 1)
+    return success
+
+
+def main():
+    sys.exit(0 if run_backup() else 1)
 
 
 if __name__ == "__main__":
@@ -1,6 +1,7 @@
 """
 Cleanup Task: Remove old soft-deleted products
 Automatically cleans up products deleted more than 90 days ago with no recent orders.
+Scheduled weekly in-process as cleanup_deleted_products (see app/core/scheduler.py).
 """
 import logging
 import psycopg2
@@ -8,7 +9,7 @@ import psycopg2.extras
 from typing import Dict
 from app.core.database_init import get_postgresql_connection
 from app.core.db_pool import put_connection
-from app.services.b2_storage_service import B2StorageService
+from app.services.b2_storage_service import get_storage_service
 import os
 import shutil
 
@@ -74,7 +75,7 @@ def cleanup_old_deleted_products(dry_run: bool = False) -> Dict:
         logger.info(f"📋 Found {stats['total_found']} products to clean up")
 
         # Initialize B2 service
-        b2 = B2StorageService()
+        b2 = get_storage_service()
 
         for product in products_to_clean:
             product_id = product['product_id']
@@ -147,32 +148,6 @@ def cleanup_old_deleted_products(dry_run: bool = False) -> Dict:
         return {'error': str(e)}
 
 
-def schedule_periodic_cleanup():
-    """
-    Schedule periodic cleanup (to be called from bot startup)
-    Runs cleanup every 7 days
-    """
-    import asyncio
-
-    async def periodic_task():
-        while True:
-            try:
-                # Wait 7 days
-                await asyncio.sleep(7 * 24 * 3600)
-
-                # Run cleanup
-                logger.info("⏰ Running scheduled cleanup of old deleted products")
-                stats = cleanup_old_deleted_products(dry_run=False)
-                logger.info(f"📊 Scheduled cleanup stats: {stats}")
-
-            except Exception as e:
-                logger.error(f"❌ Scheduled cleanup error: {e}")
-                # Wait 1 hour before retrying
-                await asyncio.sleep(3600)
-
-    return asyncio.create_task(periodic_task())
-
-
 if __name__ == "__main__":
     # Manual run with dry_run
     print("🧪 Running cleanup in DRY RUN mode...")
@@ -0,0 +1,200 @@
+"""
+Partition Maintenance Task: partitions mensuelles à venir + archivage des partitions froides
+
+- ensure: crée les partitions du mois courant et des PARTITION_MONTHS_AHEAD mois suivants
+- archive: verrouille chaque partition plus ancienne que la rétention de sa table en
+  écriture (SHARE: lectures autorisées), l'exporte en CSV gzip vers R2
+  (archives/partitions/<table>/<partition>.csv.gz), vérifie la taille de l'objet,
+  l'enregistre dans partition_archives puis la détache et la supprime, dans une seule
+  transaction: aucune ligne modifiée entre l'export et le DROP, et un échec (upload,
+  verrou non obtenu) laisse la partition intacte
+
+Rétention (mois complets, 0 = jamais archivé):
+- ORDERS_ARCHIVE_AFTER_MONTHS (défaut 0): les commandes servent encore aux vérifications
+  de téléchargement (generate-download-url, redeem); n'activer qu'avec une rétention
+  supérieure à la durée d'accès garantie aux acheteurs
+- PAYOUTS_ARCHIVE_AFTER_MONTHS (défaut 24): partitions sans payout en attente uniquement
+
+Usage:
+    python -m app.tasks.partition_maintenance ensure
+    python -m app.tasks.partition_maintenance archive [--dry-run]
+
+Cronjob (mensuel, le 1er à 4h):
+    0 4 1 * * cd /path/to/Python-bot && python -m app.tasks.partition_maintenance archive
+
+Planifiée dans le serveur (app/core/scheduler.py): partitions_ensure chaque jour,
+partitions_archive le 1er du mois.
+"""
+import gzip
+import logging
+import os
+import sys
+import tempfile
+from datetime import datetime
+from typing import Dict, List
+
+from app.core.db_pool import get_connection, init_connection_pool, put_connection
+from app.core.partitioning import (
+    PARTITION_LOCK_KEY, add_months, list_partitions, maintain_partitions,
+    month_start, parse_partition_name
+)
+from app.services.b2_storage_service import get_storage_service
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_PREFIX = "archives/partitions/"
+
+# Attente max des verrous (partition, puis table parente au DETACH): au-delà la
+# partition est ignorée plutôt que de bloquer les requêtes en file derrière la tâche
+ARCHIVE_LOCK_TIMEOUT = os.getenv('PARTITION_ARCHIVE_LOCK_TIMEOUT', '5s')
+
+ARCHIVE_AFTER_MONTHS: Dict[str, int] = {
+    'orders': int(os.getenv('ORDERS_ARCHIVE_AFTER_MONTHS', '0')),
+    'seller_payouts': int(os.getenv('PAYOUTS_ARCHIVE_AFTER_MONTHS', '24')),
+}
+
+# Partition non archivable tant qu'elle contient des lignes dans cet état
+UNSETTLED_FILTERS: Dict[str, str] = {
+    'orders': "payment_status = 'pending'",
+    'seller_payouts': "payout_status = 'pending'",
+}
+
+
+def _cold_partitions(cursor, table: str, retention_months: int) -> List[str]:
+    """Partitions mensuelles entièrement antérieures à la fenêtre de rétention"""
+    cutoff = add_months(month_start(datetime.now()), -retention_months)
+    cold = []
+    for name in list_partitions(cursor, table):
+        parsed = parse_partition_name(name)
+        if parsed and add_months(parsed[1], 1) <= cutoff:
+            cold.append(name)
+    return cold
+
+
+def _export_partition(cursor, partition: str) -> str:
+    """COPY de la partition vers un fichier CSV gzip temporaire (flux, sans tout charger)"""
+    handle, path = tempfile.mkstemp(prefix=f"{partition}_", suffix=".csv.gz")
+    os.close(handle)
+    with gzip.open(path, 'wb') as archive:
+        cursor.copy_expert(f'COPY {partition} TO STDOUT WITH (FORMAT csv, HEADER)', archive)
+    return path
+
+
+def archive_partition(cursor, conn, table: str, partition: str, dry_run: bool = False) -> bool:
+    """Verrouille, exporte, vérifie puis détache et supprime une partition froide"""
+    month = parse_partition_name(partition)[1]
+
+    # Verrou avant comptage et COPY: plus d'écriture sur la partition jusqu'au commit
+    cursor.execute("SELECT set_config('lock_timeout', %s, true)", (ARCHIVE_LOCK_TIMEOUT,))
+    cursor.execute(f'LOCK TABLE {partition} IN SHARE MODE')
+
+    cursor.execute(f'SELECT COUNT(*) FROM {partition} WHERE {UNSETTLED_FILTERS[table]}')
+    if cursor.fetchone()[0]:
+        logger.warning(f"⚠️ {partition} still has unsettled rows - skipped")
+        return False
+
+    cursor.execute(f'SELECT COUNT(*) FROM {partition}')
+    row_count = cursor.fetchone()[0]
+    object_key = f"{ARCHIVE_PREFIX}{table}/{partition}.csv.gz"
+
+    if dry_run:
+        logger.info(f"🧪 [DRY RUN] Would archive {partition} ({row_count} rows) to {object_key}")
+        return False
+
+    path = _export_partition(cursor, partition)
+    try:
+        size_bytes = os.path.getsize(path)
+        storage = get_storage_service()
+        if not storage.upload_file_sync(path, object_key):
+            raise RuntimeError(f"Upload failed for {object_key}")
+
+        # L'objet doit être complet avant toute suppression
+        if storage.get_file_size(object_key) != size_bytes:
+            raise RuntimeError(f"Uploaded archive size mismatch for {object_key}")
+    finally:
+        os.remove(path)
+
+    cursor.execute('''
+        INSERT INTO partition_archives
+            (partition_name, parent_table, range_start, range_end, row_count, object_key, size_bytes)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
+        ON CONFLICT (partition_name) DO UPDATE
+        SET row_count = EXCLUDED.row_count, object_key = EXCLUDED.object_key,
+            size_bytes = EXCLUDED.size_bytes, archived_at = CURRENT_TIMESTAMP
+    ''', (partition, table, month, add_months(month, 1), row_count, object_key, size_bytes))
+    cursor.execute(f'ALTER TABLE {table} DETACH PARTITION {partition}')
+    cursor.execute(f'DROP TABLE {partition}')
+    conn.commit()
+
+    logger.info(f"📦 {partition} archived ({row_count} rows, {size_bytes / 1024:.0f} KB) -> {object_key}")
+    return True
+
+
+def archive_cold_partitions(dry_run: bool = False) -> Dict:
+    """
+    Applique la politique de rétention à toutes les tables partitionnées
+
+    Returns:
+        dict: partitions archivées / ignorées / en erreur
+    """
+    stats = {'archived': [], 'skipped': [], 'errors': []}
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        # Une seule instance: verrou de session, relâché en fin de tâche
+        cursor.execute('SELECT pg_try_advisory_lock(%s)', (PARTITION_LOCK_KEY,))
+        if not cursor.fetchone()[0]:
+            logger.info("⏭️ Partition maintenance already running elsewhere")
+            conn.rollback()
+            return stats
+        conn.commit()
+
+        try:
+            for table, retention_months in ARCHIVE_AFTER_MONTHS.items():
+                if retention_months <= 0:
+                    continue
+                for partition in _cold_partitions(cursor, table, retention_months):
+                    try:
+                        if archive_partition(cursor, conn, table, partition, dry_run=dry_run):
+                            stats['archived'].append(partition)
+                        else:
+                            stats['skipped'].append(partition)
+                        conn.commit()
+                    except Exception as e:
+                        conn.rollback()
+                        logger.error(f"❌ Archiving {partition} failed: {e}")
+                        stats['errors'].append(partition)
+        finally:
+            conn.rollback()
+            cursor.execute('SELECT pg_advisory_unlock(%s)', (PARTITION_LOCK_KEY,))
+            conn.commit()
+
+        return stats
+    finally:
+        put_connection(conn)
+
+
+def main():
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    command = sys.argv[1] if len(sys.argv) > 1 else 'ensure'
+    init_connection_pool(min_connections=1, max_connections=2)
+
+    if command == 'ensure':
+        created = maintain_partitions()
+        logger.info(f"✅ {len(created)} partition(s) created")
+    elif command == 'archive':
+        maintain_partitions()
+        stats = archive_cold_partitions(dry_run='--dry-run' in sys.argv)
+        logger.info(f"📊 Archive results: {stats}")
+        if stats['errors']:
+            sys.exit(1)
+    else:
+        print(__doc__)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
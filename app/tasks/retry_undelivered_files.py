@@ -1,6 +1,7 @@
 """
 Cronjob to retry delivery of undelivered files
 Runs every hour to detect and retry failed deliveries
+(scheduled in-process as retry_undelivered_files, see app/core/scheduler.py)
 
 Usage:
     python -m app.tasks.retry_undelivered_files
@@ -17,33 +18,27 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspa
 from app.core.database_init import get_postgresql_connection
 from app.core.db_pool import init_connection_pool, put_connection
 from app.core import settings as core_settings
-from telegram import Bot
+from app.core.partitioning import orders_recent_filter
+from app.core.outbound_messages import send_telegram_message, PRIORITY_ADMIN
 from app.integrations.ipn_server import send_formation_to_buyer
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-async def retry_undelivered_files():
+def _find_undelivered_orders():
     """
-    Find orders that are paid but file not delivered, and retry delivery.
+    Lit les commandes payées non livrées (appelé via asyncio.to_thread)
 
-    Criteria for retry:
-    - payment_status = 'completed'
-    - file_delivered = FALSE
-    - completed_at is older than 5 minutes (to avoid race conditions)
-    - completed_at is less than 7 days old (don't retry very old orders)
+    La connexion est rendue au pool avant le retour: aucune n'est gardée
+    pendant les envois Telegram.
     """
-    conn = None
+    conn = get_postgresql_connection()
     try:
-        # Initialize connection pool
-        init_connection_pool(min_connections=1, max_connections=2)
-
-        conn = get_postgresql_connection()
         cursor = conn.cursor()
 
         # Find undelivered paid orders
-        cursor.execute('''
+        cursor.execute(f'''
             SELECT
                 o.order_id,
                 o.buyer_user_id,
@@ -57,47 +52,65 @@ async def retry_undelivered_files():
               AND o.file_delivered = FALSE
               AND o.completed_at < NOW() - INTERVAL '5 minutes'
               AND o.completed_at > NOW() - INTERVAL '7 days'
+              AND {orders_recent_filter(7, 'o')}
             ORDER BY o.completed_at ASC
         ''')
 
         undelivered_orders = cursor.fetchall()
         conn.commit()
+        return undelivered_orders
 
-        if not undelivered_orders:
-            logger.info("✅ No undelivered orders found")
-            return
-
-        logger.info(f"🔍 Found {len(undelivered_orders)} undelivered orders")
-
-        # Retry delivery for each order
-        for row in undelivered_orders:
-            order_id, buyer_user_id, product_id, payment_id, completed_at, product_title = row
+    except Exception:
+        conn.rollback()
+        raise
 
-            logger.info(f"🔄 Retrying delivery for order {order_id} (product: {product_title}, completed: {completed_at})")
+    finally:
+        put_connection(conn)
 
-            try:
-                await send_formation_to_buyer(
-                    buyer_user_id=buyer_user_id,
-                    order_id=order_id,
-                    product_id=product_id,
-                    payment_id=payment_id
-                )
 
-                logger.info(f"✅ Retry successful for order {order_id}")
-
-            except Exception as e:
-                logger.error(f"❌ Retry failed for order {order_id}: {e}")
-                continue
+async def retry_undelivered_files():
+    """
+    Find orders that are paid but file not delivered, and retry delivery.
 
+    Criteria for retry:
+    - payment_status = 'completed'
+    - file_delivered = FALSE
+    - completed_at is older than 5 minutes (to avoid race conditions)
+    - completed_at is less than 7 days old (don't retry very old orders)
+    """
+    try:
+        undelivered_orders = await asyncio.to_thread(_find_undelivered_orders)
     except Exception as e:
         logger.error(f"❌ Error in retry_undelivered_files: {e}")
-        if conn:
-            conn.rollback()
         raise
 
-    finally:
-        if conn:
-            put_connection(conn)
+    if not undelivered_orders:
+        logger.info("✅ No undelivered orders found")
+        return
+
+    logger.info(f"🔍 Found {len(undelivered_orders)} undelivered orders")
+
+    # Retry delivery for each order (send_formation_to_buyer fait ses propres accès DB hors boucle)
+    for row in undelivered_orders:
+        order_id, buyer_user_id, product_id, payment_id, completed_at, product_title = row
+
+        logger.info(f"🔄 Retrying delivery for order {order_id} (product: {product_title}, completed: {completed_at})")
+
+        try:
+            sent = await send_formation_to_buyer(
+                buyer_user_id=buyer_user_id,
+                order_id=order_id,
+                product_id=product_id
+            )
+
+            if sent:
+                logger.info(f"✅ Retry successful for order {order_id}")
+            else:
+                logger.warning(f"⚠️ Retry not delivered for order {order_id}")
+
+        except Exception as e:
+            logger.error(f"❌ Retry failed for order {order_id}: {e}")
+            continue
 
 
 async def send_admin_report(undelivered_count: int):
@@ -111,8 +124,6 @@ async def send_admin_report(undelivered_count: int):
         return
 
     try:
-        bot = Bot(token=core_settings.TELEGRAM_BOT_TOKEN)
-
         message = f"""🚨 **Rapport de Livraison - Échecs**
 
 📊 **{undelivered_count}** commandes payées mais non livrées détectées.
@@ -121,13 +132,15 @@ async def send_admin_report(undelivered_count: int):
 
 🕐 Rapport généré : {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"""
 
-        await bot.send_message(
-            chat_id=core_settings.ADMIN_USER_ID,
-            text=message,
+        sent = await send_telegram_message(
+            core_settings.ADMIN_USER_ID,
+            message,
+            priority=PRIORITY_ADMIN,
             parse_mode='Markdown'
         )
 
-        logger.info(f"✅ Admin report sent ({undelivered_count} undelivered)")
+        if sent:
+            logger.info(f"✅ Admin report sent ({undelivered_count} undelivered)")
 
     except Exception as e:
         logger.error(f"❌ Failed to send admin report: {e}")
@@ -137,6 +150,7 @@ if __name__ == "__main__":
     logger.info("🚀 Starting retry_undelivered_files cronjob...")
 
     try:
+        init_connection_pool(min_connections=1, max_connections=2)
         asyncio.run(retry_undelivered_files())
         logger.info("✅ Cronjob completed successfully")
 
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+Backfill des agrégats d'avis (product_review_stats)
+À exécuter après des modifications manuelles de la table reviews (triggers désactivés,
+imports SQL, restauration partielle). Relançable sans risque.
+
+Usage:
+    python backfill_review_stats.py
+"""
+
+import sys
+from app.core.db_pool import init_connection_pool
+from app.domain.repositories.review_repo import ReviewRepository
+
+
+def backfill_review_stats():
+    """Recalcule nombre / somme / histogramme par produit depuis reviews"""
+    init_connection_pool(min_connections=1, max_connections=2)
+
+    print("🔄 Recalcul des agrégats d'avis...")
+    try:
+        products_with_reviews = ReviewRepository().backfill_review_stats()
+        print("\n✅ Backfill terminé !")
+        print(f"  ↳ Produits avec avis: {products_with_reviews}")
+    except Exception as e:
+        print(f"\n❌ Erreur: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    backfill_review_stats()
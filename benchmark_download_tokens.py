@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark du flux de téléchargement mini-app (tokens signés)
+
+1. Micro-benchmark en process: rate limit + émission + rédemption (sans DB)
+2. Bout en bout (optionnel): POST /api/generate-download-token puis GET /download/{token}
+   contre un serveur lancé, si BENCH_BASE_URL / BENCH_INIT_DATA / BENCH_USER_ID /
+   BENCH_ORDER_ID / BENCH_PRODUCT_ID sont définis.
+
+Usage:
+    python benchmark_download_tokens.py [iterations]
+"""
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.download_tokens import DownloadTokenService, DownloadTokenSigner, ReplayGuard
+from app.core.rate_limiter import MemoryRateLimitBackend, RateLimiter
+
+
+def _report(label: str, samples_ms: list):
+    samples_ms.sort()
+    p50 = statistics.median(samples_ms)
+    p95 = samples_ms[int(len(samples_ms) * 0.95) - 1]
+    print(f"  {label:<28} p50={p50:.4f}ms  p95={p95:.4f}ms  n={len(samples_ms)}")
+
+
+def bench_in_process(iterations: int):
+    print("🔬 In-process (sans DB)")
+    service = DownloadTokenService(
+        signer=DownloadTokenSigner(b"benchmark-secret", ttl_seconds=300),
+        replay_guard=ReplayGuard(),
+        rate_limiter=RateLimiter(iterations + 1, 3600, name='downloads', backend=MemoryRateLimitBackend())
+    )
+
+    issue_ms, redeem_ms = [], []
+    for i in range(iterations):
+        start = time.perf_counter()
+        service.check_rate_limit(42)
+        token = service.issue(42, f"ORD-{i}", "TBF-BENCH")
+        issue_ms.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        assert service.redeem(token) is not None
+        redeem_ms.append((time.perf_counter() - start) * 1000)
+
+    # Le rejeu doit être refusé
+    assert service.redeem(token) is None
+
+    _report("rate limit + issue", issue_ms)
+    _report("redeem (verify + replay)", redeem_ms)
+    print(f"  replay set size: {len(service.replay_guard)}")
+
+
+def bench_end_to_end(iterations: int):
+    base_url = os.getenv('BENCH_BASE_URL')
+    if not base_url:
+        print("\nℹ️ BENCH_BASE_URL non défini - benchmark bout en bout ignoré")
+        return
+
+    import httpx
+
+    body = {
+        'user_id': int(os.getenv('BENCH_USER_ID', '0')),
+        'order_id': os.getenv('BENCH_ORDER_ID', ''),
+        'product_id': os.getenv('BENCH_PRODUCT_ID', ''),
+        'telegram_init_data': os.getenv('BENCH_INIT_DATA', '')
+    }
+
+    print(f"\n🌐 Bout en bout contre {base_url}")
+    token_ms, redirect_ms = [], []
+    with httpx.Client(base_url=base_url, timeout=30) as client:
+        for _ in range(iterations):
+            start = time.perf_counter()
+            response = client.post('/api/generate-download-token', json=body)
+            token_ms.append((time.perf_counter() - start) * 1000)
+            if response.status_code != 200:
+                print(f"  ❌ generate-download-token: HTTP {response.status_code} {response.text[:100]}")
+                return
+
+            start = time.perf_counter()
+            response = client.get(f"/download/{response.json()['download_token']}", follow_redirects=False)
+            redirect_ms.append((time.perf_counter() - start) * 1000)
+            if response.status_code != 302:
+                print(f"  ❌ download: HTTP {response.status_code}")
+                return
+
+    _report("POST generate-download-token", token_ms)
+    _report("GET /download/{token}", redirect_ms)
+
+
+if __name__ == "__main__":
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    bench_in_process(iterations)
+    # Le rate limit serveur (10/h) borne le bout en bout
+    bench_end_to_end(min(iterations, 10))
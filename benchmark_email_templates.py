@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark du rendu des emails: templates précompilés vs coquille reconstruite à chaque message
+
+Scénario d'envoi en masse: notification de payout (PAYMENT_RECEIVED) à N vendeurs.
+- rebuild: ancien chemin, contenu puis coquille HTML complète (~200 lignes de CSS inline)
+  reformatés pour chaque message, HTML seul
+- rebuild+text: ancien chemin + version texte dérivée du HTML à chaque message
+- compiled: template précompilé au chargement, emplacements remplis par message
+  (sujet + HTML échappé + version texte)
+Le HTML de rebuild et de compiled doit être identique (valeurs sans caractère à échapper).
+
+Usage:
+    python benchmark_email_templates.py [--sellers 2000] [--repeat 5]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.core import email_templates
+from app.core.email_templates import PAYMENT_RECEIVED, STANDARD_LAYOUT, Template, html_to_text
+
+_LAYOUT_SOURCE = STANDARD_LAYOUT.template.source
+HEADER_TITLE = " Paiement Reçu"
+HEADER_SUBTITLE = "Votre payout a été transféré"
+
+
+def _sellers(count: int) -> list:
+    return [{
+        'seller_name': f"Vendeur {i}",
+        'payout_amount': f"{12.5 + i % 300:.2f} USDT",
+        'payout_address': f"So1ana{i:038d}",
+        'transaction_date': f"2026-10-{1 + i % 28:02d} 12:{i % 60:02d}",
+    } for i in range(count)]
+
+
+def _content_source() -> str:
+    """Source du contenu tel qu'il était formaté à chaque envoi (template compilé privé de la coquille)"""
+    header = {
+        'header_background': email_templates.HEADER_PURPLE,
+        'header_title': HEADER_TITLE,
+        'header_subtitle': HEADER_SUBTITLE,
+    }
+    prefix, suffix = _LAYOUT_SOURCE.split('{content}')
+    prefix = Template(prefix).fill_source(header)
+    suffix = Template(suffix).fill_source(header)
+    full = PAYMENT_RECEIVED.html.source
+    return full[len(prefix):len(full) - len(suffix)]
+
+
+def rebuild(content_source: str, values: dict) -> str:
+    content = content_source.format(**values)
+    return _LAYOUT_SOURCE.format(
+        header_background=email_templates.HEADER_PURPLE,
+        header_title=HEADER_TITLE,
+        header_subtitle=HEADER_SUBTITLE,
+        content=content
+    )
+
+
+def rebuild_with_text(content_source: str, values: dict):
+    body = rebuild(content_source, values)
+    return body, html_to_text(body)
+
+
+def compiled(_content_source: str, values: dict):
+    return PAYMENT_RECEIVED.render(**values)
+
+
+def bench(sellers: int, repeat: int):
+    batch = _sellers(sellers)
+    content_source = _content_source()
+
+    if rebuild(content_source, batch[0]) != compiled(content_source, batch[0]).html:
+        print("❌ MISMATCH between rebuilt and compiled HTML")
+        sys.exit(1)
+
+    print(f"Payout notification to {sellers} sellers ({repeat} runs)\n")
+    results = {}
+    for label, render in (('rebuild', rebuild), ('rebuild+text', rebuild_with_text), ('compiled', compiled)):
+        durations = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for values in batch:
+                render(content_source, values)
+            durations.append(time.perf_counter() - start)
+        median = statistics.median(durations)
+        results[label] = median
+        print(f"    {label:<13} {median * 1000:8.1f} ms  {sellers / median:10,.0f} emails/s  "
+              f"{median / sellers * 1e6:6.1f} µs/email")
+
+    print(f"\ncompiled vs rebuild: x{results['rebuild'] / results['compiled']:.1f} "
+          f"(HTML only), x{results['rebuild+text'] / results['compiled']:.1f} (HTML + text)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sellers', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    bench(args.sellers, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
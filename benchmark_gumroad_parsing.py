@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Benchmark du parsing des pages Gumroad: extraction ciblée vs DOM BeautifulSoup complet
+
+Pour chaque page de benchmark_fixtures/gumroad/ (ou d'un dossier donné, par exemple les
+pages sauvegardées par le scraper dans /tmp/gumroad_debug_*.html):
+- ciblé: extract_script_json (recherche de chaîne + json.loads), chemin rapide du scraper
+- DOM: BeautifulSoup(html, 'lxml') + soup.find('script', id=...) + json.loads (ancien chemin)
+Les deux doivent décoder le même JSON; temps médian / p95 par page et total boutique.
+
+Les fixtures sont des pages synthétiques au gabarit Gumroad (Next.js, CSS / bundles inline,
+composant React ProfileProductPage pour ?layout=profile), régénérables:
+
+Usage:
+    python benchmark_gumroad_parsing.py [dossier] [--repeat 20]
+    python benchmark_gumroad_parsing.py fixtures      # régénère benchmark_fixtures/gumroad/
+"""
+import argparse
+import importlib.util
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.gumroad_scraper import extract_script_json
+
+FIXTURES_DIR = Path(__file__).resolve().parent / 'benchmark_fixtures' / 'gumroad'
+SHOP_SIZE = 100  # produits par boutique: 1 page profil + SHOP_SIZE pages produit
+
+MARKERS = ('__NEXT_DATA__', 'ProfileProductPage')
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# FIXTURES
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+def _embedded_json(data) -> str:
+    """JSON tel que Next.js / React on Rails l'embarquent ('<' échappé)"""
+    return json.dumps(data, separators=(',', ':')).replace('<', '\\u003c').replace('>', '\\u003e')
+
+
+def _page(title: str, scripts: str, body: str) -> str:
+    css = ''.join(f".c{i}{{display:flex;margin:{i % 7}px;color:#{i * 4099 % 0xffffff:06x}}}" for i in range(1500))
+    bundle = ''.join(f"function m{i}(e,t){{return e.call(t,{i})}}" for i in range(1200))
+    return (
+        '<!DOCTYPE html><html lang="en"><head><meta charset="utf-8">'
+        f'<title>{title}</title>'
+        f'<meta property="og:title" content="{title}">'
+        '<meta property="og:description" content="Digital products by a Gumroad creator">'
+        f'<style>{css}</style>'
+        f'<script>window.__NEXT_DATA__=window.__NEXT_DATA__||{{}};{bundle}</script>'
+        '</head><body>'
+        f'{body}{scripts}'
+        '</body></html>'
+    )
+
+
+def _layout(cards: int) -> str:
+    return ''.join(
+        f'<div class="c{i % 1500} card"><a href="/l/p{i}"><img src="/thumb/{i}.jpg" alt=""></a>'
+        f'<div class="c{(i * 3) % 1500}"><span>Product {i}</span><span>$19</span></div></div>'
+        for i in range(cards)
+    )
+
+
+def _description_html(i: int) -> str:
+    paragraphs = ''.join(
+        f"<p>Module {k}: <b>stratégies</b> et exemples concrets, fichiers modèles inclus "
+        f"(produit {i}).</p><ul><li>Vidéo {k}</li><li>Checklist {k}</li></ul>"
+        for k in range(40)
+    )
+    return f"<h2>Ce que vous obtenez</h2>{paragraphs}"
+
+
+def generate_fixtures(directory: Path):
+    directory.mkdir(parents=True, exist_ok=True)
+
+    products = [{
+        'id': f"prod{i:04d}",
+        'name': f"Template pack n°{i}",
+        'permalink': f"p{i}",
+        'price_cents': 1900 + i * 100,
+        'thumbnail_url': f"https://public-files.gumroad.com/thumb{i}.jpg",
+        'ratings_count': i % 50,
+        'average_rating': 4.5,
+        'sales_count': i * 7,
+    } for i in range(SHOP_SIZE)]
+    next_data = {'props': {'pageProps': {'products': products, 'creator': {'name': 'bench'}}},
+                 'page': '/[username]', 'buildId': 'bench'}
+    (directory / 'profile.html').write_text(_page(
+        'bench | Gumroad',
+        f'<script id="__NEXT_DATA__" type="application/json">{_embedded_json(next_data)}</script>',
+        _layout(SHOP_SIZE)
+    ), encoding='utf-8')
+
+    product = dict(products[0], description_html=_description_html(0))
+    next_data = {'props': {'pageProps': {'product': product}}, 'page': '/l/[permalink]', 'buildId': 'bench'}
+    (directory / 'product_next_data.html').write_text(_page(
+        product['name'],
+        f'<script id="__NEXT_DATA__" type="application/json">{_embedded_json(next_data)}</script>',
+        _layout(24)
+    ), encoding='utf-8')
+
+    product = dict(products[1], description_html=_description_html(1))
+    (directory / 'product_layout_profile.html').write_text(_page(
+        product['name'],
+        '<script type="application/json" class="js-react-on-rails-component" '
+        f'data-component-name="ProfileProductPage" data-dom-id="ProfileProductPage-1">'
+        f'{_embedded_json({"product": product, "creator_profile": {"name": "bench"}})}</script>',
+        _layout(24)
+    ), encoding='utf-8')
+
+    for path in sorted(directory.glob('*.html')):
+        print(f"  {path.name}: {path.stat().st_size / 1024:.0f} KB")
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# MESURES
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+def _targeted(html: str):
+    for marker in MARKERS:
+        data = extract_script_json(html, marker)
+        if data is not None:
+            return data
+    return None
+
+
+def _dom(html: str):
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, 'lxml')
+    script_tag = soup.find('script', id='__NEXT_DATA__') or soup.find(
+        'script', {'data-component-name': 'ProfileProductPage'})
+    return json.loads(script_tag.string) if script_tag and script_tag.string else None
+
+
+def _timings(parse, html: str, repeat: int) -> list:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parse(html)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def _report(label: str, samples_ms: list) -> float:
+    samples_ms = sorted(samples_ms)
+    p50 = statistics.median(samples_ms)
+    p95 = samples_ms[int(len(samples_ms) * 0.95) - 1]
+    print(f"    {label:<8} p50={p50:8.2f} ms  p95={p95:8.2f} ms")
+    return p50
+
+
+def bench(directory: Path, repeat: int):
+    pages = sorted(directory.glob('*.html'))
+    if not pages:
+        print(f"No .html pages in {directory} (run: python benchmark_gumroad_parsing.py fixtures)")
+        sys.exit(1)
+
+    with_dom = importlib.util.find_spec('bs4') is not None
+    if not with_dom:
+        print("bs4/lxml not installed: targeted extraction only\n")
+
+    medians = {}
+    for path in pages:
+        html = path.read_text(encoding='utf-8', errors='replace')
+        print(f"{path.name} ({len(html) / 1024:.0f} KB)")
+
+        targeted = _targeted(html)
+        if targeted is None:
+            print("    no embedded JSON: the scraper would use the BeautifulSoup fallbacks (worker thread)")
+        if with_dom and _dom(html) != targeted:
+            print("    ❌ MISMATCH between targeted extraction and DOM parsing")
+
+        medians[path.name] = {'targeted': _report('targeted', _timings(_targeted, html, repeat))}
+        if with_dom:
+            medians[path.name]['dom'] = _report('dom', _timings(_dom, html, repeat))
+
+    # Boutique: 1 page profil + SHOP_SIZE pages produit (temps passé sur la boucle asyncio)
+    profile = medians.get('profile.html')
+    product = medians.get('product_next_data.html') or medians.get('product_layout_profile.html')
+    if profile and product:
+        print(f"\nShop of {SHOP_SIZE} products (1 profile + {SHOP_SIZE} product pages):")
+        for method in profile:
+            total = profile[method] + SHOP_SIZE * product[method]
+            print(f"    {method:<8} {total:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('target', nargs='?', default=str(FIXTURES_DIR),
+                        help="dossier de pages .html, ou 'fixtures' pour régénérer les fixtures")
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    if args.target == 'fixtures':
+        print(f"Generating fixtures in {FIXTURES_DIR}")
+        generate_fixtures(FIXTURES_DIR)
+        return
+    bench(Path(args.target), args.repeat)
+
+
+if __name__ == '__main__':
+    main()
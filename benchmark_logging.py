@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Benchmark du coût du logging par update Telegram (temps passé sur le thread de la boucle)
+
+Update simulé: un callback de carrousel (routage + 10 recherches d'image produit).
+- legacy: anciens appels (f-strings formatées d'avance, 2 logs de routage, 2 logs INFO
+  par image) + FileHandler / StreamHandler synchrones
+- queue: mêmes appels, écriture déportée (QueueHandler -> QueueListener)
+- lazy: appels actuels (formatage paresseux, recherches d'image en DEBUG) + file
+  + JSON + corrélation, sans échantillonnage
+- pipeline: lazy + échantillonnage des chemins chauds (DEFAULT_HOT_PATH_LOGGERS)
+Les lignes sont écrites dans un fichier temporaire et sur /dev/null (stdout simulé).
+
+Usage:
+    python benchmark_logging.py [--updates 5000] [--images 10]
+"""
+import argparse
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.logging import (
+    DEFAULT_HOT_PATH_LOGGERS, JsonFormatter, TEXT_FORMAT, configure_sampling, correlation_scope,
+    get_logging_stats, shutdown_logging, start_queue_logging
+)
+
+router_logger = logging.getLogger('app.integrations.telegram.callback_router')
+buy_logger = logging.getLogger('app.integrations.telegram.handlers.buy_handlers')
+
+
+def legacy_update(update_id: int, images: int):
+    callback_data = f"browse_cat_Business_{update_id % 7}"
+    user_id = 1000 + update_id % 500
+    router_logger.info(f"DEBUG: Routing callback: {callback_data} for user {user_id}")
+    router_logger.debug(f"Routing callback: {callback_data} for user {user_id}")
+    for i in range(images):
+        product_id = f"TBF-{update_id}-{i}"
+        buy_logger.info(f"🖼️ Image lookup - Product: {product_id}")
+        buy_logger.info(f"⚡ Using cached Telegram file_id: {product_id}")
+
+
+def pipeline_update(update_id: int, images: int):
+    with correlation_scope(f"upd-{update_id}"):
+        callback_data = f"browse_cat_Business_{update_id % 7}"
+        user_id = 1000 + update_id % 500
+        router_logger.info("Routing callback %s for user %s", callback_data, user_id)
+        for i in range(images):
+            product_id = f"TBF-{update_id}-{i}"
+            buy_logger.debug("🖼️ Image lookup - Product: %s", product_id)
+            buy_logger.debug("⚡ Using cached Telegram file_id: %s", product_id)
+
+
+def _handlers(directory: str, formatter: logging.Formatter, label: str):
+    file_handler = logging.FileHandler(os.path.join(directory, f"{label}.log"))
+    console_handler = logging.StreamHandler(open(os.devnull, 'w'))
+    for handler in (file_handler, console_handler):
+        handler.setLevel(logging.INFO)
+        handler.setFormatter(formatter)
+    return [file_handler, console_handler]
+
+
+def _reset_root():
+    shutdown_logging()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+    configure_sampling({name: (1.0, None) for name in DEFAULT_HOT_PATH_LOGGERS})
+
+
+def _lines(directory: str, label: str) -> int:
+    with open(os.path.join(directory, f"{label}.log"), encoding='utf-8') as f:
+        return sum(1 for _ in f)
+
+
+def bench(updates: int, images: int):
+    directory = tempfile.mkdtemp(prefix='bench_logging_')
+    # (libellé, update, file, format, échantillonnage)
+    scenarios = (
+        ('legacy', legacy_update, False, logging.Formatter(TEXT_FORMAT), False),
+        ('queue', legacy_update, True, logging.Formatter(TEXT_FORMAT), False),
+        ('lazy', pipeline_update, True, JsonFormatter(), False),
+        ('pipeline', pipeline_update, True, JsonFormatter(), True),
+    )
+
+    print(f"{updates} updates, {images} product images each\n")
+    results = {}
+    for label, update, queued, formatter, sampled in scenarios:
+        _reset_root()
+        handlers = _handlers(directory, formatter, label)
+        if queued:
+            # File assez grande pour ne rien abandonner: seul le coût côté boucle est mesuré
+            start_queue_logging(handlers, queue_size=updates * (2 * images + 2))
+            if sampled:
+                configure_sampling(DEFAULT_HOT_PATH_LOGGERS)
+        else:
+            root = logging.getLogger()
+            root.setLevel(logging.INFO)
+            for handler in handlers:
+                root.addHandler(handler)
+
+        samples = []
+        start = time.perf_counter()
+        for update_id in range(updates):
+            t0 = time.perf_counter()
+            update(update_id, images)
+            samples.append(time.perf_counter() - t0)
+        loop_time = time.perf_counter() - start
+        dropped = get_logging_stats()['dropped']
+
+        _reset_root()
+        drained = time.perf_counter() - start
+        results[label] = statistics.mean(samples)
+        samples.sort()
+        print(f"    {label:<9} mean {statistics.mean(samples) * 1e6:7.1f} µs/update   "
+              f"p99 {samples[int(len(samples) * 0.99)] * 1e6:7.1f} µs   loop {loop_time * 1000:7.0f} ms   "
+              f"drained {drained * 1000:7.0f} ms   lines {_lines(directory, label):6d}   dropped {dropped}")
+
+    print("\nloop time per update vs legacy: " + ", ".join(
+        f"{label} x{results['legacy'] / results[label]:.1f}" for label in ('queue', 'lazy', 'pipeline')
+    ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--updates', type=int, default=5000)
+    parser.add_argument('--images', type=int, default=10)
+    args = parser.parse_args()
+    bench(args.updates, args.images)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Catalogue des formes de requêtes + vérification des plans (EXPLAIN)
+
+1. catalogue: extrait (AST) chaque requête SQL exécutée par app/domain/repositories
+   et écrit QUERY_SHAPES.md (aucune base requise)
+2. explain: crée un schéma jetable, applique les migrations, injecte un jeu de
+   données volumineux, puis vérifie que chaque requête chaude utilise un index.
+   Les autres requêtes du catalogue sont analysées en EXPLAIN (GENERIC_PLAN)
+   (PostgreSQL 16+) et les Seq Scan sont signalés.
+
+Usage:
+    python benchmark_query_plans.py catalogue
+    python benchmark_query_plans.py explain [products]   # DATABASE_URL requis
+"""
+import ast
+import os
+import re
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.partitioning import ORDERS_RECENT_FILTER, add_months, ensure_monthly_partitions, month_start
+
+ROOT = Path(__file__).resolve().parent
+REPOSITORIES_DIR = ROOT / 'app' / 'domain' / 'repositories'
+CATALOGUE_PATH = ROOT / 'QUERY_SHAPES.md'
+BENCH_SCHEMA = 'bench_query_plans'
+
+# Requêtes chaudes: (libellé, SQL, paramètres, index attendu)
+HOT_QUERIES = [
+    ("products by category (carousel)",
+     """SELECT p.* FROM products p WHERE p.category = %s AND p.status = 'active'
+        ORDER BY p.created_at DESC LIMIT 10 OFFSET 0""",
+     ('Business',), 'idx_products_active_category_created'),
+    ("count products by category",
+     "SELECT COUNT(*) FROM products WHERE category = %s AND status = 'active'",
+     ('Business',), 'idx_products_active_category_created'),
+    ("products by seller",
+     "SELECT p.* FROM products p WHERE p.seller_user_id = %s ORDER BY p.created_at DESC LIMIT 10",
+     (1001,), 'idx_products_seller_created'),
+    ("seller analytics 30 days",
+     """SELECT DATE(completed_at), COALESCE(SUM(product_price_usd), 0), COUNT(*)
+        FROM orders WHERE seller_user_id = %s AND payment_status = 'completed'
+          AND completed_at >= NOW() - INTERVAL '30 days'
+          AND """ + ORDERS_RECENT_FILTER + """
+        GROUP BY DATE(completed_at)""",
+     (1001,), 'idx_orders_seller_completed'),
+    ("seller revenue totals",
+     """SELECT COALESCE(SUM(product_price_usd), 0), COALESCE(SUM(seller_revenue_usd), 0), COUNT(*)
+        FROM orders WHERE seller_user_id = %s AND payment_status = 'completed'""",
+     (1001,), 'idx_orders_seller_completed'),
+    ("buyer library",
+     """SELECT product_id, completed_at, download_count FROM orders
+        WHERE buyer_user_id = %s AND payment_status = 'completed'""",
+     (2001,), 'idx_orders_buyer_completed'),
+    ("buyer owns product",
+     """SELECT COUNT(*) FROM orders
+        WHERE buyer_user_id = %s AND product_id = %s AND payment_status = 'completed'""",
+     (2001, 'TBF-BENCH-1'), 'idx_orders_buyer_completed'),
+    ("reviews rating distribution",
+     "SELECT COUNT(*) FROM reviews WHERE product_id = %s AND rating = %s",
+     ('TBF-BENCH-1', 5), 'idx_reviews_product_rating'),
+    ("reviews page",
+     """SELECT r.* FROM reviews r WHERE r.product_id = %s
+        ORDER BY r.created_at DESC LIMIT 5 OFFSET 0""",
+     ('TBF-BENCH-1',), 'idx_reviews_product_created'),
+    ("download token lookup",
+     "SELECT user_id, order_id, product_id, expires_at, used_at FROM download_tokens WHERE token = %s",
+     ('00000000-0000-0000-0000-000000000001',), 'download_tokens_pkey'),
+]
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# CATALOGUE (AST)
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+def _resolve_projection(node) -> str:
+    """{ProductCard.select_list()} -> liste de colonnes réelle (app.domain.views)"""
+    from app.domain import views
+
+    if (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)
+            and node.func.attr == 'select_list' and isinstance(node.func.value, ast.Name)):
+        view = getattr(views, node.func.value.id, None)
+        if view is not None:
+            return view.select_list()
+    return '{' + ast.unparse(node) + '}'
+
+
+def _literal_sql(node, assignments):
+    """Texte SQL d'un argument execute(): littéral, f-string ou variable assignée"""
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    if isinstance(node, ast.JoinedStr):
+        parts = []
+        for value in node.values:
+            if isinstance(value, ast.Constant):
+                parts.append(value.value)
+            else:
+                parts.append(_resolve_projection(value.value))
+        return ''.join(parts)
+    if isinstance(node, ast.Name) and node.id in assignments:
+        return _literal_sql(assignments[node.id], assignments)
+    if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Add):
+        left = _literal_sql(node.left, assignments)
+        right = _literal_sql(node.right, assignments)
+        if left is not None and right is not None:
+            return left + right
+    return None
+
+
+def normalize_sql(sql: str) -> str:
+    """Forme de requête: espaces compactés, littéraux conservés, %s gardés"""
+    return re.sub(r'\s+', ' ', sql).strip()
+
+
+def extract_query_shapes(directory: Path = REPOSITORIES_DIR):
+    """
+    Returns:
+        list of (module, function, line, sql) pour chaque cursor.execute() / execute_values()
+    """
+    shapes = []
+    for path in sorted(directory.glob('*.py')):
+        tree = ast.parse(path.read_text(encoding='utf-8'))
+        for func in ast.walk(tree):
+            if not isinstance(func, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                continue
+            assignments = {}
+            for node in ast.walk(func):
+                if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+                    assignments[node.targets[0].id] = node.value
+            for node in ast.walk(func):
+                if not isinstance(node, ast.Call):
+                    continue
+                name = node.func.attr if isinstance(node.func, ast.Attribute) else getattr(node.func, 'id', None)
+                # execute(sql, ...) / execute_values(cursor, sql, rows)
+                sql_index = {'execute': 0, 'execute_values': 1}.get(name)
+                if sql_index is not None and len(node.args) > sql_index:
+                    sql = _literal_sql(node.args[sql_index], assignments)
+                    shapes.append((path.stem, func.name, node.lineno,
+                                   normalize_sql(sql) if sql else '<dynamic SQL>'))
+    # Un même appel peut être vu depuis une fonction imbriquée: dédoublonner
+    seen, unique = set(), []
+    for shape in sorted(shapes, key=lambda s: (s[0], s[2])):
+        if (shape[0], shape[2]) not in seen:
+            seen.add((shape[0], shape[2]))
+            unique.append(shape)
+    return unique
+
+
+def write_catalogue(shapes) -> Path:
+    lines = [
+        "# Query shapes - app/domain/repositories",
+        "",
+        "Généré par `python benchmark_query_plans.py catalogue` — ne pas éditer à la main.",
+        "Index associés: `app/core/migrations/versions/0002_hot_path_indexes.py`.",
+        "",
+    ]
+    current_module = None
+    for module, function, line, sql in shapes:
+        if module != current_module:
+            if current_module is not None:
+                lines.append("")
+            lines += [f"## {module}", "", "| Méthode | Ligne | SQL |", "|---|---|---|"]
+            current_module = module
+        escaped_sql = sql.replace('|', '\\|')
+        lines.append(f"| `{function}` | {line} | `{escaped_sql}` |")
+    lines.append("")
+    CATALOGUE_PATH.write_text('\n'.join(lines), encoding='utf-8')
+    return CATALOGUE_PATH
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# EXPLAIN
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+def _seed(cursor, products: int):
+    """Jeu de données volumineux: products, users, orders (x10), reviews (x3)"""
+    sellers = max(products // 50, 1)
+    buyers = max(products * 2, 1)
+    cursor.execute('''
+        INSERT INTO users (user_id, first_name, is_seller)
+        SELECT g, 'user' || g, g < 2000 FROM generate_series(1000, 1000 + %s) g
+    ''', (sellers + buyers + 1000,))
+    cursor.execute('''
+        INSERT INTO products (product_id, title, description, category, price_usd, seller_user_id,
+                              status, created_at, main_file_url)
+        SELECT 'TBF-BENCH-' || g, 'Product ' || g, 'Description ' || g,
+               (ARRAY['Finance & Crypto','Marketing Digital','Développement','Design & Créatif',
+                      'Business','Formation Pro','Outils & Tech'])[1 + g %% 7],
+               10 + g %% 90, 1000 + g %% %s,
+               CASE WHEN g %% 10 = 0 THEN 'inactive' ELSE 'active' END,
+               NOW() - (g || ' minutes')::interval, 'products/file' || g || '.pdf'
+        FROM generate_series(1, %s) g
+    ''', (sellers, products))
+    cursor.execute('''
+        INSERT INTO orders (order_id, buyer_user_id, seller_user_id, product_id, product_title,
+                            product_price_usd, seller_revenue_usd, platform_commission_usd,
+                            payment_status, created_at, completed_at)
+        SELECT 'TBO-BENCH-' || g, 2000 + g %% %s, 1000 + (1 + g %% %s) %% %s, 'TBF-BENCH-' || (1 + g %% %s), 'Product',
+               20, 20, 1.49,
+               CASE WHEN g %% 5 = 0 THEN 'waiting' ELSE 'completed' END,
+               NOW() - (g %% 90 || ' days')::interval, NOW() - (g %% 90 || ' days')::interval
+        FROM generate_series(1, %s) g
+    ''', (buyers, products, sellers, products, products * 10))
+    cursor.execute('''
+        INSERT INTO reviews (product_id, buyer_user_id, rating, review_text)
+        SELECT 'TBF-BENCH-' || (1 + g %% %s), 2000 + g %% %s, 1 + g %% 5, 'review'
+        FROM generate_series(1, %s) g
+        ON CONFLICT DO NOTHING
+    ''', (products, buyers, products * 3))
+    cursor.execute('''
+        INSERT INTO download_tokens (token, user_id, order_id, product_id, expires_at)
+        SELECT md5(g::text)::uuid, 2000 + g, 'TBO-BENCH-' || g, 'TBF-BENCH-1', NOW() + INTERVAL '5 minutes'
+        FROM generate_series(1, %s) g
+    ''', (products,))
+    for table in ('users', 'products', 'orders', 'reviews', 'download_tokens'):
+        cursor.execute(f'ANALYZE {table}')
+
+
+def _plan_text(cursor, sql, params=None, generic=False):
+    if generic:
+        index = iter(range(1, 100))
+        sql = re.sub(r'%s', lambda _: f'${next(index)}', sql)
+        cursor.execute(f'EXPLAIN (GENERIC_PLAN) {sql}')
+    else:
+        cursor.execute(f'EXPLAIN {sql}', params)
+    return '\n'.join(row[0] for row in cursor.fetchall())
+
+
+def _index_names(cursor, index: str):
+    """Index et ses index de partition (noms générés par PostgreSQL à l'ATTACH)"""
+    cursor.execute('''
+        SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass(%s)
+    ''', (index,))
+    return [index] + [row[0] for row in cursor.fetchall()]
+
+
+def _seq_scans(plan: str):
+    """Seq Scan hors partitions par défaut (vides, le planificateur peut les parcourir)"""
+    return [line for line in plan.splitlines() if 'Seq Scan' in line and '_default' not in line]
+
+
+def run_explain(products: int):
+    from app.core.db_pool import init_connection_pool, get_connection, put_connection
+    from app.core.migrations import MigrationRunner
+
+    init_connection_pool(min_connections=1, max_connections=2)
+    conn = get_connection()
+    conn.autocommit = True
+    cursor = conn.cursor()
+
+    print(f"🧪 Schéma jetable {BENCH_SCHEMA} ({products} produits, {products * 10} commandes)")
+    cursor.execute(f'DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE')
+    cursor.execute(f'CREATE SCHEMA {BENCH_SCHEMA}')
+    # search_path de session: migrations et seed s'appliquent au schéma jetable (public intact)
+    cursor.execute(f'SET search_path TO {BENCH_SCHEMA}')
+    conn.autocommit = False
+
+    failures = 0
+    try:
+        runner = MigrationRunner()
+        runner._ensure_table(cursor, conn)
+        for migration in runner.migrations:
+            runner._apply(conn, migration)
+
+        start = time.perf_counter()
+        _seed(cursor, products)
+        # Partitions des 90 jours de commandes générées (lignes reprises de orders_default)
+        current = month_start(datetime.now())
+        ensure_monthly_partitions(cursor, 'orders', add_months(current, -4), current)
+        cursor.execute('ANALYZE orders')
+        conn.commit()
+        print(f"  seed: {time.perf_counter() - start:.1f}s")
+
+        print("\n🔥 Requêtes chaudes")
+        for label, sql, params, expected_index in HOT_QUERIES:
+            plan = _plan_text(cursor, sql, params)
+            ok = any(name in plan for name in _index_names(cursor, expected_index)) and not _seq_scans(plan)
+            failures += 0 if ok else 1
+            partitions = len(set(re.findall(r' on (orders_y\d{4}m\d{2})', plan)))
+            pruning = f" ({partitions} partition(s) orders)" if partitions else ''
+            print(f"  {'✅' if ok else '❌'} {label:<34} {expected_index}{pruning}")
+            if not ok:
+                print('      ' + plan.replace('\n', '\n      '))
+
+        print("\n📋 Catalogue (EXPLAIN GENERIC_PLAN)")
+        seq_scans = 0
+        for module, function, line, sql in extract_query_shapes():
+            if sql == '<dynamic SQL>' or '{' in sql or not sql.upper().startswith(('SELECT', 'UPDATE', 'DELETE')):
+                continue
+            try:
+                plan = _plan_text(cursor, sql, generic=True)
+            except Exception as e:
+                conn.rollback()
+                print(f"  ⚪ {module}.{function}:{line} - non analysable ({str(e).splitlines()[0]})")
+                continue
+            conn.rollback()
+            if _seq_scans(plan):
+                seq_scans += 1
+                print(f"  ⚠️ {module}.{function}:{line} - Seq Scan")
+        print(f"  {seq_scans} requête(s) du catalogue en Seq Scan")
+
+    finally:
+        conn.rollback()
+        conn.autocommit = True
+        cursor.execute(f'DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE')
+        cursor.execute('RESET search_path')
+        conn.autocommit = False
+        put_connection(conn)
+
+    if failures:
+        print(f"\n❌ {failures} requête(s) chaude(s) sans index")
+        sys.exit(1)
+    print("\n✅ Toutes les requêtes chaudes utilisent un index")
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else 'catalogue'
+    if command == 'catalogue':
+        shapes = extract_query_shapes()
+        path = write_catalogue(shapes)
+        print(f"✅ {len(shapes)} requêtes cataloguées -> {path.name}")
+    elif command == 'explain':
+        run_explain(int(sys.argv[2]) if len(sys.argv) > 2 else 20000)
+    else:
+        print(__doc__)
+        sys.exit(1)
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark du rate limiter: fenêtre glissante (listes de timestamps) vs GCRA
+
+Scénario: N utilisateurs actifs envoient chacun une rafale de messages (au-delà de la limite).
+- sliding: ancien RateLimiter (liste reconstruite à chaque appel, min() pour l'attente,
+  statistiques globales = parcours de tous les utilisateurs)
+- gcra: RateLimiter actuel (un TAT par clé, O(1), éviction des clés expirées)
+Mesure: coût d'un is_allowed, d'un get_wait_time et d'un get_global_stats, puis
+mémoire conservée après l'expiration de la fenêtre.
+
+Usage:
+    python benchmark_rate_limiter.py [--users 20000] [--requests 15] [--limit 10]
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.rate_limiter import MemoryRateLimitBackend, RateLimiter
+
+
+class SlidingWindowLimiter:
+    """Algorithme de l'ancien RateLimiter (nettoyage périodique désactivé: fenêtre < 5 min)"""
+
+    def __init__(self, max_requests: int, window_seconds: int):
+        self.max_requests = max_requests
+        self.window_seconds = window_seconds
+        self._requests = defaultdict(list)
+
+    def is_allowed(self, user_id: int):
+        now = time.time()
+        cutoff = now - self.window_seconds
+        timestamps = [ts for ts in self._requests[user_id] if ts > cutoff]
+        self._requests[user_id] = timestamps
+        if len(timestamps) >= self.max_requests:
+            return False, 0
+        timestamps.append(now)
+        return True, self.max_requests - len(timestamps)
+
+    def get_wait_time(self, user_id: int) -> int:
+        timestamps = self._requests.get(user_id, [])
+        if len(timestamps) < self.max_requests:
+            return 0
+        cutoff = time.time() - self.window_seconds
+        oldest = min(timestamps)
+        return 0 if oldest <= cutoff else int(oldest - cutoff) + 1
+
+    def get_global_stats(self):
+        cutoff = time.time() - self.window_seconds
+        active = [ts for timestamps in self._requests.values() for ts in timestamps if ts > cutoff]
+        return {'total_users_tracked': len(self._requests), 'total_requests_in_window': len(active)}
+
+
+def _burst(limiter, users: int, requests: int, first_user: int = 0):
+    for _ in range(requests):
+        for user_id in range(first_user, first_user + users):
+            limiter.is_allowed(user_id)
+
+
+def _run(label: str, make_limiter, users: int, requests: int, window: float):
+    # Temps (sans tracemalloc, qui pénalise les allocations)
+    limiter = make_limiter()
+    start = time.perf_counter()
+    _burst(limiter, users, requests)
+    check_us = (time.perf_counter() - start) / (users * requests) * 1e6
+
+    start = time.perf_counter()
+    for user_id in range(users):
+        limiter.get_wait_time(user_id)
+    wait_us = (time.perf_counter() - start) / users * 1e6
+
+    start = time.perf_counter()
+    limiter.get_global_stats()
+    stats_ms = (time.perf_counter() - start) * 1000
+
+    # Mémoire: même rafale sur un limiter neuf
+    limiter = make_limiter()
+    tracemalloc.start()
+    _burst(limiter, users, requests)
+    peak = tracemalloc.get_traced_memory()[1]
+
+    # Fenêtre écoulée: de nouveaux utilisateurs arrivent, les anciens sont inactifs
+    time.sleep(window + 0.05)
+    _burst(limiter, users // 10, 1, first_user=users)
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    print(f"    {label:<8} check {check_us:5.2f} µs   wait {wait_us:5.2f} µs   "
+          f"stats {stats_ms:8.2f} ms   peak {peak / 1e6:6.1f} MB   after window {retained / 1e6:6.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=20000)
+    parser.add_argument('--requests', type=int, default=15, help="requêtes par utilisateur")
+    parser.add_argument('--limit', type=int, default=10, help="requêtes autorisées par fenêtre")
+    parser.add_argument('--window', type=float, default=2.0, help="fenêtre en secondes")
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    print(f"{args.users} users x {args.requests} requests, limit {args.limit} / {args.window}s\n")
+    _run('sliding', lambda: SlidingWindowLimiter(args.limit, args.window),
+         args.users, args.requests, args.window)
+    _run('gcra', lambda: RateLimiter(args.limit, args.window, name='bench', backend=MemoryRateLimitBackend()),
+         args.users, args.requests, args.window)
+
+
+if __name__ == '__main__':
+    main()
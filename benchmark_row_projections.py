@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Benchmark des projections de lecture: SELECT p.* + RealDictCursor vs ProductCard
+
+Mesure, par page de carrousel (100 produits, comme show_category_products):
+- octets transférés (taille texte des valeurs; pg_column_size en mode --db)
+- allocations Python (tracemalloc) pour matérialiser la page
+- temps de construction
+
+1. Synthétique (sans DB): lignes produits réalistes (description ~2 Ko, URLs, file_ids)
+2. PostgreSQL (--db): requêtes réelles sur une catégorie via le pool (DATABASE_URL / PG*)
+
+Usage:
+    python benchmark_row_projections.py [--db [category]] [--page-size 100]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.domain.views import ProductCard
+
+# Colonnes de SELECT p.*, u.seller_name, u.seller_rating, u.seller_bio (ancienne requête carrousel)
+FULL_COLUMNS = (
+    'product_id', 'seller_user_id', 'title', 'description', 'category', 'price_usd',
+    'main_file_url', 'file_size_mb', 'cover_image_url', 'thumbnail_url',
+    'telegram_thumb_file_id', 'telegram_cover_file_id', 'preview_url', 'views_count',
+    'sales_count', 'rating', 'reviews_count', 'imported_rating', 'imported_reviews_count',
+    'status', 'deactivated_by_admin', 'admin_deactivation_reason', 'created_at', 'updated_at',
+    'imported_from', 'imported_url', 'source_profile',
+    'seller_name', 'seller_rating', 'seller_bio'
+)
+
+LEGACY_SQL = '''
+    SELECT p.*, u.seller_name, u.seller_rating, u.seller_bio
+    FROM products p
+    LEFT JOIN users u ON p.seller_user_id = u.user_id
+    WHERE p.category = %s AND p.status = 'active'
+    ORDER BY p.created_at DESC
+    LIMIT %s OFFSET 0
+'''
+
+CARD_SQL = f'''
+    SELECT {ProductCard.select_list()}
+    FROM products p
+    LEFT JOIN users u ON p.seller_user_id = u.user_id
+    WHERE p.category = %s AND p.status = 'active'
+    ORDER BY p.created_at DESC
+    LIMIT %s OFFSET 0
+'''
+
+
+def _synthetic_full_row(i: int) -> dict:
+    url = f"https://f003.backblazeb2.com/file/uzeur-marketplace/products/TBF-{i:06d}"
+    return {
+        'product_id': f"TBF-{i:06d}-ABCDEF",
+        'seller_user_id': 5_000_000_000 + i,
+        'title': f"Formation trading avancée n°{i} - stratégies et gestion du risque",
+        'description': ("Apprenez les bases puis les stratégies avancées. " * 40)[:2000],
+        'category': 'Finance & Crypto',
+        'price_usd': 49.0,
+        'main_file_url': f"{url}/main.pdf",
+        'file_size_mb': 12.4,
+        'cover_image_url': f"{url}/cover.jpg",
+        'thumbnail_url': f"{url}/thumb.jpg",
+        'telegram_thumb_file_id': 'AgACAgQAAxkDAAI' + 'x' * 70,
+        'telegram_cover_file_id': 'AgACAgQAAxkDAAI' + 'y' * 70,
+        'preview_url': f"{url}/preview.png",
+        'views_count': 1200 + i,
+        'sales_count': 37,
+        'rating': 4.6,
+        'reviews_count': 12,
+        'imported_rating': 4.5,
+        'imported_reviews_count': 80,
+        'status': 'active',
+        'deactivated_by_admin': False,
+        'admin_deactivation_reason': None,
+        'created_at': datetime(2025, 1, 1, 12, 0, 0),
+        'updated_at': datetime(2025, 1, 2, 12, 0, 0),
+        'imported_from': 'gumroad',
+        'imported_url': f"https://seller{i}.gumroad.com/l/product-{i}",
+        'source_profile': f"https://seller{i}.gumroad.com",
+        'seller_name': f"Vendeur {i}",
+        'seller_rating': 4.8,
+        'seller_bio': ("Trader depuis 10 ans, j'enseigne la gestion du risque. " * 6)[:300],
+    }
+
+
+def _wire_bytes(rows) -> int:
+    """Approximation du protocole texte: longueur encodée de chaque valeur non NULL"""
+    total = 0
+    for row in rows:
+        for value in row:
+            if value is not None:
+                total += len(str(value).encode('utf-8'))
+    return total
+
+
+def _measure(label: str, build, repeat: int = 20):
+    """Allocation (tracemalloc) et temps de matérialisation d'une page"""
+    tracemalloc.start()
+    page = build()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del page
+
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        build()
+        samples.append((time.perf_counter() - start) * 1000)
+
+    print(f"  {label:<34} retained={current / 1024:8.1f} KiB  peak={peak / 1024:8.1f} KiB  "
+          f"build p50={statistics.median(samples):.3f}ms")
+    return current
+
+
+def bench_synthetic(page_size: int):
+    print(f"🔬 Synthétique: page carrousel de {page_size} produits")
+    full_rows = [tuple(_synthetic_full_row(i)[c] for c in FULL_COLUMNS) for i in range(page_size)]
+
+    card_rows = []
+    for i in range(page_size):
+        source = _synthetic_full_row(i)
+        source['description_excerpt'] = source['description'][:200]
+        card_rows.append(tuple(source[c] for c in ProductCard.COLUMNS))
+
+    before_bytes = _wire_bytes(full_rows)
+    after_bytes = _wire_bytes(card_rows)
+    print(f"  octets transférés (texte)         before={before_bytes / 1024:8.1f} KiB  "
+          f"after={after_bytes / 1024:8.1f} KiB  (-{100 - after_bytes * 100 / before_bytes:.0f}%)")
+
+    # Les tuples viennent du driver dans les deux cas: on mesure la matérialisation côté Python
+    before = _measure("RealDictRow (dict par ligne)", lambda: [dict(zip(FULL_COLUMNS, r)) for r in full_rows])
+    after = _measure("ProductCard (tuple + __slots__)", lambda: ProductCard.from_rows(card_rows))
+    print(f"  allocation retenue: -{100 - after * 100 / before:.0f}% par page")
+
+
+def bench_database(category: str, page_size: int):
+    import psycopg2.extras
+    from app.core.db_pool import init_connection_pool, get_connection, put_connection
+
+    print(f"🐘 PostgreSQL: catégorie '{category}', page de {page_size}")
+    init_connection_pool(min_connections=1, max_connections=2)
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        for label, sql in (('SELECT p.* (avant)', LEGACY_SQL), ('ProductCard (après)', CARD_SQL)):
+            cursor.execute(f"SELECT COALESCE(SUM(pg_column_size(t.*)), 0), COUNT(*) FROM ({sql}) t",
+                           (category, page_size))
+            size, count = cursor.fetchone()
+            print(f"  {label:<34} {count} lignes, {size / 1024:8.1f} KiB (pg_column_size)")
+        conn.rollback()
+
+        def legacy_page():
+            dict_cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+            dict_cursor.execute(LEGACY_SQL, (category, page_size))
+            return dict_cursor.fetchall()
+
+        def card_page():
+            tuple_cursor = conn.cursor()
+            tuple_cursor.execute(CARD_SQL, (category, page_size))
+            return ProductCard.from_rows(tuple_cursor.fetchall())
+
+        before = _measure("RealDictCursor + SELECT p.*", legacy_page, repeat=10)
+        after = _measure("cursor + ProductCard", card_page, repeat=10)
+        if before:
+            print(f"  allocation retenue: -{100 - after * 100 / before:.0f}% par page")
+        conn.rollback()
+    finally:
+        put_connection(conn)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', nargs='?', const='', default=None, metavar='CATEGORY',
+                        help="Mesurer contre PostgreSQL (catégorie la plus fournie par défaut)")
+    parser.add_argument('--page-size', type=int, default=100)
+    args = parser.parse_args()
+
+    bench_synthetic(args.page_size)
+
+    if args.db is not None:
+        category = args.db
+        if not category:
+            from app.core.db_pool import init_connection_pool, get_connection, put_connection
+            init_connection_pool(min_connections=1, max_connections=2)
+            conn = get_connection()
+            try:
+                cursor = conn.cursor()
+                cursor.execute("SELECT name FROM categories ORDER BY products_count DESC LIMIT 1")
+                row = cursor.fetchone()
+                category = row[0] if row else ''
+            finally:
+                put_connection(conn)
+        print()
+        bench_database(category, args.page_size)
+
+
+if __name__ == '__main__':
+    main()
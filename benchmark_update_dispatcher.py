@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Benchmark du traitement des updates webhook: inline vs UpdateDispatcher
+
+Rafale d'updates de N utilisateurs (plusieurs updates chacun), handler simulé
+(await de 20 à 120 ms: appels API Telegram / DB).
+- inline: ancien webhook, chaque requête attend process_update (Telegram ouvre
+  jusqu'à 40 connexions webhook en parallèle, sans ordre par utilisateur)
+- dispatcher: le webhook met l'update en file et répond; workers bornés, ordre par utilisateur
+Mesures: temps de réponse du webhook (ack), durée totale, updates traitées hors
+ordre pour un même utilisateur (ou en parallèle de la précédente), refus/délestages.
+
+Usage:
+    python benchmark_update_dispatcher.py [--users 200] [--per-user 5] [--concurrency 10]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import statistics
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.update_dispatcher import UpdateDispatcher
+
+TELEGRAM_WEBHOOK_CONNECTIONS = 40
+
+
+def _updates(users: int, per_user: int) -> list:
+    """
+    Rafales entrelacées: chaque utilisateur envoie ses updates coup sur coup
+    (double clic, message + bouton), mélangées avec celles des autres
+    """
+    rng = random.Random(0)
+    remaining = {user_id: per_user for user_id in range(users)}
+    updates = []
+    while remaining:
+        user_id = rng.choice(list(remaining))
+        burst = min(remaining[user_id], rng.randint(1, 3))
+        for _ in range(burst):
+            updates.append(SimpleNamespace(
+                update_id=len(updates), effective_user=SimpleNamespace(id=user_id), effective_chat=None,
+                seq=per_user - remaining[user_id]
+            ))
+            remaining[user_id] -= 1
+        if not remaining[user_id]:
+            del remaining[user_id]
+    return updates
+
+
+class Handler:
+    """process_update simulé: vérifie l'ordre et l'absence de parallélisme par utilisateur"""
+
+    def __init__(self, seed: int):
+        self.random = random.Random(seed)
+        self.next_seq = {}
+        self.busy = set()
+        self.violations = 0
+        self.done = 0
+
+    async def __call__(self, update):
+        user_id = update.effective_user.id
+        if user_id in self.busy or self.next_seq.get(user_id, 0) != update.seq:
+            self.violations += 1
+        self.busy.add(user_id)
+        self.next_seq[user_id] = update.seq + 1
+        await asyncio.sleep(self.random.uniform(0.02, 0.12))
+        self.busy.discard(user_id)
+        self.done += 1
+
+
+async def run_inline(updates: list):
+    handler = Handler(seed=1)
+    connections = asyncio.Semaphore(TELEGRAM_WEBHOOK_CONNECTIONS)
+    acks = []
+
+    async def deliver(update):
+        async with connections:
+            start = time.perf_counter()
+            await handler(update)
+            acks.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(deliver(update) for update in updates))
+    return acks, time.perf_counter() - start, handler, {}
+
+
+async def run_dispatcher(updates: list, concurrency: int, max_queue: int):
+    handler = Handler(seed=1)
+    dispatcher = UpdateDispatcher(handler, max_concurrency=concurrency, max_queue=max_queue)
+    dispatcher.start()
+    acks = []
+    retries = []
+
+    start = time.perf_counter()
+    for update in updates:
+        t0 = time.perf_counter()
+        accepted = dispatcher.submit(update)
+        acks.append(time.perf_counter() - t0)
+        if not accepted:
+            retries.append(update)
+        await asyncio.sleep(0)
+
+    # Updates refusées (503): renvoyées par Telegram
+    while retries:
+        await asyncio.sleep(0.05)
+        retries = [update for update in retries if not dispatcher.submit(update)]
+
+    while handler.done < dispatcher.get_stats()['accepted']:
+        await asyncio.sleep(0.01)
+    elapsed = time.perf_counter() - start
+    stats = dispatcher.get_stats()
+    await dispatcher.stop()
+    return acks, elapsed, handler, stats
+
+
+def _report(label: str, acks: list, elapsed: float, handler: Handler, total: int):
+    acks.sort()
+    print(f"    {label:<11} ack p50 {statistics.median(acks) * 1000:8.3f} ms   "
+          f"p99 {acks[int(len(acks) * 0.99)] * 1000:8.3f} ms   total {elapsed:6.2f} s   "
+          f"{total / elapsed:6.0f} updates/s   order violations {handler.violations}")
+
+
+async def bench(users: int, per_user: int, concurrency: int, max_queue: int):
+    updates = _updates(users, per_user)
+    print(f"{len(updates)} updates ({users} users x {per_user}), handler 20-120 ms\n")
+
+    acks, elapsed, handler, _ = await run_inline(updates)
+    _report('inline', acks, elapsed, handler, len(updates))
+
+    acks, elapsed, handler, stats = await run_dispatcher(updates, concurrency, max_queue)
+    _report(f'dispatch x{concurrency}', acks, elapsed, handler, len(updates))
+    print(f"\n    dispatcher: max queued {stats['max_queued']}, 503 responses (incl. redeliveries) {stats['rejected_full']}, "
+          f"wait p95 {stats['p95_wait_ms']} ms, handle p95 {stats['p95_handle_ms']} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--per-user', type=int, default=5)
+    parser.add_argument('--concurrency', type=int, default=10)
+    parser.add_argument('--max-queue', type=int, default=1000)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    asyncio.run(bench(args.users, args.per_user, args.concurrency, args.max_queue))
+
+
+if __name__ == '__main__':
+    main()
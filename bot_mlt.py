@@ -41,11 +41,11 @@ import base58 # Import manquant
 from app.core import settings as core_settings, configure_logging
 from app.core.database_init import get_postgresql_connection
 from app.core.db_pool import init_connection_pool, put_connection
-from app.core.rate_limiter import init_rate_limiter
+from app.core.rate_limiter import get_rate_limiter, init_rate_limiter
 from app.core.i18n import t as i18n
 from app.core.validation import validate_email, validate_solana_address
 from app.core.state_manager import StateManager
-from app.core.database_init import DatabaseInitService
+from app.core.migrations import run_migrations
 from app.services.seller_service import SellerService
 from app.integrations.telegram.callback_router import CallbackRouter
 from app.integrations.telegram.keyboards import main_menu_keyboard, buy_menu_keyboard, sell_menu_keyboard
@@ -110,10 +110,8 @@ class MarketplaceBot:
             window_seconds=60
         )
 
-        # PostgreSQL - No db_path needed anymore
-        # Database initialization handled by DatabaseInitService
-        db_init_service = DatabaseInitService()
-        db_init_service.init_all_tables()
+        # Schéma PostgreSQL: migrations versionnées (une seule requête si déjà à jour)
+        run_migrations()
 
         # State Manager centralisé (remplace memory_cache)
         self.state_manager = StateManager()
@@ -162,6 +160,7 @@ class MarketplaceBot:
         # Import and initialize import handlers
         from app.integrations.telegram.handlers.import_handlers import ImportHandlers
         self.import_handlers = ImportHandlers(self.user_repo, self.product_repo)
+        self.state_manager.add_reset_listener(self.import_handlers.on_state_reset)
 
         # Initialize analytics handlers (AI-powered) - DISABLED (analytics_engine removed)
         # from app.integrations.telegram.handlers.analytics_handlers import AnalyticsHandlers
@@ -725,6 +724,13 @@ class MarketplaceBot:
                 # Ignorer silencieusement - l'utilisateur peut être dans un autre workflow
                 return
 
+            decision = get_rate_limiter('uploads').check(user_id)
+            if not decision.allowed:
+                await update.message.reply_text(
+                    f"⚠️ Trop de fichiers envoyés. Réessayez dans {decision.retry_after} secondes."
+                )
+                return
+
             # Déléguer au sell_handlers
             logger.info(f"✅ DOCUMENT ACCEPTED - Delegating to process_file_upload")
             await self.sell_handlers.process_file_upload(self, update, update.message.document)
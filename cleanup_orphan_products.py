@@ -42,24 +42,31 @@ def list_products():
     return products
 
 
-def delete_product_force(product_id):
-    """Supprime un produit SANS vérifier le seller_id"""
+def delete_products_force(product_ids):
+    """Supprime un ou plusieurs produits SANS vérifier le seller_id (une seule transaction)"""
     conn = get_postgresql_connection()
     cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
 
-    # Get product info first
-    cursor.execute("SELECT title, seller_user_id FROM products WHERE product_id = %s", (product_id,))
-    result = cursor.fetchone()
+    # Get products info first
+    cursor.execute(
+        "SELECT product_id, title, seller_user_id FROM products WHERE product_id = ANY(%s)",
+        (list(product_ids),)
+    )
+    found = cursor.fetchall()
 
-    if not result:
+    missing = set(product_ids) - {row['product_id'] for row in found}
+    for product_id in sorted(missing):
         print(f"❌ Produit {product_id} introuvable")
+
+    if not found:
         conn.close()
         return False
 
-    print(f"\n🗑️  Suppression FORCÉE de:")
-    print(f"   ID: {product_id}")
-    print(f"   Titre: {result['title']}")
-    print(f"   Seller: {result['seller_user_id']}")
+    print(f"\n🗑️  Suppression FORCÉE de {len(found)} produit(s):")
+    for row in found:
+        print(f"   ID: {row['product_id']}")
+        print(f"   Titre: {row['title']}")
+        print(f"   Seller: {row['seller_user_id']}")
 
     confirm = input("\n⚠️  CONFIRMER LA SUPPRESSION ? (yes/no): ")
 
@@ -70,13 +77,28 @@ def delete_product_force(product_id):
 
     try:
         # Delete without checking seller_id
-        cursor.execute("DELETE FROM products WHERE product_id = %s", (product_id,))
-        deleted = cursor.rowcount
+        cursor.execute("""
+            DELETE FROM products WHERE product_id = ANY(%s)
+            RETURNING category, status
+        """, ([row['product_id'] for row in found],))
+        deleted = cursor.fetchall()
+
+        # Compteurs de catégories: une seule requête agrégée
+        cursor.execute("""
+            UPDATE categories c
+            SET products_count = GREATEST(c.products_count - d.n, 0)
+            FROM (
+                SELECT category, COUNT(*) AS n
+                FROM unnest(%s::text[]) AS category
+                GROUP BY category
+            ) d
+            WHERE c.name = d.category
+        """, ([row['category'] for row in deleted if row['category'] and row['status'] == 'active'],))
 
         conn.commit()
 
-        if deleted > 0:
-            print(f"✅ Produit {product_id} supprimé avec succès")
+        if deleted:
+            print(f"✅ {len(deleted)} produit(s) supprimé(s) avec succès")
             return True
         else:
             print(f"❌ Échec de la suppression")
@@ -124,7 +146,7 @@ def main():
 
     print("\n" + "="*80)
     print("OPTIONS:")
-    print("  1 - Supprimer un produit spécifique (force)")
+    print("  1 - Supprimer des produits spécifiques (force, IDs séparés par des virgules)")
     print("  2 - Supprimer TOUS les produits (DANGER)")
     print("  0 - Quitter")
     print("="*80)
@@ -132,8 +154,9 @@ def main():
     choice = input("\nChoix: ")
 
     if choice == '1':
-        product_id = input("\nProduct ID à supprimer: ")
-        delete_product_force(product_id)
+        product_ids = [pid.strip() for pid in input("\nProduct ID(s) à supprimer: ").split(',') if pid.strip()]
+        if product_ids:
+            delete_products_force(product_ids)
 
     elif choice == '2':
         delete_all_products()
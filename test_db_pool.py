@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Tests de la file d'attente du pool de connexions (app/core/db_pool.py)
+
+ObservablePool ouvre ici des connexions factices (_open surchargé): attente
+d'une connexion libre, timeout, file pleine, attente depuis la boucle asyncio,
+recyclage et détection de fuites, sans PostgreSQL.
+
+Usage:
+    python -m pytest -q test_db_pool.py
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+from psycopg2 import pool
+
+from app.core import db_pool
+from app.core.db_pool import ObservablePool
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = 0
+        self.rollbacks = 0
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = 1
+
+
+class FakePool(ObservablePool):
+    def _open(self):
+        self._stats['opened'] += 1
+        return FakeConnection()
+
+
+def make_pool(maxconn=1, **kwargs):
+    kwargs.setdefault('checkout_timeout', 2.0)
+    return FakePool(minconn=0, maxconn=maxconn, **kwargs)
+
+
+def release_later(db, conn, delay=0.1):
+    timer = threading.Timer(delay, db.putconn, args=(conn,))
+    timer.start()
+    return timer
+
+
+def test_waiter_gets_the_released_connection():
+    db = make_pool(maxconn=1)
+    conn = db.getconn()
+    release_later(db, conn)
+
+    start = time.monotonic()
+    assert db.getconn() is conn
+    assert time.monotonic() - start >= 0.05
+
+    stats = db.get_stats()
+    assert stats['peak_waiting'] == 1
+    assert stats['timeouts'] == 0
+    assert stats['opened'] == 1
+
+
+def test_timeout_when_nothing_is_released():
+    db = make_pool(maxconn=1)
+    db.getconn()
+
+    with pytest.raises(pool.PoolError):
+        db.getconn(timeout=0.1)
+    assert db.get_stats()['timeouts'] == 1
+
+
+def test_zero_timeout_fails_fast():
+    db = make_pool(maxconn=1)
+    db.getconn()
+
+    start = time.monotonic()
+    with pytest.raises(pool.PoolError):
+        db.getconn(timeout=0)
+    assert time.monotonic() - start < 0.05
+    assert db.get_stats()['rejected'] == 1
+
+
+def test_full_wait_queue_is_rejected():
+    db = make_pool(maxconn=1, max_waiters=1)
+    conn = db.getconn()
+
+    waiter = threading.Thread(target=lambda: db.putconn(db.getconn()))
+    waiter.start()
+    while db.get_stats()['waiting'] == 0:
+        time.sleep(0.01)
+
+    with pytest.raises(pool.PoolError):
+        db.getconn()
+    assert db.get_stats()['rejected'] == 1
+
+    db.putconn(conn)
+    waiter.join(timeout=2)
+
+
+def test_wait_on_event_loop_thread_is_counted_not_refused():
+    db = make_pool(maxconn=1)
+    conn = db.getconn()
+
+    async def checkout_on_loop():
+        release_later(db, conn)
+        return db.getconn()
+
+    assert asyncio.run(checkout_on_loop()) is conn
+    assert db.get_stats()['loop_waits'] == 1
+
+
+def test_get_connection_async_keeps_the_loop_running(monkeypatch):
+    db = make_pool(maxconn=1)
+    monkeypatch.setattr(db_pool, '_connection_pool', db)
+    conn = db.getconn()
+
+    async def main():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        ticking = asyncio.create_task(ticker())
+        release_later(db, conn, delay=0.2)
+        got = await db_pool.get_connection_async()
+        ticking.cancel()
+        return got, ticks
+
+    got, ticks = asyncio.run(main())
+    assert got is conn
+    assert ticks >= 5
+    assert db.get_stats()['loop_waits'] == 0
+
+
+def test_expired_connection_is_recycled_on_return():
+    db = make_pool(maxconn=1, max_lifetime=0.05)
+    conn = db.getconn()
+    time.sleep(0.06)
+    db.putconn(conn)
+
+    assert conn.closed
+    assert db.getconn() is not conn
+    assert db.get_stats()['recycled'] == 1
+
+
+def test_leaked_connection_is_reported_once():
+    db = make_pool(maxconn=2)
+    conn = db.getconn()
+
+    leaks = db.find_leaks(threshold=0)
+    assert len(leaks) == 1
+    assert 'test_leaked_connection_is_reported_once' in leaks[0]['stack']
+    db.find_leaks(threshold=0)
+    assert db.get_stats()['leaks_detected'] == 1
+
+    db.putconn(conn)
+    assert db.find_leaks(threshold=0) == []
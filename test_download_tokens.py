@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Tests des tokens de téléchargement signés (app/core/download_tokens.py)
+
+Émission / rédemption, usage unique (replay set), tokens altérés ou expirés,
+replay set partagé en base et route GET /download/{token}. La base est
+remplacée par des doublures: aucun PostgreSQL nécessaire.
+
+Usage:
+    python -m pytest -q test_download_tokens.py
+"""
+import time
+from types import SimpleNamespace
+
+import psycopg2
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core import download_tokens
+from app.core.download_tokens import (
+    DownloadTokenService,
+    DownloadTokenSigner,
+    ReplayGuard,
+    _b64decode,
+    _b64encode,
+)
+from app.core.rate_limiter import MemoryRateLimitBackend, RateLimiter
+from app.domain.repositories.download_repo import DownloadRepository
+from app.integrations import ipn_server
+
+SECRET = b"test-download-secret"
+
+
+def make_service(max_tokens=10, use_database=False, ttl_seconds=300):
+    return DownloadTokenService(
+        signer=DownloadTokenSigner(SECRET, ttl_seconds),
+        replay_guard=ReplayGuard(use_database=use_database),
+        rate_limiter=RateLimiter(max_tokens, 3600, name='downloads', backend=MemoryRateLimitBackend())
+    )
+
+
+class FakeRedemptions:
+    """Table download_token_redemptions en mémoire (clé primaire nonce)"""
+
+    def __init__(self, failures=0):
+        self.nonces = set()
+        self.failures = failures
+
+    def record(self, nonce, expires_at):
+        if self.failures:
+            self.failures -= 1
+            raise psycopg2.OperationalError("server closed the connection unexpectedly")
+        if nonce in self.nonces:
+            return False
+        self.nonces.add(nonce)
+        return True
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# SIGNATURE / USAGE UNIQUE
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+def test_issue_then_redeem_returns_order():
+    service = make_service()
+    token = service.issue(42, 'ORD-1', 'PROD-1')
+
+    assert service.redeem(token) == (42, 'ORD-1', 'PROD-1')
+
+
+def test_replay_is_rejected():
+    service = make_service()
+    token = service.issue(42, 'ORD-1', 'PROD-1')
+
+    assert service.redeem(token) is not None
+    assert service.redeem(token) is None
+
+
+def test_tokens_are_independent():
+    service = make_service()
+    first = service.issue(42, 'ORD-1', 'PROD-1')
+    second = service.issue(42, 'ORD-1', 'PROD-1')
+
+    assert first != second
+    assert service.redeem(first) is not None
+    assert service.redeem(second) is not None
+
+
+def test_tampered_payload_is_rejected():
+    service = make_service()
+    payload_part, signature_part = service.issue(42, 'ORD-1', 'PROD-1').split('.')
+
+    # Même signature, commande d'un autre acheteur
+    payload = _b64decode(payload_part).replace(b'"u":42', b'"u":43')
+    forged = f"{_b64encode(payload)}.{signature_part}"
+
+    assert service.redeem(forged) is None
+
+
+def test_token_signed_with_another_secret_is_rejected():
+    other = DownloadTokenSigner(b"another-secret")
+    token = other.issue(42, 'ORD-1', 'PROD-1')
+
+    assert make_service().redeem(token) is None
+
+
+@pytest.mark.parametrize('token', ['', 'garbage', 'a.b.c', '!!!.???'])
+def test_malformed_token_is_rejected(token):
+    assert make_service().redeem(token) is None
+
+
+def test_expired_token_is_rejected(monkeypatch):
+    service = make_service(ttl_seconds=60)
+    token = service.issue(42, 'ORD-1', 'PROD-1')
+
+    later = time.time() + 61
+    monkeypatch.setattr(download_tokens.time, 'time', lambda: later)
+
+    assert service.redeem(token) is None
+
+
+def test_rate_limit_on_issue():
+    service = make_service(max_tokens=2)
+
+    assert service.check_rate_limit(42) == (True, None)
+    assert service.check_rate_limit(42) == (True, None)
+    allowed, error = service.check_rate_limit(42)
+    assert not allowed
+    assert error.startswith("Rate limit exceeded")
+    # Limite par utilisateur
+    assert service.check_rate_limit(43) == (True, None)
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# REPLAY SET PARTAGÉ (POSTGRESQL)
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+def test_shared_replay_rejects_token_used_by_another_worker(monkeypatch):
+    redemptions = FakeRedemptions()
+    monkeypatch.setattr(DownloadRepository, 'record_token_redemption', staticmethod(redemptions.record))
+
+    worker_a = make_service(use_database=True)
+    worker_b = make_service(use_database=True)
+    token = worker_a.issue(42, 'ORD-1', 'PROD-1')
+
+    assert worker_a.redeem(token) == (42, 'ORD-1', 'PROD-1')
+    assert worker_b.redeem(token) is None
+
+
+def test_database_error_does_not_burn_the_token(monkeypatch):
+    redemptions = FakeRedemptions(failures=1)
+    monkeypatch.setattr(DownloadRepository, 'record_token_redemption', staticmethod(redemptions.record))
+
+    service = make_service(use_database=True)
+    token = service.issue(42, 'ORD-1', 'PROD-1')
+
+    with pytest.raises(psycopg2.OperationalError):
+        service.redeem(token)
+
+    # Le client réessaie: le token est toujours valable, une seule fois
+    assert service.redeem(token) == (42, 'ORD-1', 'PROD-1')
+    assert service.redeem(token) is None
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# CONFIGURATION MULTI-WORKERS
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+@pytest.fixture
+def token_env(monkeypatch):
+    monkeypatch.setenv('DOWNLOAD_TOKEN_SECRET', 'env-secret')
+    monkeypatch.delenv('DOWNLOAD_TOKEN_SHARED_REPLAY', raising=False)
+    monkeypatch.delenv('WEB_CONCURRENCY', raising=False)
+    monkeypatch.setattr(download_tokens, '_download_token_service', None)
+    return monkeypatch
+
+
+def test_single_worker_defaults_to_memory_replay(token_env):
+    download_tokens.init_download_token_service()
+
+    assert download_tokens.get_download_token_service().replay_guard.use_database is False
+
+
+def test_several_workers_default_to_shared_replay(token_env):
+    token_env.setenv('WEB_CONCURRENCY', '4')
+    download_tokens.init_download_token_service()
+
+    assert download_tokens.get_download_token_service().replay_guard.use_database is True
+
+
+def test_several_workers_refuse_memory_replay(token_env):
+    token_env.setenv('WEB_CONCURRENCY', '4')
+    token_env.setenv('DOWNLOAD_TOKEN_SHARED_REPLAY', 'false')
+
+    with pytest.raises(RuntimeError):
+        download_tokens.init_download_token_service()
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# ROUTE GET /download/{token}
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+@pytest.fixture
+def client(monkeypatch):
+    service = make_service()
+    monkeypatch.setattr(ipn_server, 'get_download_token_service', lambda: service)
+    storage = SimpleNamespace(get_download_url=lambda key, expires_in: f"https://files.example/{key}")
+    monkeypatch.setattr(ipn_server, 'get_storage_service', lambda: storage)
+    # Sans "with": le lifespan (bot, pool, scheduler) n'est pas démarré
+    return SimpleNamespace(http=TestClient(ipn_server.app), service=service)
+
+
+def test_download_route_redirects_once(client, monkeypatch):
+    owners = {('ORD-1', 42): ('https://bucket.backblazeb2.com/products/guide.pdf', 'Guide', 1.0)}
+    monkeypatch.setattr(DownloadRepository, 'redeem_order_download',
+                        staticmethod(lambda order_id, user_id: owners.get((order_id, user_id))))
+    token = client.service.issue(42, 'ORD-1', 'PROD-1')
+
+    response = client.http.get(f"/download/{token}", follow_redirects=False)
+    assert response.status_code == 302
+    assert response.headers['location'].endswith('products/guide.pdf')
+
+    assert client.http.get(f"/download/{token}", follow_redirects=False).status_code == 404
+
+
+def test_download_route_checks_order_ownership(client, monkeypatch):
+    monkeypatch.setattr(DownloadRepository, 'redeem_order_download',
+                        staticmethod(lambda order_id, user_id: None))
+    token = client.service.issue(43, 'ORD-1', 'PROD-1')
+
+    response = client.http.get(f"/download/{token}", follow_redirects=False)
+    assert response.status_code == 404
+    assert response.json()['detail'] == "Order not found"
+
+
+def test_download_route_maps_database_errors_to_503(client, monkeypatch):
+    def unavailable(token):
+        raise psycopg2.OperationalError("connection pool exhausted")
+    monkeypatch.setattr(client.service, 'redeem', unavailable)
+
+    response = client.http.get("/download/any-token", follow_redirects=False)
+    assert response.status_code == 503
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Tests de l'outbox email (app/core/email_outbox.py)
+
+Classement des réponses Mailjet v3.1 (envoyé / à retenter / échec définitif),
+backoff, et worker complet avec un dépôt en mémoire et un transport httpx
+simulé: aucune base ni appel Mailjet.
+
+Usage:
+    python -m pytest -q test_email_outbox.py
+"""
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from app.core import email_outbox
+from app.core.email_outbox import EmailOutbox, classify_response, retry_delay
+
+
+def rows(*ids, attempts=1):
+    return [{'id': i, 'to_email': f"user{i}@example.com", 'attempts': attempts} for i in ids]
+
+
+def success(custom_id, uuid):
+    return {'Status': 'success', 'CustomID': str(custom_id), 'To': [{'MessageUUID': uuid, 'MessageID': 1}]}
+
+
+def error(custom_id, status_code, code='mj-0013', message='Invalid email'):
+    return {'Status': 'error', 'CustomID': str(custom_id),
+            'Errors': [{'StatusCode': status_code, 'ErrorCode': code, 'ErrorMessage': message}]}
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# CLASSEMENT DES RÉPONSES
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+def test_all_sent():
+    batch = rows(1, 2)
+    sent, retry, failed = classify_response(batch, 200, {'Messages': [success(1, 'a'), success(2, 'b')]})
+
+    assert sent == [(batch[0], 'a'), (batch[1], 'b')]
+    assert (retry, failed) == ([], [])
+
+
+def test_partial_400_rejects_only_the_invalid_message():
+    batch = rows(1, 2)
+    sent, retry, failed = classify_response(batch, 400, {'Messages': [success(1, 'a'), error(2, 400)]})
+
+    assert sent == [(batch[0], 'a')]
+    assert retry == []
+    assert failed == [(batch[1], 'mj-0013: Invalid email')]
+
+
+@pytest.mark.parametrize('status_code', [429, 500, 503])
+def test_transient_message_error_is_retried(status_code):
+    batch = rows(1)
+    sent, retry, failed = classify_response(batch, 200, {'Messages': [error(1, status_code, 'send-0001', 'Busy')]})
+
+    assert retry == [(batch[0], 'send-0001: Busy')]
+    assert (sent, failed) == ([], [])
+
+
+def test_statuses_are_matched_by_custom_id():
+    batch = rows(1, 2)
+    sent, _, failed = classify_response(batch, 400, {'Messages': [error(2, 400), success(1, 'a')]})
+
+    assert sent == [(batch[0], 'a')]
+    assert [row['id'] for row, _ in failed] == [2]
+
+
+def test_message_without_status_is_retried():
+    batch = rows(1, 2)
+    sent, retry, _ = classify_response(batch, 200, {'Messages': [success(1, 'a')]})
+
+    assert [row['id'] for row, _ in sent] == [1]
+    assert [row['id'] for row, _ in retry] == [2]
+
+
+@pytest.mark.parametrize('status_code, payload, expected', [
+    (500, None, 'HTTP 500'),
+    (401, {'ErrorMessage': 'API key authentication/authorization failure'},
+     'HTTP 401: API key authentication/authorization failure'),
+    (200, {'unexpected': True}, 'HTTP 200'),
+])
+def test_whole_batch_is_retried_without_per_message_status(status_code, payload, expected):
+    batch = rows(1, 2)
+    sent, retry, failed = classify_response(batch, status_code, payload)
+
+    assert retry == [(batch[0], expected), (batch[1], expected)]
+    assert (sent, failed) == ([], [])
+
+
+def test_retry_delay_backs_off_and_is_capped():
+    for attempts, base in [(1, 30), (2, 60), (3, 120)]:
+        assert base * 0.8 <= retry_delay(attempts) <= base * 1.2
+    assert retry_delay(50) <= email_outbox.RETRY_MAX_DELAY * 1.2
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# WORKER
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+class MemoryOutboxRepository:
+    """Table email_outbox en mémoire (échéances ignorées: tout message en file est échu)"""
+
+    def __init__(self):
+        self.messages = {}
+        self.released = 0
+
+    def enqueue(self, to_email, subject, html_body, text_body=None):
+        message_id = len(self.messages) + 1
+        self.messages[message_id] = {
+            'id': message_id, 'to_email': to_email, 'subject': subject, 'html_body': html_body,
+            'text_body': text_body, 'attempts': 0, 'status': 'queued', 'error': None,
+        }
+        return message_id
+
+    def claim_due(self, limit):
+        claimed = [m for m in self.messages.values() if m['status'] == 'queued'][:limit]
+        for message in claimed:
+            message['status'] = 'sending'
+            message['attempts'] += 1
+        return [dict(message) for message in claimed]
+
+    def next_due_in(self):
+        return None
+
+    def mark_sent(self, sent):
+        for message_id, provider_id in sent:
+            self.messages[message_id].update(status='sent', provider_id=provider_id)
+
+    def mark_retry(self, retries):
+        for message_id, delay, error_text in retries:
+            self.messages[message_id].update(status='retry_scheduled', error=error_text)
+
+    def mark_failed(self, failures):
+        for message_id, error_text in failures:
+            self.messages[message_id].update(status='failed', error=error_text)
+
+    def release_stale_claims(self, older_than_seconds=300):
+        self.released += 1
+        return 0
+
+    def statuses(self):
+        return {message_id: message['status'] for message_id, message in self.messages.items()}
+
+
+class FakeMailjet:
+    """Transport httpx: répond à chaque lot avec handler(messages)"""
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.requests = []
+
+    def __call__(self, request):
+        messages = json.loads(request.content)['Messages']
+        self.requests.append(messages)
+        return self.handler(messages)
+
+
+@pytest.fixture
+def mailjet(monkeypatch):
+    async_client = httpx.AsyncClient
+
+    def install(handler):
+        fake = FakeMailjet(handler)
+        monkeypatch.setattr(email_outbox.httpx, 'AsyncClient',
+                            lambda **kwargs: async_client(transport=httpx.MockTransport(fake), **kwargs))
+        return fake
+
+    return install
+
+
+def run_outbox(repo, emails, max_attempts=6, settle=0.3):
+    async def main():
+        outbox = EmailOutbox('key', 'secret', 'shop@example.com', 'Shop', batch_window=0.05,
+                             max_attempts=max_attempts, poll_interval=0.1, repo=repo)
+        outbox.start()
+        for to_email in emails:
+            assert await outbox.enqueue(to_email, 'Subject', '<p>Body</p>')
+        await asyncio.sleep(settle)
+        await outbox.stop()
+        return outbox.get_stats()
+
+    return asyncio.run(main())
+
+
+def test_messages_queued_together_share_one_request(mailjet):
+    fake = mailjet(lambda messages: httpx.Response(200, json={
+        'Messages': [success(m['CustomID'], f"uuid-{m['CustomID']}") for m in messages]
+    }))
+    repo = MemoryOutboxRepository()
+
+    stats = run_outbox(repo, ['seller@example.com', 'buyer@example.com'])
+
+    assert len(fake.requests) == 1
+    assert [m['To'][0]['Email'] for m in fake.requests[0]] == ['seller@example.com', 'buyer@example.com']
+    assert repo.statuses() == {1: 'sent', 2: 'sent'}
+    assert repo.messages[1]['provider_id'] == 'uuid-1'
+    assert stats['sent'] == 2
+
+
+def test_rate_limited_batch_is_rescheduled(mailjet):
+    mailjet(lambda messages: httpx.Response(429, json={'ErrorMessage': 'Too many requests'}))
+    repo = MemoryOutboxRepository()
+
+    stats = run_outbox(repo, ['buyer@example.com'])
+
+    assert repo.statuses() == {1: 'retry_scheduled'}
+    assert repo.messages[1]['error'] == 'HTTP 429: Too many requests'
+    assert stats['retried'] == 1
+
+
+def test_network_error_is_rescheduled(mailjet):
+    def unreachable(messages):
+        raise httpx.ConnectError("connection refused")
+    mailjet(unreachable)
+    repo = MemoryOutboxRepository()
+
+    run_outbox(repo, ['buyer@example.com'])
+
+    assert repo.statuses() == {1: 'retry_scheduled'}
+    assert repo.messages[1]['error'].startswith('ConnectError')
+
+
+def test_exhausted_attempts_fail_the_message(mailjet):
+    mailjet(lambda messages: httpx.Response(503))
+    repo = MemoryOutboxRepository()
+
+    stats = run_outbox(repo, ['buyer@example.com'], max_attempts=1)
+
+    assert repo.statuses() == {1: 'failed'}
+    assert stats['failed'] == 1
+
+
+def test_stale_claims_are_released_periodically(mailjet, monkeypatch):
+    mailjet(lambda messages: httpx.Response(200, json={'Messages': []}))
+    monkeypatch.setattr(email_outbox, 'STALE_CLAIM_CHECK_INTERVAL', 0.1)
+    repo = MemoryOutboxRepository()
+
+    run_outbox(repo, [], settle=0.5)
+
+    # Au démarrage puis à chaque intervalle, pas seulement au lancement du worker
+    assert repo.released >= 3
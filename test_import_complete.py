@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Test de l'endpoint /api/import-complete (mini-app d'import Gumroad)
+
+Stockage, catalogue, job d'import et bot sont remplacés par des doublures:
+aucune base ni bucket nécessaires.
+
+Usage:
+    python -m pytest -q test_import_complete.py
+"""
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.domain.repositories.user_repo import UserRepository
+from app.integrations import ipn_server
+from app.core.webapp_auth import WebAppUser
+
+USER_ID = 4242
+
+PAYLOAD = {
+    'object_key': f"products/{USER_ID}/TBF-TEST-1/main_file.pdf",
+    'file_name': 'guide.pdf',
+    'file_size': 1024,
+    'user_id': USER_ID,
+    'product_metadata': {
+        'title': 'Guide importé',
+        'price': 19.99,
+        'category': 'Business',
+        'cover_object_key': f"products/{USER_ID}/TBF-TEST-1/cover.jpg",
+    },
+}
+
+
+class FakeBot:
+    def __init__(self):
+        self.sent = []
+
+    async def send_message(self, **kwargs):
+        self.sent.append(kwargs)
+
+
+class FakeMarketplaceBot:
+    def __init__(self):
+        self.created = []
+
+    def create_product(self, product_data):
+        self.created.append(product_data)
+        return product_data['product_id']
+
+    def get_user_language(self, user_id):
+        return 'en'
+
+    def get_user_state(self, user_id):
+        return {}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    storage = SimpleNamespace(storage_type='r2', bucket_name='test', file_exists=lambda key: True)
+    monkeypatch.setattr(ipn_server, 'get_storage_service', lambda: storage)
+    monkeypatch.setattr(ipn_server, 'get_category_catalogue',
+                        lambda: SimpleNamespace(exists=lambda name: name == 'Business'))
+    monkeypatch.setattr(ipn_server, '_resolve_import_job', lambda user_id: None)
+    monkeypatch.setattr(UserRepository, 'get_user', lambda self, user_id: None)
+
+    ipn_server.app.dependency_overrides[ipn_server.authenticate_webapp] = lambda: WebAppUser(user_id=USER_ID)
+    try:
+        # Sans "with": le lifespan (bot, pool, scheduler) n'est pas démarré
+        yield TestClient(ipn_server.app)
+    finally:
+        ipn_server.app.dependency_overrides.clear()
+
+
+def test_import_complete_creates_product(client, monkeypatch):
+    bot_instance = FakeMarketplaceBot()
+    application = SimpleNamespace(bot=FakeBot(), bot_data={'bot_instance': bot_instance})
+    monkeypatch.setattr(ipn_server, 'telegram_application', application)
+
+    response = client.post('/api/import-complete', json=PAYLOAD)
+
+    assert response.status_code == 200, response.text
+    assert response.json() == {'status': 'success', 'product_id': 'TBF-TEST-1'}
+    assert bot_instance.created[0]['seller_id'] == USER_ID
+    assert bot_instance.created[0]['cover_image_url'].endswith('/cover.jpg')
+    assert application.bot.sent[0]['chat_id'] == USER_ID
+
+
+def test_import_complete_without_bot_returns_503(client, monkeypatch):
+    monkeypatch.setattr(ipn_server, 'telegram_application', None)
+
+    response = client.post('/api/import-complete', json=PAYLOAD)
+
+    assert response.status_code == 503
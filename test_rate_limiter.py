@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Tests du rate limiter GCRA (app/core/rate_limiter.py)
+
+Rafale, refus avec délai d'attente, rétablissement progressif, éviction des
+clés expirées et choix du backend par limite. L'horloge est pilotée par le
+test: aucune attente réelle.
+
+Usage:
+    python -m pytest -q test_rate_limiter.py
+"""
+import pytest
+
+from app.core import rate_limiter
+from app.core.rate_limiter import (
+    MemoryRateLimitBackend,
+    PostgresRateLimitBackend,
+    RateLimiter,
+    get_rate_limit_backend,
+)
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(rate_limiter.time, 'monotonic', fake)
+    return fake
+
+
+def make_limiter(max_requests=5, window_seconds=60, **backend_kwargs):
+    return RateLimiter(max_requests, window_seconds, name='test',
+                       backend=MemoryRateLimitBackend(**backend_kwargs))
+
+
+def test_burst_then_deny_with_retry_after(clock):
+    limiter = make_limiter(max_requests=5, window_seconds=60)
+
+    remaining = [limiter.check(1).remaining for _ in range(5)]
+    assert remaining == [4, 3, 2, 1, 0]
+
+    decision = limiter.check(1)
+    assert not decision.allowed
+    # Une requête est rendue toutes les 60 / 5 = 12 s
+    assert decision.retry_after == 12
+
+
+def test_one_request_back_per_emission_interval(clock):
+    limiter = make_limiter(max_requests=5, window_seconds=60)
+    for _ in range(5):
+        limiter.check(1)
+
+    clock.advance(12)
+    assert limiter.check(1).allowed
+    assert not limiter.check(1).allowed
+
+    clock.advance(60)
+    assert [limiter.check(1).allowed for _ in range(6)] == [True] * 5 + [False]
+
+
+def test_denied_requests_do_not_extend_the_wait(clock):
+    limiter = make_limiter(max_requests=2, window_seconds=10)
+    limiter.check(1)
+    limiter.check(1)
+
+    for _ in range(10):
+        assert not limiter.check(1).allowed
+
+    clock.advance(5)
+    assert limiter.check(1).allowed
+
+
+def test_keys_are_limited_independently(clock):
+    limiter = make_limiter(max_requests=1, window_seconds=60)
+
+    assert limiter.check(1).allowed
+    assert not limiter.check(1).allowed
+    assert limiter.check(2).allowed
+
+
+def test_peek_and_reset(clock):
+    limiter = make_limiter(max_requests=2, window_seconds=60)
+
+    assert limiter.get_wait_time(1) == 0
+    assert limiter.get_user_stats(1)['remaining_requests'] == 2
+    limiter.check(1)
+    limiter.check(1)
+    # peek ne consomme rien
+    assert limiter.get_wait_time(1) == 30
+    assert limiter.get_wait_time(1) == 30
+
+    limiter.reset_user(1)
+    assert limiter.is_allowed(1) == (True, 1)
+
+
+def test_expired_keys_are_evicted(clock):
+    limiter = make_limiter(max_requests=5, window_seconds=60)
+    for user_id in range(3):
+        limiter.check(user_id)
+    assert limiter.get_global_stats()['total_users_tracked'] == 3
+
+    clock.advance(61)
+    limiter.check(99)
+    assert limiter.get_global_stats()['total_users_tracked'] == 1
+
+
+def test_memory_is_bounded(clock):
+    limiter = make_limiter(max_requests=5, window_seconds=60, max_keys=10)
+    for user_id in range(50):
+        limiter.check(user_id)
+
+    assert limiter.get_global_stats()['total_users_tracked'] == 10
+
+
+def test_stats_count_allowed_and_denied(clock):
+    limiter = make_limiter(max_requests=1, window_seconds=60)
+    limiter.check(1)
+    limiter.check(1)
+
+    stats = limiter.get_global_stats()
+    assert (stats['allowed_requests'], stats['denied_requests']) == (1, 1)
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# BACKENDS PAR LIMITE
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+@pytest.fixture
+def backend_env(monkeypatch):
+    monkeypatch.setattr(rate_limiter, '_backends', {})
+    for name in ('RATE_LIMIT_BACKEND', 'RATE_LIMIT_BACKEND_DOWNLOADS'):
+        monkeypatch.delenv(name, raising=False)
+    return monkeypatch
+
+
+def test_downloads_stay_in_memory_by_default(backend_env):
+    assert isinstance(get_rate_limit_backend('downloads'), MemoryRateLimitBackend)
+
+
+def test_downloads_opt_in_to_postgres(backend_env):
+    backend_env.setenv('RATE_LIMIT_BACKEND_DOWNLOADS', 'postgres')
+
+    assert isinstance(get_rate_limit_backend('downloads'), PostgresRateLimitBackend)
+    assert isinstance(get_rate_limit_backend('messages'), MemoryRateLimitBackend)
+
+
+def test_backend_instances_are_shared(backend_env):
+    assert get_rate_limit_backend('messages') is get_rate_limit_backend('callbacks')
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Tests du parseur cron du planificateur de maintenance (app/core/scheduler.py)
+
+Échéances suivantes (pas, intervalles, listes, alias, jour du mois OU jour
+de semaine), expressions invalides et enregistrement des tâches.
+
+Usage:
+    python -m pytest -q test_scheduler.py
+"""
+from datetime import datetime
+
+import pytest
+
+from app.core.scheduler import CronSchedule, MaintenanceScheduler, register_maintenance_jobs
+
+# Mercredi 15 mai 2024, 10:07:30
+NOW = datetime(2024, 5, 15, 10, 7, 30)
+
+
+def next_ticks(expression, start=NOW, count=3):
+    schedule = CronSchedule(expression)
+    ticks = []
+    for _ in range(count):
+        start = schedule.next_after(start)
+        ticks.append(start)
+    return ticks
+
+
+@pytest.mark.parametrize('expression, expected', [
+    ('*/30 * * * *', [datetime(2024, 5, 15, 10, 30), datetime(2024, 5, 15, 11, 0), datetime(2024, 5, 15, 11, 30)]),
+    ('5 * * * *', [datetime(2024, 5, 15, 11, 5), datetime(2024, 5, 15, 12, 5), datetime(2024, 5, 15, 13, 5)]),
+    ('50 3 * * *', [datetime(2024, 5, 16, 3, 50), datetime(2024, 5, 17, 3, 50), datetime(2024, 5, 18, 3, 50)]),
+    ('0,30 9-10 * * *', [datetime(2024, 5, 15, 10, 30), datetime(2024, 5, 16, 9, 0), datetime(2024, 5, 16, 9, 30)]),
+    ('5/20 * * * *', [datetime(2024, 5, 15, 10, 25), datetime(2024, 5, 15, 10, 45), datetime(2024, 5, 15, 11, 5)]),
+    ('0 4 1 * *', [datetime(2024, 6, 1, 4, 0), datetime(2024, 7, 1, 4, 0), datetime(2024, 8, 1, 4, 0)]),
+    ('0 0 1 1 *', [datetime(2025, 1, 1), datetime(2026, 1, 1), datetime(2027, 1, 1)]),
+])
+def test_next_ticks(expression, expected):
+    assert next_ticks(expression) == expected
+
+
+def test_next_tick_is_strictly_after():
+    schedule = CronSchedule('8 10 * * *')
+
+    assert schedule.next_after(datetime(2024, 5, 15, 10, 8)) == datetime(2024, 5, 16, 10, 8)
+    assert schedule.next_after(datetime(2024, 5, 15, 10, 7, 59)) == datetime(2024, 5, 15, 10, 8)
+
+
+@pytest.mark.parametrize('alias, expression', [
+    ('@hourly', '0 * * * *'),
+    ('@daily', '0 0 * * *'),
+    ('@weekly', '0 0 * * 0'),
+    ('@monthly', '0 0 1 * *'),
+])
+def test_aliases(alias, expression):
+    assert next_ticks(alias) == next_ticks(expression)
+
+
+@pytest.mark.parametrize('weekday', ['0', '7'])
+def test_sunday_is_zero_or_seven(weekday):
+    assert next_ticks(f'0 5 * * {weekday}', count=2) == [datetime(2024, 5, 19, 5, 0), datetime(2024, 5, 26, 5, 0)]
+
+
+def test_weekday_range():
+    # Lundi à vendredi
+    ticks = next_ticks('0 8 * * 1-5', start=datetime(2024, 5, 17, 9, 0), count=2)
+
+    assert ticks == [datetime(2024, 5, 20, 8, 0), datetime(2024, 5, 21, 8, 0)]
+
+
+def test_day_of_month_or_weekday_when_both_restricted():
+    # Le 20 du mois OU chaque samedi (18 mai 2024 = samedi)
+    assert next_ticks('0 0 20 * 6', count=3) == [
+        datetime(2024, 5, 18), datetime(2024, 5, 20), datetime(2024, 5, 25)
+    ]
+
+
+def test_month_end_and_leap_day():
+    assert next_ticks('0 0 31 * *', count=2) == [datetime(2024, 5, 31), datetime(2024, 7, 31)]
+    assert next_ticks('0 0 29 2 *', count=2) == [datetime(2028, 2, 29), datetime(2032, 2, 29)]
+
+
+@pytest.mark.parametrize('expression', [
+    '* * * *',
+    '* * * * * *',
+    '60 * * * *',
+    '* 24 * * *',
+    '* * 0 * *',
+    '* * * 13 *',
+    '* * * * 8',
+    '*/0 * * * *',
+    '10-5 * * * *',
+    'a * * * *',
+])
+def test_invalid_expressions(expression):
+    with pytest.raises(ValueError):
+        CronSchedule(expression)
+
+
+def test_expression_that_never_matches():
+    with pytest.raises(ValueError):
+        CronSchedule('0 0 30 2 *').next_after(NOW)
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# ENREGISTREMENT
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+def test_disabled_job_is_not_registered():
+    scheduler = MaintenanceScheduler(disabled_jobs=frozenset({'retry_undelivered_files'}))
+    register_maintenance_jobs(scheduler)
+
+    stats = scheduler.get_stats()
+    assert 'retry_undelivered_files' not in stats['jobs']
+    assert 'email_outbox_cleanup' in stats['jobs']
+
+
+def test_duplicate_job_is_rejected():
+    scheduler = MaintenanceScheduler(disabled_jobs=frozenset())
+    scheduler.register('job', '@hourly', lambda: None)
+
+    with pytest.raises(ValueError):
+        scheduler.register('job', '@daily', lambda: None)
+
+
+def test_invalid_cron_is_rejected_at_registration():
+    with pytest.raises(ValueError):
+        MaintenanceScheduler(disabled_jobs=frozenset()).register('job', '61 * * * *', lambda: None)
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Tests du dispatcher d'updates webhook (app/core/update_dispatcher.py)
+
+Ordre strict par utilisateur, concurrence entre utilisateurs, équité,
+backpressure, délestage, doublons et erreurs de handler. Les updates
+Telegram sont remplacées par de simples objets.
+
+Usage:
+    python -m pytest -q test_update_dispatcher.py
+"""
+import asyncio
+from types import SimpleNamespace
+
+from app.core.update_dispatcher import UpdateDispatcher, update_key
+
+
+def make_update(update_id, user_id=None, chat_id=None):
+    return SimpleNamespace(
+        update_id=update_id,
+        effective_user=SimpleNamespace(id=user_id) if user_id is not None else None,
+        effective_chat=SimpleNamespace(id=chat_id) if chat_id is not None else None,
+    )
+
+
+class Recorder:
+    """Handler qui journalise début / fin et détecte le parallélisme par utilisateur"""
+
+    def __init__(self, delay=0.01, fail_ids=()):
+        self.delay = delay
+        self.fail_ids = set(fail_ids)
+        self.events = []
+        self.active = {}
+        self.max_active_per_user = 0
+        self.max_active = 0
+
+    async def __call__(self, update):
+        user = update_key(update)
+        self.active[user] = self.active.get(user, 0) + 1
+        self.max_active_per_user = max(self.max_active_per_user, self.active[user])
+        self.max_active = max(self.max_active, sum(self.active.values()))
+        self.events.append(update.update_id)
+        try:
+            await asyncio.sleep(self.delay)
+            if update.update_id in self.fail_ids:
+                raise RuntimeError("handler failed")
+        finally:
+            self.active[user] -= 1
+
+    def order_for(self, ids):
+        return [update_id for update_id in self.events if update_id in ids]
+
+
+def run(dispatcher_kwargs, updates, handler):
+    async def main():
+        dispatcher = UpdateDispatcher(handler, **dispatcher_kwargs)
+        dispatcher.start()
+        results = [dispatcher.submit(update) for update in updates]
+        await dispatcher.stop(drain_timeout=5)
+        return dispatcher, results
+
+    return asyncio.run(main())
+
+
+def test_updates_of_one_user_are_processed_in_order_one_at_a_time():
+    handler = Recorder()
+    updates = [make_update(i, user_id=1) for i in range(10)]
+
+    dispatcher, _ = run({'max_concurrency': 4}, updates, handler)
+
+    assert handler.events == list(range(10))
+    assert handler.max_active_per_user == 1
+    assert dispatcher.get_stats()['processed'] == 10
+
+
+def test_users_are_processed_concurrently_with_per_user_order():
+    handler = Recorder(delay=0.02)
+    updates = [make_update(i, user_id=i % 3) for i in range(12)]
+
+    run({'max_concurrency': 3}, updates, handler)
+
+    assert handler.max_active == 3
+    assert handler.max_active_per_user == 1
+    for user in range(3):
+        ids = [i for i in range(12) if i % 3 == user]
+        assert handler.order_for(ids) == ids
+
+
+def test_user_goes_back_to_the_end_of_the_round():
+    handler = Recorder()
+    updates = [make_update(1, user_id='a'), make_update(2, user_id='a'), make_update(3, user_id='a'),
+               make_update(4, user_id='b')]
+
+    run({'max_concurrency': 1}, updates, handler)
+
+    assert handler.events == [1, 4, 2, 3]
+
+
+def test_duplicate_update_is_ignored():
+    handler = Recorder()
+    update = make_update(7, user_id=1)
+
+    dispatcher, results = run({'max_concurrency': 1}, [update, update], handler)
+
+    assert results == [True, True]
+    assert handler.events == [7]
+    assert dispatcher.get_stats()['duplicates'] == 1
+
+
+def test_full_queue_rejects_updates():
+    handler = Recorder()
+    updates = [make_update(i, user_id=i) for i in range(5)]
+
+    dispatcher, results = run({'max_concurrency': 1, 'max_queue': 3}, updates, handler)
+
+    assert results == [True, True, True, False, False]
+    assert dispatcher.get_stats()['rejected_full'] == 2
+    # Refusée = pas mémorisée: Telegram peut la renvoyer
+    assert sorted(handler.events) == [0, 1, 2]
+
+
+def test_burst_from_one_user_is_shed():
+    handler = Recorder()
+    updates = [make_update(i, user_id=1) for i in range(6)] + [make_update(99, user_id=2)]
+
+    dispatcher, results = run({'max_concurrency': 1, 'max_pending_per_user': 4}, updates, handler)
+
+    assert all(results)
+    assert handler.order_for(range(6)) == [0, 1, 2, 3]
+    assert 99 in handler.events
+    assert dispatcher.get_stats()['shed_per_user'] == 2
+
+
+def test_failing_handler_does_not_block_the_lane():
+    handler = Recorder(fail_ids={1})
+    updates = [make_update(i, user_id=1) for i in range(3)]
+
+    dispatcher, _ = run({'max_concurrency': 2}, updates, handler)
+
+    assert handler.events == [0, 1, 2]
+    stats = dispatcher.get_stats()
+    assert (stats['processed'], stats['failed']) == (2, 1)
+    assert stats['queued'] == 0 and stats['in_flight'] == 0
+
+
+def test_update_key_falls_back_to_chat_then_update():
+    assert update_key(make_update(1, user_id=5, chat_id=6)) == 5
+    assert update_key(make_update(2, chat_id=6)) == ('chat', 6)
+    assert update_key(make_update(3)) == ('update', 3)
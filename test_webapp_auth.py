@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Tests de l'authentification Mini App (app/core/webapp_auth.py)
+
+Vérification initData (HMAC WebAppData), sessions signées, et contrôle
+d'identité des routes (ensure_webapp_user) via /api/generate-download-token.
+Les initData sont signés dans le test avec un faux token bot.
+
+Usage:
+    python -m pytest -q test_webapp_auth.py
+"""
+import hashlib
+import hmac
+import json
+import time
+from urllib.parse import urlencode
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core import webapp_auth
+from app.core.download_tokens import DownloadTokenService, DownloadTokenSigner, ReplayGuard
+from app.core.rate_limiter import MemoryRateLimitBackend, RateLimiter
+from app.core.webapp_auth import WebAppAuthenticator, WebAppUser
+from app.domain.repositories.download_repo import DownloadRepository
+from app.integrations import ipn_server
+
+BOT_TOKEN = "123456:TEST-TOKEN"
+USER_ID = 4242
+
+
+def sign_init_data(fields, bot_token=BOT_TOKEN):
+    """initData tel que construit par Telegram (champs triés, HMAC clé WebAppData)"""
+    secret = hmac.new(b"WebAppData", bot_token.encode(), hashlib.sha256).digest()
+    data_check_string = '\n'.join(f"{k}={v}" for k, v in sorted(fields.items()))
+    signed = dict(fields, hash=hmac.new(secret, data_check_string.encode(), hashlib.sha256).hexdigest())
+    return urlencode(signed)
+
+
+def init_data_for(user=None, auth_date=None, bot_token=BOT_TOKEN):
+    fields = {'auth_date': str(int(auth_date if auth_date is not None else time.time())), 'query_id': 'AAF'}
+    if user is not None:
+        fields['user'] = json.dumps(user, separators=(',', ':'))
+    return sign_init_data(fields, bot_token)
+
+
+@pytest.fixture
+def authenticator():
+    return WebAppAuthenticator(BOT_TOKEN, session_ttl_seconds=60)
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# INITDATA
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+def test_valid_init_data(authenticator):
+    init_data = init_data_for({'id': USER_ID, 'username': 'alice', 'language_code': 'fr'})
+
+    assert authenticator.verify_init_data(init_data) == WebAppUser(USER_ID, 'alice', 'fr')
+    # Deuxième appel servi par le cache LRU
+    assert authenticator.verify_init_data(init_data) == WebAppUser(USER_ID, 'alice', 'fr')
+
+
+def test_bad_hash_is_rejected(authenticator):
+    init_data = init_data_for({'id': USER_ID}, bot_token="999:OTHER-BOT")
+
+    assert authenticator.verify_init_data(init_data) is None
+
+
+def test_modified_user_is_rejected(authenticator):
+    init_data = init_data_for({'id': USER_ID})
+    forged = init_data.replace(str(USER_ID), '1', 1)
+
+    assert authenticator.verify_init_data(forged) is None
+
+
+def test_expired_init_data_is_rejected(authenticator):
+    init_data = init_data_for({'id': USER_ID}, auth_date=time.time() - webapp_auth.INIT_DATA_MAX_AGE_SECONDS - 60)
+
+    assert authenticator.verify_init_data(init_data) is None
+
+
+@pytest.mark.parametrize('user', [None, {}, {'username': 'alice'}, {'id': '4242'}, [4242]])
+def test_init_data_without_user_id_is_rejected(authenticator, user):
+    assert authenticator.verify_init_data(init_data_for(user)) is None
+
+
+@pytest.mark.parametrize('init_data', ['', 'auth_date=1', 'hash=abc'])
+def test_incomplete_init_data_is_rejected(authenticator, init_data):
+    assert authenticator.verify_init_data(init_data) is None
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# SESSIONS
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+def test_session_round_trip(authenticator):
+    token = authenticator.issue_session(WebAppUser(USER_ID, 'alice', 'fr'))
+
+    assert authenticator.verify_session(token) == WebAppUser(USER_ID, 'alice', 'fr')
+
+
+def test_expired_session_is_rejected(authenticator, monkeypatch):
+    token = authenticator.issue_session(WebAppUser(USER_ID))
+
+    later = time.time() + 61
+    monkeypatch.setattr(webapp_auth.time, 'time', lambda: later)
+
+    assert authenticator.verify_session(token) is None
+
+
+def test_session_from_another_bot_is_rejected(authenticator):
+    token = WebAppAuthenticator("999:OTHER-BOT").issue_session(WebAppUser(USER_ID))
+
+    assert authenticator.verify_session(token) is None
+
+
+def test_session_without_user_is_rejected(authenticator):
+    token = authenticator.issue_session(WebAppUser(user_id=None))
+
+    assert authenticator.verify_session(token) is None
+
+
+@pytest.mark.parametrize('token', ['', 'garbage', '!!!.???'])
+def test_malformed_session_is_rejected(authenticator, token):
+    assert authenticator.verify_session(token) is None
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# ROUTES
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+@pytest.fixture
+def client(monkeypatch, authenticator):
+    monkeypatch.setenv('WEBAPP_URL', 'https://miniapp.example')
+    monkeypatch.setattr(ipn_server, 'get_webapp_authenticator', lambda: authenticator)
+
+    service = DownloadTokenService(
+        signer=DownloadTokenSigner(b"test-download-secret"),
+        replay_guard=ReplayGuard(),
+        rate_limiter=RateLimiter(10, 3600, name='downloads', backend=MemoryRateLimitBackend())
+    )
+    monkeypatch.setattr(ipn_server, 'get_download_token_service', lambda: service)
+    monkeypatch.setattr(DownloadRepository, 'verify_order_ownership',
+                        staticmethod(lambda order_id, user_id: ('https://files.example/guide.pdf', 'Guide', 1.0)))
+    try:
+        # Sans "with": le lifespan (bot, pool, scheduler) n'est pas démarré
+        yield TestClient(ipn_server.app)
+    finally:
+        ipn_server.app.dependency_overrides.clear()
+
+
+def request_token(client, user_id=USER_ID, headers=None):
+    return client.post('/api/generate-download-token', headers=headers or {},
+                       json={'product_id': 'PROD-1', 'order_id': 'ORD-1', 'user_id': user_id})
+
+
+def test_session_endpoint_then_bearer(client):
+    response = client.post('/api/session', json={'telegram_init_data': init_data_for({'id': USER_ID})})
+    assert response.status_code == 200
+    assert response.json()['user_id'] == USER_ID
+
+    bearer = {'Authorization': f"Bearer {response.json()['session_token']}"}
+    assert request_token(client, headers=bearer).status_code == 200
+
+
+def test_session_endpoint_rejects_init_data_without_user(client):
+    response = client.post('/api/session', json={'telegram_init_data': init_data_for(None)})
+
+    assert response.status_code == 401
+
+
+def test_init_data_header_is_accepted(client):
+    headers = {'X-Telegram-Init-Data': init_data_for({'id': USER_ID})}
+
+    assert request_token(client, headers=headers).status_code == 200
+
+
+def test_invalid_bearer_is_rejected(client):
+    assert request_token(client, headers={'Authorization': 'Bearer forged.token'}).status_code == 401
+
+
+def test_other_user_is_forbidden(client):
+    headers = {'X-Telegram-Init-Data': init_data_for({'id': USER_ID})}
+
+    assert request_token(client, user_id=USER_ID + 1, headers=headers).status_code == 403
+
+
+def test_user_without_id_is_unauthorized(client):
+    ipn_server.app.dependency_overrides[ipn_server.authenticate_webapp] = lambda: WebAppUser(user_id=None)
+
+    assert request_token(client).status_code == 401
+
+
+def test_user_without_id_is_accepted_in_dev_mode(client, monkeypatch):
+    monkeypatch.setenv('WEBAPP_URL', 'http://localhost:5173')
+
+    assert request_token(client).status_code == 200